@@ -28,6 +28,8 @@ from requests.auth import HTTPBasicAuth
 import time
 
 import Config
+import ReadinessProbe
+import RespCache
 import UtilLogger
 
 # Function sends power action
@@ -47,6 +49,10 @@ import UtilLogger
 #   sendPassOrFail (bool): successful (true), failed (false)
 #   response (object): Http response object
 def SetPowerOnOff(outlet, powerAction):
+    # AC power actions invalidate cached IPMI responses
+    if Config.respCacheEnabled:
+        RespCache.FlushRespCache(reason = 'SetPowerOnOff')
+
     # Send Http Request
     # to send power action to Ac Switch
     sendPassOrFail, response =  SendHttpGetRequest(\
@@ -96,10 +102,9 @@ def AcPowerCycleBlade(interfaceParams):
             "Failed to power up server blade.")
     acCyclePassOrFail &= powerPassOrFail
 
-    # Sleep
-    UtilLogger.verboseLogger.info("AcPowerCycleBlade: " + \
-        "Sleeping for " + str(Config.acPowerOnSleepInSeconds) + " seconds.")
-    time.sleep(Config.acPowerOnSleepInSeconds)
+    # Wait for BMC to boot
+    ReadinessProbe.WaitFor(interfaceParams, 'bmc-ready', \
+        Config.acPowerOnSleepInSeconds, "AcPowerCycleBlade")
 
     return acCyclePassOrFail
 
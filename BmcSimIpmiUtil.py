@@ -0,0 +1,427 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+IpmiUtil stand-in for the local BMC simulator.
+
+BmcSimIpmiUtil.sh runs this module; pointing Config.ipmiUtilLinuxFilePath at
+it ('-bmcsim') sends all IpmiUtil commands of the test scripts to
+BmcSimulator over RMCP+ (one session per invocation, as IpmiUtil does).
+KCS commands (no '-N' interface parameter) go to Config.bmcSimAddress with
+the simulator credentials.
+
+Output is written in the IpmiUtil formats parsed by IpmiUtil.py, SelReader.py
+and the test scripts for these commands:
+    cmd [-m<channel><address><lun>] <bus> <address> <netFn/lun> <cmd> <data>..
+    sensor [-i <sdrId>]
+    sel -u
+    events -f <file>
+    power -u | -d | -c | -r | -s | -b | -e | -f | -h | -p
+    wcs file <file>
+Other IpmiUtil commands are reported as not supported on stderr.
+"""
+
+import logging
+import struct
+import sys
+
+# Project modules.
+import BmcSimulator
+import Config
+import IpmiLanPlus
+import UtilLogger
+
+# IpmiUtil switches that take a value
+valueSwitchList = [ '-F', '-N', '-U', '-P', '-V', '-J', '-T', '-i', '-f' ]
+
+# Bytes per Get SDR partial read when simulator cannot return whole records
+sdrReadChunkSize = 16
+
+# Dictionary of key (power switch): value (int) pairs that define the
+# Chassis Control action for 'power'
+powerActionDict = {
+    '-d' : BmcSimulator.chassisPowerDown,
+    '-u' : BmcSimulator.chassisPowerUp,
+    '-c' : BmcSimulator.chassisPowerCycle,
+    '-r' : BmcSimulator.chassisHardReset,
+    '-s' : BmcSimulator.chassisSoftShutdown
+    }
+
+# Dictionary of key (power switch): value (int list) pairs that define the
+# boot flags (Set System Boot Options parameter 5 data bytes 1 and 2) set
+# before hard reset
+powerBootFlagsDict = {
+    '-b' : [ 0x80, 0x18 ], # BIOS setup
+    '-e' : [ 0xA0, 0x00 ], # EFI boot
+    '-f' : [ 0x80, 0x3C ], # removable media
+    '-h' : [ 0x80, 0x08 ], # hard disk
+    '-p' : [ 0x80, 0x04 ]  # PXE
+    }
+
+# List of (threshold state bit, status) pairs for 'sensor' status
+# (most severe threshold first)
+sensorStatusList = [ (5, 'NonRec-hi'), (2, 'NonRec-lo'), (4, 'Crit-hi'), \
+    (1, 'Crit-lo'), (3, 'Warn-hi'), (0, 'Warn-lo') ]
+
+# Dictionary of key (base unit): value (string) pairs for 'sensor'
+sensorUnitDict = {
+    0x01 : 'C',
+    0x04 : 'V',
+    0x05 : 'A',
+    0x06 : 'W'
+    }
+
+# Function splits IpmiUtil arguments into command, switches and positional
+# arguments ('-m' value is attached to the switch)
+# Outputs:
+#   command (string), switchDict (dict; string: string), positionalList (list)
+def ParseArgs(args):
+
+    command = args[0] if args else ''
+    switchDict = {}
+    positionalList = []
+
+    argIdx = 1
+    while argIdx < len(args):
+        arg = args[argIdx]
+        if arg in valueSwitchList and argIdx + 1 < len(args):
+            switchDict[arg] = args[argIdx + 1]
+            argIdx += 2
+            continue
+        if arg.startswith('-') and len(arg) > 1:
+            switchDict[arg[:2]] = arg[2:]
+        else:
+            positionalList.append(arg)
+        argIdx += 1
+
+    return command, switchDict, positionalList
+
+# Function returns session to the simulator for interface switches
+def GetSession(switchDict):
+
+    cipherSuite = 3 if IpmiLanPlus.IsAesSupported() else 2
+
+    return IpmiLanPlus.LanPlusSession(\
+        switchDict.get(Config.ipmiUtilIpAddressSwitch, Config.bmcSimAddress), \
+        switchDict.get(Config.ipmiUtilUserNameSwitch, Config.bmcSimUserName), \
+        switchDict.get(Config.ipmiUtilPasswordSwitch, Config.bmcSimPassword), \
+        cipherSuite=cipherSuite)
+
+# Function sends request with NetFn/Cmd given as Config hex strings
+# Outputs: same as LanPlusSession.SendRecv
+def SendCmd(session, netFn, cmd, reqData):
+
+    return session.SendRawCmd(int(netFn, 16), int(cmd, 16), bytearray(reqData))
+
+# Function converts signed value of bitCount bits
+def GetSignedValue(value, bitCount):
+
+    if value & (1 << (bitCount - 1)):
+        return value - (1 << bitCount)
+
+    return value
+
+# Function converts raw reading using linear full sensor record factors
+def ConvertReading(recordBytes, rawReading):
+
+    mVal = GetSignedValue(((recordBytes[25] >> 6) & 3) << 8 | recordBytes[24], 10)
+    bVal = GetSignedValue(((recordBytes[27] >> 6) & 3) << 8 | recordBytes[26], 10)
+    rExp = GetSignedValue(recordBytes[29] >> 4, 4)
+    bExp = GetSignedValue(recordBytes[29] & 0x0F, 4)
+
+    return (mVal * rawReading + bVal * (10.0 ** bExp)) * (10.0 ** rExp)
+
+#region Commands
+
+# Function runs 'cmd': raw request to BMC, or bridged request with '-m'
+def RunCmd(session, switchDict, positionalList):
+
+    rawBytes = [ int(rawByte, 16) for rawByte in positionalList ]
+    if len(rawBytes) < 4:
+        sys.stderr.write('ipmiutil cmd: need at least 4 bytes\n')
+        return 1
+
+    if '-m' in switchDict:
+        meParam = switchDict['-m']
+        cmdPassOrFail, ccode, respBytes = session.SendBridgedCmd(\
+            int(meParam[0:2], 16), int(meParam[2:4], 16), \
+            int(meParam[4:6] or '0', 16), rawBytes[2] >> 2, rawBytes[3], \
+            bytearray(rawBytes[4:]))
+    else:
+        cmdPassOrFail, ccode, respBytes = session.SendRawCmd(rawBytes[2] >> 2, \
+            rawBytes[3], bytearray(rawBytes[4:]))
+
+    if not cmdPassOrFail:
+        sys.stderr.write('ipmiutil cmd: ipmi_sendrecv Error, no response\n')
+        return 1
+    if ccode != 0:
+        sys.stdout.write('ipmiutil cmd, ccode %02x\n' % ccode)
+        return 0
+
+    if respBytes:
+        sys.stdout.write('respData[len=%d]: %s\n' % (len(respBytes), \
+            ' '.join([ '%02x' % respByte for respByte in respBytes ])))
+    sys.stdout.write('ipmiutil cmd, completed successfully\n')
+
+    return 0
+
+# Function reads one SDR record, in partial reads if simulator
+# cannot return the whole record
+# Outputs:
+#   readPassOrFail (bool), nextRecordId (int), recordBytes (bytearray)
+def ReadSdrRecord(session, reservationId, recordId):
+
+    cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnStorage, \
+        Config.cmdGetSdr, reservationId + \
+        bytearray(struct.pack('<HBB', recordId, 0, 0xFF)))
+    if cmdPassOrFail and ccode == 0 and len(respBytes) > 2:
+        return True, respBytes[0] | respBytes[1] << 8, respBytes[2:]
+    if not cmdPassOrFail or ccode != BmcSimulator.ccCannotReturnRequestedBytes:
+        return False, 0, None
+
+    recordBytes = bytearray()
+    recordLength = BmcSimulator.sdrHeaderLength
+    nextRecordId = 0
+    while len(recordBytes) < recordLength:
+        cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnStorage, \
+            Config.cmdGetSdr, reservationId + \
+            bytearray(struct.pack('<HBB', recordId, len(recordBytes), \
+            min(sdrReadChunkSize, recordLength - len(recordBytes)))))
+        if not cmdPassOrFail or ccode != 0 or len(respBytes) <= 2:
+            return False, 0, None
+        nextRecordId = respBytes[0] | respBytes[1] << 8
+        recordBytes += respBytes[2:]
+        if len(recordBytes) >= BmcSimulator.sdrHeaderLength:
+            recordLength = BmcSimulator.sdrHeaderLength + recordBytes[4]
+
+    return True, nextRecordId, recordBytes
+
+# Function reads all SDR records
+# Outputs:
+#   readPassOrFail (bool), recordList (list; bytearray)
+def ReadSdrRecords(session):
+
+    recordList = []
+    cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnStorage, \
+        Config.cmdReserveSdrRepository, [])
+    if not cmdPassOrFail or ccode != 0:
+        return False, recordList
+    reservationId = respBytes[0:2]
+
+    recordId = 0
+    while recordId != BmcSimulator.selLastRecordId:
+        readPassOrFail, recordId, recordBytes = ReadSdrRecord(session, \
+            reservationId, recordId)
+        if not readPassOrFail:
+            return False, recordList
+        recordList.append(recordBytes)
+
+    return True, recordList
+
+# Function runs 'sensor': one line per threshold sensor
+# in 'IpmiUtil sensor' format
+def RunSensor(session, switchDict, positionalList):
+
+    readPassOrFail, recordList = ReadSdrRecords(session)
+    if not readPassOrFail:
+        sys.stderr.write('ipmiutil sensor: unable to read SDR repository\n')
+        return 1
+
+    sdrId = switchDict.get('-i')
+    outputLines = [ 'ipmiutil sensor ver 3.01 (BMC simulator)' ]
+    for recordBytes in recordList:
+        recordId = recordBytes[0] | recordBytes[1] << 8
+        if recordBytes[3] != BmcSimulator.sdrRecordTypeFull or \
+            (sdrId is not None and int(sdrId, 16) != recordId):
+            continue
+
+        cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnSensor, \
+            Config.cmdGetSensorReading, [ recordBytes[7] ])
+        if not cmdPassOrFail or ccode != 0:
+            continue
+
+        sensorStatus = 'OK'
+        for stateBit, statusText in sensorStatusList:
+            if respBytes[2] & (1 << stateBit):
+                sensorStatus = statusText
+                break
+        sensorName = str(recordBytes[48:48 + (recordBytes[47] & 0x1F)])
+
+        outputLines.append('%04x SDR Full %02x %02x %02x a %02x snum %02x %-16s ' \
+            '= %02x %s   %.2f %s' % (recordId, recordBytes[3], recordBytes[5], \
+            recordBytes[8], recordBytes[12], recordBytes[7], sensorName, \
+            respBytes[0], sensorStatus, ConvertReading(recordBytes, respBytes[0]), \
+            sensorUnitDict.get(recordBytes[21], '')))
+
+    outputLines.append('ipmiutil sensor, completed successfully')
+    sys.stdout.write('\n'.join(outputLines) + '\n')
+
+    return 0
+
+# Function runs 'sel': interpreted SEL entries in 'IpmiUtil sel' format
+def RunSel(session, switchDict, positionalList):
+
+    outputLines = [ 'ipmiutil sel ver 3.01 (BMC simulator)', \
+        'RecId Date/Time_______ Source_ Evt_Type___ SensNum Evt_detail - ' + \
+        'Trig [Evt_data]' ]
+
+    recordId = BmcSimulator.selFirstRecordId
+    while recordId != BmcSimulator.selLastRecordId:
+        cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnStorage, \
+            Config.cmdGetSelEntry, struct.pack('<HHBB', 0, recordId, 0, 0xFF))
+        if not cmdPassOrFail:
+            sys.stderr.write('ipmiutil sel: ipmi_sendrecv Error, no response\n')
+            return 1
+        if ccode == BmcSimulator.ccNotPresent:
+            break
+        if ccode != 0:
+            sys.stderr.write('ipmiutil sel: ccode %02x\n' % ccode)
+            return 1
+        outputLines.append(BmcSimulator.FormatSelRecord(respBytes[2:]))
+        recordId = respBytes[0] | respBytes[1] << 8
+
+    outputLines.append('ipmiutil sel, completed successfully')
+    sys.stdout.write('\n'.join(outputLines) + '\n')
+
+    return 0
+
+# Function runs 'events -f': interprets raw SEL records in file
+# (one record of hex bytes per line)
+def RunEvents(switchDict, positionalList):
+
+    try:
+        with open(switchDict['-f'], 'r') as recordFile:
+            recordLines = recordFile.read().splitlines()
+    except (KeyError, IOError), e:
+        sys.stderr.write('ipmiutil events: unable to read file: ' + str(e) + '\n')
+        return 1
+
+    outputLines = []
+    for recordLine in recordLines:
+        recordBytes = bytearray([ int(recordByte, 16) for recordByte in \
+            recordLine.split() ])
+        if len(recordBytes) == BmcSimulator.selRecordLength:
+            outputLines.append(BmcSimulator.FormatSelRecord(recordBytes))
+
+    outputLines.append('ipmiutil events, completed successfully')
+    sys.stdout.write('\n'.join(outputLines) + '\n')
+
+    return 0
+
+# Function runs 'power': Chassis Control, after setting boot flags
+# for boot device switches
+def RunPower(session, switchDict, positionalList):
+
+    chassisAction = None
+    for powerSwitch in switchDict:
+        if powerSwitch in powerActionDict:
+            chassisAction = powerActionDict[powerSwitch]
+        elif powerSwitch in powerBootFlagsDict:
+            cmdPassOrFail, ccode, respBytes = SendCmd(session, \
+                Config.netFnChassis, Config.cmdSetSystemBootOptions, \
+                [ 0x05 ] + powerBootFlagsDict[powerSwitch] + [ 0x00, 0x00, 0x00 ])
+            if not cmdPassOrFail or ccode != 0:
+                sys.stderr.write('ipmiutil power: Set System Boot Options ' + \
+                    'failed\n')
+                return 1
+            chassisAction = BmcSimulator.chassisHardReset
+    if chassisAction is None:
+        sys.stderr.write('ipmiutil power: no power action\n')
+        return 1
+
+    cmdPassOrFail, ccode, respBytes = SendCmd(session, Config.netFnChassis, \
+        Config.cmdChassisControl, [ chassisAction ])
+    if not cmdPassOrFail or ccode != 0:
+        sys.stderr.write('ipmiutil power: Chassis Control failed\n')
+        return 1
+    sys.stdout.write('ipmiutil power, completed successfully\n')
+
+    return 0
+
+# Function runs 'wcs file': raw requests from 'cmd:' lines in file
+def RunWcsFile(session, switchDict, positionalList):
+
+    try:
+        with open(positionalList[1], 'r') as wcsFile:
+            scriptLines = wcsFile.read().splitlines()
+    except (IndexError, IOError), e:
+        sys.stderr.write('ipmiutil wcs: unable to read file: ' + str(e) + '\n')
+        return 1
+
+    outputLines = []
+    entryIdx = 0
+    for scriptLine in scriptLines:
+        scriptLine = scriptLine.strip()
+        if not scriptLine.startswith('cmd:'):
+            continue
+        entryIdx += 1
+        outputLines.append('Processing entry ' + str(entryIdx) + ': ' + scriptLine)
+
+        rawBytes = [ int(rawByte, 16) for rawByte in scriptLine[4:].split() ]
+        cmdPassOrFail, ccode, respBytes = session.SendRawCmd(rawBytes[2] >> 2, \
+            rawBytes[3], bytearray(rawBytes[4:]))
+        if cmdPassOrFail:
+            outputLines.append(' '.join([ '%02x' % respByte for respByte in \
+                bytearray([ ccode ]) + respBytes ]))
+        else:
+            outputLines.append('ipmi_sendrecv Error')
+
+    outputLines.append('ipmiutil wcs, completed successfully')
+    sys.stdout.write('\n'.join(outputLines) + '\n')
+
+    return 0
+
+#endregion
+
+# Function runs IpmiUtil command against the simulator
+# Outputs:
+#   exitCode (int): 0 on success
+def main(args):
+
+    # Only IpmiUtil output goes to stdout/stderr
+    nullLogger = logging.getLogger('BmcSimIpmiUtil')
+    nullLogger.addHandler(logging.NullHandler())
+    nullLogger.propagate = False
+    UtilLogger.consoleLogger = nullLogger
+    UtilLogger.summaryLogger = nullLogger
+    UtilLogger.verboseLogger = nullLogger
+
+    command, switchDict, positionalList = ParseArgs(args)
+    if command == 'events':
+        return RunEvents(switchDict, positionalList)
+
+    runFunction = { 'cmd' : RunCmd, 'sensor' : RunSensor, 'sel' : RunSel, \
+        'power' : RunPower, 'wcs' : RunWcsFile }.get(command)
+    if runFunction is None:
+        sys.stderr.write('ipmiutil ' + command + \
+            ': not supported by BMC simulator\n')
+        return 1
+
+    session = GetSession(switchDict)
+    try:
+        return runFunction(session, switchDict, positionalList)
+    finally:
+        session.Close()
+
+if __name__ == '__main__':sys.exit(main(sys.argv[1:]))
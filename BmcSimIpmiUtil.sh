@@ -0,0 +1,3 @@
+#!/bin/sh
+# IpmiUtil stand-in for the local BMC simulator (see BmcSimIpmiUtil.py)
+exec python "$(dirname "$0")/BmcSimIpmiUtil.py" "$@"
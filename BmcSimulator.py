@@ -0,0 +1,1643 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Stateful local BMC simulator.
+
+BmcSimulator serves IPMI over LAN+ (RMCP+) on a UDP port so the test scripts
+and stress tests can run without hardware, e.g. to measure harness throughput
+and scaling. It speaks the same RMCP+ subset as IpmiLanPlus (cipher suites
+0 to 3, RAKP-HMAC-SHA1 / HMAC-SHA1-96 / AES-CBC-128) and keeps BMC state:
+
+  - chassis power state, identify, power restore policy and boot options
+  - SEL with reservation IDs, timestamps and Config.maxNumberOfSels capacity
+    (record IDs roll over to 1; Clear SEL logs a 'Log Cleared' entry)
+  - SDR repository of full threshold sensor records (Config.bmcSimSensorList)
+    with sensor reading, threshold and reading factor commands
+  - FRU inventory (one 256-byte device), DCMI power reading and power limit
+  - OEM (NetFn 0x30/0x32/0x38) set/get commands and Configure Firmware Update
+  - ME bridging through Send Message, with injectable Node Busy responses
+  - cold/warm reset and AC power cycles (optional AC power IP switch emulation)
+    during which the BMC does not respond
+
+Every request is delayed by a configurable per-command latency and at most
+Config.bmcSimMaxConcurrent requests are processed at once. Request counts and
+throughput are logged when the simulator stops.
+
+IpmiUtil output can be served for the simulator by BmcSimIpmiUtil.sh, which
+poses as IpmiUtil (see BmcSimIpmiUtil.py).
+
+Usage:
+    python BmcSimulator.py [-address <ip>] [-port <port>] [-user <name>]
+        [-pwd <password>] [-acswitchport <port>] [-debug]
+"""
+
+import argparse
+import BaseHTTPServer
+import logging
+import os
+import Queue
+import random
+import socket
+import struct
+import threading
+import time
+import urlparse
+
+# Project modules.
+import Config
+import IpmiLanPlus
+import UtilLogger
+
+#region Simulator Constants
+
+# Completion codes
+ccSuccess = 0x00
+ccNakOnWrite = 0x83
+ccNodeBusy = 0xC0
+ccInvalidCmd = 0xC1
+ccOutOfSpace = 0xC4
+ccInvalidReservation = 0xC5
+ccReqDataLenInvalid = 0xC7
+ccParamOutOfRange = 0xC9
+ccCannotReturnRequestedBytes = 0xCA
+ccNotPresent = 0xCB
+ccInvalidDataField = 0xCC
+ccParamNotSupported = 0x80
+
+# RMCP+ Open Session/RAKP status codes
+rakpStatusNoError = 0x00
+rakpStatusInsufficientResources = 0x01
+rakpStatusInvalidSessionId = 0x02
+rakpStatusInvalidAuthAlg = 0x04
+rakpStatusInvalidIntegrityAlg = 0x05
+rakpStatusUnauthorizedName = 0x0D
+rakpStatusInvalidIntegrityCheckValue = 0x0F
+rakpStatusInvalidConfAlg = 0x10
+
+# SEL record constants
+selRecordLength = 16
+selRecordTypeSystemEvent = 0x02
+selFirstRecordId = 0x0000
+selLastRecordId = 0xFFFF
+selGeneratorIdBmc = 0x0020
+selEvmRevision = 0x04
+
+# Sensor type and number of SEL entries logged by the simulator
+sensorTypeEventLog = 0x10
+sensorNumberEventLog = 0x8A
+eventLogOffsetLogCleared = 0x02
+sensorTypePowerUnit = 0x09
+sensorNumberPowerUnit = 0x85
+powerUnitOffsetAcLost = 0x04
+eventTypeSensorSpecific = 0x6F
+
+# Threshold names in Get/Set Sensor Thresholds byte order
+# (bit position in threshold masks and threshold state)
+thresholdNameList = [ 'LowerNonCritical', 'LowerCritical', \
+    'LowerNonRecoverable', 'UpperNonCritical', 'UpperCritical', \
+    'UpperNonRecoverable' ]
+
+# Full sensor record constants
+sdrRecordTypeFull = 0x01
+sdrVersion = 0x51
+sdrHeaderLength = 5
+sdrSensorInit = 0x7F # scanning, events, thresholds, hysteresis and type initialized
+sdrSensorCaps = 0x68 # readable/settable thresholds, auto re-arm
+sdrEntityIdSystemBoard = 0x07
+sdrEventReadingTypeThreshold = 0x01
+
+# FRU constants
+fruSize = 256
+fruBoardAreaOffset = 8
+
+# Intel ME constants
+meIanaBytes = bytearray([ 0x57, 0x01, 0x00 ])
+dcmiGroupExtension = 0xDC
+
+# Chassis Control actions
+chassisPowerDown = 0x00
+chassisPowerUp = 0x01
+chassisPowerCycle = 0x02
+chassisHardReset = 0x03
+chassisSoftShutdown = 0x05
+
+# Power restore policies
+restorePolicyAlwaysOff = 0x00
+restorePolicyPrevious = 0x01
+restorePolicyAlwaysOn = 0x02
+
+# Configure Firmware Update operations and results
+fwUpdateOpStart = 0x01
+fwUpdateOpAbort = 0x02
+fwUpdateOpQuery = 0x03
+fwUpdateResNotStarted = 0x02
+fwUpdateResInProgress = 0x03
+fwUpdateResCompleted = 0x04
+fwUpdateResAborted = 0x05
+
+#endregion
+
+# Function converts hex string NetFn/Cmd pair from Config to ints
+def GetCmdInts(netFn, cmd):
+
+    return int(netFn, 16), int(cmd, 16)
+
+# Function builds IPMI response message for IPMI request message
+# Inputs:
+#   reqMsg (bytearray): request [ rsAddr, netFn/rsLUN, chk, rqAddr,
+#       rqSeq/rqLUN, cmd, data.., chk ]
+#   ccode (int): completion code
+#   respData (bytearray): response data bytes following completion code
+def BuildRespMsg(reqMsg, ccode, respData):
+
+    header = bytearray([ reqMsg[3], \
+        (((reqMsg[1] >> 2) | 1) << 2) | (reqMsg[4] & 0x03) ])
+    body = bytearray([ reqMsg[0], (reqMsg[4] & 0xFC) | (reqMsg[1] & 0x03), \
+        reqMsg[5], ccode ]) + bytearray(respData)
+
+    return header + bytearray([ IpmiLanPlus.Checksum(header) ]) + body + \
+        bytearray([ IpmiLanPlus.Checksum(body) ])
+
+# Function converts SEL record into 'IpmiUtil sel' text line
+#   "<RecId> <Date> <Time> <Source> <Sensor type> #<SensNum> <Event detail>
+#   <Event type> [<Event data>]"
+# Event details are decoded for the events logged by the simulator and
+# threshold events only
+# Inputs:
+#   recordBytes (bytearray): 16-byte SEL record
+def FormatSelRecord(recordBytes):
+
+    recordId = recordBytes[0] | recordBytes[1] << 8
+    timestamp = struct.unpack('<I', bytes(recordBytes[3:7]))[0]
+    timeText = time.strftime('%m/%d/%y %H:%M:%S', time.localtime(timestamp))
+    if recordBytes[2] != selRecordTypeSystemEvent:
+        return '%04x %s OEM %02x [%s]' % (recordId, timeText, recordBytes[2], \
+            ' '.join([ '%02x' % recordByte for recordByte in recordBytes[7:] ]))
+
+    generatorId = recordBytes[7] | recordBytes[8] << 8
+    sensorType = recordBytes[10]
+    sensorNumber = recordBytes[11]
+    eventType = recordBytes[12] & 0x7F
+    eventData = recordBytes[13:16]
+    offset = eventData[0] & 0x0F
+
+    sourceText = 'BMC ' if generatorId == selGeneratorIdBmc else \
+        '%04x' % generatorId
+    sensorTypeText = selSensorTypeDict.get(sensorType, \
+        'Sensor Type %02x' % sensorType)
+    if eventType == sdrEventReadingTypeThreshold:
+        detailText = selThresholdDetailDict.get(offset, 'Offset %02x' % offset)
+    else:
+        detailText = selSensorSpecificDetailDict.get((sensorType, offset), \
+            'Offset %02x' % offset)
+    if recordBytes[12] & 0x80:
+        detailText += ' deasserted'
+
+    return '%04x %s %s %s #%02x %s %02x [%s]' % (recordId, timeText, \
+        sourceText, sensorTypeText, sensorNumber, detailText, \
+        recordBytes[12], ' '.join([ '%02x' % dataByte for dataByte in eventData ]))
+
+# Dictionary of key (sensor type): value (string) pairs used by FormatSelRecord
+selSensorTypeDict = {
+    0x01 : 'Temperature',
+    0x02 : 'Voltage',
+    0x03 : 'Current',
+    0x04 : 'Fan',
+    0x08 : 'Power Supply',
+    0x09 : 'Power Unit',
+    0x0B : 'Other Units',
+    0x0F : 'System Firmware',
+    0x10 : 'Event Log',
+    0x12 : 'System Event',
+    0x1D : 'System Boot',
+    0x28 : 'Management Subsystem Health'
+    }
+
+# Dictionary of key (threshold event offset): value (string) pairs
+selThresholdDetailDict = {
+    0x00 : 'Lo Noncrit going low',
+    0x01 : 'Lo Noncrit going high',
+    0x02 : 'Lo Crit going low',
+    0x03 : 'Lo Crit going high',
+    0x04 : 'Lo NonRec going low',
+    0x05 : 'Lo NonRec going high',
+    0x06 : 'Hi Noncrit going low',
+    0x07 : 'Hi Noncrit going high',
+    0x08 : 'Hi Crit going low',
+    0x09 : 'Hi Crit going high',
+    0x0A : 'Hi NonRec going low',
+    0x0B : 'Hi NonRec going high'
+    }
+
+# Dictionary of key (sensor type, event offset): value (string) pairs
+selSensorSpecificDetailDict = {
+    (0x08, 0x00) : 'Inserted',
+    (0x08, 0x01) : 'Failure detected',
+    (0x09, 0x00) : 'Power Off/Down',
+    (0x09, 0x04) : 'AC Lost',
+    (0x10, 0x02) : 'Log Cleared',
+    (0x10, 0x04) : 'Log Full',
+    (0x12, 0x01) : 'OEM System Boot Event',
+    (0x1D, 0x07) : 'Restart Cause'
+    }
+
+# Class holds one RMCP+ session on the simulated BMC
+# Session IDs are mirrored so that LanPlusSession.WrapPayload/UnwrapPayload
+# build and check BMC-side packets: bmcSessionId is the remote console
+# session ID (put in sent packets) and consoleSessionId is the managed system
+# session ID (expected in received packets)
+class SimSession(IpmiLanPlus.LanPlusSession):
+
+    # Constructor
+    # Inputs:
+    #   address (tuple): remote console (ip, port)
+    #   remoteSessionId (int): remote console session ID (SIDm)
+    #   localSessionId (int): managed system session ID (SIDc)
+    #   algorithms (list; int): [ authentication, integrity, confidentiality ]
+    #   maxPrivilegeLevel (int): requested maximum privilege level
+    def __init__(self, address, remoteSessionId, localSessionId, algorithms, \
+        maxPrivilegeLevel):
+
+        IpmiLanPlus.LanPlusSession.__init__(self, address[0], None, None, \
+            maxPrivilegeLevel)
+
+        self.address = address
+        self.bmcSessionId = remoteSessionId
+        self.consoleSessionId = localSessionId
+        self.authAlg, self.integrityAlg, self.confAlg = algorithms
+
+        # RAKP Variables
+        self.consoleRandom = None
+        self.bmcRandom = None
+        self.nameBytes = None
+        self.sik = None
+
+        return
+
+# Class simulates one BMC
+class BmcSimulator:
+
+    # Constructor
+    # Inputs:
+    #   address (string): IP address to serve RMCP+ on
+    #   port (int): UDP port to serve RMCP+ on
+    #   userName (string): BMC user name
+    #   password (string): BMC password
+    #   acSwitchPort (int): HTTP port of AC power IP switch (0: disabled)
+    def __init__(self, address=Config.bmcSimAddress, port=Config.ipmiPort, \
+        userName=Config.bmcSimUserName, password=Config.bmcSimPassword, \
+        acSwitchPort=Config.bmcSimAcSwitchPort):
+
+        # Server Variables
+        self.address = address
+        self.port = port
+        self.userName = userName
+        self.password = password
+        self.acSwitchPort = acSwitchPort
+        self.sock = None
+        self.acSwitchServer = None
+        self.threadList = []
+        self.requestQueue = Queue.Queue()
+        self.isRunning = False
+
+        # Session Variables
+        self.sessionDict = {} # managed system session ID: SimSession
+        self.sessionLock = threading.Lock()
+        self.bmcGuid = bytearray(os.urandom(16))
+
+        # BMC state; serialized by stateLock
+        self.stateLock = threading.Lock()
+        self.unavailableUntil = 0.0
+        self.acPowerOn = True
+        self.powerOn = True
+        self.lastPowerEvent = 0x00
+        self.restorePolicy = restorePolicyAlwaysOn
+        self.identifyUntil = 0.0
+        self.bootOptionDict = { 0x05 : bytearray(5) } # parameter: data
+        self.selList = [] # SEL records, oldest first
+        self.selNextRecordId = 1
+        self.selReservationId = 0
+        self.selAddTimestamp = 0
+        self.selEraseTimestamp = 0
+        self.selOverflow = False
+        self.selTimeOffset = 0
+        self.sdrList = []
+        self.sdrReservationId = 0
+        self.sdrAddTimestamp = int(time.time())
+        self.sensorDict = {} # sensor number: [ sensor config tuple, thresholds list ]
+        self.fruData = self.BuildFruData()
+        self.powerLimitData = None
+        self.powerLimitActive = False
+        self.oemDataDict = {} # (netFn, cmd): response data
+        self.fwUpdateDict = {} # (component, image type): update start time
+
+        # Statistics Variables
+        self.statsLock = threading.Lock()
+        self.cmdCountDict = {} # (netFn, cmd): [ count, total service time ]
+        self.startTime = 0.0
+        self.inFlightCount = 0
+        self.inFlightPeak = 0
+        self.droppedCount = 0
+
+        self.BuildSdrRepository()
+        self.cmdHandlerDict = self.GetCmdHandlerDict()
+
+        return
+
+    #region Server
+
+    # Function starts serving RMCP+ (and AC power IP switch if enabled)
+    def Start(self):
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.address, self.port))
+        self.sock.settimeout(0.5)
+        self.isRunning = True
+        self.startTime = time.time()
+
+        self.threadList = [ threading.Thread(target=self.ReceiveLoop) ]
+        for workerIdx in range(0, Config.bmcSimMaxConcurrent):
+            self.threadList.append(threading.Thread(target=self.WorkerLoop))
+
+        if self.acSwitchPort:
+            self.acSwitchServer = BaseHTTPServer.HTTPServer(\
+                (self.address, self.acSwitchPort), AcSwitchRequestHandler)
+            self.acSwitchServer.simulator = self
+            self.threadList.append(threading.Thread(\
+                target=self.acSwitchServer.serve_forever))
+
+        for thread in self.threadList:
+            thread.daemon = True
+            thread.start()
+
+        UtilLogger.verboseLogger.info("BmcSimulator.Start: serving RMCP+ on " + \
+            self.address + ":" + str(self.port) + " (" + \
+            str(len(self.sensorDict)) + " sensors, " + \
+            str(Config.bmcSimMaxConcurrent) + " concurrent requests)")
+        if self.acSwitchServer is not None:
+            UtilLogger.verboseLogger.info("BmcSimulator.Start: serving AC " + \
+                "power IP switch on " + self.address + ":" + str(self.acSwitchPort))
+
+        return
+
+    # Function stops serving and logs request statistics
+    def Stop(self):
+
+        self.isRunning = False
+        if self.acSwitchServer is not None:
+            self.acSwitchServer.shutdown()
+            self.acSwitchServer.server_close()
+        for workerIdx in range(0, Config.bmcSimMaxConcurrent):
+            self.requestQueue.put(None)
+        for thread in self.threadList:
+            thread.join(2)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+        self.LogStats()
+
+        return
+
+    # Function receives packets and queues them for the worker threads
+    def ReceiveLoop(self):
+
+        while self.isRunning:
+            try:
+                data, address = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+            self.requestQueue.put((bytearray(data), address))
+
+        return
+
+    # Function processes queued packets
+    # (Config.bmcSimMaxConcurrent worker threads run this loop)
+    def WorkerLoop(self):
+
+        while True:
+            request = self.requestQueue.get()
+            if request is None:
+                break
+            data, address = request
+
+            with self.statsLock:
+                self.inFlightCount += 1
+                self.inFlightPeak = max(self.inFlightPeak, self.inFlightCount)
+            try:
+                respPacket = self.HandlePacket(data, address)
+                if respPacket is not None and self.sock is not None:
+                    self.sock.sendto(bytes(respPacket), address)
+            except Exception, e:
+                UtilLogger.verboseLogger.error("BmcSimulator.WorkerLoop: " + \
+                    "exception occurred while handling packet from " + \
+                    str(address) + ": " + str(e))
+            with self.statsLock:
+                self.inFlightCount -= 1
+
+        return
+
+    # Function returns response packet for received RMCP packet
+    # (None if packet is dropped)
+    def HandlePacket(self, data, address):
+
+        if len(data) < 16 or data[0] != IpmiLanPlus.rmcpHeader[0] or \
+            data[3] != IpmiLanPlus.rmcpHeader[3]:
+            return None
+
+        # BMC is resetting or booting, or AC power is off
+        if not self.IsAvailable():
+            with self.statsLock:
+                self.droppedCount += 1
+            return None
+
+        if data[4] == IpmiLanPlus.authTypeNone:
+            return self.HandlePreSessionMsg(data)
+        if data[4] != IpmiLanPlus.authTypeRmcpPlus:
+            return None
+
+        payloadType = data[5] & 0x3F
+        if payloadType == IpmiLanPlus.payloadTypeOpenSessionReq:
+            return self.HandleOpenSession(data, address)
+        elif payloadType == IpmiLanPlus.payloadTypeRakp1:
+            return self.HandleRakp1(data)
+        elif payloadType == IpmiLanPlus.payloadTypeRakp3:
+            return self.HandleRakp3(data)
+        elif payloadType == IpmiLanPlus.payloadTypeIpmi:
+            return self.HandleSessionMsg(data)
+
+        return None
+
+    # Function returns True if BMC responds to requests
+    def IsAvailable(self):
+
+        return self.acPowerOn and time.time() >= self.unavailableUntil
+
+    # Function logs request statistics
+    def LogStats(self):
+
+        elapsedTime = max(time.time() - self.startTime, 0.001)
+        with self.statsLock:
+            totalCount = sum([ cmdCount[0] for cmdCount in \
+                self.cmdCountDict.values() ])
+            UtilLogger.verboseLogger.info("BmcSimulator.LogStats: " + \
+                str(totalCount) + " requests in %.1f seconds (%.1f requests/s); " % \
+                (elapsedTime, totalCount / elapsedTime) + \
+                "peak concurrent requests: " + str(self.inFlightPeak) + \
+                "; packets dropped while unavailable: " + str(self.droppedCount))
+            for (netFn, cmd), (cmdCount, serviceTime) in \
+                sorted(self.cmdCountDict.iteritems()):
+                UtilLogger.verboseLogger.info("BmcSimulator.LogStats: " + \
+                    "NetFn 0x%02x Cmd 0x%02x: %d requests, %.2f ms average" % \
+                    (netFn, cmd, cmdCount, serviceTime * 1000 / cmdCount))
+
+        return
+
+    #endregion
+
+    #region Session Setup
+
+    # Function builds RMCP+ pre-session response packet
+    def BuildPreSessionPacket(self, payloadType, payload):
+
+        return IpmiLanPlus.rmcpHeader + \
+            bytearray([ IpmiLanPlus.authTypeRmcpPlus, payloadType ]) + \
+            bytearray(8) + bytearray(struct.pack('<H', len(payload))) + payload
+
+    # Function handles IPMI v1.5 pre-session Get Channel Authentication
+    # Capabilities
+    def HandlePreSessionMsg(self, data):
+
+        reqMsg = data[14:14 + data[13]]
+        if len(reqMsg) < 7 or (reqMsg[1] >> 2) != IpmiLanPlus.netFnAppInt or \
+            reqMsg[5] != IpmiLanPlus.cmdGetChannelAuthCapsInt:
+            return None
+
+        respMsg = BuildRespMsg(reqMsg, ccSuccess, self.GetChannelAuthCapsData())
+
+        return IpmiLanPlus.rmcpHeader + \
+            bytearray([ IpmiLanPlus.authTypeNone ]) + bytearray(8) + \
+            bytearray([ len(respMsg) ]) + respMsg
+
+    # Function returns Get Channel Authentication Capabilities response data
+    # (channel 1, IPMI v2.0 extended capabilities, non-null user names)
+    def GetChannelAuthCapsData(self):
+
+        return bytearray([ 0x01, 0x84, 0x04, 0x02, 0x00, 0x00, 0x00, 0x00 ])
+
+    # Function handles RMCP+ Open Session Request
+    def HandleOpenSession(self, data, address):
+
+        payload = data[16:16 + struct.unpack('<H', bytes(data[14:16]))[0]]
+        if len(payload) < 32:
+            return None
+
+        remoteSessionId = struct.unpack('<I', bytes(payload[4:8]))[0]
+        algorithms = [ payload[12] & 0x3F, payload[20] & 0x3F, payload[28] & 0x3F ]
+        maxPrivilegeLevel = payload[1] & 0x0F or \
+            int(Config.ipmiUtilPrivilegeAdminValue)
+
+        status = rakpStatusNoError
+        if algorithms[0] > 1:
+            status = rakpStatusInvalidAuthAlg
+        elif algorithms[1] > 1:
+            status = rakpStatusInvalidIntegrityAlg
+        elif algorithms[2] > 1 or (algorithms[2] and not IpmiLanPlus.IsAesSupported()):
+            status = rakpStatusInvalidConfAlg
+
+        localSessionId = 0
+        if status == rakpStatusNoError:
+            with self.sessionLock:
+                self.RemoveIdleSessions()
+                if len(self.sessionDict) >= Config.bmcSimMaxSessions:
+                    status = rakpStatusInsufficientResources
+                else:
+                    while localSessionId == 0 or localSessionId in self.sessionDict:
+                        localSessionId = struct.unpack('<I', os.urandom(4))[0]
+                    session = SimSession(address, remoteSessionId, \
+                        localSessionId, algorithms, maxPrivilegeLevel)
+                    session.lastUsedTime = time.time()
+                    self.sessionDict[localSessionId] = session
+
+        respPayload = bytearray([ payload[0], status, maxPrivilegeLevel, 0x00 ]) + \
+            payload[4:8] + bytearray(struct.pack('<I', localSessionId))
+        if status == rakpStatusNoError:
+            respPayload += payload[8:32]
+
+        return self.BuildPreSessionPacket(IpmiLanPlus.payloadTypeOpenSessionResp, \
+            respPayload)
+
+    # Function removes sessions idle for longer than Config.bmcSimSessionIdleLimit
+    # (called with sessionLock held)
+    def RemoveIdleSessions(self):
+
+        currentTime = time.time()
+        for sessionId, session in self.sessionDict.items():
+            if currentTime - session.lastUsedTime > Config.bmcSimSessionIdleLimit:
+                del self.sessionDict[sessionId]
+
+        return
+
+    # Function handles RAKP Message 1 and returns RAKP Message 2
+    def HandleRakp1(self, data):
+
+        payload = data[16:16 + struct.unpack('<H', bytes(data[14:16]))[0]]
+        if len(payload) < 28:
+            return None
+
+        localSessionId = struct.unpack('<I', bytes(payload[4:8]))[0]
+        with self.sessionLock:
+            session = self.sessionDict.get(localSessionId)
+        if session is None:
+            return self.BuildPreSessionPacket(IpmiLanPlus.payloadTypeRakp2, \
+                bytearray([ payload[0], rakpStatusInvalidSessionId, 0x00, 0x00 ]) + \
+                bytearray(4))
+
+        userNameBytes = payload[28:28 + payload[27]]
+        sidm = bytearray(struct.pack('<I', session.bmcSessionId))
+        status = rakpStatusNoError
+        if str(userNameBytes) != self.userName:
+            status = rakpStatusUnauthorizedName
+
+        respPayload = bytearray([ payload[0], status, 0x00, 0x00 ]) + sidm
+        if status == rakpStatusNoError:
+            session.consoleRandom = payload[8:24]
+            session.bmcRandom = bytearray(os.urandom(16))
+            session.nameBytes = bytearray([ payload[24], len(userNameBytes) ]) + \
+                userNameBytes
+            respPayload += session.bmcRandom + self.bmcGuid
+            if session.authAlg:
+                respPayload += bytearray(session.Hmac(self.GetKuid(), \
+                    sidm + payload[4:8] + session.consoleRandom + \
+                    session.bmcRandom + self.bmcGuid + session.nameBytes))
+        else:
+            with self.sessionLock:
+                self.sessionDict.pop(localSessionId, None)
+
+        return self.BuildPreSessionPacket(IpmiLanPlus.payloadTypeRakp2, respPayload)
+
+    # Function handles RAKP Message 3 and returns RAKP Message 4
+    # (session is active after RAKP Message 4)
+    def HandleRakp3(self, data):
+
+        payload = data[16:16 + struct.unpack('<H', bytes(data[14:16]))[0]]
+        if len(payload) < 8:
+            return None
+
+        localSessionId = struct.unpack('<I', bytes(payload[4:8]))[0]
+        with self.sessionLock:
+            session = self.sessionDict.get(localSessionId)
+        if session is None or session.bmcRandom is None:
+            return self.BuildPreSessionPacket(IpmiLanPlus.payloadTypeRakp4, \
+                bytearray([ payload[0], rakpStatusInvalidSessionId, 0x00, 0x00 ]) + \
+                bytearray(4))
+
+        sidm = bytearray(struct.pack('<I', session.bmcSessionId))
+        status = payload[1]
+        if status == rakpStatusNoError and session.authAlg:
+            kuid = self.GetKuid()
+            expectedAuthCode = session.Hmac(kuid, session.bmcRandom + sidm + \
+                session.nameBytes)
+            if expectedAuthCode != bytes(payload[8:]):
+                status = rakpStatusInvalidIntegrityCheckValue
+            else:
+                session.sik = session.Hmac(kuid, session.consoleRandom + \
+                    session.bmcRandom + session.nameBytes)
+                session.k1 = session.Hmac(session.sik, '\x01' * 20)
+                session.k2 = session.Hmac(session.sik, '\x02' * 20)
+
+        respPayload = bytearray([ payload[0], status, 0x00, 0x00 ]) + sidm
+        if status == rakpStatusNoError:
+            if session.authAlg:
+                respPayload += bytearray(session.Hmac(session.sik, \
+                    session.consoleRandom + payload[4:8] + self.bmcGuid)[:12])
+            session.isOpen = True
+            session.lastUsedTime = time.time()
+        else:
+            with self.sessionLock:
+                self.sessionDict.pop(localSessionId, None)
+
+        return self.BuildPreSessionPacket(IpmiLanPlus.payloadTypeRakp4, respPayload)
+
+    # Function returns user key (password padded to 20 bytes)
+    def GetKuid(self):
+
+        return bytes(bytearray(self.password)[:20].ljust(20, '\x00'))
+
+    #endregion
+
+    #region Request Handling
+
+    # Function handles IPMI message in active session
+    def HandleSessionMsg(self, data):
+
+        localSessionId = struct.unpack('<I', bytes(data[6:10]))[0]
+        with self.sessionLock:
+            session = self.sessionDict.get(localSessionId)
+        if session is None or not session.isOpen:
+            return None
+
+        reqMsg = session.UnwrapPayload(data)
+        if reqMsg is None or len(reqMsg) < 7:
+            return None
+        session.lastUsedTime = time.time()
+
+        startTime = time.time()
+        netFn = reqMsg[1] >> 2
+        cmd = reqMsg[5]
+        reqData = reqMsg[6:-1]
+
+        # Session commands
+        if netFn == IpmiLanPlus.netFnAppInt and \
+            cmd == IpmiLanPlus.cmdSetSessionPrivilegeLevelInt:
+            ccode, respData = ccSuccess, bytearray([ \
+                reqData[0] if reqData and reqData[0] else session.privilegeLevel ])
+        elif netFn == IpmiLanPlus.netFnAppInt and \
+            cmd == IpmiLanPlus.cmdCloseSessionInt:
+            with self.sessionLock:
+                self.sessionDict.pop(localSessionId, None)
+            ccode, respData = ccSuccess, bytearray()
+        else:
+            time.sleep(Config.bmcSimLatencyDict.get(\
+                (('%02X' % netFn), ('%02X' % cmd)), Config.bmcSimDefaultLatency))
+            ccode, respData = self.HandleCmd(netFn, cmd, reqData)
+
+        with self.statsLock:
+            cmdCount = self.cmdCountDict.setdefault((netFn, cmd), [ 0, 0.0 ])
+            cmdCount[0] += 1
+            cmdCount[1] += time.time() - startTime
+
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info("BmcSimulator.HandleSessionMsg: " + \
+                "NetFn 0x%02x Cmd 0x%02x Request: %s Completion Code: 0x%02x " \
+                "Response: %s" % (netFn, cmd, \
+                ' '.join([ '%02x' % reqByte for reqByte in reqData ]), ccode, \
+                ' '.join([ '%02x' % respByte for respByte in respData ])))
+
+        with session.lock:
+            return session.WrapPayload(BuildRespMsg(reqMsg, ccode, respData))
+
+    # Function returns dictionary of key (netFn, cmd): value (function) pairs
+    # that define the handler of each simulated command
+    def GetCmdHandlerDict(self):
+
+        handlerList = [
+            (Config.netFnApp, Config.cmdGetDeviceId, self.GetDeviceId),
+            (Config.netFnApp, Config.cmdColdReset, self.ColdReset),
+            (Config.netFnApp, Config.cmdWarmReset, self.ColdReset),
+            (Config.netFnApp, Config.cmdGetSystemGuid, self.GetSystemGuid),
+            (Config.netFnApp, Config.cmdGetChannelAuthenticationCapabilities, \
+                self.GetChannelAuthCaps),
+            (Config.netFnChassis, Config.cmdGetChassisStatus, self.GetChassisStatus),
+            (Config.netFnChassis, Config.cmdChassisControl, self.ChassisControl),
+            (Config.netFnChassis, Config.cmdChassisIdentify, self.ChassisIdentify),
+            (Config.netFnChassis, Config.cmdSetPowerRestorePolicy, \
+                self.SetPowerRestorePolicy),
+            (Config.netFnChassis, Config.cmdSetPowerCycleInterval, self.NoData),
+            (Config.netFnChassis, Config.cmdSetSystemBootOptions, \
+                self.SetSystemBootOptions),
+            (Config.netFnChassis, Config.cmdGetSystemBootOptions, \
+                self.GetSystemBootOptions),
+            (Config.netFnStorage, Config.cmdGetSelInfo, self.GetSelInfo),
+            (Config.netFnStorage, Config.cmdReserveSel, self.ReserveSel),
+            (Config.netFnStorage, Config.cmdGetSelEntry, self.GetSelEntry),
+            (Config.netFnStorage, Config.cmdAddSelEntry, self.AddSelEntry),
+            (Config.netFnStorage, Config.cmdClearSel, self.ClearSel),
+            (Config.netFnStorage, Config.cmdGetSelTime, self.GetSelTime),
+            (Config.netFnStorage, Config.cmdSetSelTime, self.SetSelTime),
+            (Config.netFnStorage, Config.cmdGetSdrRepositoryInfo, \
+                self.GetSdrRepositoryInfo),
+            (Config.netFnStorage, Config.cmdReserveSdrRepository, \
+                self.ReserveSdrRepository),
+            (Config.netFnStorage, Config.cmdGetSdr, self.GetSdr),
+            (Config.netFnStorage, '10', self.GetFruInventoryAreaInfo),
+            (Config.netFnStorage, Config.cmdReadFruData, self.ReadFruData),
+            (Config.netFnStorage, Config.cmdWriteFruData, self.WriteFruData),
+            (Config.netFnSensor, Config.cmdGetSensorReading, self.GetSensorReading),
+            (Config.netFnSensor, Config.cmdGetSensorThresholds, \
+                self.GetSensorThresholds),
+            (Config.netFnSensor, Config.cmdSetSensorThresholds, \
+                self.SetSensorThresholds),
+            (Config.netFnSensor, Config.cmdGetSensorType, self.GetSensorType),
+            (Config.netFnSensor, Config.cmdGetSensorReadingFactors, \
+                self.GetSensorReadingFactors),
+            (Config.netFnDcmi, Config.cmdGetPowerReading, self.GetPowerReading),
+            (Config.netFnDcmi, Config.cmdGetPowerLimit, self.GetPowerLimit),
+            (Config.netFnDcmi, Config.cmdSetPowerLimit, self.SetPowerLimit),
+            (Config.netFnDcmi, Config.cmdActivatePowerLimit, \
+                self.ActivatePowerLimit),
+            (Config.netFnOem38, Config.cmdConfigureFirmwareUpdate, \
+                self.ConfigureFirmwareUpdate)
+            ]
+
+        return dict([ (GetCmdInts(netFn, cmd), handler) \
+            for netFn, cmd, handler in handlerList ])
+
+    # Function returns completion code and response data for request
+    # Inputs:
+    #   netFn (int), cmd (int): request NetFn and Cmd
+    #   reqData (bytearray): request data bytes
+    # Outputs:
+    #   ccode (int): completion code
+    #   respData (bytearray): response data bytes following completion code
+    def HandleCmd(self, netFn, cmd, reqData):
+
+        # Bridged requests do not access BMC state
+        if (netFn, cmd) == (IpmiLanPlus.netFnAppInt, IpmiLanPlus.cmdSendMessageInt):
+            return self.SendMessage(reqData)
+
+        handler = self.cmdHandlerDict.get((netFn, cmd))
+        if handler is not None:
+            with self.stateLock:
+                return handler(reqData)
+
+        # OEM commands
+        if netFn in oemNetFnList:
+            with self.stateLock:
+                return self.OemCmd(netFn, cmd, reqData)
+
+        return ccInvalidCmd, bytearray()
+
+    # Function handles commands that take no action
+    def NoData(self, reqData):
+
+        return ccSuccess, bytearray()
+
+    #endregion
+
+    #region App Commands
+
+    # Function handles Get Device ID
+    def GetDeviceId(self, reqData):
+
+        return ccSuccess, bytearray([ 0x20, 0x81, 0x04, 0x10, 0x02, 0xBF, \
+            0x37, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00 ])
+
+    # Function handles Get System GUID
+    def GetSystemGuid(self, reqData):
+
+        return ccSuccess, bytearray(self.bmcGuid)
+
+    # Function handles Get Channel Authentication Capabilities in session
+    def GetChannelAuthCaps(self, reqData):
+
+        return ccSuccess, self.GetChannelAuthCapsData()
+
+    # Function handles Cold Reset and Warm Reset
+    # (BMC stops responding after the response is sent)
+    def ColdReset(self, reqData):
+
+        resetTimer = threading.Timer(0.05, self.ResetBmc, \
+            [ Config.bmcSimResetTime ])
+        resetTimer.daemon = True
+        resetTimer.start()
+
+        return ccSuccess, bytearray()
+
+    # Function resets BMC: sessions and reservations are dropped and
+    # BMC does not respond for resetTime seconds
+    def ResetBmc(self, resetTime):
+
+        with self.sessionLock:
+            self.sessionDict.clear()
+        with self.stateLock:
+            self.unavailableUntil = time.time() + resetTime
+            self.selReservationId = (self.selReservationId % 0xFFFF) + 1
+            self.sdrReservationId = (self.sdrReservationId % 0xFFFF) + 1
+            self.fwUpdateDict.clear()
+
+        UtilLogger.verboseLogger.info("BmcSimulator.ResetBmc: BMC resetting for " + \
+            str(resetTime) + " seconds.")
+
+        return
+
+    #endregion
+
+    #region Chassis Commands
+
+    # Function handles Get Chassis Status
+    def GetChassisStatus(self, reqData):
+
+        identifyState = 0x00
+        if self.identifyUntil is None:
+            identifyState = 0x02 # indefinite on
+        elif time.time() < self.identifyUntil:
+            identifyState = 0x01 # temporary on
+
+        return ccSuccess, bytearray([ (self.restorePolicy << 5) | int(self.powerOn), \
+            self.lastPowerEvent, 0x40 | (identifyState << 4), 0x00 ])
+
+    # Function handles Chassis Control
+    def ChassisControl(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+
+        action = reqData[0] & 0x0F
+        if action in ( chassisPowerDown, chassisSoftShutdown ):
+            self.powerOn = False
+        elif action in ( chassisPowerUp, chassisPowerCycle, chassisHardReset ):
+            self.powerOn = True
+            self.lastPowerEvent = 0x10 # last power on via IPMI command
+        else:
+            return ccInvalidDataField, bytearray()
+
+        return ccSuccess, bytearray()
+
+    # Function handles Chassis Identify
+    def ChassisIdentify(self, reqData):
+
+        interval = reqData[0] if len(reqData) > 0 else 15
+        if len(reqData) > 1 and reqData[1] & 0x01:
+            self.identifyUntil = None
+        else:
+            self.identifyUntil = time.time() + interval
+
+        return ccSuccess, bytearray()
+
+    # Function handles Set Power Restore Policy
+    def SetPowerRestorePolicy(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+        policy = reqData[0] & 0x07
+        if policy <= restorePolicyAlwaysOn:
+            self.restorePolicy = policy
+        elif policy != 0x03: # 0x03: no change
+            return ccInvalidDataField, bytearray()
+
+        return ccSuccess, bytearray([ 0x07 ])
+
+    # Function handles Set System Boot Options
+    def SetSystemBootOptions(self, reqData):
+
+        if len(reqData) < 1:
+            return ccReqDataLenInvalid, bytearray()
+        self.bootOptionDict[reqData[0] & 0x7F] = bytearray(reqData[1:])
+
+        return ccSuccess, bytearray()
+
+    # Function handles Get System Boot Options
+    def GetSystemBootOptions(self, reqData):
+
+        if len(reqData) < 1:
+            return ccReqDataLenInvalid, bytearray()
+        parameter = reqData[0] & 0x7F
+        if parameter not in self.bootOptionDict:
+            return ccParamNotSupported, bytearray()
+
+        return ccSuccess, bytearray([ 0x01, parameter ]) + \
+            self.bootOptionDict[parameter]
+
+    #endregion
+
+    #region SEL Commands
+
+    # Function returns current SEL time
+    def GetSelTimestamp(self):
+
+        return int(time.time()) + self.selTimeOffset
+
+    # Function adds SEL record, assigning record ID and timestamp
+    # (called with stateLock held)
+    # Outputs:
+    #   addPassOrFail (bool): record added (False if SEL is full
+    #       and Config.bmcSimSelCircular is False)
+    #   recordId (int): record ID of added record
+    def AddSelRecord(self, recordBytes):
+
+        if len(self.selList) >= Config.maxNumberOfSels - 1:
+            if not Config.bmcSimSelCircular:
+                self.selOverflow = True
+                return False, 0
+            self.selList.pop(0)
+
+        recordId = self.selNextRecordId
+        self.selNextRecordId += 1
+        if self.selNextRecordId >= Config.maxNumberOfSels:
+            self.selNextRecordId = 1 # record ID rolls over to 1
+
+        timestamp = self.GetSelTimestamp()
+        record = bytearray(recordBytes)
+        record[0:2] = bytearray(struct.pack('<H', recordId))
+        if record[2] < 0xE0: # timestamped record types
+            record[3:7] = bytearray(struct.pack('<I', timestamp))
+        self.selList.append(record)
+        self.selAddTimestamp = timestamp
+
+        return True, recordId
+
+    # Function adds system event SEL record generated by BMC
+    # (called with stateLock held)
+    def AddSystemEvent(self, sensorType, sensorNumber, eventType, eventData):
+
+        recordBytes = bytearray([ 0x00, 0x00, selRecordTypeSystemEvent, \
+            0x00, 0x00, 0x00, 0x00 ]) + \
+            bytearray(struct.pack('<H', selGeneratorIdBmc)) + \
+            bytearray([ selEvmRevision, sensorType, sensorNumber, eventType ]) + \
+            bytearray(eventData)
+
+        return self.AddSelRecord(recordBytes)
+
+    # Function handles Get SEL Info
+    def GetSelInfo(self, reqData):
+
+        freeBytes = min((Config.maxNumberOfSels - 1 - len(self.selList)) * \
+            selRecordLength, 0xFFFF)
+
+        return ccSuccess, bytearray([ 0x51 ]) + \
+            bytearray(struct.pack('<HHII', len(self.selList), freeBytes, \
+            self.selAddTimestamp, self.selEraseTimestamp)) + \
+            bytearray([ 0x02 | (0x80 if self.selOverflow else 0x00) ])
+
+    # Function handles Reserve SEL
+    def ReserveSel(self, reqData):
+
+        self.selReservationId = (self.selReservationId % 0xFFFF) + 1
+
+        return ccSuccess, bytearray(struct.pack('<H', self.selReservationId))
+
+    # Function handles Get SEL Entry
+    def GetSelEntry(self, reqData):
+
+        if len(reqData) != 6:
+            return ccReqDataLenInvalid, bytearray()
+        reservationId, recordId, offset, bytesToRead = \
+            struct.unpack('<HHBB', bytes(reqData))
+        if offset != 0 and reservationId != self.selReservationId:
+            return ccInvalidReservation, bytearray()
+        if not self.selList:
+            return ccNotPresent, bytearray()
+
+        if recordId == selFirstRecordId:
+            recordIdx = 0
+        elif recordId == selLastRecordId:
+            recordIdx = len(self.selList) - 1
+        else:
+            recordIdx = None
+            for selIdx, record in enumerate(self.selList):
+                if record[0] | record[1] << 8 == recordId:
+                    recordIdx = selIdx
+                    break
+            if recordIdx is None:
+                return ccNotPresent, bytearray()
+
+        nextRecordId = selLastRecordId
+        if recordIdx + 1 < len(self.selList):
+            nextRecordId = self.selList[recordIdx + 1][0] | \
+                self.selList[recordIdx + 1][1] << 8
+        if offset >= selRecordLength:
+            return ccParamOutOfRange, bytearray()
+        endOffset = selRecordLength if bytesToRead == 0xFF else \
+            min(offset + bytesToRead, selRecordLength)
+
+        return ccSuccess, bytearray(struct.pack('<H', nextRecordId)) + \
+            self.selList[recordIdx][offset:endOffset]
+
+    # Function handles Add SEL Entry
+    def AddSelEntry(self, reqData):
+
+        if len(reqData) != selRecordLength:
+            return ccReqDataLenInvalid, bytearray()
+        addPassOrFail, recordId = self.AddSelRecord(reqData)
+        if not addPassOrFail:
+            return ccOutOfSpace, bytearray()
+
+        return ccSuccess, bytearray(struct.pack('<H', recordId))
+
+    # Function handles Clear SEL
+    # (erasure completes immediately and is logged as 'Log Cleared' entry)
+    def ClearSel(self, reqData):
+
+        if len(reqData) != 6:
+            return ccReqDataLenInvalid, bytearray()
+        if (reqData[0] | reqData[1] << 8) != self.selReservationId:
+            return ccInvalidReservation, bytearray()
+        if reqData[2:5] != bytearray('CLR') or reqData[5] not in ( 0x00, 0xAA ):
+            return ccInvalidDataField, bytearray()
+
+        if reqData[5] == 0xAA:
+            self.selList = []
+            self.selNextRecordId = 1
+            self.selOverflow = False
+            self.selEraseTimestamp = self.GetSelTimestamp()
+            self.selReservationId = (self.selReservationId % 0xFFFF) + 1
+            self.AddSystemEvent(sensorTypeEventLog, sensorNumberEventLog, \
+                eventTypeSensorSpecific, [ eventLogOffsetLogCleared, 0xFF, 0xFF ])
+
+        return ccSuccess, bytearray([ 0x01 ]) # erasure completed
+
+    # Function handles Get SEL Time
+    def GetSelTime(self, reqData):
+
+        return ccSuccess, bytearray(struct.pack('<I', self.GetSelTimestamp()))
+
+    # Function handles Set SEL Time
+    def SetSelTime(self, reqData):
+
+        if len(reqData) != 4:
+            return ccReqDataLenInvalid, bytearray()
+        self.selTimeOffset = struct.unpack('<I', bytes(reqData))[0] - \
+            int(time.time())
+
+        return ccSuccess, bytearray()
+
+    #endregion
+
+    #region SDR and Sensor Commands
+
+    # Function builds SDR repository of full sensor records
+    # from Config.bmcSimSensorList
+    def BuildSdrRepository(self):
+
+        self.sdrList = []
+        self.sensorDict = {}
+        for recordIdx, sensorConfig in enumerate(Config.bmcSimSensorList):
+            sensorName, sensorNumber, sensorType, baseUnit, mVal, bVal, rExp, \
+                nominalReading, thresholdList = sensorConfig
+
+            # Threshold masks: bit per supported threshold in thresholdNameList
+            # order; assertion events going low for lower and going high for
+            # upper thresholds
+            thresholdMask = 0
+            eventMask = 0
+            for thresholdIdx, threshold in enumerate(thresholdList):
+                if threshold is not None:
+                    thresholdMask |= 1 << thresholdIdx
+                    eventMask |= 1 << (thresholdIdx * 2 + \
+                        (1 if thresholdIdx >= 3 else 0))
+
+            nameBytes = bytearray(sensorName)
+            record = bytearray(48) + nameBytes
+            record[0:2] = bytearray(struct.pack('<H', recordIdx + 1))
+            record[2] = sdrVersion
+            record[3] = sdrRecordTypeFull
+            record[4] = len(record) - sdrHeaderLength
+            record[5] = int(Config.bmcSlaveAddr, 16)
+            record[7] = sensorNumber
+            record[8] = sdrEntityIdSystemBoard
+            record[9] = 0x01
+            record[10] = sdrSensorInit
+            record[11] = sdrSensorCaps
+            record[12] = sensorType
+            record[13] = sdrEventReadingTypeThreshold
+            record[14:16] = bytearray(struct.pack('<H', eventMask))
+            record[16:18] = bytearray(struct.pack('<H', eventMask))
+            record[18] = thresholdMask
+            record[19] = thresholdMask
+            record[21] = baseUnit
+            record[24] = mVal & 0xFF
+            record[25] = ((mVal >> 8) & 0x03) << 6
+            record[26] = bVal & 0xFF
+            record[27] = ((bVal >> 8) & 0x03) << 6
+            record[29] = (rExp & 0x0F) << 4
+            record[30] = 0x01 # nominal reading specified
+            record[31] = nominalReading
+            record[32] = 0xFF
+            record[34] = 0xFF
+            for thresholdIdx, thresholdByteIdx in \
+                enumerate([ 41, 40, 39, 38, 37, 36 ]):
+                record[thresholdByteIdx] = thresholdList[thresholdIdx] or 0
+            record[47] = 0xC0 | len(nameBytes)
+
+            self.sdrList.append(record)
+            self.sensorDict[sensorNumber] = [ sensorConfig, list(thresholdList) ]
+
+        self.sdrAddTimestamp = int(time.time())
+
+        return
+
+    # Function handles Get SDR Repository Info
+    def GetSdrRepositoryInfo(self, reqData):
+
+        return ccSuccess, bytearray([ sdrVersion ]) + \
+            bytearray(struct.pack('<HHII', len(self.sdrList), 0x0000, \
+            self.sdrAddTimestamp, self.sdrAddTimestamp)) + bytearray([ 0x02 ])
+
+    # Function handles Reserve SDR Repository
+    def ReserveSdrRepository(self, reqData):
+
+        self.sdrReservationId = (self.sdrReservationId % 0xFFFF) + 1
+
+        return ccSuccess, bytearray(struct.pack('<H', self.sdrReservationId))
+
+    # Function handles Get SDR (partial reads are supported)
+    def GetSdr(self, reqData):
+
+        if len(reqData) != 6:
+            return ccReqDataLenInvalid, bytearray()
+        reservationId, recordId, offset, bytesToRead = \
+            struct.unpack('<HHBB', bytes(reqData))
+        if offset != 0 and reservationId != self.sdrReservationId:
+            return ccInvalidReservation, bytearray()
+
+        recordIdx = 0 if recordId == 0 else recordId - 1
+        if recordIdx >= len(self.sdrList):
+            return ccNotPresent, bytearray()
+        record = self.sdrList[recordIdx]
+        if offset >= len(record):
+            return ccParamOutOfRange, bytearray()
+
+        if bytesToRead == 0xFF:
+            bytesToRead = len(record) - offset
+        if bytesToRead > Config.bmcSimSdrMaxReadBytes:
+            return ccCannotReturnRequestedBytes, bytearray()
+
+        nextRecordId = recordIdx + 2 if recordIdx + 1 < len(self.sdrList) else \
+            selLastRecordId
+
+        return ccSuccess, bytearray(struct.pack('<H', nextRecordId)) + \
+            record[offset:offset + bytesToRead]
+
+    # Function returns raw reading of sensor, varied by up to
+    # Config.bmcSimSensorNoise around its nominal reading
+    def GetRawReading(self, sensorConfig):
+
+        rawReading = sensorConfig[7] + \
+            random.randint(-Config.bmcSimSensorNoise, Config.bmcSimSensorNoise)
+
+        return max(0, min(0xFF, rawReading))
+
+    # Function handles Get Sensor Reading
+    def GetSensorReading(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] not in self.sensorDict:
+            return ccNotPresent, bytearray()
+        sensorConfig, thresholdList = self.sensorDict[reqData[0]]
+
+        # Threshold comparison status: at or below lower, at or above upper
+        rawReading = self.GetRawReading(sensorConfig)
+        thresholdState = 0x00
+        for thresholdIdx, threshold in enumerate(thresholdList):
+            if threshold is None:
+                continue
+            if (thresholdIdx < 3 and rawReading <= threshold) or \
+                (thresholdIdx >= 3 and rawReading >= threshold):
+                thresholdState |= 1 << thresholdIdx
+
+        return ccSuccess, bytearray([ rawReading, 0xC0, thresholdState, 0x80 ])
+
+    # Function handles Get Sensor Thresholds
+    def GetSensorThresholds(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] not in self.sensorDict:
+            return ccNotPresent, bytearray()
+        thresholdList = self.sensorDict[reqData[0]][1]
+
+        readableMask = 0
+        for thresholdIdx, threshold in enumerate(thresholdList):
+            if threshold is not None:
+                readableMask |= 1 << thresholdIdx
+
+        return ccSuccess, bytearray([ readableMask ]) + \
+            bytearray([ threshold or 0 for threshold in thresholdList ])
+
+    # Function handles Set Sensor Thresholds
+    # (only thresholds supported by the sensor can be set)
+    def SetSensorThresholds(self, reqData):
+
+        if len(reqData) != 8:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] not in self.sensorDict:
+            return ccNotPresent, bytearray()
+        thresholdList = self.sensorDict[reqData[0]][1]
+
+        setMask = reqData[1] & 0x3F
+        for thresholdIdx in range(0, len(thresholdList)):
+            if setMask & (1 << thresholdIdx) and \
+                thresholdList[thresholdIdx] is None:
+                return ccInvalidDataField, bytearray()
+        for thresholdIdx in range(0, len(thresholdList)):
+            if setMask & (1 << thresholdIdx):
+                thresholdList[thresholdIdx] = reqData[2 + thresholdIdx]
+
+        return ccSuccess, bytearray()
+
+    # Function handles Get Sensor Type
+    def GetSensorType(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] not in self.sensorDict:
+            return ccNotPresent, bytearray()
+
+        return ccSuccess, bytearray([ self.sensorDict[reqData[0]][0][2], \
+            sdrEventReadingTypeThreshold ])
+
+    # Function handles Get Sensor Reading Factors (linear sensors)
+    def GetSensorReadingFactors(self, reqData):
+
+        if len(reqData) != 2:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] not in self.sensorDict:
+            return ccNotPresent, bytearray()
+        mVal, bVal, rExp = self.sensorDict[reqData[0]][0][4:7]
+
+        return ccSuccess, bytearray([ 0xFF, mVal & 0xFF, ((mVal >> 8) & 0x03) << 6, \
+            bVal & 0xFF, ((bVal >> 8) & 0x03) << 6, 0x00, (rExp & 0x0F) << 4 ])
+
+    #endregion
+
+    #region FRU Commands
+
+    # Function builds FRU data with common header and board info area
+    def BuildFruData(self):
+
+        boardArea = bytearray([ 0x01, 0x00, 0x00, 0x00, 0x00, 0x00 ])
+        for fieldText in [ 'Microsoft', 'BMC Simulator', 'SIM0000001', \
+            'SIM-BOARD', '' ]:
+            boardArea += bytearray([ 0xC0 | len(fieldText) ]) + bytearray(fieldText)
+        boardArea += bytearray([ 0xC1 ]) # end of fields
+        boardArea += bytearray((8 - (len(boardArea) + 1) % 8) % 8)
+        boardArea[1] = (len(boardArea) + 1) / 8
+        boardArea += bytearray([ IpmiLanPlus.Checksum(boardArea) ])
+
+        header = bytearray([ 0x01, 0x00, 0x00, fruBoardAreaOffset / 8, \
+            0x00, 0x00, 0x00 ])
+        header += bytearray([ IpmiLanPlus.Checksum(header) ])
+
+        fruData = header + boardArea
+
+        return fruData + bytearray(fruSize - len(fruData))
+
+    # Function handles Get FRU Inventory Area Info
+    def GetFruInventoryAreaInfo(self, reqData):
+
+        if len(reqData) != 1:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] != 0:
+            return ccNotPresent, bytearray()
+
+        return ccSuccess, bytearray(struct.pack('<HB', len(self.fruData), 0x00))
+
+    # Function handles Read FRU Data
+    def ReadFruData(self, reqData):
+
+        if len(reqData) != 4:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] != 0:
+            return ccNotPresent, bytearray()
+        offset = reqData[1] | reqData[2] << 8
+        if offset >= len(self.fruData):
+            return ccParamOutOfRange, bytearray()
+        readData = self.fruData[offset:offset + reqData[3]]
+
+        return ccSuccess, bytearray([ len(readData) ]) + readData
+
+    # Function handles Write FRU Data
+    def WriteFruData(self, reqData):
+
+        if len(reqData) < 3:
+            return ccReqDataLenInvalid, bytearray()
+        if reqData[0] != 0:
+            return ccNotPresent, bytearray()
+        offset = reqData[1] | reqData[2] << 8
+        writeData = reqData[3:]
+        if offset + len(writeData) > len(self.fruData):
+            return ccParamOutOfRange, bytearray()
+        self.fruData[offset:offset + len(writeData)] = writeData
+
+        return ccSuccess, bytearray([ len(writeData) ])
+
+    #endregion
+
+    #region DCMI Commands
+
+    # Function returns current power consumption in Watts
+    # ('HSC0 Input Power' sensor if configured)
+    def GetPowerWatts(self):
+
+        if not self.powerOn:
+            return 0
+        for sensorConfig, thresholdList in self.sensorDict.values():
+            if sensorConfig[0] == 'HSC0 Input Power':
+                return sensorConfig[4] * self.GetRawReading(sensorConfig) + \
+                    sensorConfig[5]
+
+        return 100
+
+    # Function handles DCMI Get Power Reading
+    def GetPowerReading(self, reqData):
+
+        if len(reqData) < 1 or reqData[0] != dcmiGroupExtension:
+            return ccInvalidDataField, bytearray()
+        powerWatts = self.GetPowerWatts()
+
+        return ccSuccess, bytearray([ dcmiGroupExtension ]) + \
+            bytearray(struct.pack('<HHHHIIB', powerWatts, powerWatts, \
+            powerWatts, powerWatts, int(time.time()), 1000, 0x40))
+
+    # Function handles DCMI Get Power Limit
+    def GetPowerLimit(self, reqData):
+
+        if len(reqData) < 1 or reqData[0] != dcmiGroupExtension:
+            return ccInvalidDataField, bytearray()
+        if self.powerLimitData is None:
+            return ccParamNotSupported, bytearray() # no power limit set
+
+        return ccSuccess, bytearray([ dcmiGroupExtension ]) + self.powerLimitData
+
+    # Function handles DCMI Set Power Limit
+    def SetPowerLimit(self, reqData):
+
+        if len(reqData) != 15 or reqData[0] != dcmiGroupExtension:
+            return ccInvalidDataField, bytearray()
+        self.powerLimitData = bytearray(reqData[2:]) # one less reserved byte
+
+        return ccSuccess, bytearray([ dcmiGroupExtension ])
+
+    # Function handles DCMI Activate/Deactivate Power Limit
+    def ActivatePowerLimit(self, reqData):
+
+        if len(reqData) < 2 or reqData[0] != dcmiGroupExtension:
+            return ccInvalidDataField, bytearray()
+        self.powerLimitActive = bool(reqData[1] & 0x01)
+
+        return ccSuccess, bytearray([ dcmiGroupExtension ])
+
+    #endregion
+
+    #region OEM Commands
+
+    # Function handles OEM commands: set commands in Config.bmcSimOemSetGetDict
+    # store request data for the matching get command; other commands return
+    # stored data, Config.bmcSimOemRespDict data or zero bytes
+    def OemCmd(self, netFn, cmd, reqData):
+
+        cmdKey = ('%02X' % netFn, '%02X' % cmd)
+        getCmd = Config.bmcSimOemSetGetDict.get(cmdKey)
+        if getCmd is not None:
+            self.oemDataDict[GetCmdInts(cmdKey[0], getCmd)] = bytearray(reqData)
+            return ccSuccess, bytearray()
+
+        respData = self.oemDataDict.get((netFn, cmd))
+        if respData is None and cmdKey in Config.bmcSimOemRespDict:
+            respData = bytearray([ int(respByte, 16) for respByte in \
+                Config.bmcSimOemRespDict[cmdKey] ])
+        if respData is None:
+            respData = bytearray(Config.bmcSimOemDefaultRespLength)
+
+        return ccSuccess, respData
+
+    # Function handles Configure Firmware Update: START_FW_UPDATE starts an
+    # update that completes Config.bmcSimFwUpdateTime seconds later
+    def ConfigureFirmwareUpdate(self, reqData):
+
+        if len(reqData) < 3:
+            return ccReqDataLenInvalid, bytearray()
+        updateKey = (reqData[0], reqData[1])
+        operation = reqData[2]
+
+        if operation == fwUpdateOpStart:
+            self.fwUpdateDict[updateKey] = time.time()
+            return ccSuccess, bytearray([ fwUpdateResInProgress ])
+        elif operation == fwUpdateOpAbort:
+            self.fwUpdateDict.pop(updateKey, None)
+            return ccSuccess, bytearray([ fwUpdateResAborted ])
+        elif operation == fwUpdateOpQuery:
+            if updateKey not in self.fwUpdateDict:
+                return ccSuccess, bytearray([ fwUpdateResNotStarted ])
+            if time.time() - self.fwUpdateDict[updateKey] < Config.bmcSimFwUpdateTime:
+                return ccSuccess, bytearray([ fwUpdateResInProgress ])
+            return ccSuccess, bytearray([ fwUpdateResCompleted ])
+
+        return ccInvalidDataField, bytearray()
+
+    #endregion
+
+    #region ME Bridging
+
+    # Function handles Send Message: requests to the ME on the IPMB channel
+    # are answered by the simulated ME, with the bridged response embedded
+    # in the Send Message response
+    def SendMessage(self, reqData):
+
+        if len(reqData) < 8:
+            return ccReqDataLenInvalid, bytearray()
+        channel = reqData[0] & 0x0F
+        innerMsg = reqData[1:]
+        if channel != int(Config.ipmbChannel, 16) or \
+            innerMsg[0] != int(Config.meSlaveAddr, 16):
+            return ccNakOnWrite, bytearray()
+
+        time.sleep(Config.bmcSimMeLatency)
+        if random.random() < Config.bmcSimMeNodeBusyRate:
+            ccode, respData = ccNodeBusy, bytearray()
+        else:
+            ccode, respData = self.MeCmd(innerMsg[1] >> 2, innerMsg[5], \
+                innerMsg[6:-1])
+
+        return ccSuccess, BuildRespMsg(innerMsg, ccode, respData)
+
+    # Function returns ME completion code and response data
+    def MeCmd(self, netFn, cmd, reqData):
+
+        # Get Device ID
+        if (netFn, cmd) == GetCmdInts(Config.netFnApp, Config.cmdGetDeviceId):
+            return ccSuccess, bytearray([ 0x50, 0x01, 0x04, 0x10, 0x02, 0x21, \
+                0x57, 0x01, 0x00, 0x0B, 0x0B, 0x00, 0x00, 0x00, 0x00 ])
+
+        # Get Sensor Reading
+        if (netFn, cmd) == GetCmdInts(Config.netFnSensor, Config.cmdGetSensorReading):
+            return ccSuccess, bytearray([ 0x5A, 0xC0, 0xC0 ])
+
+        # Intel NM OEM commands: echo Intel IANA
+        if netFn == int(Config.netFnOem2E, 16):
+            if reqData[0:3] != meIanaBytes:
+                return ccInvalidDataField, bytearray()
+            return ccSuccess, meIanaBytes + \
+                bytearray(Config.bmcSimOemDefaultRespLength)
+
+        # DCMI commands: echo group extension
+        if netFn == int(Config.netFnDcmi, 16):
+            if reqData[0:1] != bytearray([ dcmiGroupExtension ]):
+                return ccInvalidDataField, bytearray()
+            return ccSuccess, bytearray([ dcmiGroupExtension ]) + \
+                bytearray(Config.bmcSimOemDefaultRespLength)
+
+        return ccSuccess, bytearray()
+
+    #endregion
+
+    #region AC Power
+
+    # Function sets AC power: BMC stops responding while AC is off and
+    # boots for Config.bmcSimBootTime seconds after AC is restored
+    def SetAcPower(self, acPowerOn):
+
+        with self.sessionLock:
+            self.sessionDict.clear()
+
+        with self.stateLock:
+            if acPowerOn and not self.acPowerOn:
+                self.unavailableUntil = time.time() + Config.bmcSimBootTime
+                if self.restorePolicy == restorePolicyAlwaysOn:
+                    self.powerOn = True
+                elif self.restorePolicy == restorePolicyAlwaysOff:
+                    self.powerOn = False
+                self.lastPowerEvent = 0x01 # AC failed
+                self.fwUpdateDict.clear()
+                self.AddSystemEvent(sensorTypePowerUnit, sensorNumberPowerUnit, \
+                    eventTypeSensorSpecific, [ powerUnitOffsetAcLost, 0xFF, 0xFF ])
+            elif not acPowerOn and self.acPowerOn and \
+                self.restorePolicy != restorePolicyPrevious:
+                self.powerOn = False
+            self.acPowerOn = acPowerOn
+
+        UtilLogger.verboseLogger.info("BmcSimulator.SetAcPower: AC power " + \
+            ("on" if acPowerOn else "off"))
+
+        return
+
+    #endregion
+
+# NetFn (int) of OEM commands handled by BmcSimulator.OemCmd
+oemNetFnList = [ int(netFn, 16) for netFn in \
+    [ Config.netFnOem30, Config.netFnOem32, Config.netFnOem38 ] ]
+
+# Class handles AC power IP switch requests
+# ('/cgi-bin/control.cgi?target=<outlet>&control=<0: off, 1: on, 2: toggle>'
+# as sent by AcPowerIpSwitch.SetPowerOnOff)
+class AcSwitchRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+
+        simulator = self.server.simulator
+        url = urlparse.urlparse(self.path)
+        query = urlparse.parse_qs(url.query)
+        control = query.get('control', [ None ])[0]
+
+        if url.path != '/cgi-bin/control.cgi' or control not in ( '0', '1', '2' ):
+            self.send_error(400)
+            return
+
+        if control == '2':
+            simulator.SetAcPower(not simulator.acPowerOn)
+        else:
+            simulator.SetAcPower(control == '1')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.end_headers()
+        self.wfile.write('OK')
+
+        return
+
+    def log_message(self, format, *args):
+
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info("AcSwitchRequestHandler: " + \
+                (format % args))
+
+        return
+
+# Function runs simulator until interrupted
+def main():
+
+    parser = argparse.ArgumentParser(description='Local BMC simulator ' + \
+        'serving IPMI over LAN+ (RMCP+)')
+    parser.add_argument('-address', default=Config.bmcSimAddress, \
+        help='IP address to serve RMCP+ on')
+    parser.add_argument('-port', type=int, default=Config.ipmiPort, \
+        help='UDP port to serve RMCP+ on (clients use Config.ipmiPort)')
+    parser.add_argument('-user', default=Config.bmcSimUserName, \
+        help='BMC user name')
+    parser.add_argument('-pwd', default=Config.bmcSimPassword, \
+        help='BMC password')
+    parser.add_argument('-acswitchport', type=int, \
+        default=Config.bmcSimAcSwitchPort, \
+        help='HTTP port of simulated AC power IP switch (0: disabled)')
+    parser.add_argument('-debug', action='store_true', \
+        help='Log every request and response')
+    parsedArgs = parser.parse_args()
+
+    # Log to console
+    logging.basicConfig(level=logging.DEBUG, \
+        format='%(asctime)s - %(message)s')
+    UtilLogger.consoleLogger = logging.getLogger('BmcSimulator')
+    UtilLogger.summaryLogger = UtilLogger.consoleLogger
+    UtilLogger.verboseLogger = UtilLogger.consoleLogger
+    Config.debugEn = parsedArgs.debug
+
+    simulator = BmcSimulator(parsedArgs.address, parsedArgs.port, \
+        parsedArgs.user, parsedArgs.pwd, parsedArgs.acswitchport)
+    simulator.Start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    simulator.Stop()
+
+    return
+
+if __name__ == '__main__':main()
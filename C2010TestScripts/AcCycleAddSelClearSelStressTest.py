@@ -37,6 +37,9 @@ import Psu
 import Ssh
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'power', 'sel', 'bmc-reset' ]
+
 # Initialize global variables
 threadLock = threading.Lock()
 testPassOrFail = True
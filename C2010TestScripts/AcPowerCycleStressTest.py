@@ -31,25 +31,49 @@ import AcPowerIpSwitch
 import Config
 import Helper
 import IpmiUtil
+import SelMatcher
+import SelReader
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'power', 'bmc-reset' ]
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
     setupSuccess = False
 
     # Get Sel entries
-    processCmd = ['sel', '-u']
-    for interfaceParam in interfaceParams:
-        processCmd.append(interfaceParam)
-    out, err = IpmiUtil.RunIpmiUtil(processCmd)
-    if err:
-        UtilLogger.verboseLogger.error("AcPowerCycleStressTest.py: " + \
-            "setup SEL entries error: " + str(err))
+    if Config.selCursorEnabled:
+        # Move SEL cursor to last entry; SEL verification
+        # only reads entries added after this point
+        setupSuccess, entryCount = SelReader.CheckpointSel(interfaceParams)
+        if setupSuccess:
+            UtilLogger.verboseLogger.info("AcPowerCycleStressTest.py: " + \
+                "setup SEL entries: " + str(entryCount) + " existing entries.")
+        else:
+            UtilLogger.verboseLogger.error("AcPowerCycleStressTest.py: " + \
+                "setup SEL entries error: unable to read SEL info.")
     else:
-        UtilLogger.verboseLogger.info("AcPowerCycleStressTest.py: " + \
-            "setup SEL entries: \n" + str(out))
-        setupSuccess = True
+        processCmd = ['sel', '-u']
+        for interfaceParam in interfaceParams:
+            processCmd.append(interfaceParam)
+        out, err = IpmiUtil.RunIpmiUtil(processCmd)
+        if err:
+            UtilLogger.verboseLogger.error("AcPowerCycleStressTest.py: " + \
+                "setup SEL entries error: " + str(err))
+        else:
+            UtilLogger.verboseLogger.info("AcPowerCycleStressTest.py: " + \
+                "setup SEL entries: \n" + str(out))
+            setupSuccess = True
+
+    # Compile expected SEL list once; matcher is reused every cycle
+    if SelMatcher.GetSelListMatcher(\
+        Config.acPowerCycleStressTestExpectedSelsXmlFilePath) is None:
+        UtilLogger.verboseLogger.error("AcPowerCycleStressTest.py: " + \
+            "unable to compile expected SEL list " + \
+            Config.acPowerCycleStressTestExpectedSelsXmlFilePath)
+        setupSuccess = False
 
     return setupSuccess
 
@@ -96,6 +120,8 @@ def Execute(interfaceParams):
 
             cyclePassOrFail = True
             cycleStartTime = time.time()
+            if Config.selCursorEnabled:
+                cycleSelMark = SelReader.MarkSelEvents(interfaceParams)
 
             # Reserve Sel
             reservationId = []
@@ -196,6 +222,21 @@ def Execute(interfaceParams):
                     unexpectedSels if unexpectedSels is not None else [ 'Empty' ]) + "\n")
             cyclePassOrFail &= selPassOrFail
 
+            # Log decoded SEL events of this cycle by sensor and event type
+            if Config.selCursorEnabled:
+                readPassOrFail, cycleSelEvents = SelReader.QuerySelEvents(\
+                    interfaceParams, sinceMark=cycleSelMark)
+                cycleSelCounts = {}
+                for selEvent in cycleSelEvents:
+                    countKey = '#%02x - %02x' % (selEvent.sensorNumber, \
+                        selEvent.eventType) if selEvent.sensorNumber is not None \
+                        else 'OEM(%02x)' % selEvent.recordType
+                    cycleSelCounts[countKey] = cycleSelCounts.get(countKey, 0) + 1
+                UtilLogger.verboseLogger.info("AcPowerCycleStressTest.py: " + \
+                    str(len(cycleSelEvents)) + " SEL events this cycle: " + \
+                    ", ".join([ countKey + ": " + str(cycleSelCounts[countKey]) \
+                    for countKey in sorted(cycleSelCounts) ]))
+
             # Get and verify sensor entries
             sensorPassOrFail = IpmiUtil.VerifyThresholdSensors(interfaceParams, \
                 Config.sensorListXmlFile)
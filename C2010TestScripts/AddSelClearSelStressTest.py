@@ -31,6 +31,9 @@ import Helper
 import IpmiUtil
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'sel' ]
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
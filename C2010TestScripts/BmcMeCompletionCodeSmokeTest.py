@@ -28,6 +28,7 @@ import time
 import Config
 import Helper
 import IpmiUtil
+import MeBridge
 import UtilLogger
 
 # Prototype Setup Function
@@ -45,6 +46,9 @@ def Execute(interfaceParams):
     testPassOrFail = True
     respData = None
 
+    # Count ME command latency and Node Busy responses for this run only
+    MeBridge.ResetMeCmdStatistics()
+
     # Send raw bytes for Send Message 
     # (Get Device ID)
     testPassOrFail &= RetryCommand(\
@@ -205,6 +209,9 @@ def Execute(interfaceParams):
         [ '00', '20', 'B8', 'F9', '57', '01', '00', '07', \
         '00', '00', '00', '00', '00', '00', '00', '00' ])
 
+    # Log ME command statistics summary
+    MeBridge.LogMeCmdStatistics(testName)
+
     return testPassOrFail
 
 # Prototype Cleanup Function
@@ -213,27 +220,13 @@ def Cleanup(interfaceParams):
     # Detect and Remove BMC Hang
     return Helper.DetectAndRemoveBmcHang(interfaceParams)
 
-# Function will retry the BMC-ME command
-# as defined in rawBytesList for 5 times
+# Function will send the BMC-ME command
+# as defined in rawBytesList, retrying with backoff
+# while the ME responds Node Busy (0xC0)
 def RetryCommand(cmdName, interfaceParams, rawBytesList):
 
-    # Retry max of 5 times
-    retryMax = 5
-
-    # Loop and check for either 
-    # Success completion code or
-    # Node Busy (0xC0)
-    retryCount = 0
-    sendMsgPassOrFail = False
-    respData = []
-    for retryCount in range(0, retryMax):
-
-        sendMsgPassOrFail, respData = IpmiUtil.SendRawCmd2ME(interfaceParams, \
-            rawBytesList)
-        if sendMsgPassOrFail:
-            break
-        elif respData != 'c0':
-            break
+    sendMsgPassOrFail, respData, retryCount = MeBridge.SendBridgedCmd(\
+        interfaceParams, rawBytesList, cmdName)
     
     # Verify results
     if sendMsgPassOrFail:
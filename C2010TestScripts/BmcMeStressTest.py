@@ -29,6 +29,7 @@ import time
 import Config
 import Helper
 import IpmiUtil
+import MeBridge
 import UtilLogger
 
 # Prototype Setup Function
@@ -54,6 +55,9 @@ def Execute(interfaceParams):
     totalTestTime = startTime + 60 * 60 * \
         Config.bmcMeStressTestTotalTime
     
+    # Count ME command latency and Node Busy responses for this run only
+    MeBridge.ResetMeCmdStatistics()
+
     try:
         if not interfaceParams:
             UtilLogger.consoleLogger.info(\
@@ -166,6 +170,7 @@ def Execute(interfaceParams):
                 str(cyclesPassed) + " Cycles Failed: " + str(cyclesFailed) + \
                 " Total Cycles: " + str(cyclesPassed + cyclesFailed) + \
                 " Test Duration: " + str(datetime.timedelta(seconds=endTime-startTime)))
+        MeBridge.LogMeCmdStatistics(testName)
     except Exception, e:
         UtilLogger.verboseLogger.info("BmcMeStressTest.py: exception occurred - " + \
             str(e))
@@ -179,27 +184,13 @@ def Cleanup(interfaceParams):
     # Detect and Remove BMC Hang
     return Helper.DetectAndRemoveBmcHang(interfaceParams)
 
-# Function will retry the BMC-ME command
-# as defined in rawBytesList for 5 times
+# Function will send the BMC-ME command
+# as defined in rawBytesList, retrying with backoff
+# while the ME responds Node Busy (0xC0)
 def RetryCommand(cmdName, interfaceParams, rawBytesList):
 
-    # Retry max of 5 times
-    retryMax = 5
-
-    # Loop and check for either 
-    # Success completion code or
-    # Node Busy (0xC0)
-    retryCount = 0
-    sendMsgPassOrFail = False
-    respData = []
-    for retryCount in range(0, retryMax):
-
-        sendMsgPassOrFail, respData = IpmiUtil.SendRawCmd2ME(interfaceParams, \
-            rawBytesList)
-        if sendMsgPassOrFail:
-            break
-        elif respData != 'c0':
-            break
+    sendMsgPassOrFail, respData, retryCount = MeBridge.SendBridgedCmd(\
+        interfaceParams, rawBytesList, cmdName)
     
     # Verify results
     if sendMsgPassOrFail:
@@ -29,6 +29,7 @@ import time
 import Config
 import Helper
 import IpmiUtil
+import ReadinessProbe
 import UtilLogger
 
 # Prototype Setup Function
@@ -100,8 +101,9 @@ def Execute(interfaceParams):
                 interfaceParams, Config.netFnChassis,\
                 Config.cmdChassisControl, [ '01' ])
             if cmdPassOrFail:
-                # Sleep for 30 seconds
-                time.sleep(30)
+                # Wait for power on
+                ReadinessProbe.WaitFor(interfaceParams, 'chassis-on', \
+                    Config.concurrentStressTestPowerOnWaitTime, testName)
                 UtilLogger.verboseLogger.info("ChassisControl.PowerUp" + \
                     ": Command passed: " + str(respData))
             else:
@@ -145,65 +147,30 @@ def Execute(interfaceParams):
                     ": Command failed. Completion Code: " + str(respData))
             cyclePassOrFail &= cmdPassOrFail
 
-            # Set Next Boot to BIOS Setup
-            cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
-                interfaceParams, Config.netFnChassis,\
-                Config.cmdSetSystemBootOptions,\
-                [ '05', 'A0', '18', '00', '00', '00' ])
-            if cmdPassOrFail:
-                UtilLogger.verboseLogger.info("SetSystemBootOptions" + \
-                    ": Command passed for set next boot to Bios Setup: " + \
-                    str(respData))
-            else:
-                UtilLogger.verboseLogger.error("SetSystemBootOptions" + \
-                    ": Command failed for set next boot to Bios Setup." + \
-                    " Completion Code: " + str(respData))
-            cyclePassOrFail &= cmdPassOrFail
-
-            # Set Next Boot to EFI
-            cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
-                interfaceParams, Config.netFnChassis,\
-                Config.cmdSetSystemBootOptions,\
-                [ '05', 'A0', '00', '00', '00', '00' ])
-            if cmdPassOrFail:
-                UtilLogger.verboseLogger.info("SetSystemBootOptions" + \
-                    ": Command passed for set next boot to EFI: " + \
-                    str(respData))
-            else:
-                UtilLogger.verboseLogger.error("SetSystemBootOptions" + \
-                    ": Command failed for set next boot to EFI." + \
-                    " Completion Code: " + str(respData))
-            cyclePassOrFail &= cmdPassOrFail
-
-            # Set Next Boot to PXE
-            cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
-                interfaceParams, Config.netFnChassis,\
-                Config.cmdSetSystemBootOptions,\
-                [ '05', 'A0', '04', '00', '00', '00' ])
-            if cmdPassOrFail:
-                UtilLogger.verboseLogger.info("SetSystemBootOptions" + \
-                    ": Command passed for set next boot to PXE: " + \
-                    str(respData))
-            else:
-                UtilLogger.verboseLogger.error("SetSystemBootOptions" + \
-                    ": Command failed for set next boot to PXE." + \
-                    " Completion Code: " + str(respData))
-            cyclePassOrFail &= cmdPassOrFail
-            
-            # Set Next Boot to Hard Disk
-            cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
-                interfaceParams, Config.netFnChassis,\
-                Config.cmdSetSystemBootOptions,\
-                [ '05', 'A0', '08', '00', '00', '00' ])
-            if cmdPassOrFail:
-                UtilLogger.verboseLogger.info("SetSystemBootOptions" + \
-                    ": Command passed for set next boot to Hard Disk: " + \
-                    str(respData))
-            else:
-                UtilLogger.verboseLogger.error("SetSystemBootOptions" + \
-                    ": Command failed for set next boot to Hard Disk." + \
-                    " Completion Code: " + str(respData))
-            cyclePassOrFail &= cmdPassOrFail
+            # Set Next Boot to BIOS Setup, EFI, PXE and Hard Disk
+            # (sent as a single IpmiUtil batch)
+            bootDeviceList = [ ('18', 'Bios Setup'), ('00', 'EFI'), \
+                ('04', 'PXE'), ('08', 'Hard Disk') ]
+            cmdList = []
+            for bootDevice, bootName in bootDeviceList:
+                cmdList.append((Config.netFnChassis, \
+                    Config.cmdSetSystemBootOptions, \
+                    [ '05', 'A0', bootDevice, '00', '00', '00' ]))
+            batchPassOrFail, respList = IpmiUtil.SendRawCmdBatch(\
+                interfaceParams, cmdList)
+            cyclePassOrFail &= batchPassOrFail
+            for idx in range(0, len(bootDeviceList)):
+                bootName = bootDeviceList[idx][1]
+                cmdPassOrFail, respData = respList[idx]
+                if cmdPassOrFail:
+                    UtilLogger.verboseLogger.info("SetSystemBootOptions" + \
+                        ": Command passed for set next boot to " + \
+                        bootName + ": " + str(respData))
+                else:
+                    UtilLogger.verboseLogger.error("SetSystemBootOptions" + \
+                        ": Command failed for set next boot to " + \
+                        bootName + ". Completion Code: " + str(respData))
+                cyclePassOrFail &= cmdPassOrFail
 
             # Get Sel Entry
             cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
@@ -239,14 +206,22 @@ def Execute(interfaceParams):
             cyclePassOrFail &= cpuPassOrFail
 
             # Get Memory Info
+            # (all dimm indexes sent as a single IpmiUtil batch)
             cmdPassOrFail = True
+            cmdList = []
             for idx in range(0, 25):
                 # Set rawByte to memory index
                 dimmIdx = hex(idx).lstrip('0x')
                 if idx == 0:
                     dimmIdx = '0'
-                dimmPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, \
-                    Config.netFnOem30, Config.cmdGetMemoryInfo, [ dimmIdx ])
+                cmdList.append((Config.netFnOem30, \
+                    Config.cmdGetMemoryInfo, [ dimmIdx ]))
+            batchPassOrFail, respList = IpmiUtil.SendRawCmdBatch(\
+                interfaceParams, cmdList)
+            cyclePassOrFail &= batchPassOrFail
+            for idx in range(0, 25):
+                dimmIdx = cmdList[idx][2][0]
+                dimmPassOrFail, respData = respList[idx]
                 if dimmPassOrFail:
                     UtilLogger.verboseLogger.info("GetMemoryInfo" + \
                         ": Command passed for dimm 0x"\
@@ -256,7 +231,7 @@ def Execute(interfaceParams):
                         ": Command failed for dimm 0x" + dimmIdx + \
                         ". Completion Code: " + str(respData))
                 cmdPassOrFail &= dimmPassOrFail
-            cyclePassOrFail &= dimmPassOrFail
+            cyclePassOrFail &= cmdPassOrFail
 
             # Get Pcie Info
             for idx in range(0, 22):
@@ -29,25 +29,40 @@ import time
 import Config
 import Helper
 import IpmiUtil
+import SelReader
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'power' ]
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
     setupSuccess = False
 
     # Get Sel entries
-    processCmd = ['sel', '-u']
-    for interfaceParam in interfaceParams:
-        processCmd.append(interfaceParam)
-    out, err = IpmiUtil.RunIpmiUtil(processCmd)
-    if err:
-        UtilLogger.verboseLogger.error("DcPowerCycleStressTest.py: " + \
-            "setup SEL entries error: " + str(err))
+    if Config.selCursorEnabled:
+        # Move SEL cursor to last entry; SEL verification
+        # only reads entries added after this point
+        setupSuccess, entryCount = SelReader.CheckpointSel(interfaceParams)
+        if setupSuccess:
+            UtilLogger.verboseLogger.info("DcPowerCycleStressTest.py: " + \
+                "setup SEL entries: " + str(entryCount) + " existing entries.")
+        else:
+            UtilLogger.verboseLogger.error("DcPowerCycleStressTest.py: " + \
+                "setup SEL entries error: unable to read SEL info.")
     else:
-        UtilLogger.verboseLogger.info("DcPowerCycleStressTest.py: " + \
-            "setup SEL entries: \n" + str(out))
-        setupSuccess = True
+        processCmd = ['sel', '-u']
+        for interfaceParam in interfaceParams:
+            processCmd.append(interfaceParam)
+        out, err = IpmiUtil.RunIpmiUtil(processCmd)
+        if err:
+            UtilLogger.verboseLogger.error("DcPowerCycleStressTest.py: " + \
+                "setup SEL entries error: " + str(err))
+        else:
+            UtilLogger.verboseLogger.info("DcPowerCycleStressTest.py: " + \
+                "setup SEL entries: \n" + str(out))
+            setupSuccess = True
 
     return setupSuccess
 
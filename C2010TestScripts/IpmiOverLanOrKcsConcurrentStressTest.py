@@ -40,6 +40,66 @@ testPassOrFail = True
 threads = []
 threadsStats = [] # statistics for each ipmi thread
 
+# Commands run by each ipmi thread per test cycle:
+# (name, netFn, cmd, rawBytesList)
+cycleCmdList = [
+    ("GetDeviceId", Config.netFnApp, Config.cmdGetDeviceId, []),
+    ("GetSdr", Config.netFnStorage, Config.cmdGetSdr, \
+        [ '00', '00', '00', '00', '00', 'FF' ]),
+    ("ReadFruData", Config.netFnStorage, Config.cmdReadFruData, \
+        [ '00', '00', '00', '08' ]),
+    ("GetPowerReading", Config.netFnDcmi, Config.cmdGetPowerReading, \
+        [ 'DC', '01', '01', '00' ]),
+    ("SetSystemBootOptions.BiosSetup", Config.netFnChassis, \
+        Config.cmdSetSystemBootOptions, [ '05', 'A0', '18', '00', '00', '00' ]),
+    ("SetSystemBootOptions.EFI", Config.netFnChassis, \
+        Config.cmdSetSystemBootOptions, [ '05', 'A0', '00', '00', '00', '00' ]),
+    ("SetSystemBootOptions.PXE", Config.netFnChassis, \
+        Config.cmdSetSystemBootOptions, [ '05', 'A0', '04', '00', '00', '00' ]),
+    ("SetSystemBootOptions.HDD", Config.netFnChassis, \
+        Config.cmdSetSystemBootOptions, [ '05', 'A0', '08', '00', '00', '00' ]),
+    ("GetSelEntry", Config.netFnStorage, Config.cmdGetSelEntry, \
+        [ '00', '00', '00', '00', '00', 'FF' ]) ] + \
+    [ ("GetProcessorInfo", Config.netFnOem30, Config.cmdGetProcessorInfo, \
+        [ '%x' % idx ]) for idx in range(0, 2) ] + \
+    [ ("GetMemoryInfo", Config.netFnOem30, Config.cmdGetMemoryInfo, \
+        [ '%x' % idx ]) for idx in range(0, 25) ] + \
+    [ ("GetPcieInfo", Config.netFnOem30, Config.cmdGetPcieInfo, \
+        [ '%x' % idx ]) for idx in range(0, 22) ]
+
+# Send Message requests run by each ipmi thread per test cycle:
+# (name, rawBytesList)
+cycleMeCmdList = [
+    ("Send Message (Get CPU and Memory Temperature)", \
+        [ '00', '20', 'B8', '4B', '57', '01', '00', '03', \
+        'FF', 'FF', 'FF', 'FF', '00', '00', '00', '00' ]),
+    ("Send Message (Set NM Power Draw Range)", \
+        [ '00', '20', 'B8', 'CB', '57', '01', '00', '03', \
+        '00', '00', 'C8', '00' ]),
+    ("Send Message (Set Intel NM Parameter)", \
+        [ '00', '20', 'B8', 'F9', '57', '01', '00', '07', \
+        '00', '00', '00', '00', '01', '00', '00', '00' ]),
+    ("Send Message (Set NM Power Draw Range)", \
+        [ '00', '20', 'B8', 'CB', '57', '01', '00', '03', \
+        '00', '00', 'FF', '7F' ]),
+    ("Send Message (Set Intel NM Parameter)", \
+        [ '00', '20', 'B8', 'F9', '57', '01', '00', '07', \
+        '00', '00', '00', '00', '00', '00', '00', '00' ]) ]
+
+# Reset Function (called by ModuleRegistry before every iteration)
+def Reset():
+
+    # Declare Module-Scope variables
+    global testPassOrFail
+    global threads
+    global threadsStats
+
+    testPassOrFail = True
+    threads = []
+    threadsStats = []
+
+    return
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
@@ -115,6 +175,21 @@ def Execute(interfaceParams):
         if threadCount < 1:
             threadCount = 1
 
+        # Native LAN+ transport: drive all ipmi threads' commands from
+        # this thread over the session pool instead of one thread each
+        if interfaceParams and \
+            Config.ipmiTransport == Config.ipmiTransportLanPlus:
+            for threadIdx in range(0, threadCount):
+                threadsStats.append(IpmiThreadStats(threadIdx))
+            UtilLogger.verboseLogger.info("IpmiOverLanOrKcsConcurrentStressTest.py: " + \
+                "running " + str(threadCount) + " ipmi threads over " + \
+                str(Config.lanPlusPipelineSessionCount) + " LAN+ sessions " + \
+                "(max in flight: " + str(Config.lanPlusPipelineMaxInFlight) + ")")
+            runIpmiPipelineTest(threadDuration, interfaceParams)
+            for threadStats in threadsStats:
+                LogIpmiThreadStatistics(threadStats)
+            return testPassOrFail
+
         for threadIdx in range(0, threadCount):
 
             # Create new threads
@@ -586,4 +661,69 @@ def runIpmiTest(threadIdx, duration, interfaceParams):
     threadsStats[threadIdx] = threadStats
     threadLock.release()
 
-    return
\ No newline at end of file
+    return
+
+# Function will run Ipmi over LAN+ commands of all ipmi threads
+# as pipelined batches (one batch per test cycle)
+def runIpmiPipelineTest(duration, interfaceParams):
+
+    # Declare Module-Scope variables
+    global testPassOrFail
+    global threadsStats
+
+    # One copy of the cycle commands per ipmi thread
+    batchCmdList = []
+    batchStatsList = []
+    for threadStats in threadsStats:
+        for cmdName, netFn, cmd, rawBytesList in cycleCmdList:
+            batchCmdList.append((netFn, cmd, rawBytesList))
+            batchStatsList.append((threadStats, cmdName))
+
+    # run Ipmi over LAN+ test
+    startTime = time.time()
+    totalTestTime = startTime + duration
+
+    while time.time() < totalTestTime:
+
+        batchPassOrFail, respList = IpmiUtil.SendRawCmdBatch(\
+            interfaceParams, batchCmdList)
+        for (threadStats, cmdName), (cmdPassOrFail, respData) in \
+            zip(batchStatsList, respList):
+            if cmdPassOrFail:
+                UtilLogger.verboseLogger.info(cmdName + \
+                    " (threadId " + str(threadStats.threadId) + ")" + \
+                    ": Command passed: " + str(respData))
+                threadStats.commandsPassed += 1
+            else:
+                UtilLogger.verboseLogger.error(cmdName + \
+                    " (threadId " + str(threadStats.threadId) + ")" + \
+                    ": Command failed. Completion Code: " + str(respData))
+                threadStats.UpdateFailureStats(cmdName)
+            threadStats.threadPassOrFail &= cmdPassOrFail
+
+        # Get Nic Info and Send Message requests are not pipelined
+        for threadStats in threadsStats:
+            threadStats.threadPassOrFail &= \
+                IpmiUtil.VerifyGetNicInfo(interfaceParams)
+            for cmdName, rawBytesList in cycleMeCmdList:
+                cmdPassOrFail, respData = IpmiUtil.SendRawCmd2ME(\
+                    interfaceParams, rawBytesList)
+                if cmdPassOrFail:
+                    UtilLogger.verboseLogger.info(cmdName + \
+                        " (threadId " + str(threadStats.threadId) + ")" + \
+                        ": Command passed: " + str(respData))
+                    threadStats.commandsPassed += 1
+                else:
+                    UtilLogger.verboseLogger.error(cmdName + \
+                        " (threadId " + str(threadStats.threadId) + ")" + \
+                        ": Command failed. Completion Code: " + str(respData))
+                    threadStats.UpdateFailureStats(cmdName)
+                threadStats.threadPassOrFail &= cmdPassOrFail
+
+    # Calculate and update thread duration
+    threadDuration = datetime.timedelta(seconds=time.time() - startTime)
+    for threadStats in threadsStats:
+        threadStats.threadDuration = threadDuration
+        testPassOrFail &= threadStats.threadPassOrFail
+
+    return
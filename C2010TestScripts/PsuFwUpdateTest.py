@@ -28,6 +28,9 @@ import IpmiUtil
 import Psu
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'fw' ]
+
 # Module-scope variables
 currFwImageA = Psu.PsuFwInfo()
 currFwImageB = Psu.PsuFwInfo()
@@ -66,6 +66,15 @@ sensorList = []  # List containing information about each sensor to monitor.
                  # nominalValue and tolerance are floats.
 
 
+# Reset function (called by ModuleRegistry before every iteration).
+def Reset():
+
+    # Declare global (module-scope) variables.
+    global sensorList
+
+    sensorList = []
+
+
 # Setup function.
 def Setup(interfaceParams):
 
@@ -85,17 +94,24 @@ def Setup(interfaceParams):
                                        "failed to parse sensor list XML file.")
         return False
 
+    # Get sensor IDs for all sensors with one sensor listing.
+    gotSnapshotSuccess, sensorDict = IpmiUtil.GetIpmiUtilSensorSnapshot(interfaceParams)
+    if (not gotSnapshotSuccess):
+        UtilLogger.verboseLogger.error("SensorReadingStressTest.py - Setup(): " + \
+                                   "Failed to get sensor listing.")
+        return False
+
     # Store info regarding all sensors to be monitored in sensorList.
     for sensorEntry in xmlParserObj.root:
         sensorName = sensorEntry.attrib["name"]
         nominalValue = sensorEntry.attrib["nominal"]
         tolerance = sensorEntry.attrib["tolerance"]
-        gotSensorIdSuccess, sensorId = IpmiUtil.GetIpmiUtilSensorId(interfaceParams, sensorName)
+        gotSensorIdSuccess, snapshotInfo = IpmiUtil.FindSnapshotSensor(sensorDict, sensorName)
         if (not gotSensorIdSuccess):
             UtilLogger.verboseLogger.error("SensorReadingStressTest.py - Setup(): " + \
                                        "Failed to get sensor ID for sensor '%s'." % sensorName)
             return False
-        sensorList.append((sensorName, sensorId, float(nominalValue), float(tolerance)))
+        sensorList.append((sensorName, snapshotInfo[0], float(nominalValue), float(tolerance)))
 
     return True
 
@@ -135,8 +151,9 @@ def Execute(interfaceParams):
                        # for each sensor.
     while (time.time() < endTime):
 
-        # Do 1 reading for each sensor in the list.
+        # Do 1 reading for each sensor in the list (one sensor listing for all sensors).
         readingsCount += 1  # Update number of readings.
+        gotSnapshotSuccess, sensorDict = IpmiUtil.GetIpmiUtilSensorSnapshot(interfaceParams)
         for sensorInfo in sensorList:
 
             # Get reading for this sensor.
@@ -146,8 +163,11 @@ def Execute(interfaceParams):
             tolerance = sensorInfo[3]
             validRangeLow = nominalValue - (float(tolerance)/100) * nominalValue  # Lower bound of valid range.
             validRangeHigh = nominalValue + (float(tolerance)/100) * nominalValue  # Upper bound of valid range.
-            sensorReadSuccess, sensorReading = IpmiUtil.GetIpmiUtilSensorReading(interfaceParams, sensorId, sensorName)  # Get 1 sensor reading.
-            if (not sensorReadSuccess):
+            sensorReadSuccess, snapshotInfo = IpmiUtil.FindSnapshotSensor(sensorDict, sensorName)  # Get 1 sensor reading.
+            sensorReading = None
+            if (sensorReadSuccess):
+                sensorReading = snapshotInfo[1]
+            if (sensorReading is None):
                 UtilLogger.verboseLogger.error("SensorReadingStressTest.py - Execute(): " + \
                                        "Failed to get sensor reading for sensor '%s'." % sensorName)
                 testPassOrFail = False
@@ -49,6 +49,7 @@ import time
 # Project Modules.
 import Config
 import IpmiUtil
+import SdrCache
 import UtilLogger
 import XmlParser
 
@@ -61,6 +62,15 @@ sensorList = []  # List containing information about each sensor to monitor.
                  # nominalValue and tolerance are floats.
 
 
+# Reset function (called by ModuleRegistry before every iteration).
+def Reset():
+
+    # Declare global (module-scope) variables.
+    global sensorList
+
+    sensorList = []
+
+
 # Setup function.
 def Setup(interfaceParams):
 
@@ -80,6 +90,11 @@ def Setup(interfaceParams):
                                        "failed to parse sensor list XML file.")
         return False
 
+    # Load SDR cache (SDR repository is only read when it changed)
+    sdrCache = None
+    if Config.sdrCacheEnabled:
+        sdrCache = SdrCache.GetSdrCache(interfaceParams)
+
     # Store info regarding all sensors to be monitored in sensorList.
     for sensorEntry in xmlParserObj.root:
         sensorName = sensorEntry.attrib["name"]
@@ -90,7 +105,7 @@ def Setup(interfaceParams):
             return False
         sensorInfo = IpmiUtil.SdrInfo([ sensorId[2] + sensorId[3], \
             sensorId[0] + sensorId[1] ], sensorName, interfaceParams)
-        updatePassOrFail = sensorInfo.UpdateSdrInfo(interfaceParams) # Update SDR Info for sensor
+        updatePassOrFail = sensorInfo.UpdateSdrInfo(interfaceParams, sdrCache) # Update SDR Info for sensor
         if updatePassOrFail:
             UtilLogger.verboseLogger.info("SensorThresholdStressTest.py - Setup(): " + \
                 "Successfully received sensor thresholds for sensor '%s'." % sensorName)
@@ -56,6 +56,32 @@ stabilityThreadCyclesPassed = 0
 stabilityThreadCyclesFailed = 0
 stabilityThreadDuration = None
 
+# Reset Function (called by ModuleRegistry before every iteration)
+def Reset():
+
+    # Declare Module-Scope variables
+    global testPassOrFail
+    global ipmiThreadCycleCount
+    global ipmiThreadCyclesPassed
+    global ipmiThreadCyclesFailed
+    global ipmiThreadDuration
+    global stabilityThreadCycleCount
+    global stabilityThreadCyclesPassed
+    global stabilityThreadCyclesFailed
+    global stabilityThreadDuration
+
+    testPassOrFail = True
+    ipmiThreadCycleCount = 0
+    ipmiThreadCyclesPassed = 0
+    ipmiThreadCyclesFailed = 0
+    ipmiThreadDuration = None
+    stabilityThreadCycleCount = 0
+    stabilityThreadCyclesPassed = 0
+    stabilityThreadCyclesFailed = 0
+    stabilityThreadDuration = None
+
+    return
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
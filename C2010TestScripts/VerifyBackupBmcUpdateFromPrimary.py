@@ -32,6 +32,9 @@ import IpmiUtil
 import UtilLogger
 import FwFlash
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'fw', 'bmc-reset' ]
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
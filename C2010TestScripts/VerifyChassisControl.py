@@ -29,6 +29,9 @@ import Config
 import IpmiUtil
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'power' ]
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
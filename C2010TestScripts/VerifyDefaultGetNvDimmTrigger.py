@@ -27,6 +27,9 @@ import Config
 import IpmiUtil
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = []
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
@@ -28,6 +28,9 @@ import IpmiUtil
 import XmlParser
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = []
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
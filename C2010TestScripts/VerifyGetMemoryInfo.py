@@ -27,6 +27,9 @@ import Config
 import IpmiUtil
 import UtilLogger
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = []
+
 # Prototype Setup Function
 def Setup(interfaceParams):
 
@@ -48,6 +51,7 @@ def Execute(interfaceParams):
     netFn = Config.netFnOem30
 
     # Define sample raw bytes (24 dimm slots in Mt Olympus)
+    cmdList = []
     for idx in range(0, 25):
 
         # Set rawByte to memory index
@@ -55,10 +59,19 @@ def Execute(interfaceParams):
         if idx == 0:
             dimmIdx = '0'
         rawBytesList = [ dimmIdx ]
+        cmdList.append((netFn, cmdNum, rawBytesList))
+
+    # Send all requests in a single IpmiUtil batch
+    cmdPassOrFail, respList = IpmiUtil.SendRawCmdBatch(interfaceParams, \
+        cmdList)
+    if not cmdPassOrFail:
+        UtilLogger.verboseLogger.error(cmdName + \
+            ": Batch command failed to return all responses.")
+
+    for idx in range(0, len(cmdList)):
 
-        # Send raw bytes via IpmiUtil
-        dimmPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, \
-            netFn, cmdNum, rawBytesList)
+        dimmIdx = cmdList[idx][2][0]
+        dimmPassOrFail, respData = respList[idx]
 
         # Verify response
         if dimmPassOrFail:
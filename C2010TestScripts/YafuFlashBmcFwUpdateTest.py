@@ -28,9 +28,13 @@ import time
 import Config
 import Helper
 import IpmiUtil
+import ReadinessProbe
 import UtilLogger
 import FwFlash
 
+# Resources used by this test (see TestScheduler.py)
+resourceTags = [ 'fw', 'bmc-reset' ]
+
 previousFwVersion = []
 
 # Prototype Setup Function
@@ -54,11 +58,10 @@ def Setup(interfaceParams):
         UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest: " + \
             "Bmc FW at path " + Config.bmcPrevBinFilePath + \
             " successfully flashed.")
-        # Sleep
-        UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest" + \
-            ": Sleeping for " + str(Config.acPowerOnSleepInSeconds) + \
-            " seconds..")
-        time.sleep(Config.acPowerOnSleepInSeconds)
+        # Wait for BMC to be ready after its reboot
+        ReadinessProbe.WaitFor(interfaceParams, 'bmc-ready', \
+            Config.acPowerOnSleepInSeconds, "YafuFlashBmcFwUpdateTest", \
+            Config.readinessProbeRebootSettleTime)
     else:
         UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest: " + \
             "Bmc FW at path " + Config.bmcPrevBinFilePath + \
@@ -70,17 +73,17 @@ def Setup(interfaceParams):
     cmdNum = Config.cmdGetDeviceId
     netFn = Config.netFnApp
 
-    cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
+    resp = IpmiUtil.SendRawCmdResp(\
         interfaceParams, netFn, cmdNum, [])
-    if cmdPassOrFail:
+    if resp.cmdPassOrFail:
         UtilLogger.verboseLogger.info(cmdName + \
             ": success completion code.")
-        major, minor, aux = FwFlash.extractBmcFwGetDeviceId(respData)
+        major, minor, aux = FwFlash.extractBmcFwGetDeviceId(resp.data)
         previousFwVersion = [ major, minor, aux ]
     else:
         UtilLogger.verboseLogger.error(cmdName + \
             ": command failed. Completion Code: " + \
-            str(respData))
+            str(resp))
         setupPassOrFail = False
 
     return setupPassOrFail
@@ -136,11 +139,10 @@ def Cleanup(interfaceParams):
         UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest: " + \
             "Bmc FW at path " + Config.bmcNextBinFilePath + \
             " successfully flashed.")
-                # Sleep
-        UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest" + \
-            ": Sleeping for " + str(Config.acPowerOnSleepInSeconds) + \
-            " seconds..")
-        time.sleep(Config.acPowerOnSleepInSeconds)
+        # Wait for BMC to be ready after its reboot
+        ReadinessProbe.WaitFor(interfaceParams, 'bmc-ready', \
+            Config.acPowerOnSleepInSeconds, "YafuFlashBmcFwUpdateTest", \
+            Config.readinessProbeRebootSettleTime)
     else:
         UtilLogger.verboseLogger.info("YafuFlashBmcFwUpdateTest: " + \
             "Bmc FW at path " + Config.bmcNextBinFilePath + \
@@ -182,11 +184,10 @@ def FlashFwAndCompare(interfaceParams, currentFwFilePath, expectedCompare):
     if flashPassOrFail:
         UtilLogger.verboseLogger.info(testName + \
             ": BMC FW flash test passed.")
-        # Sleep
-        UtilLogger.verboseLogger.info(testName + \
-            ": Sleeping for " + str(Config.acPowerOnSleepInSeconds) + \
-            " seconds..")
-        time.sleep(Config.acPowerOnSleepInSeconds)
+        # Wait for BMC to be ready after its reboot
+        ReadinessProbe.WaitFor(interfaceParams, 'bmc-ready', \
+            Config.acPowerOnSleepInSeconds, testName, \
+            Config.readinessProbeRebootSettleTime)
     else:
         UtilLogger.verboseLogger.error(testName + \
             ": BMC FW flash test failed.")
@@ -197,17 +198,17 @@ def FlashFwAndCompare(interfaceParams, currentFwFilePath, expectedCompare):
     cmdNum = Config.cmdGetDeviceId
     netFn = Config.netFnApp
 
-    cmdPassOrFail, respData = IpmiUtil.SendRawCmd(\
+    resp = IpmiUtil.SendRawCmdResp(\
         interfaceParams, netFn, cmdNum, [])
-    if cmdPassOrFail:
+    if resp.cmdPassOrFail:
         UtilLogger.verboseLogger.info(cmdName + \
             ": success completion code.")
-        major, minor, aux = FwFlash.extractBmcFwGetDeviceId(respData)
+        major, minor, aux = FwFlash.extractBmcFwGetDeviceId(resp.data)
         flashedFwVersion = [ major, minor, aux ]
     else:
         UtilLogger.verboseLogger.error(cmdName + \
             ": command failed. Completion Code: " + \
-            str(respData))
+            str(resp))
         testPassOrFail = False
 
     # Verify flashedFwVersion newer/older/same than previousFwVersion
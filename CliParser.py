@@ -93,6 +93,80 @@ def initParser():
     parser.add_argument('-port', '-po', help='SMTP server port to use' + \
         ' for sending email')
     parser.add_argument('-switch', '-switch', help='IP Power Switch IP address. Requires for connecting to the switch ')
+    parser.add_argument('-ipmitransport', '-itp',
+                        choices=[Config.ipmiTransportIpmiUtil, Config.ipmiTransportLanPlus],
+                        default=Config.ipmiTransport,
+                        help='IPMI over LAN+ transport (shorthand: \'-itp\') - ' + \
+        'options: ipmiutil (run IpmiUtil per command), ' + \
+        'lanplus (keep native RMCP+ session open per BMC)')
+    parser.add_argument('-kcstransport', '-ktp',
+                        choices=[Config.kcsTransportIpmiUtil, Config.kcsTransportOpenIpmi],
+                        default=Config.kcsTransport,
+                        help='KCS transport (shorthand: \'-ktp\') - ' + \
+        'options: ipmiutil (run IpmiUtil per command), ' + \
+        'openipmi (keep Linux OpenIPMI device ' + Config.ipmiDevicePath + ' open)')
+    parser.add_argument('-inventory', '-inv', help='Path to target inventory ' + \
+        'XML file (shorthand: \'-inv\') - ' + \
+        'runs the selected tests against every BMC in the file, ' + \
+        'one process per BMC (replaces \'-conn\', \'-ip\', \'-user\' and \'-pwd\')')
+    parser.add_argument('-maxparallel', '-mp', type=int,
+                        default=Config.multiTargetMaxParallel,
+                        help='Maximum number of BMCs tested concurrently ' + \
+        'with \'-inventory\' (shorthand: \'-mp\')')
+    parser.add_argument('-summaryname', '-smn', help='Name of summary log file.' + \
+        'File will be renamed as <summaryname>_<timeStamp>.log.' + \
+        ' Shorthand: \'-smn\'')
+    parser.add_argument('-resultfile', '-rf', help='Path of file to write ' + \
+        'summary results to as JSON (shorthand: \'-rf\') - ' + \
+        'used by \'-inventory\' to merge per-BMC results')
+    parser.add_argument('-record', '-rec', help='Path of file to append ' + \
+        'every IpmiUtil call (arguments, output, latency) to ' + \
+        '(shorthand: \'-rec\')')
+    parser.add_argument('-replay', '-rpl', help='Path of file recorded with ' + \
+        '\'-record\' to serve IpmiUtil output from instead of running ' + \
+        'IpmiUtil (shorthand: \'-rpl\') - sets \'-itp\' and \'-ktp\' ' + \
+        'to ipmiutil')
+    parser.add_argument('-replaymode', '-rpm',
+                        choices=[Config.transportReplayModeOrdered, \
+                            Config.transportReplayModeKeyed],
+                        default=Config.transportReplayModeOrdered,
+                        help='Replay mode (shorthand: \'-rpm\') - ' + \
+        'options: ordered (recorded order), ' + \
+        'keyed (match IpmiUtil arguments)')
+    parser.add_argument('-replaylatency', '-rpla', help='Switch to emulate ' + \
+        'recorded IpmiUtil latency in replay mode (shorthand: \'-rpla\')', \
+        action='store_true')
+    parser.add_argument('-parallel', '-par', type=int,
+                        default=Config.testSchedulerWorkers,
+                        help='Number of worker threads running \'-test b\' ' + \
+        'tests that do not share resource tags at the same time; ' + \
+        'no Excel output with more than 1 (shorthand: \'-par\')')
+    parser.add_argument('-resume', '-res', help='Switch to resume an ' + \
+        'interrupted \'-test b\' run from its checkpoint file ' + \
+        '(<summaryname>' + Config.testCheckpointFileSuffix + \
+        Config.testCheckpointFileExtension + '; shorthand: \'-res\') - ' + \
+        'use the same test list and \'-summaryname\'', action='store_true')
+    parser.add_argument('-isolate', '-iso', help='Switch to run every ' + \
+        'iteration of \'-test b\' tests in a child process that is killed ' + \
+        'after the test\'s \'timeout\' attribute (shorthand: \'-iso\') - ' + \
+        'tests with a \'timeout\' attribute always run this way', \
+        action='store_true')
+    parser.add_argument('-coordinator', '-coord', type=int, help='TCP port ' + \
+        'to hand out \'-test b\' test list units for all BMCs in ' + \
+        '\'-inventory\' to \'-worker\' processes on (shorthand: ' + \
+        '\'-coord\') - results of all workers are merged into one summary')
+    parser.add_argument('-worker', '-wrk', help='<host>:<port> of ' + \
+        '\'-coordinator\' process to run test list units for ' + \
+        '(shorthand: \'-wrk\') - run on any number of controller hosts; ' + \
+        'use the same \'-platform\' as the coordinator; BMC credentials ' + \
+        'come from the worker\'s own \'-inventory\' or \'-user\'/\'-pwd\'')
+    parser.add_argument('-sharedsecret', '-ss', help='Secret that ' + \
+        '\'-coordinator\' and \'-worker\' processes authenticate each other ' + \
+        'with (shorthand: \'-ss\') - default: Config.testShardSharedSecret')
+    parser.add_argument('-bmcsim', '-sim', help='Switch to run IpmiUtil ' + \
+        'commands against BmcSimulator.py through ' + \
+        Config.bmcSimIpmiUtilFilePath + ' (shorthand: \'-sim\') - ' + \
+        'use with \'-ip ' + Config.bmcSimAddress + '\'', action='store_true')
     
     # Parse arguments and return
     return parser
@@ -0,0 +1,274 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Per-command IPMI latency histograms.
+
+Every IPMI request sent by IpmiUtil, IpmiLanPlus, IpmiPipeline or IpmiDev is
+recorded here with its latency and completion code, keyed by NetFn/Cmd
+(bridged ME requests are prefixed with 'ME'; other IpmiUtil invocations such
+as 'sel' or 'sensor' are keyed by IpmiUtil command). Latencies go into
+log-spaced buckets (Config.cmdStatsBucketsPerDoubling buckets per doubling
+from Config.cmdStatsBucketMin milliseconds), from which p50/p90/p99 are
+estimated. Requests without any response are counted in a separate timeout
+bucket and left out of the latency histogram.
+
+DumpCmdStats logs the histograms to the summary log, appends them as one JSON
+line to the command statistics file and starts a new collection period.
+"""
+
+import json
+import math
+import threading
+import time
+
+import Config
+import UtilLogger
+
+# Class holds latency histogram and failure counts for one command
+class CmdHistogram:
+
+    # Constructor
+    # Inputs:
+    #   cmdKey (string): command key (e.g. 'NetFn 0x06 Cmd 0x01')
+    def __init__(self, cmdKey):
+
+        self.cmdKey = cmdKey
+        self.count = 0 # requests with a response
+        self.timeouts = 0 # requests without a response
+        self.failureDict = {} # completion code: count
+        self.bucketDict = {} # bucket index: count
+        self.latencyMax = 0.0 # in milliseconds
+        self.latencyTotal = 0.0 # in milliseconds
+
+        return
+
+    # Function will add one request
+    # Inputs:
+    #   latency (float): request latency in seconds
+    #   ccode: completion code (int), None if no response,
+    #       or error string if request could not be sent
+    def Add(self, latency, ccode):
+
+        if ccode is None:
+            self.timeouts += 1
+            return
+
+        latency *= 1000.0
+        self.count += 1
+        self.latencyTotal += latency
+        if latency > self.latencyMax:
+            self.latencyMax = latency
+        bucketIdx = GetBucketIndex(latency)
+        self.bucketDict[bucketIdx] = self.bucketDict.get(bucketIdx, 0) + 1
+
+        if ccode != 0:
+            ccodeKey = '%02x' % ccode if isinstance(ccode, int) else str(ccode)
+            self.failureDict[ccodeKey] = self.failureDict.get(ccodeKey, 0) + 1
+
+        return
+
+    # Function will add the requests of another histogram of the same command
+    # Inputs:
+    #   cmdHistogram (CmdHistogram): histogram to add
+    def Merge(self, cmdHistogram):
+
+        self.count += cmdHistogram.count
+        self.timeouts += cmdHistogram.timeouts
+        self.latencyTotal += cmdHistogram.latencyTotal
+        if cmdHistogram.latencyMax > self.latencyMax:
+            self.latencyMax = cmdHistogram.latencyMax
+        for bucketIdx, bucketCount in cmdHistogram.bucketDict.iteritems():
+            self.bucketDict[bucketIdx] = \
+                self.bucketDict.get(bucketIdx, 0) + bucketCount
+        for ccodeKey, failureCount in cmdHistogram.failureDict.iteritems():
+            self.failureDict[ccodeKey] = \
+                self.failureDict.get(ccodeKey, 0) + failureCount
+
+        return
+
+    # Function returns latency percentile estimate in milliseconds
+    # (upper bound of the bucket holding the percentile, at most max)
+    def GetPercentile(self, percentile):
+
+        if self.count == 0:
+            return 0.0
+
+        rank = int(math.ceil(self.count * percentile / 100.0))
+        cumulativeCount = 0
+        for bucketIdx in sorted(self.bucketDict):
+            cumulativeCount += self.bucketDict[bucketIdx]
+            if cumulativeCount >= rank:
+                return min(GetBucketUpperBound(bucketIdx), self.latencyMax)
+
+        return self.latencyMax
+
+    # Function returns histogram as dictionary for JSON output
+    def ToDict(self):
+
+        return { 'count' : self.count, \
+            'timeouts' : self.timeouts, \
+            'failures' : self.failureDict, \
+            'p50' : round(self.GetPercentile(50), 3), \
+            'p90' : round(self.GetPercentile(90), 3), \
+            'p99' : round(self.GetPercentile(99), 3), \
+            'max' : round(self.latencyMax, 3), \
+            'mean' : round(self.latencyTotal / max(self.count, 1), 3), \
+            'buckets' : dict([ ('%.3f' % GetBucketUpperBound(bucketIdx), \
+                bucketCount) for bucketIdx, bucketCount in \
+                self.bucketDict.iteritems() ]) }
+
+    def __str__(self):
+
+        return self.cmdKey + \
+            " - Count: " + str(self.count) + \
+            " p50/p90/p99/max (ms): %.1f/%.1f/%.1f/%.1f" % \
+            (self.GetPercentile(50), self.GetPercentile(90), \
+            self.GetPercentile(99), self.latencyMax) + \
+            " Timeouts: " + str(self.timeouts) + \
+            " Failures: " + (', '.join([ ccodeKey + ': ' + \
+            str(self.failureDict[ccodeKey]) \
+            for ccodeKey in sorted(self.failureDict) ]) or 'None')
+
+# Function returns histogram bucket index for latency in milliseconds
+def GetBucketIndex(latency):
+
+    if latency <= Config.cmdStatsBucketMin:
+        return 0
+
+    return int(math.ceil(math.log(latency / Config.cmdStatsBucketMin, 2) * \
+        Config.cmdStatsBucketsPerDoubling))
+
+# Function returns upper bound in milliseconds of histogram bucket
+def GetBucketUpperBound(bucketIdx):
+
+    return Config.cmdStatsBucketMin * \
+        2 ** (float(bucketIdx) / Config.cmdStatsBucketsPerDoubling)
+
+# Dictionary of key (cmdKey): value (CmdHistogram) pairs
+# for the current collection period
+cmdStatsDict = {}
+cmdStatsDictLock = threading.Lock()
+
+# Function returns command key for NetFn and Cmd
+# Inputs:
+#   netFn, cmd (string or int): NetFn and Cmd (hex strings or ints)
+#   prefix (string): key prefix (e.g. 'ME' for bridged requests)
+def GetCmdKey(netFn, cmd, prefix=None):
+
+    if isinstance(netFn, basestring):
+        netFn = int(netFn or '0', 16)
+    if isinstance(cmd, basestring):
+        cmd = int(cmd or '0', 16)
+    cmdKey = 'NetFn 0x%02x Cmd 0x%02x' % (netFn, cmd)
+
+    return prefix + ' ' + cmdKey if prefix else cmdKey
+
+# Function will record one request
+# Inputs:
+#   cmdKey (string): command key (see GetCmdKey)
+#   latency (float): request latency in seconds
+#   ccode: completion code (int), None if no response,
+#       or error string if request could not be sent
+def RecordCmd(cmdKey, latency, ccode):
+
+    if not Config.cmdStatsEnabled:
+        return
+
+    with cmdStatsDictLock:
+        if cmdKey not in cmdStatsDict:
+            cmdStatsDict[cmdKey] = CmdHistogram(cmdKey)
+        cmdStatsDict[cmdKey].Add(latency, ccode)
+
+    return
+
+# Function returns the histograms recorded so far and starts
+# a new collection period without logging them
+# (used by TestIsolation to hand a child's statistics to the parent)
+# Outputs:
+#   periodStatsDict (dictionary): cmdKey: CmdHistogram
+def TakeCmdStats():
+
+    global cmdStatsDict
+
+    with cmdStatsDictLock:
+        periodStatsDict = cmdStatsDict
+        cmdStatsDict = {}
+
+    return periodStatsDict
+
+# Function will add histograms returned by TakeCmdStats
+# to the current collection period
+# Inputs:
+#   periodStatsDict (dictionary): cmdKey: CmdHistogram
+def MergeCmdStats(periodStatsDict):
+
+    with cmdStatsDictLock:
+        for cmdKey, cmdHistogram in periodStatsDict.iteritems():
+            if cmdKey not in cmdStatsDict:
+                cmdStatsDict[cmdKey] = CmdHistogram(cmdKey)
+            cmdStatsDict[cmdKey].Merge(cmdHistogram)
+
+    return
+
+# Function will log histograms of current collection period to summary log,
+# append them to command statistics file and start a new period
+# Inputs:
+#   periodName (string): name of collection period (e.g. 'Test Cycle 0')
+def DumpCmdStats(periodName):
+
+    global cmdStatsDict
+
+    if not Config.cmdStatsEnabled:
+        return
+
+    with cmdStatsDictLock:
+        periodStatsDict = cmdStatsDict
+        cmdStatsDict = {}
+
+    if not periodStatsDict:
+        return
+
+    UtilLogger.summaryLogger.info("IPMI COMMAND STATISTICS for " + periodName + ":")
+    for cmdKey in sorted(periodStatsDict):
+        UtilLogger.summaryLogger.info("  " + str(periodStatsDict[cmdKey]))
+    UtilLogger.summaryLogger.info("")
+
+    cmdStatsFilePath = Config.summaryLogPath + Config.summaryLogFileName + \
+        Config.cmdStatsFileSuffix + UtilLogger.fileTimeStamp + \
+        Config.cmdStatsFileExtension
+    try:
+        with open(cmdStatsFilePath, 'a') as cmdStatsFile:
+            cmdStatsFile.write(json.dumps({ 'period' : periodName, \
+                'time' : time.time(), \
+                'bmcIpAddress' : Config.bmcIpAddress, \
+                'commands' : dict([ (cmdKey, cmdHistogram.ToDict()) \
+                    for cmdKey, cmdHistogram in periodStatsDict.iteritems() ]) }, \
+                sort_keys=True) + '\n')
+    except IOError, e:
+        UtilLogger.verboseLogger.error("CmdStats.DumpCmdStats: failed to write " + \
+            cmdStatsFilePath + ": " + str(e))
+
+    return
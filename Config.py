@@ -44,6 +44,7 @@ netFnOem38 = '38'
 # region BladeAPI Command Numbers (Cmd; in hex string)
 cmdGetDeviceId = '01'
 cmdColdReset = '02'
+cmdWarmReset = '03'
 cmdGetSystemGuid = '37'
 cmdGetChannelAuthenticationCapabilities = '38'
 cmdGetSessionChallenge = '39'
@@ -74,7 +75,9 @@ cmdReadFruData = '11'
 cmdWriteFruData = '12' 
 cmdReserveSdrRepository = '22' 
 cmdGetSdr = '23' 
+cmdGetSdrRepositoryInfo = '20'
 cmdReserveSel = '42' 
+cmdGetSelInfo = '40'
 cmdGetSelEntry = '43' 
 cmdAddSelEntry = '44'
 cmdClearSel = '47' 	
@@ -179,6 +182,9 @@ bmcStorPrevBinFilePath = './FirmwareBin/Prev/'
 
 sftpUploadFilePath = '/var/wcs/home/'
 
+sdrCacheDirectoryPath = './SdrCache/'
+fwUpdateHistoryFilePath = './FwUpdateHistory.json'
+
 # endregion
 
 # region IPMI Constants
@@ -212,7 +218,303 @@ ipmiUtilPasswordSwitch = '-P'
 ipmiUtilPrivilegeSwitch = '-V'
 ipmiUtilPrivilegeAdminValue = '4'
 
-ipmiUtilSendMsgMaxRetries = 5
+ipmiUtilSendMsgMaxRetries = 5  # Send Message attempts per ME request while Node Busy
+
+# MeBridge.py: backoff before Node Busy retry is
+#   min(meBridgeBackoffMax, meBridgeBackoffBase * 2^retry),
+#   reduced by a random fraction of up to meBridgeBackoffJitter
+meBridgeBackoffBase = 0.05  # in seconds
+meBridgeBackoffMax = 2  # in seconds
+meBridgeBackoffJitter = 0.5
+meBridgeDeadline = 10  # in seconds; per ME request including retries
+meBridgeLatencySampleLimit = 10000  # latencies kept per ME command for percentiles
+
+# endregion
+
+# region IPMI transport constants
+
+# Transport used by IpmiUtil.SendRawCmd/SendRawCmd2ME for IPMI over LAN+
+#   ipmiutil - spawn IpmiUtil for every command (default)
+#   lanplus - native persistent RMCP+ session (IpmiLanPlus.py)
+ipmiTransportIpmiUtil = 'ipmiutil'
+ipmiTransportLanPlus = 'lanplus'
+ipmiTransport = ipmiTransportIpmiUtil
+
+lanPlusCipherSuite = 3  # HMAC-SHA1 / HMAC-SHA1-96 / AES-CBC-128
+lanPlusResponseTimeout = 2  # in seconds
+lanPlusMaxRetries = 3
+lanPlusSessionIdleLimit = 50  # in seconds; session reopened after idling this long
+
+# IpmiPipeline.py: LAN+ session pool used by IpmiUtil.SendRawCmdBatch
+# and IpmiOverLanOrKcsConcurrentStressTest when ipmiTransport is lanplus
+lanPlusPipelineSessionCount = 4
+lanPlusPipelineMaxInFlight = 16  # requests outstanding across all sessions
+
+# Transport used by IpmiUtil.SendRawCmd/SendRawCmd2ME for KCS (in-band)
+#   ipmiutil - spawn IpmiUtil for every command (default)
+#   openipmi - Linux OpenIPMI device ioctls on a persistent descriptor (IpmiDev.py)
+kcsTransportIpmiUtil = 'ipmiutil'
+kcsTransportOpenIpmi = 'openipmi'
+kcsTransport = kcsTransportIpmiUtil
+
+ipmiDevicePath = '/dev/ipmi0'
+ipmiDeviceResponseTimeout = 5  # in seconds
+
+# endregion
+
+# region SDR cache constants
+
+# SdrInfo.UpdateSdrInfo uses SdrCache.py (decoded SDR repository saved
+# in sdrCacheDirectoryPath) instead of Get SDR for every sensor
+sdrCacheEnabled = True
+sdrCacheReadChunkSize = 16  # bytes per Get SDR partial read
+sdrCacheReservationRetries = 3
+
+# endregion
+
+# region SEL reader constants
+
+# VerifySelAgainstXmlList and the stress tests that checkpoint the SEL read
+# only SEL entries added since the last read (SelReader.py) instead of
+# 'IpmiUtil sel -u'. Off by default: with the cursor, each verification
+# checks only entries that no earlier verification has already consumed.
+# DetectAndRemoveBmcHang always dumps the full SEL and does not move the cursor
+selCursorEnabled = False
+
+# endregion
+
+# region IPMI command statistics constants
+
+# CmdStats.py: per-NetFn/Cmd latency histograms, dumped to the summary log
+# and to <summaryLogFileName><cmdStatsFileSuffix>_<timeStamp>.jsonl
+# (one JSON line per test list cycle)
+cmdStatsEnabled = True
+cmdStatsBucketMin = 0.5  # in milliseconds; upper bound of first bucket
+cmdStatsBucketsPerDoubling = 4
+cmdStatsFileSuffix = '_cmdstats'
+cmdStatsFileExtension = '.jsonl'
+
+# endregion
+
+# region IPMI response cache constants
+
+# RespCache.py: successful responses to the read-only commands in
+# respCacheTtlDict are reused until their TTL expires (opt-in).
+# Cached responses for a target are flushed when the commands in
+# respCacheFlushCmdList are sent to it; all cached responses are flushed
+# on 'IpmiUtil power', AC power switch actions and firmware flash
+respCacheEnabled = False
+
+# (netFn, cmd) : TTL in seconds
+respCacheTtlDict = {
+    (netFnApp, cmdGetDeviceId) : 60,
+    (netFnApp, cmdGetSystemGuid) : 300,
+    (netFnApp, cmdGetChannelAuthenticationCapabilities) : 300,
+    (netFnStorage, cmdGetSdr) : 300
+    }
+
+# (netFn, cmd)
+respCacheFlushCmdList = [
+    (netFnApp, cmdColdReset),
+    (netFnApp, cmdWarmReset),
+    (netFnChassis, cmdChassisControl)
+    ]
+
+# endregion
+
+# region IpmiUtil record/replay constants
+
+# '-record' / '-replay' (TransportReplay.py): RunIpmiUtil calls are appended
+# to a record file, or served from it instead of running IpmiUtil
+transportReplayModeOrdered = 'ordered'  # serve records in recorded order
+transportReplayModeKeyed = 'keyed'  # serve records matching IpmiUtil arguments
+
+# endregion
+
+# region BMC simulator constants
+
+# BmcSimulator.py: stateful BMC simulator serving RMCP+ on bmcSimAddress
+# (port Config.ipmiPort, which clients use as well; use a port above 1023
+# to run without root privileges). BmcSimIpmiUtil.sh poses as IpmiUtil
+# for the simulator ('-bmcsim' sets ipmiUtilLinuxFilePath to it)
+bmcSimAddress = '127.0.0.1'
+bmcSimUserName = 'admin'
+bmcSimPassword = 'admin'
+bmcSimIpmiUtilFilePath = './BmcSimIpmiUtil.sh'
+
+bmcSimMaxSessions = 16  # active sessions; Open Session fails beyond this
+bmcSimSessionIdleLimit = 60  # in seconds; idle sessions are dropped
+bmcSimMaxConcurrent = 4  # requests processed concurrently
+
+# Latency added before each response, in seconds
+bmcSimDefaultLatency = 0.005
+# (netFn, cmd) : latency in seconds
+bmcSimLatencyDict = {
+    (netFnStorage, cmdGetSdr) : 0.01,
+    (netFnStorage, cmdAddSelEntry) : 0.02,
+    (netFnStorage, cmdClearSel) : 0.2,
+    (netFnOem38, cmdConfigureFirmwareUpdate) : 0.05
+    }
+bmcSimMeLatency = 0.02  # added to bridged (Send Message) requests to ME
+bmcSimMeNodeBusyRate = 0.05  # fraction of ME requests answered with Node Busy (0xC0)
+
+bmcSimResetTime = 5  # in seconds; BMC does not respond after cold/warm reset
+bmcSimBootTime = 30  # in seconds; BMC does not respond after AC power on
+bmcSimFwUpdateTime = 20  # in seconds; Configure Firmware Update duration
+bmcSimAcSwitchPort = 0  # HTTP port of simulated AC power IP switch (0: disabled)
+
+bmcSimSelCircular = True  # oldest entry overwritten when SEL is full
+bmcSimSdrMaxReadBytes = 0xFF  # Get SDR returns 0xCA when more bytes are requested
+bmcSimSensorNoise = 1  # raw reading varies by up to +/- this value
+
+# Threshold sensors:
+#   (name, number, sensor type, base unit, M, B, R exponent, nominal raw reading,
+#   raw thresholds (LNC, LC, LNR, UNC, UC, UNR); None if not supported)
+bmcSimSensorList = [
+    ('PWM_1', 0x01, 0x04, 0x00, 1, 0, 0, 50, (None, None, None, None, None, None)),
+    ('HSC0 Input Power', 0x02, 0x0B, 0x06, 2, 0, 0, 50, (None, None, None, 200, 225, None)),
+    ('HSC0 Input Volt', 0x03, 0x02, 0x04, 6, 0, -2, 205, (None, 180, None, None, 230, None)),
+    ('HSC0 Output Curr', 0x04, 0x03, 0x05, 1, 0, -1, 80, (None, None, None, 200, 230, None)),
+    ('HSC0 Temp', 0x05, 0x01, 0x01, 1, 0, 0, 24, (None, None, None, 75, 85, None)),
+    ('FPGA_HSC_Temp', 0x06, 0x01, 0x01, 1, 0, 0, 35, (None, None, None, 75, 85, None)),
+    ('FPGA_DIE_Temp', 0x07, 0x01, 0x01, 1, 0, 0, 45, (None, None, None, 85, 95, None)),
+    ('FPGA_AMB_Temp', 0x08, 0x01, 0x01, 1, 0, 0, 35, (None, None, None, 75, 85, None)),
+    ('P0VPP_ABC', 0x09, 0x02, 0x04, 2, 0, -2, 128, (None, 112, None, None, 144, None)),
+    ('P0VPP_DEF', 0x0A, 0x02, 0x04, 2, 0, -2, 128, (None, 112, None, None, 144, None)),
+    ('P1VPP_GHJ', 0x0B, 0x02, 0x04, 2, 0, -2, 128, (None, 112, None, None, 144, None)),
+    ('P1VPP_KLM', 0x0C, 0x02, 0x04, 2, 0, -2, 128, (None, 112, None, None, 144, None)),
+    ('CPU0_VccIO', 0x0D, 0x02, 0x04, 1, 0, -2, 100, (None, 85, None, None, 115, None)),
+    ('CPU1_VccIO', 0x0E, 0x02, 0x04, 1, 0, -2, 100, (None, 85, None, None, 115, None)),
+    ('Temp_CPU0', 0x0F, 0x01, 0x01, 1, 0, 0, 29, (None, None, None, 85, 95, None)),
+    ('Temp_PCH', 0x10, 0x01, 0x01, 1, 0, 0, 39, (None, None, None, 85, 95, None)),
+    ('Temp_Inlet', 0x11, 0x01, 0x01, 1, 0, 0, 29, (None, None, None, 40, 45, None)),
+    ('Temp_Outlet', 0x12, 0x01, 0x01, 1, 0, 0, 31, (None, None, None, 70, 80, None)),
+    ('Temp_CPU1', 0x13, 0x01, 0x01, 1, 0, 0, 31, (None, None, None, 85, 95, None)),
+    ('P3V3', 0x14, 0x02, 0x04, 2, 0, -2, 168, (None, 154, None, None, 182, None)),
+    ('P5V', 0x15, 0x02, 0x04, 3, 0, -2, 170, (None, 155, None, None, 185, None))
+    ]
+
+# OEM (netFn 0x30/0x32/0x38) commands: a set command stores its request data,
+# which is returned by the matching get command
+# (netFn, set cmd) : get cmd
+bmcSimOemSetGetDict = {
+    (netFnOem30, cmdSetProcessorInfo) : cmdGetProcessorInfo,
+    (netFnOem30, cmdSetMemoryInfo) : cmdGetMemoryInfo,
+    (netFnOem30, cmdSetPcieInfo) : cmdGetPcieInfo,
+    (netFnOem30, cmdSetNicInfo) : cmdGetNicInfo,
+    (netFnOem30, cmdSetEnergyStorage) : cmdGetEnergyStorage,
+    (netFnOem30, cmdSetDefaultPowerLimit) : cmdGetDefaultPowerLimit,
+    (netFnOem30, cmdSetPsuAlert) : cmdGetPsuAlert,
+    (netFnOem30, cmdSetNvDimmTrigger) : cmdGetNvDimmTrigger,
+    (netFnOem38, cmdSetBiosConfig) : cmdGetBiosConfig,
+    (netFnOem30, cmdSetGpio) : cmdGetGpio,
+    (netFnOem32, cmdSetPwmProfile) : cmdGetPwmProfile,
+    (netFnOem38, cmdSetTpmPhysicalPresence) : cmdGetTpmPhysicalPresence,
+    (netFnOem38, cmdSetStorageMapping) : cmdGetStorageMapping
+    }
+# (netFn, cmd) : response data (hex string list) before any set command
+bmcSimOemRespDict = {
+    (netFnOem32, cmdGetBiosCode) : [ '00', 'AA' ],
+    (netFnOem38, cmdGetFirmwareVersion) : [ '04', '10' ]
+    }
+bmcSimOemDefaultRespLength = 4  # zero bytes returned by other OEM commands
+
+# endregion
+
+# region Multi-target constants
+
+# '-inventory' mode (MultiTarget.py): one OneBMCTest.py process per target
+multiTargetMaxParallel = 8  # targets running concurrently
+multiTargetPollInterval = 5  # in seconds
+multiTargetResultFileExtension = '.json'
+
+# endregion
+
+# region Test sharding constants
+
+# '-coordinator'/'-worker' mode (TestSharding.py): a coordinator hands out
+# XML test list units over TCP to worker processes on any number of
+# controller hosts and merges their results
+# Coordinator listens on loopback only; set to '' (all interfaces) or a host
+# address for workers on other controller hosts
+testShardListenAddress = '127.0.0.1'
+# Secret coordinator and workers authenticate each other with
+# (overridden by '-sharedsecret'; required for '-coordinator'/'-worker')
+testShardSharedSecret = None
+testShardConnectTimeout = 30 # in seconds
+testShardHeartbeatInterval = 10 # in seconds
+# Worker that sends nothing for this long is dead and its unit runs again
+# (must be longer than testShardHeartbeatInterval)
+testShardWorkerTimeout = 60 # in seconds
+# Worker whose heartbeats are not acknowledged for this long gives up its unit
+# (must be shorter than testShardWorkerTimeout so that the worker stops
+# before the coordinator runs the unit again on another worker)
+testShardLeaseTimeout = 30 # in seconds
+testShardWaitInterval = 2 # in seconds, worker asks again when no unit can start
+
+# endregion
+
+# region Test scheduler constants
+
+# '-parallel' mode (TestScheduler.py): XML test list tests that do not share
+# resource tags run at the same time on this many worker threads
+# (1: tests run one after another). Tests finish in a different order than
+# listed, so the Excel output of ResultProcessor.py (which expects the same
+# test order in every cycle) is not generated with more than one worker
+testSchedulerWorkers = 1
+# Tests with one of these resource tags run alone
+testSchedulerExclusiveTagList = [ 'exclusive', 'bmc-reset' ]
+
+# endregion
+
+# region Readiness probe constants
+
+# ReadinessProbe.py: waits ('wait-for' in XML test lists) poll readiness
+# conditions with backoff instead of sleeping for a fixed worst-case time
+readinessProbeMinInterval = 1 # in seconds, first probe interval
+readinessProbeMaxInterval = 10 # in seconds
+readinessProbeBackoffFactor = 1.5
+readinessProbeRequestTimeout = 5 # in seconds, per Redfish/SSH probe
+readinessProbeDefaultMaxTime = 300 # in seconds, 'wait-max' without 'delay'
+# Time the BMC may still answer after a firmware flash
+# before its reboot starts (not probed)
+readinessProbeRebootSettleTime = 10 # in seconds
+
+# endregion
+
+# region Test isolation constants
+
+# '-isolate' mode (TestIsolation.py): each iteration of an XML test list test
+# runs in a child process that is killed at the test's deadline ('timeout'
+# attribute in seconds or HH:MM:SS; tests with the attribute are always
+# isolated) and is logged as TIMEOUT
+testIsolationEn = False
+testIsolationDefaultTimeout = 0 # in seconds, for tests without attribute (0: none)
+# Check for hung BMC (Helper.DetectAndRemoveBmcHang) after a test timed out
+testTimeoutDetectBmcHang = True
+
+# endregion
+
+# region Test checkpoint constants
+
+# TestCheckpoint.py: XML test list progress and statistics are saved after
+# every test iteration to <summaryLogFileName>_checkpoint.json in
+# summaryLogPath; '-resume' continues an interrupted run from it
+testCheckpointFileSuffix = '_checkpoint'
+testCheckpointFileExtension = '.json'
+# Previous checkpoint while it is being replaced (Windows without MoveFileEx)
+testCheckpointBackupSuffix = '.bak'
+
+# endregion
+
+# region Test manifest constants
+
+# TestManifest.py: file, modification time and declared metadata of every
+# test scripts package module, cached so that listing tests and reading
+# resource tags neither rescans nor imports test modules
+testManifestFilePath = './TestManifest.json'
+# Module-scope variables read (as Python literals) from test module source
+testManifestMetadataList = [ 'resourceTags' ]
 
 # endregion
 
@@ -259,6 +561,18 @@ yafuFlashPasswordSwitch = '-P'
 biosFwUpdateTimeLimit = 120  # in seconds
 psuFwUpdateTimeLimit = 3600  # in seconds
 psuFwUpdatePollStatusInterval = 30  # in seconds
+
+# ConfigureFwUpdate.UpdateFw polls QUERY_FW_UPDATE starting at
+# fwUpdatePollMinInterval, backing off by fwUpdatePollBackoffFactor up to
+# the caller's poll interval. Polling tightens to fwUpdatePollWindowPollCount
+# queries within fwUpdatePollCompletionWindow (fraction) of the expected duration,
+# the median of the last fwUpdateHistoryLimit durations stored in
+# fwUpdateHistoryFilePath for the component, image type and image file
+fwUpdatePollMinInterval = 2  # in seconds
+fwUpdatePollBackoffFactor = 1.5
+fwUpdatePollCompletionWindow = 0.1
+fwUpdatePollWindowPollCount = 10
+fwUpdateHistoryLimit = 20
 # endregion
 
 # region AcPowerIpSwitch Constants
@@ -419,6 +733,7 @@ bmcMeStressTestTotalTime = 1  # in hours
 
 # region ConcurrentStressTest constants
 concurrentStressTestTotalTime = 1  # in hours
+concurrentStressTestPowerOnWaitTime = 30  # in seconds, max wait for chassis-on
 # endregion
 
 # region IpmiOverLanOrKcsStressTest constants
@@ -28,6 +28,7 @@ from subprocess import Popen, PIPE
 import os
 
 import Config
+import RespCache
 import UtilLogger
 
 # Function runs input command
@@ -58,6 +59,10 @@ def RunFwFlash(fwFlashFilePath, *args):
                 "Fw Flash program " + str(fwFlashAbsFilePath) + ": " + \
                 commandRun)
 
+        # Flashed firmware invalidates cached IPMI responses
+        if Config.respCacheEnabled:
+            RespCache.FlushRespCache(reason = 'RunFwFlash')
+
         # Run Fw Flash and get stdout and stderr
         process = Popen(processCmd, stdout=PIPE, stderr=PIPE,\
             cwd=os.path.dirname(fwFlashAbsFilePath))
@@ -283,7 +288,7 @@ def CompareBmcFwVersion(maj1, min1, aux1,\
     return compareOut
 
 # Function will extract Bmc Fw version
-# from GetDeviceId response
+# from GetDeviceId response data (bytearray)
 def extractBmcFwGetDeviceId(respData):
 
     # Initialize variables
@@ -292,8 +297,8 @@ def extractBmcFwGetDeviceId(respData):
     auxIndex = 11
 
     # Return maj, min, aux
-    maj = int(respData[majIndex], 16)
-    min = int(respData[minIndex], 16)
-    aux = int(respData[auxIndex], 16)
+    maj = respData[majIndex]
+    min = respData[minIndex]
+    aux = respData[auxIndex]
 
     return maj, min, aux
\ No newline at end of file
@@ -0,0 +1,222 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Adaptive status polling for firmware updates.
+
+FwUpdatePoller decides how long to wait before each status query of a
+firmware update in progress. Polling starts at Config.fwUpdatePollMinInterval
+and backs off by Config.fwUpdatePollBackoffFactor while the update stays in
+progress, up to the maximum poll interval given by the caller. When earlier
+durations of the same update are known, polling tightens again around the
+expected completion time (median of stored durations), spreading
+Config.fwUpdatePollWindowPollCount queries over that window.
+
+Every poll is recorded as a progress event (dictionary with timestamp,
+elapsed time and status) and logged to the verbose log as a JSON line.
+Durations of successful updates are stored in Config.fwUpdateHistoryFilePath
+so the expected completion time improves run over run.
+"""
+
+import json
+import os
+import threading
+import time
+
+import Config
+import UtilLogger
+
+# Progress event names
+eventStarted = 'started'
+eventInProgress = 'inprogress'
+eventCompleted = 'completed'
+eventFailed = 'failed'
+eventTimedOut = 'timedout'
+
+# Lock for reading/writing update history file
+fwUpdateHistoryLock = threading.Lock()
+
+# Function will load update history
+# Outputs:
+#   historyDict (dict): history key: list of durations in seconds
+def LoadHistory():
+
+    if not os.path.isfile(Config.fwUpdateHistoryFilePath):
+        return {}
+
+    try:
+        with open(Config.fwUpdateHistoryFilePath, 'r') as historyFile:
+            return json.load(historyFile)
+    except (IOError, ValueError), e:
+        UtilLogger.verboseLogger.error('FwUpdatePoller.LoadHistory: ' + \
+            'unable to read ' + Config.fwUpdateHistoryFilePath + ': ' + str(e))
+
+    return {}
+
+# Function will return expected duration for history key
+# Outputs:
+#   expectedDuration (float): median of stored durations in seconds
+#       (None if no duration stored)
+def GetExpectedDuration(historyKey):
+
+    with fwUpdateHistoryLock:
+        durationList = sorted(LoadHistory().get(historyKey, []))
+
+    if not durationList:
+        return None
+
+    return float(durationList[len(durationList) / 2])
+
+# Function will store duration of successful update for history key
+# (only the last Config.fwUpdateHistoryLimit durations are kept)
+def SaveDuration(historyKey, duration):
+
+    with fwUpdateHistoryLock:
+        historyDict = LoadHistory()
+        durationList = historyDict.get(historyKey, [])
+        durationList.append(round(duration, 1))
+        historyDict[historyKey] = durationList[-Config.fwUpdateHistoryLimit:]
+        try:
+            with open(Config.fwUpdateHistoryFilePath, 'w') as historyFile:
+                json.dump(historyDict, historyFile, indent=1, sort_keys=True)
+        except IOError, e:
+            UtilLogger.verboseLogger.error('FwUpdatePoller.SaveDuration: ' + \
+                'unable to write ' + Config.fwUpdateHistoryFilePath + ': ' + \
+                str(e))
+
+    return
+
+# Class decides poll intervals and records progress events for one update
+class FwUpdatePoller:
+
+    # Constructor
+    # Inputs:
+    #   historyKey (string): identifies update in history file
+    #       (e.g. component, image type and image file name)
+    #   maxPollInterval (float): maximum time between status queries (in seconds)
+    #   timeLimit (float): time limit for update (in seconds)
+    def __init__(self, historyKey, maxPollInterval, timeLimit):
+
+        self.historyKey = historyKey
+        self.maxPollInterval = max(maxPollInterval, Config.fwUpdatePollMinInterval)
+        self.timeLimit = timeLimit
+        self.expectedDuration = GetExpectedDuration(historyKey)
+        self.pollInterval = Config.fwUpdatePollMinInterval
+        self.startTime = None
+        self.progressEventList = []
+
+        return
+
+    # Function will start timing update and record started event
+    def Start(self):
+
+        self.startTime = time.time()
+        self.AddEvent(eventStarted)
+
+        return
+
+    # Function returns seconds since Start
+    def GetElapsed(self):
+
+        return time.time() - self.startTime
+
+    # Function returns True if update time limit has not been reached
+    def IsWithinTimeLimit(self):
+
+        return self.GetElapsed() < self.timeLimit
+
+    # Function will record and log progress event
+    # Inputs:
+    #   eventName (string): eventStarted, eventInProgress, ...
+    #   opResult (string): operation result reported by BMC
+    #   nextPollIn (float): seconds until next status query
+    def AddEvent(self, eventName, opResult = None, nextPollIn = None):
+
+        progressEvent = { \
+            'timestamp' : round(time.time(), 3), \
+            'elapsed' : round(self.GetElapsed(), 3), \
+            'event' : eventName, \
+            'update' : self.historyKey, \
+            'opResult' : opResult, \
+            'expectedDuration' : self.expectedDuration, \
+            'nextPollIn' : nextPollIn }
+        self.progressEventList.append(progressEvent)
+        UtilLogger.verboseLogger.info('FwUpdateProgress: ' + \
+            json.dumps(progressEvent, sort_keys=True))
+
+        return
+
+    # Function returns seconds to wait before next status query
+    # and advances backoff
+    def GetNextPollInterval(self):
+
+        elapsed = self.GetElapsed()
+        pollInterval = self.pollInterval
+        self.pollInterval = min(self.pollInterval * Config.fwUpdatePollBackoffFactor, \
+            self.maxPollInterval)
+
+        # Tighten polling around expected completion
+        if self.expectedDuration is not None:
+            windowLength = self.expectedDuration * Config.fwUpdatePollCompletionWindow
+            windowStart = self.expectedDuration - windowLength
+            windowEnd = self.expectedDuration + windowLength
+            windowPollInterval = min(max(Config.fwUpdatePollMinInterval, \
+                2 * windowLength / Config.fwUpdatePollWindowPollCount), \
+                self.maxPollInterval)
+            if windowStart <= elapsed <= windowEnd:
+                pollInterval = windowPollInterval
+                self.pollInterval = windowPollInterval
+            elif elapsed < windowStart:
+                pollInterval = max(min(pollInterval, windowStart - elapsed), \
+                    Config.fwUpdatePollMinInterval)
+
+        # Do not sleep past time limit
+        pollInterval = min(pollInterval, self.timeLimit - elapsed)
+
+        return max(pollInterval, 0)
+
+    # Function will record in progress event and wait for next status query
+    def WaitForNextPoll(self, opResult = None):
+
+        pollInterval = self.GetNextPollInterval()
+        self.AddEvent(eventInProgress, opResult, round(pollInterval, 3))
+        time.sleep(pollInterval)
+
+        return
+
+    # Function will record final event and store duration on success
+    # Inputs:
+    #   eventName (string): eventCompleted, eventFailed or eventTimedOut
+    #   opResult (string): operation result reported by BMC
+    # Outputs:
+    #   duration (float): seconds since Start
+    def Finish(self, eventName, opResult = None):
+
+        duration = self.GetElapsed()
+        self.AddEvent(eventName, opResult)
+        if eventName == eventCompleted:
+            SaveDuration(self.historyKey, duration)
+
+        return duration
@@ -34,14 +34,19 @@ import re
 # using input hex string and number of bits
 def calc2sComplementHexString2Int(hexInput, bitCount):
 
+    return calc2sComplementInt2Int(int(hexInput, 16), bitCount)
+
+# Function will calculate 2's complement value of bitCount-bit integer input
+def calc2sComplementInt2Int(intInput, bitCount):
+
     # Initialize local variables
     twosComplement = None
 
     # Check if MSB is positive (0) or negative (1)
-    if ((int(hexInput, 16) >> (bitCount - 1)) & 1):
-        twosComplement = -1 * ((~int(hexInput, 16) + 1) & (2**bitCount-1))
+    if ((intInput >> (bitCount - 1)) & 1):
+        twosComplement = -1 * ((~intInput + 1) & (2**bitCount-1))
     else:
-        twosComplement = int(hexInput, 16) & (2**bitCount-1)
+        twosComplement = intInput & (2**bitCount-1)
 
     return twosComplement
 
@@ -63,7 +68,7 @@ def DetectAndRemoveBmcHang(interfaceParams):
     for retryCount in range(0, Config.bmcHangRetryCount):
 
         cmdPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams,\
-            Config.netFnApp, Config.cmdGetDeviceId, [])
+            Config.netFnApp, Config.cmdGetDeviceId, [], useCache = False)
         if cmdPassOrFail:
             UtilLogger.verboseLogger.info("GetDeviceId: " + \
                 "Command passed (retry count: " + \
@@ -102,6 +107,8 @@ def DetectAndRemoveBmcHang(interfaceParams):
         "Checking if BMC hang is fixed by getting and clearing SELs.")
 
         # Get Sel entries
+        # (full SEL dump; does not move the SelReader cursor so that
+        # a later SEL verification still sees every new entry)
         processCmd = ['sel', '-u']
         for interfaceParam in interfaceParams:
             processCmd.append(interfaceParam)
@@ -247,7 +254,7 @@ def GetDeviceIdAndCheckResponse(responseTimeLimit, interfaceParams, startTime=No
 
             # Get Device Id
             getPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, \
-                Config.netFnApp, Config.cmdGetDeviceId, [])
+                Config.netFnApp, Config.cmdGetDeviceId, [], useCache = False)
             if getPassOrFail:
                 getDuration = time.time() - getStartTime
                 UtilLogger.verboseLogger.info("GetDeviceIdAndCheckResponse:" + \
@@ -0,0 +1,305 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Native in-band IPMI through the Linux OpenIPMI driver.
+
+An IpmiDevice keeps the OpenIPMI character device (Config.ipmiDevicePath,
+normally /dev/ipmi0) open and sends requests with the IPMICTL_SEND_COMMAND
+ioctl, then waits for the matching response (by message ID) with
+IPMICTL_RECEIVE_MSG_TRUNC. Requests to the ME are addressed to the IPMB
+channel and the driver performs the Send Message bridging.
+
+Module-level SendRawCmdBytes/SendRawCmd2ME keep one device open per process
+and return the same values as the IpmiLanPlus functions, so IpmiUtil can use
+either backend behind SendRawCmd.
+"""
+
+import ctypes
+import os
+import select
+import threading
+import time
+
+import Config
+import IpmiLanPlus
+import UtilLogger
+
+# fcntl is POSIX only (no OpenIPMI device elsewhere)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#region OpenIPMI Constants (linux/ipmi.h)
+
+ipmiIocMagic = ord('i')
+
+ipmiSystemInterfaceAddrType = 0x0C
+ipmiIpmbAddrType = 0x01
+ipmiBmcChannel = 0x0F
+ipmiResponseRecvType = 1
+
+ipmiMaxMsgLength = 272 # IPMI_MAX_MSG_LENGTH
+ipmiMaxAddrSize = 32 # sizeof(struct ipmi_addr)
+
+# struct ipmi_system_interface_addr
+class IpmiSystemInterfaceAddr(ctypes.Structure):
+    _fields_ = [ ('addrType', ctypes.c_int), \
+        ('channel', ctypes.c_short), \
+        ('lun', ctypes.c_ubyte) ]
+
+# struct ipmi_ipmb_addr
+class IpmiIpmbAddr(ctypes.Structure):
+    _fields_ = [ ('addrType', ctypes.c_int), \
+        ('channel', ctypes.c_short), \
+        ('slaveAddr', ctypes.c_ubyte), \
+        ('lun', ctypes.c_ubyte) ]
+
+# struct ipmi_msg
+class IpmiMsg(ctypes.Structure):
+    _fields_ = [ ('netFn', ctypes.c_ubyte), \
+        ('cmd', ctypes.c_ubyte), \
+        ('dataLen', ctypes.c_ushort), \
+        ('data', ctypes.c_void_p) ]
+
+# struct ipmi_req
+class IpmiReq(ctypes.Structure):
+    _fields_ = [ ('addr', ctypes.c_void_p), \
+        ('addrLen', ctypes.c_uint), \
+        ('msgId', ctypes.c_long), \
+        ('msg', IpmiMsg) ]
+
+# struct ipmi_recv
+class IpmiRecv(ctypes.Structure):
+    _fields_ = [ ('recvType', ctypes.c_int), \
+        ('addr', ctypes.c_void_p), \
+        ('addrLen', ctypes.c_uint), \
+        ('msgId', ctypes.c_long), \
+        ('msg', IpmiMsg) ]
+
+# Function returns ioctl request number (asm-generic/ioctl.h _IOC)
+def GetIoctlNumber(direction, nr, size):
+
+    return (direction << 30) | (size << 16) | (ipmiIocMagic << 8) | nr
+
+ioctlWrite = 1
+ioctlRead = 2
+
+# IPMICTL_SEND_COMMAND: _IOR(IPMI_IOC_MAGIC, 13, struct ipmi_req)
+ipmiCtlSendCommand = GetIoctlNumber(ioctlRead, 13, ctypes.sizeof(IpmiReq))
+# IPMICTL_RECEIVE_MSG_TRUNC: _IOWR(IPMI_IOC_MAGIC, 11, struct ipmi_recv)
+ipmiCtlReceiveMsgTrunc = GetIoctlNumber(ioctlRead | ioctlWrite, 11, \
+    ctypes.sizeof(IpmiRecv))
+
+#endregion
+
+# Class holds the open OpenIPMI device
+class IpmiDevice:
+
+    # Constructor
+    # Inputs:
+    #   devicePath (string): OpenIPMI character device
+    def __init__(self, devicePath=None):
+
+        self.devicePath = devicePath or Config.ipmiDevicePath
+        self.fd = None
+        self.msgId = 0
+
+        # Serialize request/response pairs on this device
+        self.lock = threading.Lock()
+
+        return
+
+    # Function will open the device
+    # Outputs:
+    #   openPassOrFail (bool): device opened (True) or not (False)
+    def Open(self):
+
+        if fcntl is None:
+            UtilLogger.verboseLogger.error("IpmiDevice.Open: OpenIPMI " + \
+                "device " + self.devicePath + " requires Linux (no fcntl)")
+            return False
+
+        try:
+            self.fd = os.open(self.devicePath, os.O_RDWR)
+        except OSError, e:
+            UtilLogger.verboseLogger.error("IpmiDevice.Open: failed to open " + \
+                self.devicePath + ": " + str(e))
+            self.fd = None
+            return False
+
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info("IpmiDevice.Open: opened " + \
+                self.devicePath)
+
+        return True
+
+    # Function will close the device
+    def Close(self):
+
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+        return
+
+    # Function sends one IPMI request and waits for its response
+    # Inputs:
+    #   netFn (int), cmd (int): request network function and command
+    #   data (bytearray): request data bytes
+    #   addr (ctypes.Structure): IpmiSystemInterfaceAddr (BMC; default)
+    #       or IpmiIpmbAddr (bridged)
+    # Outputs: same as IpmiLanPlus.LanPlusSession.SendRecv
+    #   cmdPassOrFail (bool): response received (True) or not (False)
+    #   ccode (int): completion code (None if no response)
+    #   respBytes (bytearray): response data bytes
+    def SendRecv(self, netFn, cmd, data, addr=None):
+
+        if addr is None:
+            addr = IpmiSystemInterfaceAddr(ipmiSystemInterfaceAddrType, \
+                ipmiBmcChannel, 0)
+
+        with self.lock:
+
+            if self.fd is None and not self.Open():
+                return False, None, bytearray()
+
+            self.msgId += 1
+            msgId = self.msgId
+
+            reqData = (ctypes.c_ubyte * max(len(data), 1))(*data)
+            req = IpmiReq(ctypes.addressof(addr), ctypes.sizeof(addr), msgId, \
+                IpmiMsg(netFn, cmd, len(data), ctypes.addressof(reqData)))
+
+            try:
+                fcntl.ioctl(self.fd, ipmiCtlSendCommand, req)
+            except IOError, e:
+                UtilLogger.verboseLogger.error("IpmiDevice.SendRecv: " + \
+                    "IPMICTL_SEND_COMMAND failed for NetFn 0x%02x Cmd 0x%02x: %s" % \
+                    (netFn, cmd, str(e)))
+                return False, None, bytearray()
+
+            # Wait for response with matching message ID
+            endTime = time.time() + Config.ipmiDeviceResponseTimeout
+            recvAddr = ctypes.create_string_buffer(ipmiMaxAddrSize)
+            recvData = (ctypes.c_ubyte * ipmiMaxMsgLength)()
+            while True:
+                readList, writeList, errorList = select.select([ self.fd ], \
+                    [], [], max(endTime - time.time(), 0))
+                if not readList:
+                    if Config.debugEn:
+                        UtilLogger.verboseLogger.error("IpmiDevice.SendRecv: " + \
+                            "timeout for NetFn 0x%02x Cmd 0x%02x" % (netFn, cmd))
+                    return False, None, bytearray()
+
+                recv = IpmiRecv(0, ctypes.addressof(recvAddr), ipmiMaxAddrSize, 0, \
+                    IpmiMsg(0, 0, ipmiMaxMsgLength, ctypes.addressof(recvData)))
+                try:
+                    fcntl.ioctl(self.fd, ipmiCtlReceiveMsgTrunc, recv)
+                except IOError, e:
+                    UtilLogger.verboseLogger.error("IpmiDevice.SendRecv: " + \
+                        "IPMICTL_RECEIVE_MSG_TRUNC failed: " + str(e))
+                    return False, None, bytearray()
+
+                # Skip stale responses and asynchronous events
+                if recv.recvType != ipmiResponseRecvType or recv.msgId != msgId:
+                    continue
+                if recv.msg.dataLen < 1:
+                    return False, None, bytearray()
+
+                respBytes = bytearray(recvData[:recv.msg.dataLen])
+                return True, respBytes[0], respBytes[1:]
+
+# OpenIPMI device shared by all requests of this process
+ipmiDevice = None
+ipmiDeviceLock = threading.Lock()
+
+# Function returns the persistent device (opened lazily on first request)
+def GetDevice():
+
+    global ipmiDevice
+
+    with ipmiDeviceLock:
+        if ipmiDevice is None:
+            ipmiDevice = IpmiDevice()
+
+    return ipmiDevice
+
+# Function closes the persistent device
+def CloseDevice():
+
+    with ipmiDeviceLock:
+        if ipmiDevice is not None:
+            ipmiDevice.Close()
+
+    return
+
+# Function drops the device inherited from the parent process
+# without closing it (the parent keeps using it)
+def ForgetDevice():
+
+    global ipmiDevice
+    global ipmiDeviceLock
+
+    ipmiDevice = None
+    ipmiDeviceLock = threading.Lock()
+
+    return
+
+# Function sends raw command to BMC through OpenIPMI device
+# Inputs: same as IpmiUtil.SendRawCmd (interfaceParams unused)
+# Outputs: same as IpmiDevice.SendRecv
+def SendRawCmdBytes(interfaceParams, netFn, cmd, rawBytesList):
+
+    cmdPassOrFail, ccode, respBytes = GetDevice().SendRecv(int(netFn, 16), \
+        int(cmd, 16), bytearray([ int(rawByte, 16) for rawByte in rawBytesList ]))
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("IpmiDev.SendRawCmd: NetFn " + \
+            str(netFn) + " Cmd " + str(cmd) + " Request: " + str(rawBytesList) + \
+            " Completion Code: " + str(ccode) + " Response: " + \
+            str([ '%02x' % respByte for respByte in respBytes ]))
+
+    return cmdPassOrFail, ccode, respBytes
+
+# Function sends raw request to ME through OpenIPMI device
+# Inputs/Outputs: same as IpmiUtil.SendRawCmd2MEOnce
+#   rawBytesList (list; string): [ bus, slave address, NetFn/LUN, cmd, data.. ]
+#       as used by IpmiUtil 'cmd -m' parameter
+def SendRawCmd2ME(interfaceParams, rawBytesList):
+
+    rawBytes = [ int(rawByte, 16) for rawByte in rawBytesList ]
+    addr = IpmiIpmbAddr(ipmiIpmbAddrType, int(Config.ipmbChannel, 16), \
+        int(Config.meSlaveAddr, 16), int(Config.meLun, 16))
+    cmdPassOrFail, ccode, respBytes = GetDevice().SendRecv(rawBytes[2] >> 2, \
+        rawBytes[3], bytearray(rawBytes[4:]), addr)
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("IpmiDev.SendRawCmd2ME: Request: " + \
+            str(rawBytesList) + " Completion Code: " + str(ccode) + \
+            " Response: " + str([ '%02x' % respByte for respByte in respBytes ]))
+
+    return IpmiLanPlus.FormatRespData(cmdPassOrFail, ccode, respBytes)
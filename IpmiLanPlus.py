@@ -0,0 +1,721 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Native IPMI over LAN+ (RMCP+) client.
+
+A LanPlusSession performs the RMCP+ session setup (Get Channel Authentication
+Capabilities, Open Session, RAKP 1-4, Set Session Privilege Level) once and
+then sends raw NetFn/Cmd requests over the authenticated session.
+Module-level SendRawCmd/SendRawCmd2ME keep one session per target alive and
+return the same (passOrFail, respData) tuples as the IpmiUtil functions.
+"""
+
+# Built-in modules.
+import hashlib
+import hmac
+import os
+import socket
+import struct
+import threading
+import time
+
+# Project modules.
+import CmdStats
+import Config
+import UtilLogger
+
+# AES-CBC-128 (cipher suite 3 confidentiality) requires the cryptography module,
+# which is imported on first use: (Cipher, algorithms, modes, default_backend),
+# False if not installed
+aesCipherModules = None
+
+# Function returns cryptography cipher modules, importing them on first call
+def GetAesCipherModules():
+
+    global aesCipherModules
+
+    if aesCipherModules is None:
+        try:
+            from cryptography.hazmat.backends import default_backend
+            from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+            aesCipherModules = (Cipher, algorithms, modes, default_backend)
+        except ImportError:
+            aesCipherModules = False
+
+    return aesCipherModules
+
+# Function returns True if AES-CBC-128 is supported
+def IsAesSupported():
+
+    return bool(GetAesCipherModules())
+
+# Function returns AES-CBC-128 cipher for key and initialization vector
+def NewAesCbcCipher(key, iv):
+
+    Cipher, algorithms, modes, default_backend = GetAesCipherModules()
+
+    return Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+
+#region RMCP+ Constants
+
+rmcpHeader = bytearray([ 0x06, 0x00, 0xFF, 0x07 ]) # ASF RMCP v1.0, no ACK, IPMI class
+
+authTypeNone = 0x00
+authTypeRmcpPlus = 0x06
+
+payloadTypeIpmi = 0x00
+payloadTypeOpenSessionReq = 0x10
+payloadTypeOpenSessionResp = 0x11
+payloadTypeRakp1 = 0x12
+payloadTypeRakp2 = 0x13
+payloadTypeRakp3 = 0x14
+payloadTypeRakp4 = 0x15
+payloadEncryptedBit = 0x80
+payloadAuthenticatedBit = 0x40
+
+bmcAddr = 0x20
+remoteConsoleAddr = 0x81
+nextHeaderIpmi = 0x07
+
+netFnAppInt = 0x06
+cmdGetChannelAuthCapsInt = 0x38
+cmdSetSessionPrivilegeLevelInt = 0x3B
+cmdCloseSessionInt = 0x3C
+cmdSendMessageInt = 0x34
+
+# Role byte used in RAKP 1: name-only lookup bit [4]
+rakpNameOnlyLookup = 0x10
+
+# Dictionary of key (int): value (int list) pairs that define the
+# [ authentication, integrity, confidentiality ] algorithms per cipher suite
+#   authentication: 0 (none), 1 (RAKP-HMAC-SHA1)
+#   integrity: 0 (none), 1 (HMAC-SHA1-96)
+#   confidentiality: 0 (none), 1 (AES-CBC-128)
+cipherSuiteAlgorithms = {
+    0 : [ 0, 0, 0 ],
+    1 : [ 1, 0, 0 ],
+    2 : [ 1, 1, 0 ],
+    3 : [ 1, 1, 1 ]
+    }
+
+#endregion
+
+# Function calculates IPMI 8-bit checksum of byte list
+def Checksum(byteList):
+
+    return (-sum(byteList)) & 0xFF
+
+# Function will extract IP address, user name and password
+# from the IpmiUtil interface parameters used for IPMI over LAN+
+# Outputs:
+#   ipAddress, userName, password (string): None if not present
+def ParseInterfaceParams(interfaceParams):
+
+    ipAddress = None
+    userName = None
+    password = None
+
+    for idx in range(0, len(interfaceParams) - 1):
+        if interfaceParams[idx] == Config.ipmiUtilIpAddressSwitch:
+            ipAddress = interfaceParams[idx + 1]
+        elif interfaceParams[idx] == Config.ipmiUtilUserNameSwitch:
+            userName = interfaceParams[idx + 1]
+        elif interfaceParams[idx] == Config.ipmiUtilPasswordSwitch:
+            password = interfaceParams[idx + 1]
+
+    return ipAddress, userName, password
+
+# Class holds one authenticated RMCP+ session to a BMC
+class LanPlusSession:
+
+    # Constructor
+    # Inputs:
+    #   ipAddress (string): BMC IP address
+    #   userName (string): BMC user name
+    #   password (string): BMC password
+    #   privilegeLevel (int): requested maximum privilege (default: Administrator)
+    #   cipherSuite (int): cipher suite ID (0 to 3)
+    def __init__(self, ipAddress, userName, password, \
+        privilegeLevel=int(Config.ipmiUtilPrivilegeAdminValue), cipherSuite=None):
+
+        # Target Variables
+        self.ipAddress = ipAddress
+        self.userName = userName or ''
+        self.password = password or ''
+        self.port = Config.ipmiPort
+        self.privilegeLevel = privilegeLevel
+        self.cipherSuite = cipherSuite
+        if self.cipherSuite is None:
+            self.cipherSuite = Config.lanPlusCipherSuite
+
+        # Session Variables
+        self.sock = None
+        self.isOpen = False
+        self.consoleSessionId = 0 # SIDm
+        self.bmcSessionId = 0 # SIDc
+        self.sessionSeq = 0
+        self.rqSeq = 0
+        self.k1 = None # integrity key
+        self.k2 = None # confidentiality key
+        self.authAlg, self.integrityAlg, self.confAlg = \
+            cipherSuiteAlgorithms.get(self.cipherSuite, [ 1, 1, 1 ])
+        self.lastUsedTime = 0.0
+
+        # Serialize request/response pairs on this session
+        self.lock = threading.Lock()
+
+        return
+
+    #region Session Setup
+
+    # Function will open the RMCP+ session
+    # Outputs:
+    #   openPassOrFail (bool): session authenticated and activated (True) or not (False)
+    def Open(self):
+
+        # Close any existing session first
+        if self.isOpen or self.sock is not None:
+            self.Close()
+
+        if self.confAlg and not IsAesSupported():
+            UtilLogger.verboseLogger.error("LanPlusSession.Open: cipher suite " + \
+                str(self.cipherSuite) + " requires AES-CBC-128 but the " + \
+                "cryptography module is not installed.")
+            return False
+
+        try:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.settimeout(Config.lanPlusResponseTimeout)
+            self.sock.connect((self.ipAddress, self.port))
+
+            if not self.GetChannelAuthCaps():
+                return False
+            if not self.OpenSession():
+                return False
+            if not self.RakpHandshake():
+                return False
+
+            # Session is active; numbering starts at 1
+            self.isOpen = True
+            self.sessionSeq = 0
+
+            # Raise session privilege level
+            cmdPassOrFail, ccode, respBytes = self.SendRecv(\
+                netFnAppInt, cmdSetSessionPrivilegeLevelInt, \
+                bytearray([ self.privilegeLevel ]))
+            if not cmdPassOrFail or ccode != 0:
+                UtilLogger.verboseLogger.error("LanPlusSession.Open: " + \
+                    "Set Session Privilege Level failed. Completion Code: " + \
+                    str(ccode))
+                self.isOpen = False
+                return False
+
+        except Exception, e:
+            UtilLogger.verboseLogger.error("LanPlusSession.Open: " + \
+                "failed to open session with " + str(self.ipAddress) + \
+                " due to exception: " + str(e))
+            self.isOpen = False
+            return False
+
+        self.lastUsedTime = time.time()
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info("LanPlusSession.Open: " + \
+                "opened session 0x%08x with %s (cipher suite %d)" % \
+                (self.bmcSessionId, self.ipAddress, self.cipherSuite))
+
+        return True
+
+    # Function will close the RMCP+ session
+    def Close(self):
+
+        try:
+            if self.isOpen:
+                self.SendRecv(netFnAppInt, cmdCloseSessionInt, \
+                    bytearray(struct.pack('<I', self.bmcSessionId)))
+        except Exception, e:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.error("LanPlusSession.Close: " + \
+                    "exception occurred: " + str(e))
+
+        self.isOpen = False
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+        return
+
+    # Function sends Get Channel Authentication Capabilities
+    # as an IPMI v1.5 pre-session message
+    def GetChannelAuthCaps(self):
+
+        # Request IPMI v2.0 extended data for current channel
+        msg = self.BuildIpmiMsg(netFnAppInt, cmdGetChannelAuthCapsInt, \
+            bytearray([ 0x8E, self.privilegeLevel ]))
+        packet = rmcpHeader + bytearray([ authTypeNone ]) + \
+            bytearray(8) + bytearray([ len(msg) ]) + msg
+        self.sock.send(bytes(packet))
+
+        data = bytearray(self.sock.recv(1024))
+        respMsg = data[14:] # skip RMCP and IPMI v1.5 session header
+        if len(respMsg) < 8 or respMsg[6] != 0:
+            UtilLogger.verboseLogger.error("LanPlusSession.GetChannelAuthCaps: " + \
+                "command failed. Response: " + str(list(respMsg)))
+            return False
+
+        return True
+
+    # Function sends RMCP+ Open Session Request
+    # and stores the managed system session ID
+    def OpenSession(self):
+
+        self.consoleSessionId = struct.unpack('<I', os.urandom(4))[0] | 1
+
+        # Build Open Session Request payload
+        payload = bytearray([ 0x00, 0x00, 0x00, 0x00 ])
+        payload += bytearray(struct.pack('<I', self.consoleSessionId))
+        payload += bytearray([ 0x00, 0x00, 0x00, 0x08, self.authAlg, 0x00, 0x00, 0x00 ])
+        payload += bytearray([ 0x01, 0x00, 0x00, 0x08, self.integrityAlg, 0x00, 0x00, 0x00 ])
+        payload += bytearray([ 0x02, 0x00, 0x00, 0x08, self.confAlg, 0x00, 0x00, 0x00 ])
+
+        respPayload = self.SendRecvPreSession(payloadTypeOpenSessionReq, \
+            payload, payloadTypeOpenSessionResp)
+        if respPayload is None or len(respPayload) < 12 or respPayload[1] != 0:
+            UtilLogger.verboseLogger.error("LanPlusSession.OpenSession: " + \
+                "Open Session Request failed. Response: " + \
+                str(list(respPayload or [])))
+            return False
+
+        self.bmcSessionId = struct.unpack('<I', bytes(respPayload[8:12]))[0]
+
+        return True
+
+    # Function performs RAKP 1-4 handshake and derives session keys
+    def RakpHandshake(self):
+
+        userNameBytes = bytearray(self.userName)
+        kuid = bytes(bytearray(self.password)[:20].ljust(20, '\x00'))
+        roleByte = self.privilegeLevel | rakpNameOnlyLookup
+        consoleRandom = bytearray(os.urandom(16))
+        sidm = bytearray(struct.pack('<I', self.consoleSessionId))
+        sidc = bytearray(struct.pack('<I', self.bmcSessionId))
+
+        # RAKP Message 1
+        payload = bytearray([ 0x00, 0x00, 0x00, 0x00 ]) + sidc + consoleRandom + \
+            bytearray([ roleByte, 0x00, 0x00, len(userNameBytes) ]) + userNameBytes
+        respPayload = self.SendRecvPreSession(payloadTypeRakp1, payload, \
+            payloadTypeRakp2)
+        if respPayload is None or len(respPayload) < 40 or respPayload[1] != 0:
+            UtilLogger.verboseLogger.error("LanPlusSession.RakpHandshake: " + \
+                "RAKP Message 2 failed. Response: " + str(list(respPayload or [])))
+            return False
+
+        # RAKP Message 2: verify key exchange authentication code
+        bmcRandom = respPayload[8:24]
+        bmcGuid = respPayload[24:40]
+        rakp2AuthCode = bytes(respPayload[40:])
+        nameBytes = bytearray([ roleByte, len(userNameBytes) ]) + userNameBytes
+        if self.authAlg:
+            expectedAuthCode = self.Hmac(kuid, sidm + sidc + consoleRandom + \
+                bmcRandom + bmcGuid + nameBytes)
+            if expectedAuthCode != rakp2AuthCode:
+                UtilLogger.verboseLogger.error("LanPlusSession.RakpHandshake: " + \
+                    "RAKP Message 2 authentication code mismatch. " + \
+                    "Check user name and password.")
+                return False
+
+            # Derive Session Integrity Key and K1/K2
+            sik = self.Hmac(kuid, consoleRandom + bmcRandom + nameBytes)
+            self.k1 = self.Hmac(sik, '\x01' * 20)
+            self.k2 = self.Hmac(sik, '\x02' * 20)
+
+        # RAKP Message 3
+        payload = bytearray([ 0x00, 0x00, 0x00, 0x00 ]) + sidc
+        if self.authAlg:
+            payload += bytearray(self.Hmac(kuid, bmcRandom + sidm + nameBytes))
+        respPayload = self.SendRecvPreSession(payloadTypeRakp3, payload, \
+            payloadTypeRakp4)
+        if respPayload is None or len(respPayload) < 8 or respPayload[1] != 0:
+            UtilLogger.verboseLogger.error("LanPlusSession.RakpHandshake: " + \
+                "RAKP Message 4 failed. Response: " + str(list(respPayload or [])))
+            return False
+
+        # RAKP Message 4: verify integrity check value
+        if self.authAlg:
+            expectedIcv = self.Hmac(sik, consoleRandom + sidc + bmcGuid)[:12]
+            if expectedIcv != bytes(respPayload[8:20]):
+                UtilLogger.verboseLogger.error("LanPlusSession.RakpHandshake: " + \
+                    "RAKP Message 4 integrity check value mismatch.")
+                return False
+
+        return True
+
+    #endregion
+
+    #region Packet Handling
+
+    # Function returns HMAC-SHA1 of data using key
+    def Hmac(self, key, data):
+
+        return hmac.new(bytes(key), bytes(data), hashlib.sha1).digest()
+
+    # Function builds IPMI message (LUN 0 for requester and responder)
+    def BuildIpmiMsg(self, netFn, cmd, data, rsAddr=bmcAddr, \
+        rqAddr=remoteConsoleAddr, rqSeq=None):
+
+        if rqSeq is None:
+            self.rqSeq = (self.rqSeq + 1) & 0x3F
+            rqSeq = self.rqSeq
+
+        header = bytearray([ rsAddr, (netFn << 2) & 0xFF ])
+        body = bytearray([ rqAddr, (rqSeq << 2) & 0xFF, cmd ]) + bytearray(data)
+
+        return header + bytearray([ Checksum(header) ]) + body + \
+            bytearray([ Checksum(body) ])
+
+    # Function sends pre-session payload and returns matching response payload
+    def SendRecvPreSession(self, payloadType, payload, respPayloadType):
+
+        packet = rmcpHeader + bytearray([ authTypeRmcpPlus, payloadType ]) + \
+            bytearray(8) + bytearray(struct.pack('<H', len(payload))) + payload
+
+        for retryCount in range(0, Config.lanPlusMaxRetries):
+            self.sock.send(bytes(packet))
+            try:
+                while True:
+                    data = bytearray(self.sock.recv(1024))
+                    if len(data) >= 16 and data[4] == authTypeRmcpPlus and \
+                        (data[5] & 0x3F) == respPayloadType:
+                        payloadLen = struct.unpack('<H', bytes(data[14:16]))[0]
+                        return data[16:16 + payloadLen]
+            except socket.timeout:
+                if Config.debugEn:
+                    UtilLogger.verboseLogger.error("LanPlusSession.SendRecvPreSession: " + \
+                        "timeout waiting for payload type 0x%02x (retry count: %d)" % \
+                        (respPayloadType, retryCount))
+
+        return None
+
+    # Function wraps IPMI message payload in authenticated/encrypted
+    # RMCP+ session packet
+    def WrapPayload(self, payload):
+
+        payloadType = payloadTypeIpmi
+        if self.confAlg:
+            payloadType |= payloadEncryptedBit
+            iv = os.urandom(16)
+            padLen = (16 - ((len(payload) + 1) % 16)) % 16
+            plainText = payload + bytearray(range(1, padLen + 1)) + bytearray([ padLen ])
+            encryptor = NewAesCbcCipher(self.k2[:16], iv).encryptor()
+            payload = bytearray(iv) + bytearray(encryptor.update(bytes(plainText)) + \
+                encryptor.finalize())
+        if self.integrityAlg:
+            payloadType |= payloadAuthenticatedBit
+
+        # Session sequence number wraps to 1 (0 is reserved)
+        self.sessionSeq = (self.sessionSeq % 0xFFFFFFFF) + 1
+
+        sessionPacket = bytearray([ authTypeRmcpPlus, payloadType ]) + \
+            bytearray(struct.pack('<IIH', self.bmcSessionId, self.sessionSeq, \
+            len(payload))) + payload
+
+        # Append integrity trailer (pad to 4-byte boundary, pad length, next header, AuthCode)
+        if self.integrityAlg:
+            padLen = (4 - ((len(sessionPacket) + 2) % 4)) % 4
+            sessionPacket += bytearray([ 0xFF ] * padLen) + \
+                bytearray([ padLen, nextHeaderIpmi ])
+            sessionPacket += bytearray(self.Hmac(self.k1, sessionPacket)[:12])
+
+        return rmcpHeader + sessionPacket
+
+    # Function unwraps RMCP+ session packet and returns IPMI message payload
+    # (None if packet is not an IPMI payload for this session or fails integrity check)
+    def UnwrapPayload(self, data):
+
+        if len(data) < 16 or data[4] != authTypeRmcpPlus or \
+            (data[5] & 0x3F) != payloadTypeIpmi:
+            return None
+
+        sessionId, sessionSeq, payloadLen = struct.unpack('<IIH', bytes(data[6:16]))
+        if sessionId != self.consoleSessionId:
+            return None
+        payload = data[16:16 + payloadLen]
+
+        # Verify AuthCode over session header through next header
+        if data[5] & payloadAuthenticatedBit:
+            authCode = bytes(data[-12:])
+            if self.Hmac(self.k1, data[4:-12])[:12] != authCode:
+                UtilLogger.verboseLogger.error("LanPlusSession.UnwrapPayload: " + \
+                    "integrity check failed for received packet.")
+                return None
+
+        # Decrypt payload
+        if data[5] & payloadEncryptedBit:
+            decryptor = NewAesCbcCipher(self.k2[:16], \
+                bytes(payload[:16])).decryptor()
+            plainText = bytearray(decryptor.update(bytes(payload[16:])) + \
+                decryptor.finalize())
+            payload = plainText[:len(plainText) - plainText[-1] - 1]
+
+        return payload
+
+    # Function sends one IPMI request over the session and waits for its response
+    # Inputs:
+    #   netFn (int), cmd (int): request network function and command
+    #   data (bytearray): request data bytes
+    #   expectBridged (bool): wait for embedded response of a tracked Send Message
+    # Outputs:
+    #   cmdPassOrFail (bool): response received (True) or not (False)
+    #   ccode (int): completion code (None if no response)
+    #   respBytes (bytearray): response data bytes
+    def SendRecv(self, netFn, cmd, data, expectBridged=False):
+
+        msg = self.BuildIpmiMsg(netFn, cmd, data)
+        rqSeq = self.rqSeq
+
+        for retryCount in range(0, Config.lanPlusMaxRetries):
+            self.sock.send(bytes(self.WrapPayload(msg)))
+            try:
+                while True:
+                    respMsg = self.UnwrapPayload(bytearray(self.sock.recv(1024)))
+                    if respMsg is None or len(respMsg) < 8:
+                        continue
+
+                    # Match response NetFn, sequence and command
+                    if (respMsg[4] >> 2) != rqSeq or respMsg[5] != cmd or \
+                        (respMsg[1] >> 2) != (netFn | 1):
+                        continue
+
+                    ccode = respMsg[6]
+                    respBytes = respMsg[7:-1]
+
+                    # Tracked Send Message: embedded response may arrive
+                    # in this packet or in a following packet
+                    if expectBridged and ccode == 0:
+                        if len(respBytes) >= 8:
+                            return True, respBytes[6], respBytes[7:-1]
+                        expectBridged = False
+                        bridgedMsg = self.RecvBridged()
+                        if bridgedMsg is None:
+                            return False, None, bytearray()
+                        return True, bridgedMsg[6], bridgedMsg[7:-1]
+
+                    return True, ccode, respBytes
+
+            except socket.timeout:
+                if Config.debugEn:
+                    UtilLogger.verboseLogger.error("LanPlusSession.SendRecv: " + \
+                        "timeout for NetFn 0x%02x Cmd 0x%02x (retry count: %d)" % \
+                        (netFn, cmd, retryCount))
+
+        return False, None, bytearray()
+
+    # Function waits for the embedded response of a tracked Send Message
+    def RecvBridged(self):
+
+        try:
+            while True:
+                respMsg = self.UnwrapPayload(bytearray(self.sock.recv(1024)))
+                if respMsg is not None and len(respMsg) >= 15 and \
+                    respMsg[5] == cmdSendMessageInt:
+                    return respMsg[7:-1]
+        except socket.timeout:
+            UtilLogger.verboseLogger.error("LanPlusSession.RecvBridged: " + \
+                "timeout waiting for bridged response.")
+
+        return None
+
+    #endregion
+
+    #region Requests
+
+    # Function sends raw request over session, reopening session if needed
+    # Outputs: same as SendRecv
+    def SendRawCmd(self, netFn, cmd, data):
+
+        with self.lock:
+
+            # BMC drops idle sessions; reopen before the BMC timeout
+            if self.isOpen and \
+                time.time() - self.lastUsedTime > Config.lanPlusSessionIdleLimit:
+                self.Close()
+
+            if not self.isOpen and not self.Open():
+                return False, None, bytearray()
+
+            cmdPassOrFail, ccode, respBytes = self.SendRecv(netFn, cmd, data)
+            if cmdPassOrFail:
+                self.lastUsedTime = time.time()
+            else:
+                # No response: force session re-establishment on next request
+                self.Close()
+
+        return cmdPassOrFail, ccode, respBytes
+
+    # Function sends bridged request to IPMB target using tracked Send Message
+    # Inputs:
+    #   channel (int): IPMB channel number
+    #   targetAddr (int): target slave address
+    #   targetLun (int): target LUN
+    #   netFn (int), cmd (int), data (bytearray): bridged request
+    # Outputs: same as SendRecv (completion code and data of bridged response)
+    def SendBridgedCmd(self, channel, targetAddr, targetLun, netFn, cmd, data):
+
+        with self.lock:
+
+            if self.isOpen and \
+                time.time() - self.lastUsedTime > Config.lanPlusSessionIdleLimit:
+                self.Close()
+
+            if not self.isOpen and not self.Open():
+                return False, None, bytearray()
+
+            # Encapsulated IPMB request from BMC to target
+            innerMsg = self.BuildIpmiMsg(netFn, cmd, data, rsAddr=targetAddr, \
+                rqAddr=bmcAddr)
+            innerMsg[1] |= targetLun & 0x03
+            innerMsg[2] = Checksum(innerMsg[0:2])
+            sendMsgData = bytearray([ 0x40 | channel ]) + innerMsg
+
+            cmdPassOrFail, ccode, respBytes = self.SendRecv(netFnAppInt, \
+                cmdSendMessageInt, sendMsgData, expectBridged=True)
+            if cmdPassOrFail:
+                self.lastUsedTime = time.time()
+            else:
+                self.Close()
+
+        return cmdPassOrFail, ccode, respBytes
+
+    #endregion
+
+#region Session Registry
+
+# Dictionary of key (ipAddress, userName, password): value (LanPlusSession) pairs
+sessionDict = {}
+sessionDictLock = threading.Lock()
+
+# Function returns the persistent session for the target
+# (session is opened lazily on first request)
+def GetSession(ipAddress, userName, password):
+
+    with sessionDictLock:
+        sessionKey = (ipAddress, userName, password)
+        if sessionKey not in sessionDict:
+            sessionDict[sessionKey] = LanPlusSession(ipAddress, userName, password)
+        session = sessionDict[sessionKey]
+
+    return session
+
+# Function closes all open sessions
+def CloseAllSessions():
+
+    with sessionDictLock:
+        for session in sessionDict.values():
+            session.Close()
+        sessionDict.clear()
+
+    return
+
+# Function drops sessions inherited from the parent process
+# without closing them (the parent keeps using them)
+def ForgetAllSessions():
+
+    global sessionDictLock
+
+    sessionDictLock = threading.Lock()
+    sessionDict.clear()
+
+    return
+
+# Function converts native response into IpmiUtil GetRespData format
+# Outputs:
+#   cmdPassOrFail (bool): completion code is 0x00
+#   respData: list of hex strings, completion code string,
+#       'No Response Bytes' or empty list when no response received
+def FormatRespData(cmdPassOrFail, ccode, respBytes):
+
+    if not cmdPassOrFail:
+        return False, []
+    if ccode != 0:
+        return False, '%02x' % ccode
+    if not respBytes:
+        return True, 'No Response Bytes'
+
+    return True, [ '%02x' % respByte for respByte in respBytes ]
+
+#endregion
+
+# Function sends raw command over persistent LAN+ session
+# Inputs/Outputs: same as IpmiUtil.SendRawCmd
+def SendRawCmd(interfaceParams, netFn, cmd, rawBytesList):
+
+    cmdPassOrFail, ccode, respBytes = SendRawCmdBytes(interfaceParams, \
+        netFn, cmd, rawBytesList)
+
+    return FormatRespData(cmdPassOrFail, ccode, respBytes)
+
+# Function sends raw command over persistent LAN+ session
+# Inputs: same as IpmiUtil.SendRawCmd
+# Outputs: same as LanPlusSession.SendRecv
+def SendRawCmdBytes(interfaceParams, netFn, cmd, rawBytesList):
+
+    ipAddress, userName, password = ParseInterfaceParams(interfaceParams)
+    session = GetSession(ipAddress, userName, password)
+
+    startTime = time.time()
+    cmdPassOrFail, ccode, respBytes = session.SendRawCmd(int(netFn, 16), \
+        int(cmd, 16), bytearray([ int(rawByte, 16) for rawByte in rawBytesList ]))
+    CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), time.time() - startTime, \
+        ccode)
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("IpmiLanPlus.SendRawCmd: NetFn " + \
+            str(netFn) + " Cmd " + str(cmd) + " Request: " + str(rawBytesList) + \
+            " Completion Code: " + str(ccode) + " Response: " + \
+            str([ '%02x' % respByte for respByte in respBytes ]))
+
+    return cmdPassOrFail, ccode, respBytes
+
+# Function sends raw request packet to ME over persistent LAN+ session
+# Inputs/Outputs: same as IpmiUtil.SendRawCmd2ME
+#   rawBytesList (list; string): [ bus, slave address, NetFn/LUN, cmd, data.. ]
+#       as used by IpmiUtil 'cmd -m' parameter
+def SendRawCmd2ME(interfaceParams, rawBytesList):
+
+    ipAddress, userName, password = ParseInterfaceParams(interfaceParams)
+    session = GetSession(ipAddress, userName, password)
+
+    rawBytes = [ int(rawByte, 16) for rawByte in rawBytesList ]
+    cmdPassOrFail, ccode, respBytes = session.SendBridgedCmd(\
+        int(Config.ipmbChannel, 16), int(Config.meSlaveAddr, 16), \
+        int(Config.meLun, 16), rawBytes[2] >> 2, rawBytes[3], \
+        bytearray(rawBytes[4:]))
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("IpmiLanPlus.SendRawCmd2ME: Request: " + \
+            str(rawBytesList) + " Completion Code: " + str(ccode) + \
+            " Response: " + str([ '%02x' % respByte for respByte in respBytes ]))
+
+    return FormatRespData(cmdPassOrFail, ccode, respBytes)
@@ -0,0 +1,307 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Pipelined IPMI over LAN+ requests.
+
+An IpmiPipeline keeps a pool of RMCP+ sessions (IpmiLanPlus.LanPlusSession)
+to one BMC and drives them from a single select() loop: queued requests are
+spread across the sessions, each request gets a sequence number that is unique
+among the requests in flight on its session, and at most
+Config.lanPlusPipelineMaxInFlight requests are outstanding at any time.
+Responses are matched back to requests by session and sequence number, so a
+batch of requests completes at the rate the BMC answers instead of one
+round-trip (or one IpmiUtil process) per request.
+
+Bridged (Send Message) requests are not pipelined; use SendRawCmd2ME.
+"""
+
+# Built-in modules.
+import collections
+import select
+import threading
+import time
+
+# Project modules.
+import CmdStats
+import Config
+import IpmiLanPlus
+import UtilLogger
+
+# Highest request sequence number (6-bit rqSeq field)
+rqSeqMax = 0x3F
+
+# Class holds a pool of LAN+ sessions to one BMC
+class IpmiPipeline:
+
+    # Constructor
+    # Inputs:
+    #   ipAddress (string): BMC IP address
+    #   userName (string): BMC user name
+    #   password (string): BMC password
+    #   sessionCount (int): number of LAN+ sessions in pool
+    #   maxInFlight (int): requests outstanding across all sessions
+    def __init__(self, ipAddress, userName, password, \
+        sessionCount=None, maxInFlight=None):
+
+        if sessionCount is None:
+            sessionCount = Config.lanPlusPipelineSessionCount
+        if maxInFlight is None:
+            maxInFlight = Config.lanPlusPipelineMaxInFlight
+
+        self.ipAddress = ipAddress
+        self.sessionList = [ IpmiLanPlus.LanPlusSession(ipAddress, userName, \
+            password) for sessionIdx in range(0, max(sessionCount, 1)) ]
+        self.maxInFlight = max(maxInFlight, 1)
+
+        # Sequence numbers are reused only after a full wrap, so a late
+        # response to a timed-out request cannot match a newer request
+        self.sessionDepth = min(rqSeqMax // 2, \
+            -(-self.maxInFlight // len(self.sessionList)))
+
+        # One batch at a time per pipeline
+        self.lock = threading.Lock()
+
+        return
+
+    # Function will open sessions that are closed or idled out
+    # Outputs:
+    #   openCount (int): number of sessions open
+    def Open(self):
+
+        openCount = 0
+        for session in self.sessionList:
+            if session.isOpen and \
+                time.time() - session.lastUsedTime > Config.lanPlusSessionIdleLimit:
+                session.Close()
+            if session.isOpen or session.Open():
+                openCount += 1
+
+        if openCount < len(self.sessionList):
+            UtilLogger.verboseLogger.error("IpmiPipeline.Open: only " + \
+                str(openCount) + " of " + str(len(self.sessionList)) + \
+                " sessions opened with " + str(self.ipAddress))
+
+        return openCount
+
+    # Function will close all sessions in pool
+    def Close(self):
+
+        with self.lock:
+            for session in self.sessionList:
+                session.Close()
+
+        return
+
+    # Function will send all requests over the session pool and
+    # wait for their responses
+    # Inputs:
+    #   requestList (list; tuple): (netFn (int), cmd (int), data (bytearray))
+    # Outputs:
+    #   respList (list; tuple): (cmdPassOrFail, ccode, respBytes) for each
+    #       request in order, as returned by LanPlusSession.SendRecv
+    def SubmitBatch(self, requestList):
+
+        respList = [ (False, None, bytearray()) ] * len(requestList)
+        if not requestList:
+            return respList
+
+        with self.lock:
+
+            if self.Open() == 0:
+                return respList
+
+            # Open sessions, their sockets and in-flight sequence numbers
+            sessionList = [ session for session in self.sessionList \
+                if session.isOpen ]
+            sessionIdxDict = dict([ (session.sock.fileno(), sessionIdx) \
+                for sessionIdx, session in enumerate(sessionList) ])
+            inFlightList = [ {} for session in sessionList ]
+            failedSessions = set()
+
+            # In-flight request entry:
+            #   [ requestIdx, msg, deadline, retryCount, sendTime ]
+            pendingQueue = collections.deque(range(0, len(requestList)))
+            inFlightCount = 0
+
+            while pendingQueue or inFlightCount:
+
+                # Fill pipeline: least loaded session first
+                while pendingQueue and inFlightCount < self.maxInFlight:
+                    sessionIdx = min(range(0, len(sessionList)), \
+                        key=lambda idx: len(inFlightList[idx]))
+                    if len(inFlightList[sessionIdx]) >= self.sessionDepth:
+                        break
+                    session = sessionList[sessionIdx]
+                    requestIdx = pendingQueue.popleft()
+                    netFn, cmd, data = requestList[requestIdx]
+
+                    session.rqSeq = (session.rqSeq + 1) & rqSeqMax
+                    while session.rqSeq in inFlightList[sessionIdx]:
+                        session.rqSeq = (session.rqSeq + 1) & rqSeqMax
+                    msg = session.BuildIpmiMsg(netFn, cmd, data, rqSeq=session.rqSeq)
+                    session.sock.send(bytes(session.WrapPayload(msg)))
+                    sendTime = time.time()
+                    inFlightList[sessionIdx][session.rqSeq] = [ requestIdx, msg, \
+                        sendTime + Config.lanPlusResponseTimeout, 0, sendTime ]
+                    inFlightCount += 1
+
+                # Wait for responses until the earliest deadline
+                nextDeadline = min([ inFlightEntry[2] \
+                    for inFlightDict in inFlightList \
+                    for inFlightEntry in inFlightDict.itervalues() ])
+                readList, writeList, errorList = select.select(\
+                    [ session.sock for session in sessionList ], [], [], \
+                    max(nextDeadline - time.time(), 0))
+
+                for sock in readList:
+                    sessionIdx = sessionIdxDict[sock.fileno()]
+                    session = sessionList[sessionIdx]
+                    respMsg = session.UnwrapPayload(bytearray(sock.recv(1024)))
+                    if respMsg is None or len(respMsg) < 8:
+                        continue
+
+                    # Match response to in-flight request by sequence,
+                    # then check NetFn and command
+                    inFlightEntry = inFlightList[sessionIdx].get(respMsg[4] >> 2)
+                    if inFlightEntry is None:
+                        continue
+                    requestIdx = inFlightEntry[0]
+                    netFn, cmd, data = requestList[requestIdx]
+                    if respMsg[5] != cmd or (respMsg[1] >> 2) != (netFn | 1):
+                        continue
+
+                    respList[requestIdx] = (True, respMsg[6], respMsg[7:-1])
+                    CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), \
+                        time.time() - inFlightEntry[4], respMsg[6])
+                    del inFlightList[sessionIdx][respMsg[4] >> 2]
+                    inFlightCount -= 1
+                    session.lastUsedTime = time.time()
+
+                # Resend or fail requests past their deadline
+                currentTime = time.time()
+                for sessionIdx, inFlightDict in enumerate(inFlightList):
+                    session = sessionList[sessionIdx]
+                    for rqSeq, inFlightEntry in inFlightDict.items():
+                        if inFlightEntry[2] > currentTime:
+                            continue
+                        inFlightEntry[3] += 1
+                        if inFlightEntry[3] < Config.lanPlusMaxRetries:
+                            session.sock.send(bytes(session.WrapPayload(\
+                                inFlightEntry[1])))
+                            inFlightEntry[2] = currentTime + \
+                                Config.lanPlusResponseTimeout
+                            continue
+                        netFn, cmd, data = requestList[inFlightEntry[0]]
+                        CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), \
+                            currentTime - inFlightEntry[4], None)
+                        if Config.debugEn:
+                            UtilLogger.verboseLogger.error(\
+                                "IpmiPipeline.SubmitBatch: timeout for " + \
+                                "NetFn 0x%02x Cmd 0x%02x (session %d)" % \
+                                (netFn, cmd, sessionIdx))
+                        del inFlightDict[rqSeq]
+                        inFlightCount -= 1
+                        failedSessions.add(sessionIdx)
+
+            # No response: force session re-establishment on next batch
+            for sessionIdx in failedSessions:
+                sessionList[sessionIdx].Close()
+
+        return respList
+
+#region Pipeline Registry
+
+# Dictionary of key (ipAddress, userName, password): value (IpmiPipeline) pairs
+pipelineDict = {}
+pipelineDictLock = threading.Lock()
+
+# Function returns the persistent pipeline for the target
+# (sessions are opened lazily on first batch)
+def GetPipeline(interfaceParams):
+
+    ipAddress, userName, password = \
+        IpmiLanPlus.ParseInterfaceParams(interfaceParams)
+
+    with pipelineDictLock:
+        pipelineKey = (ipAddress, userName, password)
+        if pipelineKey not in pipelineDict:
+            pipelineDict[pipelineKey] = IpmiPipeline(ipAddress, userName, password)
+        pipeline = pipelineDict[pipelineKey]
+
+    return pipeline
+
+# Function closes all pipeline sessions
+def CloseAllPipelines():
+
+    with pipelineDictLock:
+        for pipeline in pipelineDict.values():
+            pipeline.Close()
+        pipelineDict.clear()
+
+    return
+
+# Function drops pipelines inherited from the parent process
+# without closing them (the parent keeps using them)
+def ForgetAllPipelines():
+
+    global pipelineDictLock
+
+    pipelineDictLock = threading.Lock()
+    pipelineDict.clear()
+
+    return
+
+#endregion
+
+# Function sends raw commands over the target's pipeline
+# Inputs/Outputs: same as IpmiUtil.SendRawCmdBatch
+#   cmdList (list; tuple): (netFn, cmd, rawBytesList) as hex strings
+def SendRawCmdBatch(interfaceParams, cmdList):
+
+    respList = SendRawCmdBatchBytes(interfaceParams, cmdList)
+
+    return True, [ IpmiLanPlus.FormatRespData(cmdPassOrFail, ccode, respBytes) \
+        for cmdPassOrFail, ccode, respBytes in respList ]
+
+# Function sends raw commands over the target's pipeline
+# Inputs: same as SendRawCmdBatch
+# Outputs:
+#   respList (list; tuple): (cmdPassOrFail, ccode, respBytes) for each
+#       request, same as LanPlusSession.SendRecv
+def SendRawCmdBatchBytes(interfaceParams, cmdList):
+
+    requestList = [ (int(netFn, 16), int(cmd, 16), \
+        bytearray([ int(rawByte, 16) for rawByte in rawBytesList ])) \
+        for netFn, cmd, rawBytesList in cmdList ]
+
+    respList = GetPipeline(interfaceParams).SubmitBatch(requestList)
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("IpmiPipeline.SendRawCmdBatch: " + \
+            str(len(requestList)) + " requests, " + \
+            str(len([ resp for resp in respList if resp[0] ])) + " responses.")
+
+    return respList
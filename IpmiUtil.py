@@ -24,17 +24,29 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 # Built-in modules.
+import binascii
 import datetime
 import math
 from subprocess import Popen, PIPE
 import os
 import re
+import tempfile
 import time
 import types
 
 # Project modules.
+import CmdStats
 import Config
-from Helper import calc2sComplementHexString2Int
+import FwUpdatePoller
+import Helper
+import IpmiLanPlus
+import IpmiPipeline
+import MeBridge
+import RespCache
+import SdrCache
+import SelMatcher
+import SelReader
+import TransportReplay
 import UtilLogger
 import XmlParser
 
@@ -56,8 +68,26 @@ def RunIpmiUtil(*args):
             processCmd.append(param)
 
     # Run IpmiUtil and get stdout and stderr
-    process = Popen(processCmd, stdout=PIPE, stderr=PIPE)
-    out, err = process.communicate()
+    # (served from record file in replay mode; see TransportReplay)
+    startTime = time.time()
+    if TransportReplay.IsReplaying():
+        out, err = TransportReplay.Replay(processCmd[1:])
+    else:
+        process = Popen(processCmd, stdout=PIPE, stderr=PIPE)
+        out, err = process.communicate()
+        if TransportReplay.IsRecording():
+            TransportReplay.Record(processCmd[1:], out, err, \
+                time.time() - startTime)
+
+    # Raw requests are recorded by NetFn/Cmd in SendRawCmdResp/SendRawCmd2MEOnce
+    if len(processCmd) > 1 and processCmd[1] != IpmiUtilCmds['raw'][0]:
+        CmdStats.RecordCmd('IpmiUtil ' + processCmd[1], time.time() - startTime, \
+            'err' if err else 0)
+
+    # Power commands may reset the BMC or change chassis power state
+    if Config.respCacheEnabled and len(processCmd) > 1 and \
+        processCmd[1] in ( IpmiUtilCmds['powercycle'][0], 'reset' ):
+        RespCache.FlushRespCache(reason = 'IpmiUtil ' + processCmd[1])
 
     # Print additional output to verbose log
     # if debugEn is True
@@ -90,7 +120,8 @@ IpmiUtilCmds = {
     'setnextboot2removable' : [ 'power', '-f' ],
     'setnextboot2hdd' : [ 'power', '-h' ],
     'setnextboot2network' : [ 'power', '-p' ],
-    'wcsfile' : [ 'wcs', 'file' ]
+    'wcsfile' : [ 'wcs', 'file' ],
+    'events' : [ 'events', '-f' ]
     }
 
 # Function uses IpmiUtil Wcs Extention
@@ -126,19 +157,173 @@ def RunWcsFile(interfaceParams, filePath):
 
     return cmdPassOrFail, respData
 
-def SendRawCmd(interfaceParams, netFn, cmd, rawBytesList):
+# Regular expression for single pass parse of IpmiUtil raw 'cmd' output
+# Groups: (1) response data bytes, (2) failed completion code,
+#   (3) success with no response bytes
+respDataRegEx = re.compile(\
+    r'respData\[len=\d+\]: ?([0-9a-fA-F ]*)|' + \
+    r'ccode ([0-9a-fA-F]+)|' + \
+    r'(completed successfully)')
 
-    # Default: cmd failed
-    cmdPassOrFail = False
-    respData = []
-    processCmd = []
+# Class holds a parsed IPMI response
+#   cmdPassOrFail (bool): response received with 0x00 completion code
+#   completionCode (int): completion code (None if no response)
+#   data (bytearray): response data bytes following completion code
+#   rawOutput (string): unparsed IpmiUtil output, kept for logging only
+class IpmiResponse(object):
+
+    __slots__ = ('cmdPassOrFail', 'completionCode', 'data', 'rawOutput')
+
+    # Constructor
+    def __init__(self, cmdPassOrFail = False, completionCode = None, \
+        data = None, rawOutput = None):
+
+        self.cmdPassOrFail = cmdPassOrFail
+        self.completionCode = completionCode
+        self.data = data if data is not None else bytearray()
+        self.rawOutput = rawOutput
+
+        return
+
+    # Function will return response in GetRespData format:
+    #   list of hex strings, completion code string,
+    #   'No Response Bytes' or empty list when no response received
+    def GetRespData(self):
+
+        if not self.cmdPassOrFail:
+            if self.completionCode is None:
+                return []
+            return '%02x' % self.completionCode
+        if not self.data:
+            return 'No Response Bytes'
+
+        return [ '%02x' % respByte for respByte in self.data ]
+
+    def __str__(self):
+
+        return str(self.GetRespData())
+
+# Function will parse IpmiUtil output for IpmiUtil raw 'cmd'
+# in a single pass over the output
+# Inputs:
+#   parseData (string): IpmiUtil output
+# Outputs:
+#   resp (IpmiResponse): parsed response
+def ParseRespData(parseData):
+
+    resp = IpmiResponse(rawOutput = parseData)
+
+    for match in respDataRegEx.finditer(parseData):
+
+        respBytes, ccode, completedSuccessfully = match.groups()
+
+        # "respData[len=<num>]: <rawByte> <rawByte>.."
+        if respBytes is not None:
+            resp.cmdPassOrFail = True
+            resp.completionCode = 0
+            try:
+                resp.data = bytearray(binascii.unhexlify(\
+                    ''.join(respBytes.split())))
+            except (TypeError, binascii.Error):
+                resp.data = bytearray(\
+                    [ int(respByte, 16) for respByte in respBytes.split() ])
+            break
+
+        # "..ccode <completion code>.." when cmd execution failed
+        elif ccode is not None:
+            resp.cmdPassOrFail = False
+            resp.completionCode = int(ccode, 16)
+            break
+
+        # Command has 00 completion code but no response bytes
+        elif completedSuccessfully is not None:
+            resp.cmdPassOrFail = True
+            resp.completionCode = 0
+
+    return resp
+
+# Regular expressions for parsing IpmiUtil Wcs file output
+wcsFileEntryRegEx = re.compile(r'^\s*Processing entry\s+\d+.*$', re.M)
+wcsFileRespBytesRegEx = re.compile(\
+    r'^\s*((?:[0-9a-fA-F]{2}[ \t]+)*[0-9a-fA-F]{2})[ \t]*$', re.M)
+
+# Function will convert NetFn for use with IpmiUtil raw 'cmd'
+# [7:2] : Netfn ; [1:0] : Lun
+def ConvertNetFn2FnLun(netFn):
 
-    # Convert NetFn for use with IpmiUtil
-    # [7:2] : Netfn ; [1:0] : Lun
     fnLun = '00'
     if netFn is not '00' and netFn:
         fnLun = hex(int(netFn, 16) << 2).lstrip("0x")
 
+    return fnLun
+
+def SendRawCmd(interfaceParams, netFn, cmd, rawBytesList, useCache = True):
+
+    resp = SendRawCmdResp(interfaceParams, netFn, cmd, rawBytesList, useCache)
+
+    return resp.cmdPassOrFail, resp.GetRespData()
+
+# Function will send raw command and return parsed IpmiResponse
+# Inputs: same as SendRawCmd
+#   useCache (bool): use RespCache if Config.respCacheEnabled
+#       (set to False to always query the BMC, e.g. for liveness checks)
+# Outputs:
+#   resp (IpmiResponse): integer completion code and bytearray data
+def SendRawCmdResp(interfaceParams, netFn, cmd, rawBytesList, useCache = True):
+
+    # Check response cache (reset/chassis control flush target's responses)
+    if Config.respCacheEnabled:
+        if RespCache.IsFlushCmd(netFn, cmd):
+            RespCache.FlushRespCache(interfaceParams, \
+                'NetFn 0x' + netFn + ' Cmd 0x' + cmd)
+        elif useCache:
+            cacheHit, ccode, respBytes = RespCache.GetResp(\
+                interfaceParams, netFn, cmd, rawBytesList)
+            if cacheHit:
+                return IpmiResponse(True, ccode, respBytes)
+
+    # Send over persistent native session if enabled for IPMI over LAN+
+    # (timed in IpmiLanPlus.SendRawCmdBytes)
+    if interfaceParams and \
+        Config.ipmiTransport == Config.ipmiTransportLanPlus:
+        cmdPassOrFail, ccode, respBytes = IpmiLanPlus.SendRawCmdBytes(\
+            interfaceParams, netFn, cmd, rawBytesList)
+        if not cmdPassOrFail:
+            return IpmiResponse()
+        resp = IpmiResponse(ccode == 0, ccode, respBytes)
+    else:
+        startTime = time.time()
+        resp = SendRawCmdRespLocal(interfaceParams, netFn, cmd, rawBytesList)
+        CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), \
+            time.time() - startTime, resp.completionCode)
+
+    if Config.respCacheEnabled and resp.cmdPassOrFail:
+        RespCache.PutResp(interfaceParams, netFn, cmd, rawBytesList, \
+            resp.completionCode, resp.data)
+
+    return resp
+
+# Function will send raw command using OpenIPMI device or IpmiUtil
+# and return parsed IpmiResponse
+# Inputs/Outputs: same as SendRawCmdResp
+def SendRawCmdRespLocal(interfaceParams, netFn, cmd, rawBytesList):
+
+    # Send through OpenIPMI device if enabled for KCS
+    # (imported on first use: Linux only)
+    if not interfaceParams and \
+        Config.kcsTransport == Config.kcsTransportOpenIpmi:
+        import IpmiDev
+        cmdPassOrFail, ccode, respBytes = IpmiDev.SendRawCmdBytes(\
+            interfaceParams, netFn, cmd, rawBytesList)
+        if not cmdPassOrFail:
+            return IpmiResponse()
+        return IpmiResponse(ccode == 0, ccode, respBytes)
+
+    processCmd = []
+
+    # Convert NetFn for use with IpmiUtil
+    fnLun = ConvertNetFn2FnLun(netFn)
+
     # Construct command line to execute with IpmiUtil
     for cmdParam in IpmiUtilCmds.get('raw'):
         processCmd.append(cmdParam)
@@ -155,20 +340,236 @@ def SendRawCmd(interfaceParams, netFn, cmd, rawBytesList):
     out, err = RunIpmiUtil(processCmd)
     if err:
         UtilLogger.verboseLogger.error("Received error for RunIpmiUtil: " + err)
+        return IpmiResponse(rawOutput = out)
+
+    # Parse output
+    return ParseRespData(out)
+
+# Function will send a list of raw commands to the BMC
+# in a single IpmiUtil invocation using the Wcs file extension
+# (one 'cmd:' line per request in a temporary script file)
+# Responses are cached, and reset/chassis control flush the cache,
+# the same as for SendRawCmd
+# Inputs:
+#   interfaceParams (list; string): interface parameters for LAN+/KCS
+#   cmdList (list; tuple): (netFn, cmd, rawBytesList) for each request
+# Outputs:
+#   batchPassOrFail (bool): True if the batch was executed and
+#       a response was received for every request
+#   respList (list; tuple): (cmdPassOrFail, respData) for each request,
+#       in the same order and format as returned by SendRawCmd
+def SendRawCmdBatch(interfaceParams, cmdList):
+
+    if not cmdList:
+        return True, []
+
+    # OpenIPMI device: no process startup to amortize
+    if not interfaceParams and \
+        Config.kcsTransport == Config.kcsTransportOpenIpmi:
+        return True, [ SendRawCmd(interfaceParams, netFn, cmd, rawBytesList) \
+            for netFn, cmd, rawBytesList in cmdList ]
+
+    # Check response cache
+    # A batch with reset/chassis control flushes the target's responses
+    # and bypasses the cache, since responses of requests before the
+    # flush command may no longer be valid after the batch
+    respObjList = [ None ] * len(cmdList)
+    flushCmdList = [ 'NetFn 0x' + netFn + ' Cmd 0x' + cmd \
+        for netFn, cmd, rawBytesList in cmdList \
+        if RespCache.IsFlushCmd(netFn, cmd) ]
+    useCache = Config.respCacheEnabled and not flushCmdList
+    if Config.respCacheEnabled and flushCmdList:
+        RespCache.FlushRespCache(interfaceParams, ', '.join(flushCmdList))
+    elif useCache:
+        for cmdIdx, (netFn, cmd, rawBytesList) in enumerate(cmdList):
+            cacheHit, ccode, respBytes = RespCache.GetResp(\
+                interfaceParams, netFn, cmd, rawBytesList)
+            if cacheHit:
+                respObjList[cmdIdx] = IpmiResponse(True, ccode, respBytes)
+
+    sendIdxList = [ cmdIdx for cmdIdx, resp in enumerate(respObjList) \
+        if resp is None ]
+    sendCmdList = [ cmdList[cmdIdx] for cmdIdx in sendIdxList ]
+
+    # Native sessions: keep all commands in flight over the session pool
+    # (timed in IpmiPipeline)
+    batchPassOrFail = True
+    if not sendCmdList:
+        sendRespList = []
+    elif interfaceParams and \
+        Config.ipmiTransport == Config.ipmiTransportLanPlus:
+        sendRespList = [ IpmiResponse(ccode == 0, ccode, respBytes) \
+            if cmdPassOrFail else IpmiResponse() \
+            for cmdPassOrFail, ccode, respBytes in \
+            IpmiPipeline.SendRawCmdBatchBytes(interfaceParams, sendCmdList) ]
     else:
-        # Parse output
-        cmdPassOrFail, respData = GetRespData(out)
+        batchPassOrFail, sendRespList = SendRawCmdBatchWcsFile(\
+            interfaceParams, sendCmdList)
+
+    for cmdIdx, resp in zip(sendIdxList, sendRespList):
+        respObjList[cmdIdx] = resp
+        netFn, cmd, rawBytesList = cmdList[cmdIdx]
+        if useCache and resp.cmdPassOrFail:
+            RespCache.PutResp(interfaceParams, netFn, cmd, rawBytesList, \
+                resp.completionCode, resp.data)
+
+    return batchPassOrFail, [ (resp.cmdPassOrFail, resp.GetRespData()) \
+        for resp in respObjList ]
+
+# Function will send a list of raw commands to the BMC
+# in a single IpmiUtil Wcs file invocation
+# Each command is recorded in CmdStats with the batch duration
+# divided evenly between the commands
+# If the Wcs file output cannot be parsed, the commands are sent
+# again one at a time
+# Inputs: same as SendRawCmdBatch
+# Outputs:
+#   batchPassOrFail (bool): True if a response was parsed for
+#       every request
+#   respList (list; IpmiResponse): response for each request
+def SendRawCmdBatchWcsFile(interfaceParams, cmdList):
+
+    # Default: batch failed
+    batchPassOrFail = False
+    respList = []
+
+    # Construct Wcs file script
+    scriptLines = []
+    for netFn, cmd, rawBytesList in cmdList:
+        cmdBytes = [ Config.bmcBusId, Config.bmcSlaveAddr, \
+            ConvertNetFn2FnLun(netFn), cmd ]
+        cmdBytes.extend(rawBytesList)
+        scriptLines.append('cmd:' + ' '.join(cmdBytes))
+
+    fileHandle, filePath = tempfile.mkstemp(suffix = '.txt', \
+        prefix = 'SendRawCmdBatch')
+    try:
+        os.write(fileHandle, '\n'.join(scriptLines) + '\n')
+        os.close(fileHandle)
+
+        # Run all commands with a single IpmiUtil process
+        startTime = time.time()
+        runPassOrFail, out = RunWcsFile(interfaceParams, filePath)
+        cmdLatency = (time.time() - startTime) / len(cmdList)
+        if runPassOrFail:
+            batchPassOrFail, respList = \
+                GetWcsFileRespData(out, len(cmdList))
+    finally:
+        os.remove(filePath)
+
+    if batchPassOrFail:
+        for (netFn, cmd, rawBytesList), resp in zip(cmdList, respList):
+            CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), \
+                cmdLatency, resp.completionCode)
+        return batchPassOrFail, respList
+
+    # Fall back to one IpmiUtil invocation per command
+    UtilLogger.verboseLogger.error(\
+        "SendRawCmdBatch: unable to parse response for all " + \
+        str(len(cmdList)) + " commands. Sending commands one at a time.")
+    respList = []
+    for netFn, cmd, rawBytesList in cmdList:
+        startTime = time.time()
+        resp = SendRawCmdRespLocal(interfaceParams, netFn, cmd, rawBytesList)
+        CmdStats.RecordCmd(CmdStats.GetCmdKey(netFn, cmd), \
+            time.time() - startTime, resp.completionCode)
+        respList.append(resp)
+
+    return all(resp.completionCode is not None for resp in respList), \
+        respList
+
+# Function will parse output of IpmiUtil Wcs file extension
+# into a list of IpmiResponse
+# Output for each script entry is expected as a 'Processing entry'
+# header followed by either the response bytes, starting with the
+# completion code, or an 'ipmi_sendrecv Error' line
+# Inputs:
+#   parseData (string): IpmiUtil Wcs file output
+#   expectedCount (int): number of commands in the script
+# Outputs:
+#   parseSuccess (bool): True if all entries were found
+#   respList (list; IpmiResponse): response for each entry
+def GetWcsFileRespData(parseData, expectedCount):
 
-    return cmdPassOrFail, respData
+    respList = []
+
+    # Split output into one section per script entry
+    sections = wcsFileEntryRegEx.split(parseData)[1:]
+    for section in sections:
+
+        resp = IpmiResponse(rawOutput = section)
+
+        # Response bytes line: completion code followed by data
+        respMatch = wcsFileRespBytesRegEx.search(section)
+        if 'ipmi_sendrecv Error' in section or not respMatch:
+            pass
+        else:
+            respBytes = bytearray([ int(respByte, 16) \
+                for respByte in respMatch.group(1).split() ])
+            resp.completionCode = respBytes[0]
+            resp.cmdPassOrFail = resp.completionCode == 0
+            if resp.cmdPassOrFail:
+                resp.data = respBytes[1:]
+
+        respList.append(resp)
+
+    parseSuccess = len(respList) == expectedCount
+    if not parseSuccess:
+        respList = (respList + [ IpmiResponse() \
+            for cmdIdx in range(expectedCount) ])[:expectedCount]
+
+    return parseSuccess, respList
 
 # Function will send raw request packet to ME using 
 # -m IpmiUtil parameter (SendMessage)
+# Node Busy (0xC0) responses are retried with backoff by MeBridge
 def SendRawCmd2ME(interfaceParams, rawBytesList):
 
+    cmdPassOrFail, respData, retryCount = MeBridge.SendBridgedCmd(\
+        interfaceParams, rawBytesList)
+
+    return cmdPassOrFail, respData
+
+# Function will send raw request packet to ME once
+# (no retry on Node Busy) using -m IpmiUtil parameter (SendMessage)
+def SendRawCmd2MEOnce(interfaceParams, rawBytesList):
+
+    startTime = time.time()
+    cmdPassOrFail, respData = SendRawCmd2MELocal(interfaceParams, rawBytesList)
+
+    # Completion code: None if no response
+    ccode = 0
+    if not cmdPassOrFail:
+        ccode = int(respData, 16) if isinstance(respData, basestring) else None
+    try:
+        cmdKey = CmdStats.GetCmdKey(int(rawBytesList[2], 16) >> 2, \
+            rawBytesList[3], 'ME')
+    except (IndexError, ValueError):
+        cmdKey = 'ME Unknown'
+    CmdStats.RecordCmd(cmdKey, time.time() - startTime, ccode)
+
+    return cmdPassOrFail, respData
+
+# Function will send raw request packet to ME once over LAN+, OpenIPMI
+# device or IpmiUtil
+# Inputs/Outputs: same as SendRawCmd2MEOnce
+def SendRawCmd2MELocal(interfaceParams, rawBytesList):
+
     # Default: cmd failed
     cmdPassOrFail = False
     respData = []
-    processCmd = []
+
+    # Send over persistent native session if enabled for IPMI over LAN+
+    if interfaceParams and \
+        Config.ipmiTransport == Config.ipmiTransportLanPlus:
+        return IpmiLanPlus.SendRawCmd2ME(interfaceParams, rawBytesList)
+
+    # Send through OpenIPMI device if enabled for KCS
+    # (imported on first use: Linux only)
+    if not interfaceParams and \
+        Config.kcsTransport == Config.kcsTransportOpenIpmi:
+        import IpmiDev
+        return IpmiDev.SendRawCmd2ME(interfaceParams, rawBytesList)
 
     # Define -m parameter for IpmiUtil Send Message
     meParam = '-m' + \
@@ -177,6 +578,7 @@ def SendRawCmd2ME(interfaceParams, rawBytesList):
         Config.meLun
 
     # Construct command line to execute with IpmiUtil
+    processCmd = []
     for cmdParam in IpmiUtilCmds.get('raw'):
         processCmd.append(cmdParam)
     for interfaceParam in interfaceParams:
@@ -185,27 +587,14 @@ def SendRawCmd2ME(interfaceParams, rawBytesList):
     for rawByte in rawBytesList:
         processCmd.append(rawByte)
 
-    # Retry send message for max sendRawCmd2MEMaxRetryCount count
-    retryCount = Config.ipmiUtilSendMsgMaxRetries
-    while retryCount > 0:
-
-        # Process command using RunIpmiUtil
-        out, err = RunIpmiUtil(processCmd)
-
-        if err:
-            UtilLogger.verboseLogger.error("Received error for RunIpmiUtil: " + err)
-            break
-        else:
-            # Parse output
-            cmdPassOrFail, respData = GetRespData(out)
+    # Process command using RunIpmiUtil
+    out, err = RunIpmiUtil(processCmd)
 
-        # Check for non-Success completion codes
-        # Allowed:
-        #   0xCC Node Busy
-        if not cmdPassOrFail and respData == 'c0':
-            retryCount -= 1
-        else:
-            break
+    if err:
+        UtilLogger.verboseLogger.error("Received error for RunIpmiUtil: " + err)
+    else:
+        # Parse output
+        cmdPassOrFail, respData = GetRespData(out)
 
     return cmdPassOrFail, respData
 
@@ -213,48 +602,9 @@ def SendRawCmd2ME(interfaceParams, rawBytesList):
 # from IpmiUtil output for IpmiUtil raw 'cmd'
 def GetRespData(parseData):
 
-    # Init variables
-    parseSuccess = False
-    parsedData = []
-
-    # parse output
-    for item in parseData.split("\n"):
-        
-        # Check for response data raw bytes
-        if "respData" in item:
+    resp = ParseRespData(parseData)
 
-            # Extract raw bytes from output of syntax
-            # "respData[len=<num>]: <rawByte> <rawByte>.."
-            parsedData = item.split(": ")[1].split(" ")
-            parseSuccess = True
-
-            # Check that last byte is an integer
-            if len(parsedData) > 0:
-                if not parsedData[len(parsedData) - 1].isdigit():
-                    parsedData.pop(len(parsedData) - 1)
-
-            break
-    
-        # Check for completion code string if 
-        # cmd execution failed
-        elif "ccode" in item:
-
-            # Command failed to execute
-            # Retrieve completion code (ccode)
-            # "..ccode <completion code>.."
-            itemList = item.split(" ")
-            parsedData = itemList[itemList.index("ccode") + 1]
-
-            break
-
-        # Check for "completed successfully" string
-        # This scenario arises when a command has 00 completion code
-        # but no response bytes
-        elif "completed successfully" in item:
-            parseSuccess = True
-            parsedData = 'No Response Bytes'
-
-    return parseSuccess, parsedData
+    return resp.cmdPassOrFail, resp.GetRespData()
 
 # Funtion will get sensor ID using 'IpmiUtil.exe sensor'
 # Inputs:
@@ -267,37 +617,16 @@ def GetRespData(parseData):
 #   sensorId (string): 
 def GetIpmiUtilSensorId(interfaceParams, sensorName):
 
-    # Init variables
-    parseSuccess = False
-    sensorId = None
-    processCmd = []
+    # Get sensor ID from a full 'IpmiUtil.exe sensor' listing
+    parseSuccess, sensorDict = GetIpmiUtilSensorSnapshot(interfaceParams)
+    if not parseSuccess:
+        return False, None
 
-    # Generate IpmiUtil command
-    processCmd.append('sensor')
-    for interfaceParam in interfaceParams:
-        processCmd.append(interfaceParam)
+    parseSuccess, sensorInfo = FindSnapshotSensor(sensorDict, sensorName)
+    if not parseSuccess:
+        return False, None
 
-    # Get sensor reading using 'IpmiUtil.exe sensor -i <sdrId>'
-    out, err = RunIpmiUtil(\
-        processCmd)
-    if err:
-        UtilLogger.verboseLogger.error("Received error for RunIpmiUtil: " + err)
-        sensorReading = err
-    else:
-        # Parse output
-        for item in out.split("\n"):
-        
-            # Check for response data raw bytes
-            if (IsThisSensor(item, sensorName)):
-
-                # Extract sensor reading from output of syntax
-                # "<sensor> = <> OK   <sensorReading> ..."
-                sensorId = item.split()[0]
-                parseSuccess = True
-
-                break
-
-    return parseSuccess, sensorId
+    return True, sensorInfo[0]
 
 #endregion
 
@@ -350,6 +679,66 @@ def GetIpmiUtilSensorReading(interfaceParams, sdrId, sensorName):
 
     return parseSuccess, sensorReading
 
+# Regular expression for one 'IpmiUtil.exe sensor' reading line
+# "<sdrId> SDR <type> .. snum <num> <sensorName> = <raw> <status> <reading> .."
+# Groups: (1) SDR ID, (2) sensor name, (3) status, (4) sensor reading
+sensorLineRegEx = re.compile(\
+    r'^\s*([0-9a-fA-F]{4})\s+SDR\s+\S+\s+(?:.*?\bsnum\s+[0-9a-fA-F]{2}\s+)?' + \
+    r'(.*?)[ \t]+=[ \t]+\S+[ \t]+(\S+)(?:[ \t]+(\S+))?', re.M)
+
+# Function will read all sensors with a single 'IpmiUtil.exe sensor' listing
+# Inputs:
+#   interfaceParams (list; string): interface parameters for LAN+/KCS
+# Outputs:
+#   parseSuccess (bool): listing ran and at least one sensor was parsed
+#   sensorDict (dict): sensor name (string):
+#       (sensorId (string), sensorReading (float or None), sensorStatus (string))
+def GetIpmiUtilSensorSnapshot(interfaceParams):
+
+    # Init variables
+    sensorDict = {}
+    processCmd = [ 'sensor' ]
+    for interfaceParam in interfaceParams:
+        processCmd.append(interfaceParam)
+
+    # Get all sensor readings using 'IpmiUtil.exe sensor'
+    out, err = RunIpmiUtil(processCmd)
+    if err:
+        UtilLogger.verboseLogger.error("Received error for RunIpmiUtil: " + err)
+        return False, sensorDict
+
+    # Parse output
+    for match in sensorLineRegEx.finditer(out):
+        sensorId, sensorName, sensorStatus, sensorReading = match.groups()
+        try:
+            sensorReading = float(sensorReading)
+        except (TypeError, ValueError): # discrete sensor or no reading
+            sensorReading = None
+
+        # First listing line wins for duplicate names
+        if sensorName not in sensorDict:
+            sensorDict[sensorName] = (sensorId, sensorReading, sensorStatus)
+
+    return len(sensorDict) > 0, sensorDict
+
+# Function will find sensor in GetIpmiUtilSensorSnapshot output
+# Sensor names as used in sensor list XML files match the end of
+# the text before '=' (same as IsThisSensor) when not an exact match
+# Outputs:
+#   findSuccess (bool): sensor found
+#   sensorInfo (tuple): (sensorId, sensorReading, sensorStatus) or None
+def FindSnapshotSensor(sensorDict, sensorName):
+
+    sensorInfo = sensorDict.get(sensorName)
+    if sensorInfo is not None:
+        return True, sensorInfo
+
+    for (pairKey, pairValue) in sensorDict.iteritems():
+        if pairKey.endswith(sensorName):
+            return True, pairValue
+
+    return False, None
+
 """
 This method checks whether sensor reading 'sensorReadingLine' corresponds to sensor 'sensorName' or not.
 
@@ -412,125 +801,73 @@ def VerifySelAgainstXmlList(interfaceParams, selListXml):
     unexpectedSels = None
 
     # Get Sel entries
-    processCmd = ['sel', '-u']
-    for param in interfaceParams:
-        processCmd.append(param)
-    out, err = RunIpmiUtil(processCmd)  # out and err are strings.
-    if err:
-        UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
-            "IPMI Command 'sel -u' Error: " + str(err))
-        return selPassOrFail, unexpectedSels
-    else:
+    if Config.selCursorEnabled:
+        # Only SEL events added since last SEL read or checkpoint
+        readPassOrFail, actualSelList = SelReader.GetNewSelEntries(interfaceParams)
+        if not readPassOrFail:
+            UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
+                "unable to read new SEL events.")
+            return selPassOrFail, unexpectedSels
         UtilLogger.verboseLogger.info("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
-            "IPMI Command 'sel -u' returned SEL events: \n" + str(out))
-
-    # No errors from IPMI Command 'sel -u'.
-
-    # Get list of all SEL records returned from command (this is the
-    # list of actual event logs).
-    # First get list of all log messages returned from command (this
-    # includes some information other than the SEL events, such as
-    # BMC version, IPMI version, etc.).
-    rawSelList = out.splitlines()  # List of lines in the string out.
-                                   # Each line is either an SEL event
-                                   # or some other info.
-    # Next we get the list of SEL events only.
-    count = len(rawSelList)
-    headerIndex = -1  # Index of header of SEL records in list.
-    for i in range(count-1):
-        if (rawSelList[i].startswith("RecId Date/Time")):
-            headerIndex = i
-            break
-    if (headerIndex == -1):
-        UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
-            "Header for SEL Records was not found!")
-        return selPassOrFail, unexpectedSels
-    actualSelList = rawSelList[headerIndex+1 : count-1]
+            "new SEL events: \n" + "\n".join(actualSelList))
+    else:
+        processCmd = ['sel', '-u']
+        for param in interfaceParams:
+            processCmd.append(param)
+        out, err = RunIpmiUtil(processCmd)  # out and err are strings.
+        if err:
+            UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
+                "IPMI Command 'sel -u' Error: " + str(err))
+            return selPassOrFail, unexpectedSels
+        else:
+            UtilLogger.verboseLogger.info("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
+                "IPMI Command 'sel -u' returned SEL events: \n" + str(out))
+
+        # No errors from IPMI Command 'sel -u'.
+
+        # Get list of all SEL records returned from command (this is the
+        # list of actual event logs).
+        # First get list of all log messages returned from command (this
+        # includes some information other than the SEL events, such as
+        # BMC version, IPMI version, etc.).
+        rawSelList = out.splitlines()  # List of lines in the string out.
+                                       # Each line is either an SEL event
+                                       # or some other info.
+        # Next we get the list of SEL events only.
+        count = len(rawSelList)
+        headerIndex = -1  # Index of header of SEL records in list.
+        for i in range(count-1):
+            if (rawSelList[i].startswith("RecId Date/Time")):
+                headerIndex = i
+                break
+        if (headerIndex == -1):
+            UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
+                "Header for SEL Records was not found!")
+            return selPassOrFail, unexpectedSels
+        actualSelList = rawSelList[headerIndex+1 : count-1]
 
     # Validate the returned SEL log events against list of SEL events
-    # in input selListXml.
-
-    selReqList = []  # List containing all required SEL events.
-                     # Each element in the list is a nested list [Event_Text, duplicate],
-                     # where Event_Text is an SEL event as a string, and duplicate
-                     # is an integer indicating whether the event is allowed to be
-                     # used as a duplicate or not (-1: allow as duplicate, 1: only
-                     # use once (no duplicate, hasn't been used yet), 0: can no longer
-                     # be used (no duplicate, already used once).
-    selOptList = []  # List containing all optional SEL events.
-                     # Each element in the list is a nested list [Event_Text, duplicate],
-                     # where Event_Text is an SEL event as a string, and duplicate
-                     # is an integer indicating whether the event is allowed to be
-                     # used as a duplicate or not (-1: allow as duplicate, 1: only
-                     # use once (no duplicate, hasn't been used yet), 0: can no longer
-                     # be used (no duplicate, already used once).
-    # Parse the input XML file to get selReqList and selOptList.
-    xmlParserObj = XmlParser.XmlParser(selListXml)
-    if not xmlParserObj.root:
+    # in input selListXml (compiled once and cached across calls).
+    selListMatcher = SelMatcher.GetSelListMatcher(selListXml)
+    if selListMatcher is None:
         UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
                                        "failed to parse input XML file.")
         return selPassOrFail, unexpectedSels
-    for selEntry in xmlParserObj.root:
-        required = (selEntry.attrib["required"] == "true")
-        selText = selEntry.attrib["contains"]
-        allowDupl = (selEntry.attrib["allowduplicates"] == "true")
-        if (required):  # Required event log.
-            if (allowDupl):
-                selReqList.append([selText, -1])
-            else:
-                selReqList.append([selText, 1])
-        else:  # Optional event log.
-            if (allowDupl):
-                selOptList.append([selText, -1])
-            else:
-                selOptList.append([selText, 1])
-
-    # Ready to do the validation.
-
-    # Verify whether all required event logs are in the list of actual event logs.
-    AreAllReqIn = True  # Indicates wether all required events were found (True) in
-                        # list of actual event or not (False).
-    for event in selReqList:
-        IsEventIn = False
-        for actualEvent in actualSelList:
-            if event[0] in actualEvent:
-                IsEventIn = True
-                break
-        if not IsEventIn:
-            AreAllReqIn = False
-            break
 
-    # Verify whether all actual events are either required or optional and nothing
-    # else.
-    AreAllActualIn = True  # Indicates whether all actual events are either required
-                           # or optional and nothing else (True) or not (False).
-    unexpectedSels = []
-    selValidList = selReqList + selOptList
-    for event in actualSelList:
-        IsEventIn = False
-        for validEvent in selValidList:
-            if validEvent[0] in event:
-                if (validEvent[1] == 0):
-                    break  # Event already matched and cannot be duplicate, hence cannot
-                           # be matched again.
-                           # This SEL record (variable event) is a duplicate.
-                if (validEvent[1] == 1):
-                    validEvent[1] = 0  # Mark event as already matched and no duplicate
-                                       # is allowed.
-                IsEventIn = True
-                break
-        if not IsEventIn:
-            AreAllActualIn = False
-            unexpectedSels.append(event)
-            # We don't break here in order to find all unexpected SEL events.
+    # Single pass over actual event logs for missing required events and
+    # events that are neither required nor optional (or disallowed duplicates).
+    missingSels, unexpectedSels = selListMatcher.Verify(actualSelList)
+    if missingSels:
+        UtilLogger.verboseLogger.error("IpmiUtil.py - VerifySelAgainstXmlList(): " + \
+            "required SEL events not found: \n" + "\n".join(missingSels))
 
     # Ready to return results.
-    if (AreAllReqIn and AreAllActualIn):
+    if (not missingSels and not unexpectedSels):
         selPassOrFail = True
         unexpectedSels = None
-    elif (not AreAllActualIn):
+    elif (unexpectedSels):
         selPassOrFail = False
-    else:  # AreAllActualIn = True, AreAllReqIn = False.
+    else:  # All actual events expected, required events missing.
         selPassOrFail = False
         unexpectedSels = None
 
@@ -576,17 +913,30 @@ def VerifyThresholdSensors(interfaceParams, sensorListFile):
                                        "failed to parse sensor list XML file.")
         return False
 
+    # Load SDR cache (SDR repository is only read when it changed)
+    sdrCache = None
+    if Config.sdrCacheEnabled:
+        sdrCache = SdrCache.GetSdrCache(interfaceParams)
+
+    # Get sensor IDs and readings for all sensors with one sensor listing
+    gotSnapshotSuccess, sensorDict = GetIpmiUtilSensorSnapshot(interfaceParams)
+    if (not gotSnapshotSuccess):
+        UtilLogger.verboseLogger.error("IpmiUtil.py - VerifyThresholdSensors(): " + \
+                                   "Failed to get sensor listing.")
+        return False
+
     # Store info regarding all sensors to be monitored in sensorList.
     for sensorEntry in xmlParserObj.root:
         sensorName = sensorEntry.attrib["name"]
-        gotSensorIdSuccess, sensorId = GetIpmiUtilSensorId(interfaceParams, sensorName)
+        gotSensorIdSuccess, snapshotInfo = FindSnapshotSensor(sensorDict, sensorName)
         if (not gotSensorIdSuccess):
             UtilLogger.verboseLogger.error("IpmiUtil.py - VerifyThresholdSensors(): " + \
                                        "Failed to get sensor ID for sensor '%s'." % sensorName)
             return False
+        sensorId = snapshotInfo[0]
         sensorInfo = SdrInfo([ sensorId[2] + sensorId[3], \
             sensorId[0] + sensorId[1] ], sensorName, interfaceParams)
-        updatePassOrFail = sensorInfo.UpdateSdrInfo(interfaceParams) # Update SDR Info for sensor
+        updatePassOrFail = sensorInfo.UpdateSdrInfo(interfaceParams, sdrCache) # Update SDR Info for sensor
         if updatePassOrFail:
             UtilLogger.verboseLogger.info("SensorThresholdStressTest.py - Setup(): " + \
                 "Successfully received sensor thresholds for sensor '%s'." % sensorName)
@@ -610,9 +960,9 @@ def VerifyThresholdSensors(interfaceParams, sensorListFile):
             UtilLogger.verboseLogger.info("Sensor Name: {} - Result: Fail - Got invalid sensor ID".format(sensorName))
             continue
 
-        # Get reading for this sensor.
-        sensorReadSuccess, sensorReading = GetIpmiUtilSensorReading(interfaceParams, sensorId, sensorName)
-        if (not sensorReadSuccess):
+        # Get reading for this sensor from sensor listing.
+        sensorReading = FindSnapshotSensor(sensorDict, sensorName)[1][1]
+        if (sensorReading is None):
             UtilLogger.verboseLogger.error("ImpiUtil.py - VerifyThresholdSensors(): " + \
                                     "Failed to get sensor reading for sensor '%s'." % sensorName)
             methodResult = False
@@ -838,42 +1188,61 @@ class SdrInfo:
         self.sensorLowerCritGoingHighOrLow = None
         self.sensorLowerNonCritGoingHighOrLow = None
 
+        # SDR Sensor Conversion Table (SdrCache.GetConversionTable)
+        self.conversionTable = None
+
         return
 
+    # Get 256-entry conversion table from Get SDR response conversion factors
+    # Inputs:
+    #   respData (bytearray): Get SDR response data
+    # Outputs:
+    #   conversionTable (array('d')): None if linearization type is not supported
+    def GetConversionTable(self, respData):
+
+        linearizationType = respData[self.constLinearizationIdx] & 0x7f
+        mVal = Helper.calc2sComplementInt2Int(((respData[self.constMValMsbIdx] >> 6) & 3) << 8 | \
+            respData[self.constMValLsbIdx], 10) # 10-bit 2's complement with Msb bits [7:6]
+        bVal = Helper.calc2sComplementInt2Int(((respData[self.constBValMsbIdx] >> 6) & 3) << 8 | \
+            respData[self.constBValLsbIdx], 10) # 10-bit 2's complement with Msb bits [7:6]
+        rExp = Helper.calc2sComplementInt2Int((respData[self.constRExpBExpIdx] >> 4) & 0x0f, \
+            4) # 4-bit 2's complement with bits [7:4]
+        bExp = Helper.calc2sComplementInt2Int(respData[self.constRExpBExpIdx] & 0x0f, \
+            4) # 4-bit 2's complement with bits [4:0]
+
+        return SdrCache.GetConversionTable(linearizationType, mVal, bVal, rExp, bExp)
+
+    # Convert Sensor Reading from raw reading
+    # Inputs:
+    #   respData (bytearray): Get SDR response data
+    #       (conversion table is built from it on first use)
+    #   rawReading (int): raw sensor reading byte
     def ConvertSensorReading(self, respData, rawReading):
 
-        # Initialize local variables
-        convertPassOrFail = False
-        sensorReading = None
-        linearizationType = respData[self.constLinearizationIdx]
-        mValLsb = respData[self.constMValLsbIdx]
-        mValMsb = hex(((int(respData[self.constMValMsbIdx], 16) >> 6) & 3))[2:] # bits [7:6]
-        mVal = calc2sComplementHexString2Int(mValMsb + mValLsb, 10)
-        bValLsb = respData[self.constBValLsbIdx]
-        bValMsb = hex(((int(respData[self.constBValMsbIdx], 16) >> 6) & 3))[2:] # bits [7:6]
-        bVal = calc2sComplementHexString2Int(bValMsb + bValLsb, 10)
-        rExp = calc2sComplementHexString2Int(hex((int(respData[self.constRExpBExpIdx], 16) >> 4) & \
-            int('0f', 16))[2:], 4) # 4-bit 2's complement with bits [7:4]
-        bExp = calc2sComplementHexString2Int(hex(int(respData[self.constRExpBExpIdx], 16) & \
-            int('0f', 16))[2:], 4) # 4-bit 2's complement with bits [4:0]
-
-        # Convert Sensor Reading 
-        sensorReading = float((mVal * int(rawReading, 16) + (bVal * (10**bExp))) * (10**rExp))
-
-        # Linearize sensor reading based on Linearization Type with function f(x) so that y = f(x)
-        if respData[self.constLinearizationIdx] == '00': # linear, y = x
-            convertPassOrFail = True
-        elif respData[self.constLinearizationIdx] == '01': # y = ln(x)
-            sensorReading = math.log(sensorReading)
-            convertPassOrFail = True
-        elif respData[self.constLinearizationIdx] == '02': # y = log10(x)
-            sensorReading = math.log10(sensorReading)
-            convertPassOrFail = True
-        elif respData[self.constLinearizationIdx]  == '03': # y = log2(x)
-            sensorReading = math.log(sensorReading, 2)
-            convertPassOrFail = True
+        if self.conversionTable is None:
+            self.conversionTable = self.GetConversionTable(respData)
+            if self.conversionTable is None:
+                return False, None
 
-        return convertPassOrFail, sensorReading
+        sensorReading = self.conversionTable[rawReading]
+        if math.isnan(sensorReading):
+            return False, None
+
+        return True, sensorReading
+
+    # Convert a batch of raw sensor readings using the conversion table
+    # set by UpdateSdrInfo
+    # Inputs:
+    #   rawReadings (bytearray or list; int): raw sensor reading bytes
+    # Outputs:
+    #   sensorReadings (list; float): converted readings
+    #       (NaN if undefined or if sensor has no conversion table)
+    def ConvertSensorReadings(self, rawReadings):
+
+        if self.conversionTable is None:
+            return [ float('nan') ] * len(rawReadings)
+
+        return SdrCache.ConvertReadings(self.conversionTable, rawReadings)
 
     # Convert Sensor Threshold from raw reading
     def ConvertSensorThreshold(self, respData, settableMaskOffset, rawReading):
@@ -883,9 +1252,9 @@ class SdrInfo:
         sensorReading = None
 
         # Check Sensor Init Thresholds Mask and Settable 
-        if not (((int(respData[self.constSensorInitIdx], 16) >> \
+        if not (((respData[self.constSensorInitIdx] >> \
             self.constSensorInitThresholdsOffset) & 1) and \
-            ((int(respData[self.constSettableThresoldMaskIdx], 16) >> \
+            ((respData[self.constSettableThresoldMaskIdx] >> \
             settableMaskOffset) & 1)):
             return convertPassOrFail, sensorReading
 
@@ -898,43 +1267,33 @@ class SdrInfo:
         return convertPassOrFail, sensorReading
 
     # Update SDR Info Variables
-    def UpdateSdrInfo(self, interfaceParams):
+    # Inputs:
+    #   interfaceParams (list; string): interface parameters for LAN+/KCS
+    #   sdrCache (SdrCache.SdrCache): loaded SDR cache; sensor record is read
+    #       from BMC when None or when sensor is not a full sensor record in cache
+    def UpdateSdrInfo(self, interfaceParams, sdrCache = None):
 
         # Initialize local variables
         updatePassOrFail = False
         respData = None
 
-        # Reserve SDR Repository via IPMI
-        reserveSdrBytes = None # [ LS byte, MS byte ]
-        cmdPassOrFail, respData = SendRawCmd(interfaceParams, Config.netFnStorage, \
-            Config.cmdReserveSdrRepository, [])
-        if cmdPassOrFail:
-            if Config.debugEn:
-                UtilLogger.verboseLogger.info('ReserveSdrRepository' + \
-                    ': Command passed: ' + str(respData))
-            reserveSdrBytes = respData
-        else:
-            if Config.debugEn:
-                UtilLogger.verboseLogger.error('ReserveSdrRepository' + \
-                    ': Command failed. Completion Code: ' + str(respData))
-            return False
-
-        # Generate request data for Get SDR
-        getSdrRequest = [ reserveSdrBytes[0], reserveSdrBytes[1], \
-            self.sensorId[0], self.sensorId[1], '00', 'FF' ]
+        # Get sensor record from SDR cache
+        if sdrCache is not None:
+            sdrRecord = sdrCache.GetRecordById(self.sensorId[1] + self.sensorId[0])
+            if sdrRecord is not None and \
+                sdrRecord.recordType == SdrCache.sdrRecordTypeFull:
+                respData = sdrRecord.GetSdrRespData()
+                self.conversionTable = sdrRecord.conversionTable
+            elif Config.debugEn:
+                UtilLogger.verboseLogger.info('SdrInfo.UpdateSdrInfo' + \
+                    ': no full sensor record in SDR cache for sensor ' + \
+                    self.sensorName)
 
-        # Update Sensor Threshold Values
-        cmdPassOrFail, respData = SendRawCmd(interfaceParams, Config.netFnStorage, \
-            Config.cmdGetSdr, getSdrRequest)
-        if cmdPassOrFail:
-            if Config.debugEn:
-                UtilLogger.verboseLogger.info('GetSdr' + \
-                    ': Command passed: ' + str(respData))
-        else:
-            if Config.debugEn:
-                UtilLogger.verboseLogger.error('GetSdr' + \
-                    ': Command failed. Completion Code: ' + str(respData))
-            return False
+        if respData is None:
+            respData = self.GetSdrRecord(interfaceParams)
+            if respData is None:
+                return False
+            self.conversionTable = self.GetConversionTable(respData)
 
         # Parse Get SDR response to update SDR Info
 
@@ -1168,12 +1527,12 @@ class SdrInfo:
         goingHighOrLow = None
 
         # Join Msb and Lsb for Lower Threshold Reading Mask Response bytes
-        lowerThresholdReadingMaskBytes = respData[self.constLowerThresholdReadingMaskMsbIdx] + \
+        lowerThresholdReadingMask = respData[self.constLowerThresholdReadingMaskMsbIdx] << 8 | \
             respData[self.constLowerThresholdReadingMaskLsbIdx]
 
         # Check if threshold assertion is supported for going high or low
-        goingHigh = bool((int(lowerThresholdReadingMaskBytes, 16) >> goingHighMaskOffset) & 1)
-        goingLow = bool((int(lowerThresholdReadingMaskBytes, 16) >> goingLowMaskOffset) & 1)
+        goingHigh = bool((lowerThresholdReadingMask >> goingHighMaskOffset) & 1)
+        goingLow = bool((lowerThresholdReadingMask >> goingLowMaskOffset) & 1)
 
         # Determine if going high or low
         if goingHigh:
@@ -1183,6 +1542,47 @@ class SdrInfo:
         
         return goingHighOrLow
 
+    # Read sensor record from BMC using Reserve SDR Repository and Get SDR
+    # Inputs:
+    #   interfaceParams (list; string): interface parameters for LAN+/KCS
+    # Outputs:
+    #   respData (bytearray): Get SDR response data (None on failure)
+    def GetSdrRecord(self, interfaceParams):
+
+        # Reserve SDR Repository via IPMI
+        reserveSdrBytes = None # [ LS byte, MS byte ]
+        cmdPassOrFail, respData = SendRawCmd(interfaceParams, Config.netFnStorage, \
+            Config.cmdReserveSdrRepository, [])
+        if cmdPassOrFail:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.info('ReserveSdrRepository' + \
+                    ': Command passed: ' + str(respData))
+            reserveSdrBytes = respData
+        else:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.error('ReserveSdrRepository' + \
+                    ': Command failed. Completion Code: ' + str(respData))
+            return None
+
+        # Generate request data for Get SDR
+        getSdrRequest = [ reserveSdrBytes[0], reserveSdrBytes[1], \
+            self.sensorId[0], self.sensorId[1], '00', 'FF' ]
+
+        # Get sensor record
+        resp = SendRawCmdResp(interfaceParams, Config.netFnStorage, \
+            Config.cmdGetSdr, getSdrRequest)
+        if resp.cmdPassOrFail:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.info('GetSdr' + \
+                    ': Command passed: ' + str(resp))
+        else:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.error('GetSdr' + \
+                    ': Command failed. Completion Code: ' + str(resp))
+            return None
+
+        return resp.data
+
 class ConfigureFwUpdate:
 
     # Configure Firmware Update Request Variables
@@ -1200,6 +1600,9 @@ class ConfigureFwUpdate:
     imageFileNameBytes = []
     fwFileNameLenLimit = 60
 
+    # Configure Firmware Update polling (progress events of last UpdateFw)
+    poller = None
+
     # Configure Firmware Update Static Component Variables
     compTypePsu = '10'
     compTypeBios = '20'
@@ -1293,8 +1696,9 @@ class ConfigureFwUpdate:
     # Inputs:
     #   interfaceParams (list of strings): base parameters used to interface with IpmiUtil
     #   fwUpdateTimeLimit (int): time limit to allow FW to update (in seconds)
-    #   fwUpdatePollInterval (int): minimum time between each 
+    #   fwUpdatePollInterval (int): maximum time between each 
     #       Configure Firmware Update (QUERY_FW_UPDATE) request for polling FW update status
+    #       (polling starts faster and adapts to earlier update durations; see FwUpdatePoller)
     # Outputs:
     #   updatePassOrFail (bool): output determines if FW Update successful (True) or not (False)
     #   fwUpdateDuration (float): output provides duration for FW Update to be completed
@@ -1303,6 +1707,8 @@ class ConfigureFwUpdate:
         # Initialize local variables
         updatePassOrFail = False
         fwUpdateDuration = 0.0
+        fwUpdateEvent = FwUpdatePoller.eventTimedOut
+        opResult = None
 
         # Upload FW Image to BMC
         if not self.UploadImage():
@@ -1332,14 +1738,17 @@ class ConfigureFwUpdate:
             return updatePassOrFail, fwUpdateDuration
 
         # Poll FW Update Status until update is complete
-        fwUpdateStartTime = time.time()
-        fwUpdateTimeLimit = fwUpdateStartTime + fwUpdateTimeLimit
-        while time.time() < fwUpdateTimeLimit:
+        self.poller = FwUpdatePoller.FwUpdatePoller(self.componentByte + '-' + \
+            self.imageType + '-' + self.imageFileName, fwUpdatePollInterval, \
+            fwUpdateTimeLimit)
+        self.poller.Start()
+        while self.poller.IsWithinTimeLimit():
 
             # Send Configure Firmware Update request (QUERY_FW_UPDATE)
             cmdPassOrFail, respData = SendRawCmd(interfaceParams, \
                 self.netFn, self.cmdNum, \
                 [ self.componentByte, self.imageType, self.opQueryFwUpdate ])
+            opResult = respData[0] if cmdPassOrFail else None
             if cmdPassOrFail and respData[0] == self.opResFwUpdateCompleted:
                 UtilLogger.verboseLogger.info(self.cmdName + '.UpdateFw' + \
                     ' (QUERY_FW_UPDATE): command passed. FW update completed. ' + \
@@ -1348,6 +1757,7 @@ class ConfigureFwUpdate:
                     ' Image Type: ' + \
                     self.configureFwUpdateImageType[self.imageType])
                 updatePassOrFail = True
+                fwUpdateEvent = FwUpdatePoller.eventCompleted
                 break
             elif cmdPassOrFail and respData[0] == self.opResFwUpdateInProgress:
                 UtilLogger.verboseLogger.info(self.cmdName + '.UpdateFw' + \
@@ -1377,16 +1787,15 @@ class ConfigureFwUpdate:
                     self.configureFwUpdateComponent[self.componentType] + '.' + \
                     ' Image Type: ' + \
                     self.configureFwUpdateImageType[self.imageType])
+                fwUpdateEvent = FwUpdatePoller.eventFailed
                 break
 
-            # Sleep for poll Interval
-            UtilLogger.verboseLogger.info(self.cmdName + '.UpdateFw' + \
-                ' (QUERY_FW_UPDATE): Polling again in ' + \
-                str(fwUpdatePollInterval) + ' seconds.')
-            time.sleep(fwUpdatePollInterval)
+            # Sleep for adaptive poll interval (logged as progress event)
+            self.poller.WaitForNextPoll(opResult)
 
         # Summarize results
-        fwUpdateDuration = datetime.timedelta(seconds=time.time() - fwUpdateStartTime)
+        fwUpdateDuration = datetime.timedelta(\
+            seconds=self.poller.Finish(fwUpdateEvent, opResult))
         if updatePassOrFail:
             UtilLogger.verboseLogger.info(self.cmdName + '.UpdateFw:' + \
                 ' FW Update passed. Component Type: ' + \
@@ -0,0 +1,233 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Node Busy aware ME bridging.
+
+SendBridgedCmd sends a request to the ME through the BMC (Send Message) and,
+while the ME answers Node Busy (0xC0), retries after an exponential backoff
+with jitter until the request succeeds, fails with another completion code,
+runs out of retries or passes its deadline.
+
+Every request updates per-command counters (requests, attempts, Node Busy
+responses, deadline expiries, latency) that tests log in their summary with
+LogMeCmdStatistics.
+"""
+
+import random
+import threading
+import time
+
+import Config
+import IpmiUtil
+import UtilLogger
+
+# Node Busy completion code
+ccNodeBusy = 'c0'
+
+# Class holds counters for one bridged ME command
+class MeCmdStats:
+
+    # Constructor
+    # Inputs:
+    #   cmdName (string): command name used in summary
+    def __init__(self, cmdName):
+
+        self.cmdName = cmdName
+        self.requests = 0
+        self.requestsPassed = 0
+        self.attempts = 0
+        self.busyResponses = 0
+        self.deadlineExpired = 0
+        self.latencyTotal = 0.0
+        self.latencyMin = None
+        self.latencyMax = 0.0
+        self.latencySamples = [] # reservoir of request latencies
+
+        return
+
+    # Function will add one request to counters
+    # Inputs:
+    #   cmdPassOrFail (bool): request passed
+    #   attempts (int): number of Send Message attempts
+    #   busyResponses (int): number of Node Busy responses
+    #   deadlineExpired (bool): request stopped by deadline
+    #   latency (float): request time including backoff in seconds
+    def Update(self, cmdPassOrFail, attempts, busyResponses, deadlineExpired, \
+        latency):
+
+        self.requests += 1
+        if cmdPassOrFail:
+            self.requestsPassed += 1
+        self.attempts += attempts
+        self.busyResponses += busyResponses
+        if deadlineExpired:
+            self.deadlineExpired += 1
+        self.latencyTotal += latency
+        if self.latencyMin is None or latency < self.latencyMin:
+            self.latencyMin = latency
+        if latency > self.latencyMax:
+            self.latencyMax = latency
+
+        # Keep uniform sample of latencies for percentiles
+        if len(self.latencySamples) < Config.meBridgeLatencySampleLimit:
+            self.latencySamples.append(latency)
+        else:
+            sampleIdx = random.randint(0, self.requests - 1)
+            if sampleIdx < Config.meBridgeLatencySampleLimit:
+                self.latencySamples[sampleIdx] = latency
+
+        return
+
+    # Function returns latency percentile in seconds
+    def GetLatencyPercentile(self, percentile):
+
+        if not self.latencySamples:
+            return 0.0
+        sortedSamples = sorted(self.latencySamples)
+
+        return sortedSamples[min(len(sortedSamples) - 1, \
+            int(len(sortedSamples) * percentile / 100.0))]
+
+    def __str__(self):
+
+        return self.cmdName + \
+            " - Requests: " + str(self.requests) + \
+            " Passed: " + str(self.requestsPassed) + \
+            " Attempts: " + str(self.attempts) + \
+            " Node Busy: " + str(self.busyResponses) + \
+            " (%.1f%%)" % (100.0 * self.busyResponses / max(self.attempts, 1)) + \
+            " Deadline Expired: " + str(self.deadlineExpired) + \
+            " Latency (ms) avg/p50/p90/max: %.1f/%.1f/%.1f/%.1f" % \
+            (1000.0 * self.latencyTotal / max(self.requests, 1), \
+            1000.0 * self.GetLatencyPercentile(50), \
+            1000.0 * self.GetLatencyPercentile(90), \
+            1000.0 * self.latencyMax)
+
+# Dictionary of key (cmdName): value (MeCmdStats) pairs
+meCmdStatsDict = {}
+meCmdStatsDictLock = threading.Lock()
+
+# Function returns default command name for rawBytesList
+# ([ bus, slave address, NetFn/LUN, cmd, data.. ])
+def GetMeCmdName(rawBytesList):
+
+    try:
+        return 'NetFn 0x%02x Cmd 0x%02x' % (int(rawBytesList[2], 16) >> 2, \
+            int(rawBytesList[3], 16))
+    except (IndexError, ValueError):
+        return 'Unknown'
+
+# Function returns backoff delay in seconds before retry attempt
+# Inputs:
+#   retryCount (int): number of retries already made
+def GetBackoffDelay(retryCount):
+
+    backoffDelay = min(Config.meBridgeBackoffMax, \
+        Config.meBridgeBackoffBase * (2 ** retryCount))
+
+    # Randomize part of delay so concurrent requesters do not retry in step
+    return backoffDelay * (1.0 - Config.meBridgeBackoffJitter * random.random())
+
+# Function will send bridged request to ME, backing off while ME is busy
+# Inputs:
+#   interfaceParams (list; string): interface parameters for LAN+/KCS
+#   rawBytesList (list; string): [ bus, slave address, NetFn/LUN, cmd, data.. ]
+#       as used by IpmiUtil 'cmd -m' parameter
+#   cmdName (string): name for per-command counters (default: NetFn/Cmd)
+#   deadline (float): seconds allowed for request including retries
+#       (default: Config.meBridgeDeadline)
+# Outputs:
+#   cmdPassOrFail (bool): command passed
+#   respData: same as IpmiUtil.SendRawCmd2ME
+#   retryCount (int): number of retries after Node Busy
+def SendBridgedCmd(interfaceParams, rawBytesList, cmdName=None, deadline=None):
+
+    if cmdName is None:
+        cmdName = GetMeCmdName(rawBytesList)
+    if deadline is None:
+        deadline = Config.meBridgeDeadline
+
+    startTime = time.time()
+    endTime = startTime + deadline
+    retryCount = 0
+    busyResponses = 0
+    deadlineExpired = False
+
+    while True:
+
+        cmdPassOrFail, respData = IpmiUtil.SendRawCmd2MEOnce(\
+            interfaceParams, rawBytesList)
+        if cmdPassOrFail or respData != ccNodeBusy:
+            break
+        busyResponses += 1
+
+        if retryCount + 1 >= Config.ipmiUtilSendMsgMaxRetries:
+            break
+
+        # Stop if backoff would end past the deadline
+        backoffDelay = GetBackoffDelay(retryCount)
+        if time.time() + backoffDelay > endTime:
+            deadlineExpired = True
+            break
+
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info("MeBridge.SendBridgedCmd: " + \
+                cmdName + ": Node Busy. Retrying in %.3f seconds." % backoffDelay)
+        time.sleep(backoffDelay)
+        retryCount += 1
+
+    latency = time.time() - startTime
+    with meCmdStatsDictLock:
+        if cmdName not in meCmdStatsDict:
+            meCmdStatsDict[cmdName] = MeCmdStats(cmdName)
+        meCmdStatsDict[cmdName].Update(cmdPassOrFail, retryCount + 1, \
+            busyResponses, deadlineExpired, latency)
+
+    return cmdPassOrFail, respData, retryCount
+
+# Function will clear per-command counters
+def ResetMeCmdStatistics():
+
+    with meCmdStatsDictLock:
+        meCmdStatsDict.clear()
+
+    return
+
+# Function will log per-command counters
+# to console and verbose logs
+def LogMeCmdStatistics(testName):
+
+    with meCmdStatsDictLock:
+        meCmdStatsList = sorted(meCmdStatsDict.values(), \
+            key=lambda meCmdStats: meCmdStats.cmdName)
+
+    UtilLogger.consoleLogger.info(testName + " ME Command Statistics:")
+    UtilLogger.verboseLogger.info(testName + " ME Command Statistics:")
+    for meCmdStats in meCmdStatsList:
+        UtilLogger.consoleLogger.info("  " + str(meCmdStats))
+        UtilLogger.verboseLogger.info("  " + str(meCmdStats))
+
+    return
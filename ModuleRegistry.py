@@ -0,0 +1,145 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test module registry.
+
+ModuleRegistry loads each test module of a <bmcPlatform>TestScripts package
+once per run and returns the same module object for every later iteration and
+test list cycle. Module top-level code is run once, and tests can keep
+expensive setup (parsed XML lists, opened sessions) in module-scope variables.
+
+A test module that keeps per-iteration state in module-scope variables
+(counters, thread lists) defines a reset hook:
+    def Reset():
+which ResetModule calls before every iteration.
+
+Load time is recorded per module and logged separately by LogLoadTimes, so it
+is not counted as part of the first test iteration.
+
+Module names and declared metadata come from the cached TestManifest, so
+listing tests or reading resource tags does not import any test module.
+"""
+
+import datetime
+import imp
+import threading
+import time
+
+import TestManifest
+import UtilLogger
+
+# Class loads and caches the test modules of a test scripts package
+class ModuleRegistry:
+
+    # Constructor
+    # Inputs:
+    #   package (module): <bmcPlatform>TestScripts package
+    def __init__(self, package):
+
+        self.packagePath = package.__path__
+        self.manifest = TestManifest.GetManifest(package)
+        self.moduleDict = {} # module name: loaded module
+        self.loadTimeDict = {} # module name: load time in seconds
+        self.lock = threading.Lock()
+
+        return
+
+    # Function returns True if testName is a package
+    # (raises KeyError if there is no such module)
+    def IsPackage(self, testName):
+
+        return self.manifest[testName]['isPkg']
+
+    # Function returns names of all modules in package
+    # (sorted, as listed by pkgutil.iter_modules)
+    def GetModuleNames(self):
+
+        return sorted(self.manifest)
+
+    # Function returns resource tags declared by test module
+    # (read from manifest; module is loaded only if
+    # its resourceTags value is not a literal)
+    def GetResourceTags(self, testName):
+
+        entry = self.manifest.get(testName, {})
+        if 'resourceTags' in entry:
+            return entry['resourceTags']
+
+        return getattr(self.GetModule(testName), 'resourceTags', None)
+
+    # Function returns test module, loading it on first use
+    # (raises KeyError if there is no such module)
+    def GetModule(self, testName):
+
+        with self.lock:
+            if testName not in self.moduleDict:
+                if testName not in self.manifest:
+                    raise KeyError(testName)
+                startTime = time.time()
+                moduleFile, pathName, description = \
+                    imp.find_module(testName, self.packagePath)
+                try:
+                    self.moduleDict[testName] = imp.load_module(testName, \
+                        moduleFile, pathName, description)
+                finally:
+                    if moduleFile:
+                        moduleFile.close()
+                self.loadTimeDict[testName] = time.time() - startTime
+                UtilLogger.verboseLogger.info("ModuleRegistry: loaded " + \
+                    "test module " + testName + " in %.3f ms" % \
+                    (self.loadTimeDict[testName] * 1000.0))
+
+            return self.moduleDict[testName]
+
+    # Function will call reset hook of a loaded test module, if it has one
+    def ResetModule(self, testName):
+
+        Reset = getattr(self.GetModule(testName), 'Reset', None)
+        if Reset is not None:
+            Reset()
+
+        return
+
+    # Function will log module load times to summary log
+    def LogLoadTimes(self):
+
+        with self.lock:
+            loadTimeList = sorted(self.loadTimeDict.iteritems(), \
+                key=lambda loadTime: loadTime[1], reverse=True)
+
+        if not loadTimeList:
+            return
+
+        UtilLogger.summaryLogger.info("TEST MODULE LOAD TIMES - " + \
+            "Modules Loaded: " + str(len(loadTimeList)) + \
+            " Total Load Time: " + str(datetime.timedelta(\
+            seconds=sum([ loadTime for testName, loadTime in loadTimeList ]))))
+        for testName, loadTime in loadTimeList:
+            UtilLogger.summaryLogger.info("  " + testName + \
+                ": %.3f ms" % (loadTime * 1000.0))
+        UtilLogger.summaryLogger.info("")
+
+        return
@@ -0,0 +1,336 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Multi-BMC fan-out.
+
+A TargetContext holds everything that identifies one BMC under test: address,
+credentials, platform, AC power switch and IPMI transport. Program builds the
+IpmiUtil interface parameters and the shared Config variables from it.
+
+RunInventory runs the same test selection against every target listed in an
+inventory XML file. Target state (Config, loggers, sessions, SEL/SDR caches)
+is per process, so each target runs in its own OneBMCTest.py child process
+with its own verbose/summary logs; at most maxParallel children run at once.
+Each child writes its summary counts to a result file that is merged into one
+summary in this (controller) process.
+
+Inventory file format:
+    <TargetList>
+      <target name="rack1-blade1" ip="10.0.0.11" user="admin" pwd="admin"
+        platform="C2010" switch="10.0.0.200"/>
+    </TargetList>
+name defaults to ip; platform, switch and ipmitransport default to the
+controller's command line values.
+"""
+
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+import Config
+import UtilLogger
+import XmlParser
+
+# Program started for each target
+oneBmcTestFilePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+    'OneBMCTest.py')
+
+# Class holds connection information for one BMC under test
+class TargetContext:
+
+    # Constructor
+    # Inputs:
+    #   name (string): target name used in log file names and summary
+    #   ipAddress (string): BMC IP address
+    #   userName (string): BMC user name
+    #   password (string): BMC password
+    #   platform (string): BMC platform (Config.bmcPlatform<Platform>Value)
+    #   switchIpAddress (string): AC power IP switch address
+    #   ipmiTransport (string): Config.ipmiTransport<Transport> value
+    def __init__(self, name, ipAddress, userName, password, platform=None, \
+        switchIpAddress=None, ipmiTransport=None):
+
+        self.name = name or ipAddress
+        self.ipAddress = ipAddress
+        self.userName = userName
+        self.password = password
+        self.platform = platform or Config.bmcPlatform
+        self.switchIpAddress = switchIpAddress
+        self.ipmiTransport = ipmiTransport or Config.ipmiTransport
+
+        return
+
+    # Function returns input arguments for IpmiUtil
+    # that are needed for using the IPMI over LAN+ interface
+    def GetInterfaceParams(self):
+
+        return [ Config.ipmiUtilPrivilegeSwitch, \
+            Config.ipmiUtilPrivilegeAdminValue, \
+            Config.ipmiUtilInterfaceSwitch, \
+            Config.ipmiUtilInterfaceLanPlusValue, \
+            Config.ipmiUtilIpAddressSwitch, \
+            self.ipAddress, \
+            Config.ipmiUtilUserNameSwitch, \
+            self.userName, \
+            Config.ipmiUtilPasswordSwitch, \
+            self.password ]
+
+    # Function updates config file shared variables
+    # (used by RedFish, Ssh and AC power switch helpers) for this target
+    def Apply(self):
+
+        Config.bmcIpAddress = self.ipAddress
+        Config.bmcUser = self.userName
+        Config.bmcPassword = self.password
+        Config.acPowerIpSwitchIpAddress = self.switchIpAddress
+        Config.ipmiTransport = self.ipmiTransport
+
+        return
+
+    # Function returns OneBMCTest.py arguments that select this target
+    def GetCliArgs(self):
+
+        cliArgs = [ '-conn', 'eth', '-ip', self.ipAddress, \
+            '-user', self.userName, '-pwd', self.password, \
+            '-ipmitransport', self.ipmiTransport ]
+        if self.platform:
+            cliArgs += [ '-platform', self.platform ]
+        if self.switchIpAddress:
+            cliArgs += [ '-switch', self.switchIpAddress ]
+
+        return cliArgs
+
+# Function will read targets from inventory XML file
+# Inputs:
+#   requireCredentials (bool): skip targets without user and pwd
+# Outputs:
+#   targetList (list; TargetContext): None if file is invalid
+def LoadInventory(inventoryFilePath, switchIpAddress=None, \
+    requireCredentials=True):
+
+    xmlParserObj = XmlParser.XmlParser(inventoryFilePath)
+    if xmlParserObj.root is None:
+        UtilLogger.summaryLogger.error("MultiTarget.LoadInventory: " + \
+            "failed to parse inventory file " + str(inventoryFilePath))
+        return None
+
+    targetList = []
+    nameSet = set()
+    for targetElement in xmlParserObj.root.iter('target'):
+        target = TargetContext(targetElement.get('name'), \
+            targetElement.get('ip'), targetElement.get('user'), \
+            targetElement.get('pwd'), targetElement.get('platform'), \
+            targetElement.get('switch', switchIpAddress), \
+            targetElement.get('ipmitransport'))
+        if not target.ipAddress or (requireCredentials and \
+            (target.userName is None or target.password is None)):
+            UtilLogger.summaryLogger.error("MultiTarget.LoadInventory: " + \
+                "target " + str(target.name) + " requires ip" + \
+                (", user and pwd" if requireCredentials else "") + \
+                ". Will not run target.")
+            continue
+        if target.name in nameSet:
+            UtilLogger.summaryLogger.error("MultiTarget.LoadInventory: " + \
+                "duplicate target name " + target.name + ". Will not run target.")
+            continue
+        nameSet.add(target.name)
+        targetList.append(target)
+
+    return targetList
+
+# Class holds the child process and results for one target
+class TargetRun:
+
+    # Constructor
+    # Inputs:
+    #   target (TargetContext): target to run
+    #   testArgs (list; string): OneBMCTest.py test selection arguments
+    def __init__(self, target, testArgs):
+
+        self.target = target
+        self.testArgs = testArgs
+        self.process = None
+        self.consoleFile = None
+        self.startTime = None
+        self.duration = None
+        self.exitCode = None
+        self.result = None # dictionary written by Program.LogSummaryStatistics
+
+        # Per-target log and result file names
+        self.verboseLogFileName = Config.verboseLogFileName + '_' + target.name
+        self.summaryLogFileName = Config.summaryLogFileName + '_' + target.name
+        self.consoleLogFilePath = Config.verboseLogPath + 'console_' + \
+            target.name + UtilLogger.fileTimeStamp + Config.verboseLogFileExtension
+        self.resultFilePath = Config.summaryLogPath + self.summaryLogFileName + \
+            UtilLogger.fileTimeStamp + Config.multiTargetResultFileExtension
+
+        return
+
+    # Function starts OneBMCTest.py for the target
+    def Start(self):
+
+        processCmd = [ sys.executable, oneBmcTestFilePath ] + \
+            self.target.GetCliArgs() + self.testArgs + \
+            [ '-verbosename', self.verboseLogFileName, \
+            '-summaryname', self.summaryLogFileName, \
+            '--excelOutput', Config.defaultOutputExcelFile + '_' + self.target.name, \
+            '-resultfile', self.resultFilePath ]
+
+        self.startTime = time.time()
+        self.consoleFile = open(self.consoleLogFilePath, 'w')
+        self.process = subprocess.Popen(processCmd, stdout=self.consoleFile, \
+            stderr=subprocess.STDOUT)
+
+        UtilLogger.verboseLogger.info("MultiTarget: started target " + \
+            self.target.name + " (" + self.target.ipAddress + ") as process " + \
+            str(self.process.pid))
+
+        return
+
+    # Function checks whether the child process has finished
+    # and loads its results
+    # Outputs:
+    #   isDone (bool): child process exited
+    def Poll(self):
+
+        if self.process.poll() is None:
+            return False
+
+        self.exitCode = self.process.returncode
+        self.duration = datetime.timedelta(seconds=time.time() - self.startTime)
+        self.consoleFile.close()
+
+        try:
+            with open(self.resultFilePath, 'r') as resultFile:
+                self.result = json.load(resultFile)
+        except (IOError, ValueError), e:
+            UtilLogger.verboseLogger.error("MultiTarget: no results for target " + \
+                self.target.name + ": " + str(e))
+
+        return True
+
+    # Function returns True if all tests ran and passed for the target
+    def Passed(self):
+
+        return self.exitCode == 0 and self.result is not None and \
+            self.result['totalFailed'] == 0 and self.result['totalRun'] > 0
+
+# Function runs test selection against all targets in inventory file
+# with at most maxParallel targets running at once
+# Inputs:
+#   inventoryFilePath (string): inventory XML file
+#   testArgs (list; string): OneBMCTest.py test selection arguments
+#   maxParallel (int): maximum number of targets running concurrently
+#   switchIpAddress (string): default AC power IP switch address
+# Outputs:
+#   runPassOrFail (bool): all targets passed
+def RunInventory(inventoryFilePath, testArgs, maxParallel, switchIpAddress=None):
+
+    targetList = LoadInventory(inventoryFilePath, switchIpAddress)
+    if not targetList:
+        UtilLogger.summaryLogger.error("MultiTarget.RunInventory: " + \
+            "no targets to run in " + str(inventoryFilePath))
+        return False
+
+    maxParallel = max(1, maxParallel)
+    UtilLogger.summaryLogger.info("Running " + ' '.join(testArgs) + " on " + \
+        str(len(targetList)) + " targets from " + inventoryFilePath + \
+        " (max parallel: " + str(maxParallel) + ")")
+    UtilLogger.summaryLogger.info("")
+
+    startTime = time.time()
+    pendingRuns = [ TargetRun(target, testArgs) for target in targetList ]
+    runningRuns = []
+    doneRuns = []
+
+    while pendingRuns or runningRuns:
+
+        # Start targets up to parallel limit
+        while pendingRuns and len(runningRuns) < maxParallel:
+            targetRun = pendingRuns.pop(0)
+            targetRun.Start()
+            runningRuns.append(targetRun)
+
+        time.sleep(Config.multiTargetPollInterval)
+
+        for targetRun in list(runningRuns):
+            if targetRun.Poll():
+                runningRuns.remove(targetRun)
+                doneRuns.append(targetRun)
+                UtilLogger.summaryLogger.info("Target " + targetRun.target.name + \
+                    (" PASSED" if targetRun.Passed() else " FAILED") + \
+                    " (" + str(len(doneRuns)) + " of " + str(len(targetList)) + \
+                    " done) Duration: " + str(targetRun.duration))
+
+    LogMergedSummary(doneRuns, datetime.timedelta(seconds=time.time() - startTime))
+
+    return all([ targetRun.Passed() for targetRun in doneRuns ])
+
+# Function logs one summary over all targets
+def LogMergedSummary(targetRuns, duration):
+
+    UtilLogger.summaryLogger.info("")
+    UtilLogger.summaryLogger.info("")
+
+    totalRun = 0
+    totalPassed = 0
+    totalFailed = 0
+    for targetRun in targetRuns:
+        if targetRun.result is not None:
+            totalRun += targetRun.result['totalRun']
+            totalPassed += targetRun.result['totalPassed']
+            totalFailed += targetRun.result['totalFailed']
+            failedTests = ', '.join([ failedTest + ' (' + str(failedCount) + ')' \
+                for failedTest, failedCount in \
+                sorted(targetRun.result['failedTests'].iteritems()) ])
+            UtilLogger.summaryLogger.info("TARGET " + targetRun.target.name + \
+                " (" + targetRun.target.ipAddress + ") - Total Passed: " + \
+                str(targetRun.result['totalPassed']) + \
+                " Total Failed: " + str(targetRun.result['totalFailed']) + \
+                " Total Run: " + str(targetRun.result['totalRun']) + \
+                " Test Duration: " + str(targetRun.duration) + \
+                (" Failed Tests: " + failedTests if failedTests else ""))
+        else:
+            UtilLogger.summaryLogger.info("TARGET " + targetRun.target.name + \
+                " (" + targetRun.target.ipAddress + ") - no results (exit code " + \
+                str(targetRun.exitCode) + "). See " + targetRun.consoleLogFilePath)
+
+    targetsPassed = len([ targetRun for targetRun in targetRuns \
+        if targetRun.Passed() ])
+    UtilLogger.summaryLogger.info("")
+    UtilLogger.summaryLogger.info("MERGED SUMMARY - Targets Passed: " + \
+        str(targetsPassed) + " Targets Failed: " + \
+        str(len(targetRuns) - targetsPassed) + \
+        " Total Passed: " + str(totalPassed) + \
+        " Total Failed: " + str(totalFailed) + \
+        " Total Run: " + str(totalRun) + \
+        " Test Duration: " + str(duration))
+    UtilLogger.summaryLogger.info("")
+
+    return
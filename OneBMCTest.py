@@ -25,7 +25,6 @@
 
 import CliParser
 import Program
-import ResultProcessor
 import UtilLogger
 import Program
 import signal
@@ -56,6 +55,7 @@ def processResults():
     # We only generate an output Excel file if we are executing test scripts inside
     # a batch file ('-t b' option).
     if (Program.generateOutputExcelFile):
+        import ResultProcessor
         try:
             ResultProcessor.ProcessResults(UtilLogger.verboseCompleteFileName, \
                                            Program.outputCompleteFileName)
@@ -24,16 +24,21 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import os
-import pkgutil
 import time
 import datetime
+import json
 
+import CmdStats
 import Config
-import Email
-import IpmiUtil
+import ModuleRegistry
+import MultiTarget
 import UtilLogger
 import XmlParser
-import ResultProcessor
+import TestCheckpoint
+import TestIsolation
+import TestScheduler
+import TestSharding
+import TransportReplay
 
 bmcVersion=None
 bmcPlatform=None
@@ -46,6 +51,19 @@ port=None
 # Output Excel complete file name including full directory path, file name and extension.
 outputCompleteFileName = None
 
+# Path of JSON file that summary results are written to ('-resultfile')
+resultFilePath = None
+
+# Number of worker threads running XML test list tests ('-parallel')
+testWorkerCount = Config.testSchedulerWorkers
+
+# Checkpoint of interrupted XML test list run to continue ('-resume')
+resumeCheckpoint = None
+
+# Flag indicating whether every XML test list test runs
+# in a child process with deadline ('-isolate')
+testIsolationEn = Config.testIsolationEn
+
 # Flag indicating whether to generate the output Excel file (True) or not (False).
 # We only generate an output Excel file if we are executing test scripts inside
 # a batch file ('-t b' option).
@@ -65,6 +83,10 @@ def Run(parser):
     global port
     global outputCompleteFileName
     global generateOutputExcelFile
+    global resultFilePath
+    global testWorkerCount
+    global resumeCheckpoint
+    global testIsolationEn
 
     # parse CLI arguments
     parsedArgs = parser.parse_args()
@@ -83,6 +105,7 @@ def Run(parser):
     # then all we do is process the log file to generate the output Excel file.
     if (parsedArgs.excelInput):  # Input verbose log file was provided as a
                                  # command line argument.
+        import ResultProcessor
         try:
             ResultProcessor.ProcessResults(parsedArgs.excelInput, \
                                            outputCompleteFileName)
@@ -122,12 +145,32 @@ def Run(parser):
     if parsedArgs.verbosename:
         Config.verboseLogFileName = str(parsedArgs.verbosename)
 
+    # Check for renaming summary log file
+    if parsedArgs.summaryname:
+        Config.summaryLogFileName = str(parsedArgs.summaryname)
+
+    # Check for writing summary results file
+    if parsedArgs.resultfile:
+        resultFilePath = parsedArgs.resultfile
+
     # Check for Timestamp switch
     if parsedArgs.timestamp:
         Config.timestampEn = True
 
+    # Check for resuming interrupted XML test list run
+    # (logging continues in the log files of that run;
+    # with '-inventory' each target process resumes its own run)
+    if parsedArgs.resume and parsedArgs.inventory is None:
+        loadPassOrFail, resumeCheckpoint = TestCheckpoint.LoadCheckpoint(\
+            TestCheckpoint.GetCheckpointFilePath())
+        if not loadPassOrFail:
+            print("Run() - Unable to resume test list run: " + resumeCheckpoint)
+            resumeCheckpoint = None
+            return
+        timeInSecs = resumeCheckpoint.logStartTime
+
     # Initialize Logging
-    UtilLogger.InitLogging(timeInSecs)
+    UtilLogger.InitLogging(timeInSecs, resumeCheckpoint is not None)
 
     # Update the output Excel file name to include the time stamp, in order
     # to be consistent with the verbose log file naming.
@@ -172,31 +215,111 @@ def Run(parser):
     if parsedArgs.debug:
         Config.debugEn = True
 
+    # Check for parallel XML test list execution
+    testWorkerCount = max(1, parsedArgs.parallel)
+
+    # Check for running XML test list tests in child processes
+    if parsedArgs.isolate:
+        testIsolationEn = True
+
+    # Check for IpmiUtil traffic record/replay
+    # (only RunIpmiUtil calls are replayed, so native transports are disabled)
+    if parsedArgs.record is not None:
+        TransportReplay.StartRecording(parsedArgs.record)
+    if parsedArgs.replay is not None:
+        if not TransportReplay.StartReplay(parsedArgs.replay, \
+            parsedArgs.replaymode, parsedArgs.replaylatency):
+            UtilLogger.consoleLogger.error("Unable to load replay file " + \
+                parsedArgs.replay)
+            return
+        parsedArgs.ipmitransport = Config.ipmiTransportIpmiUtil
+        parsedArgs.kcstransport = Config.kcsTransportIpmiUtil
+
+    # Check for test sharding shared secret ('-coordinator'/'-worker')
+    sharedSecret = Config.testShardSharedSecret
+    if parsedArgs.sharedsecret is not None:
+        sharedSecret = parsedArgs.sharedsecret
+
+    # Check for BMC simulator (IpmiUtil stand-in sends requests to BmcSimulator.py)
+    if parsedArgs.bmcsim:
+        Config.ipmiUtilFilePath = Config.bmcSimIpmiUtilFilePath
+        Config.ipmiUtilLinuxFilePath = Config.bmcSimIpmiUtilFilePath
+
+    # Check for running test list units handed out by '-coordinator'
+    # process (BMC credentials from the worker's own '-inventory'
+    # or '-user'/'-pwd')
+    if parsedArgs.worker is not None:
+
+        Config.ipmiTransport = parsedArgs.ipmitransport
+        UtilLogger.summaryLogger.info("Running test list units of " + \
+            "coordinator " + parsedArgs.worker)
+        RunShardWorker(parsedArgs.worker, sharedSecret, parsedArgs.inventory, \
+            parsedArgs.user, parsedArgs.pwd, parsedArgs.switch)
+
+        # Close native IPMI over LAN+ sessions
+        import IpmiLanPlus
+        import IpmiPipeline
+        IpmiLanPlus.CloseAllSessions()
+        IpmiPipeline.CloseAllPipelines()
+
+    # Check for running tests
+    # against every BMC in target inventory file
+    elif parsedArgs.inventory is not None:
+
+        # Test selection forwarded to the process for each target
+        Config.ipmiTransport = parsedArgs.ipmitransport
+        testArgs = []
+        if parsedArgs.test is not None:
+            testArgs += [ '-test', parsedArgs.test ]
+        if parsedArgs.xmlfilepath is not None:
+            testArgs += [ '-xmlfilepath', parsedArgs.xmlfilepath ]
+        if parsedArgs.version is not None:
+            testArgs += [ '-version', parsedArgs.version ]
+        if parsedArgs.debug:
+            testArgs.append('-debug')
+        if parsedArgs.timestamp:
+            testArgs.append('-timestamp')
+        if testWorkerCount > 1:
+            testArgs += [ '-parallel', str(testWorkerCount) ]
+        if parsedArgs.resume:
+            testArgs.append('-resume')
+        if testIsolationEn:
+            testArgs.append('-isolate')
+
+        if parsedArgs.test is None or \
+            (parsedArgs.test == 'b' and parsedArgs.xmlfilepath is None) or \
+            (parsedArgs.coordinator is not None and parsedArgs.test != 'b'):
+            parser.print_help()
+
+        # Hand out test list units to '-worker' processes
+        # on any number of controller hosts
+        elif parsedArgs.coordinator is not None:
+            UtilLogger.summaryLogger.info("Running test scripts specified in " + \
+                parsedArgs.xmlfilepath + " on workers of coordinator port " + \
+                str(parsedArgs.coordinator))
+            RunShardedXmlTestScripts(parsedArgs.inventory, \
+                parsedArgs.xmlfilepath, parsedArgs.coordinator, sharedSecret, \
+                parsedArgs.switch)
+
+        else:
+            MultiTarget.RunInventory(parsedArgs.inventory, testArgs, \
+                parsedArgs.maxparallel, parsedArgs.switch)
+
     # Check for running tests
     # using IPMI over LAN
-    if parsedArgs.conn == 'eth' and \
+    elif parsedArgs.conn == 'eth' and \
         parsedArgs.ip and parsedArgs.user and \
         parsedArgs.pwd:
             
         # Update config file shared variables
-        Config.bmcIpAddress = parsedArgs.ip
-        Config.bmcUser = parsedArgs.user
-        Config.bmcPassword = parsedArgs.pwd
-        Config.acPowerIpSwitchIpAddress = parsedArgs.switch        
+        target = MultiTarget.TargetContext(parsedArgs.ip, parsedArgs.ip, \
+            parsedArgs.user, parsedArgs.pwd, Config.bmcPlatform, \
+            parsedArgs.switch, parsedArgs.ipmitransport)
+        target.Apply()
 
         # Concatenate input arguments for IpmiUtil
         # that are needed for using the IPMI over LAN+ interface
-        interfaceParams = \
-            [ Config.ipmiUtilPrivilegeSwitch, \
-            Config.ipmiUtilPrivilegeAdminValue, \
-            Config.ipmiUtilInterfaceSwitch, \
-            Config.ipmiUtilInterfaceLanPlusValue, \
-            Config.ipmiUtilIpAddressSwitch, \
-            Config.bmcIpAddress, \
-            Config.ipmiUtilUserNameSwitch, \
-            Config.bmcUser, \
-            Config.ipmiUtilPasswordSwitch, \
-            Config.bmcPassword]
+        interfaceParams = target.GetInterfaceParams()
 
         # Run all test scripts in <bmcPlatform>TestScripts folder
         if parsedArgs.test == 'a':
@@ -210,7 +333,7 @@ def Run(parser):
             parsedArgs.xmlfilepath is not None:
             UtilLogger.summaryLogger.info("Running test scripts specified in " + \
                 parsedArgs.xmlfilepath + " using IPMI over LAN+")
-            generateOutputExcelFile = True
+            generateOutputExcelFile = IsExcelOutputSupported()
             RunXmlTestScripts(interfaceParams, parsedArgs.xmlfilepath)
 
         # Check if <testValue> in -test <testValue>
@@ -227,10 +350,18 @@ def Run(parser):
         else:
             parser.print_help()
 
+        # Close native IPMI over LAN+ sessions
+        import IpmiLanPlus
+        import IpmiPipeline
+        IpmiLanPlus.CloseAllSessions()
+        IpmiPipeline.CloseAllPipelines()
+
     # Check for running tests
     # in-band in compute server
     elif parsedArgs.conn == 'kcs':
 
+        Config.kcsTransport = parsedArgs.kcstransport
+
         # Run all test scripts in <bmcPlatform>TestScripts folder
         if parsedArgs.test == 'a':
             UtilLogger.summaryLogger.info("Running all test scripts using " + \
@@ -245,7 +376,7 @@ def Run(parser):
             UtilLogger.summaryLogger.info("Running test scripts specified in " + \
                 parsedArgs.xmlfilepath + " KCS")
             RunXmlTestScripts([], parsedArgs.xmlfilepath)
-            generateOutputExcelFile = True
+            generateOutputExcelFile = IsExcelOutputSupported()
 
         # Check if <testValue> in -test <testValue>
         # is a test script.
@@ -262,10 +393,16 @@ def Run(parser):
         else:
             parser.print_help()
 
+        # Close native OpenIPMI device
+        import IpmiDev
+        IpmiDev.CloseDevice()
+
     # Print help usage if no arguments passed
     else:
         parser.print_help()
 
+    TransportReplay.StopRecording()
+
     return
 
 # Function checks if specified module in <bmcPlatform>TestScripts package
@@ -287,17 +424,18 @@ def RunSingleTestScript(interfaceParams, testName):
     # and number of iterations where they failed
     statDict = { 'init' : 0 }    
     # Get all modules and look for specified test script         
-    for modLoader, modName, isPkg in pkgutil.iter_modules(bmcPlatform.__path__):
+    moduleRegistry = ModuleRegistry.ModuleRegistry(bmcPlatform)
+    for modName in moduleRegistry.GetModuleNames():
         
         # Test failed by default
         testPassOrFail = False           
          
-        if modName == testName and not isPkg:             
+        if modName == testName and not moduleRegistry.IsPackage(modName):             
 
             testScriptExists = True
 
-            # Use modLoader to find and import module
-            module = modLoader.find_module(modName).load_module(modName)
+            # Find and import module
+            module = moduleRegistry.GetModule(modName)
         
             # Add new line to logging
             UtilLogger.verboseLogger.info("")
@@ -338,6 +476,7 @@ def RunSingleTestScript(interfaceParams, testName):
 
     # Log Summary and Statistics
     testDuration = datetime.timedelta(seconds=time.time() - startTime)
+    CmdStats.DumpCmdStats("Test Run")
     LogSummaryStatistics(totalRun, totalPassed, totalFailed, statDict, testDuration)
 
     # Email Results
@@ -386,16 +525,17 @@ def RunAllTestScripts(interfaceParams):
     statDict = { 'init' : 0 }
 
     # Get all modules and iterate through each
-    for modLoader, modName, isPkg in pkgutil.iter_modules(bmcPlatform.__path__):
+    moduleRegistry = ModuleRegistry.ModuleRegistry(bmcPlatform)
+    for modName in moduleRegistry.GetModuleNames():
 
         # Verify module is not package
-        if not isPkg:
+        if not moduleRegistry.IsPackage(modName):
 
             # Test failed by default
             testPassOrFail = False
 
-            # Use modLoader to find and import module
-            module = modLoader.find_module(modName).load_module(modName)
+            # Find and import module
+            module = moduleRegistry.GetModule(modName)
         
             # Add new line to logging
             UtilLogger.verboseLogger.info("")
@@ -429,6 +569,7 @@ def RunAllTestScripts(interfaceParams):
 
     # Log Summary and Statistics
     testDuration = datetime.timedelta(seconds=time.time() - startTime)
+    CmdStats.DumpCmdStats("Test Run")
     LogSummaryStatistics(totalRun, totalPassed, totalFailed, statDict, testDuration)
 
     # Email Results
@@ -461,26 +602,28 @@ def RunAllTestScripts(interfaceParams):
 
     return
 
+# Function returns True if the verbose log of an XML test list run
+# can be processed into the output Excel file
+# ResultProcessor expects the tests of every cycle in list order, with
+# the log lines of one test at a time, which parallel workers do not keep
+def IsExcelOutputSupported():
+
+    if testWorkerCount > 1:
+        UtilLogger.summaryLogger.error("Excel output is not generated " + \
+            "for test lists run with -parallel " + str(testWorkerCount) + \
+            ": test results are interleaved in the verbose log.")
+        return False
+
+    return True
+
 # Function will run all functional tests
 # with iterations >= 1 in test scripts XML file
 # using IPMI over LAN+ or KCS interface
 def RunXmlTestScripts(interfaceParams, xmlFilePath):
 
-    # Get all modules in <bmcPlatform>TestScripts folder and append to dictionary
-    modDict = { 'init' : [ True, True ] }
-    modLoaderIdx = 0
-    isPkgIdx = 1
-    for modLoader, modName, isPkg in pkgutil.iter_modules(bmcPlatform.__path__):
-        modDict[str(modName)] = [ modLoader, isPkg ]
-
-    # Initialize variables for statistics and summary logging
-    totalRun = 0
-    totalPassed = 0
-    totalFailed = 0
-
-    # Initialize dictionary of tests that fail
-    # and number of iterations where they failed
-    statDict = { 'init' : 0 }
+    # Get all modules in <bmcPlatform>TestScripts folder
+    # (each module is loaded once, on first use)
+    moduleRegistry = ModuleRegistry.ModuleRegistry(bmcPlatform)
 
     # Instantiate Xml Parser class
     xmlParserObj = XmlParser.XmlParser(xmlFilePath)
@@ -489,182 +632,100 @@ def RunXmlTestScripts(interfaceParams, xmlFilePath):
             + " Will not execute test scripts.")
         return
 
-    # Convert duration attribute in Xml testlist element
-    # to seconds
-    totalSeconds = ConvertDuration2Seconds(\
-        xmlParserObj.root.attrib["duration"])
+    # Initialize progress and statistics for summary logging
+    # (carried over from checkpoint when resuming an interrupted run)
+    if resumeCheckpoint is not None:
+        testCheckpoint = resumeCheckpoint
+        if os.path.abspath(testCheckpoint.xmlFilePath) != \
+            os.path.abspath(xmlFilePath):
+            UtilLogger.summaryLogger.error("RunXmlTestScripts: checkpoint " + \
+                "is for test list " + testCheckpoint.xmlFilePath + \
+                ". Will not execute test scripts.")
+            return
+        UtilLogger.summaryLogger.info("Resuming test list at cycle " + \
+            str(testCheckpoint.cycleIdx) + ". Elapsed time: " + \
+            str(datetime.timedelta(seconds=testCheckpoint.GetElapsedTime())))
+    else:
+        testCheckpoint = TestCheckpoint.TestCheckpoint(\
+            TestCheckpoint.GetCheckpointFilePath(), xmlFilePath, \
+            UtilLogger.logStartTime)
+    testResults = testCheckpoint.testResults
+
+    # Index of each test element (identifies tests in checkpoint)
+    testIdxDict = dict([ (test, testIdx) \
+        for testIdx, test in enumerate(xmlParserObj.root) ])
 
     # Loop testlist until either totalSeconds or
     # testListIterations has elapsed
-    startTime = time.time()
-    totalTestTime = startTime + totalSeconds
-    testListCycles = xmlParserObj.root.attrib["iterations"]
-    if not testListCycles.isdigit():
-        testListCycles = 1
-    elif testListCycles < 0:
-        testListCycles = 1
-    else:
-        testListCycles = int(testListCycles)
-    stopOnAnyTestFail = False
-    try:
-        stopOnAnyTestFail = \
-            True if int(xmlParserObj.root.attrib["stopOnFail"]) == 1 else False
-    except Exception, stopOnFailXmLException:
-        UtilLogger.verboseLogger.error(\
-            "RunXmlTestScripts: failed to parse stopOnFail " + \
-            " element in XML. Setting to False. Exception: " + \
-            str(stopOnFailXmLException))
+    totalSeconds, testListCycles, stopOnAnyTestFail = \
+        GetTestListSettings(xmlParserObj.root)
 
     # Loop testlist
-    testListCurrCycle = 0
     stopTest = False
-    while time.time() < totalTestTime or \
-        testListCurrCycle < testListCycles:
+    while testCheckpoint.GetElapsedTime() < totalSeconds or \
+        testCheckpoint.cycleIdx < testListCycles:
 
         # Determine if program stopping test execution
         # Due to stopOnFail
         if stopTest:
             break
 
-        # Initialize variables for summary
-        # and statistics logging 
-        cycleStartTime = time.time()
-        totalRunInCycle = 0
-        totalPassedInCycle = 0
-        totalFailedInCycle = 0
-        statDictInCycle = { 'init' : 0 }
+        # Start new cycle (unless continuing
+        # the cycle of an interrupted run)
+        if not testCheckpoint.cycleInProgress:
+            testCheckpoint.StartCycle()
+
+            # Insert Test List cycle and duration
+            UtilLogger.summaryLogger.info("")
+            UtilLogger.summaryLogger.info(\
+                "Starting Test List Cycle " + \
+                str(testCheckpoint.cycleIdx) + \
+                ". Elapsed time: " + \
+                str(datetime.timedelta(\
+                seconds=testCheckpoint.GetElapsedTime())))
+
+        # Function runs remaining iterations of one test element
+        def RunTest(test):
+            return RunXmlTest(interfaceParams, test, testIdxDict[test], \
+                moduleRegistry, stopOnAnyTestFail, testCheckpoint)
+
+        # Run tests that do not share resources
+        # at the same time on worker threads
+        if testWorkerCount > 1:
+            stopTest = TestScheduler.RunTests(xmlParserObj.root, \
+                testWorkerCount, moduleRegistry.GetResourceTags, RunTest)
+
+        # Else, run tests one after another
+        else:
+            for test in xmlParserObj.root:
 
-        # Insert Test List cycle and duration
-        UtilLogger.summaryLogger.info("")
-        UtilLogger.summaryLogger.info(\
-            "Starting Test List Cycle " + \
-            str(testListCurrCycle) + \
-            ". Elapsed time: " + \
-            str(datetime.timedelta(\
-            seconds=time.time() - startTime)))
-
-        # Parse xml file and for each element,
-        # check if test module should be executed.
-        # If so, find and load module
-        # and execute Setup, Execute, Cleanup functions
-        for test in xmlParserObj.root:
-            testName = test.attrib["name"]
-
-            # Determine if program stopping test execution
-            # Due to stopOnFail
-            if stopTest:
-                break
-
-            try:
-
-                # Get number of iterations
-                iterationCount = int(test.attrib["iterations"])
-                if iterationCount < 0:
-                    iterationCount = 0
-                stopOnTestFail = False
-                try:
-                    stopOnTestFail = \
-                        True if int(test.attrib["stopOnFail"]) == 1 else False
-                except Exception, stopOnFailXmLException:
-                    UtilLogger.verboseLogger.error(\
-                        "RunXmlTestScripts: failed to parse stopOnFail " \
-                        + " element in XML. Setting to False. Exception: " \
-                        + str(stopOnFailXmLException))
-                
-                # Check if package
-                if not modDict[testName][isPkgIdx]:
-
-                    # Call module functions iterationCount times
-                    for i in range(0,iterationCount): 
-
-                        # Test failed by default
-                        testPassOrFail = False
-
-                        # Find and Load module
-                        module = modDict[testName][modLoaderIdx]\
-                            .find_module(testName).load_module(testName)
-
-                        # Add new line to logging
-                        UtilLogger.verboseLogger.info("")
-
-                        # Delay test execution based on delay
-                        # xml test element
-                        testDelay = test.attrib["delay"]
-                        if testDelay.isdigit() and \
-                            int(testDelay) > 0:
-                            UtilLogger.verboseLogger.info("Delaying test " + \
-                                "execution for " + str(int(testDelay)) + " seconds..")
-                            time.sleep(int(testDelay))
-
-                        # Run Setup Function in TestScript module
-                        UtilLogger.verboseLogger.info("Running Setup for test " \
-                            + str(testName))
-                        testPassOrFail = module.Setup(interfaceParams)
-
-                        # Run Execute Function in TestScript module
-                        if testPassOrFail:
-                            UtilLogger.verboseLogger.info("Running Execute for test " \
-                                + str(testName))
-                            testPassOrFail &= module.Execute(interfaceParams)
-
-                        # Determine if to stop testing based on Execute() failure
-                        # Feature enabled if stopOnTestFail or stopOnAnyTestFail is true
-                        if not testPassOrFail and (stopOnAnyTestFail or stopOnTestFail):
-                            UtilLogger.verboseLogger.error(\
-                                "Stopping Test Execution. Execute " + \
-                                " for test " + str(testName) + " failed.")
-                            stopTest = True
-                            break
-
-                        # Run Cleanup Function in TestScript module                          
-                        UtilLogger.verboseLogger.info("Running Cleanup for test " \
-                            + str(testName))
-                        module.Cleanup(interfaceParams)
-
-                        # Increment statistics and log if test passed or failed
-                        if testPassOrFail:
-                            UtilLogger.summaryLogger.info(str(testName) + " PASSED")
-                            totalPassed += 1
-                            totalPassedInCycle += 1
-                        else:
-                            UtilLogger.summaryLogger.info(str(testName) + " FAILED")
-                            totalFailed += 1
-                            totalFailedInCycle += 1
-
-                            # Check if failed test already exists in dictionary
-                            if str(testName) in statDict:
-                                statDict[str(testName)] += 1
-                            # Else, append failed test to dictionary
-                            else:
-                                statDict[str(testName)] = 1
-
-                            # Check if failed test already exists in cycle dictionary
-                            if str(testName) in statDictInCycle:
-                                statDictInCycle[str(testName)] += 1
-                            # Else, append failed test to cycle dictionary
-                            else:
-                                statDictInCycle[str(testName)] = 1
-
-                        # Increment total tests run
-                        totalRunInCycle = totalPassedInCycle + totalFailedInCycle
-                        totalRun = totalPassed + totalFailed
-
-            except Exception, e:
-                UtilLogger.verboseLogger.error("RunXmlTestScripts: test " \
-                    + testName + " failed with exception: " + str(e))
+                # Determine if program stopping test execution
+                # Due to stopOnFail
+                if stopTest:
+                    break
+
+                stopTest = RunTest(test)
 
         # Log Summary and Statistics for Cycle
-        testCycleDuration = datetime.timedelta(seconds=time.time() - cycleStartTime)
-        LogCycleSummaryStatistics(testListCurrCycle, totalRunInCycle, \
-            totalPassedInCycle, totalFailedInCycle, statDictInCycle, \
-            testCycleDuration)
+        cycleResults = testCheckpoint.cycleResults
+        testCycleDuration = datetime.timedelta(\
+            seconds=testCheckpoint.GetCycleElapsedTime())
+        LogCycleSummaryStatistics(testCheckpoint.cycleIdx, cycleResults.totalRun, \
+            cycleResults.totalPassed, cycleResults.totalFailed, \
+            cycleResults.statDict, testCycleDuration)
+        CmdStats.DumpCmdStats("Test Cycle " + str(testCheckpoint.cycleIdx))
 
         # Increment test cycle index
-        testListCurrCycle += 1
+        testCheckpoint.EndCycle()
 
     # Log Summary and Statistics
-    testDuration = datetime.timedelta(seconds=time.time() - startTime)
-    LogSummaryStatistics(totalRun, totalPassed, totalFailed, statDict, testDuration)
+    testDuration = datetime.timedelta(seconds=testCheckpoint.GetElapsedTime())
+    moduleRegistry.LogLoadTimes()
+    LogSummaryStatistics(testResults.totalRun, testResults.totalPassed, \
+        testResults.totalFailed, testResults.statDict, testDuration)
+
+    # Run finished, nothing left to resume
+    testCheckpoint.Delete()
 
     # Email Results
     if email is not None:
@@ -696,6 +757,271 @@ def RunXmlTestScripts(interfaceParams, xmlFilePath):
 
     return
 
+# Function will run all iterations of one test element
+# in test scripts XML file that are not completed in current cycle
+# Inputs:
+#   test (Element): test element in XML test list
+#   testIdx (int): index of test element in XML test list
+#   moduleRegistry (ModuleRegistry): test modules
+#   stopOnAnyTestFail (bool): stop on failure of any test
+#   testCheckpoint (TestCheckpoint): run progress and statistics to update
+#       (TestSharding.UnitProgress when run by '-worker')
+# Outputs:
+#   stopTest (bool): True if test execution should stop due to stopOnFail
+def RunXmlTest(interfaceParams, test, testIdx, moduleRegistry, \
+    stopOnAnyTestFail, testCheckpoint):
+
+    testName = test.attrib["name"]
+    stopTest = False
+
+    try:
+
+        # Get number of iterations
+        iterationCount = int(test.attrib["iterations"])
+        if iterationCount < 0:
+            iterationCount = 0
+        stopOnTestFail = False
+        try:
+            stopOnTestFail = \
+                True if int(test.attrib["stopOnFail"]) == 1 else False
+        except Exception, stopOnFailXmLException:
+            UtilLogger.verboseLogger.error(\
+                "RunXmlTestScripts: failed to parse stopOnFail " \
+                + " element in XML. Setting to False. Exception: " \
+                + str(stopOnFailXmLException))
+        
+        # Run test in child process that is killed at test's deadline
+        isolateTest = testIsolationEn or "timeout" in test.attrib
+
+        # Check if package
+        if not moduleRegistry.IsPackage(testName):
+
+            # Call module functions iterationCount times
+            # (less iterations completed before run was interrupted)
+            for i in range(testCheckpoint.GetCompletedIterations(testIdx), \
+                iterationCount): 
+
+                # Test failed by default
+                testPassOrFail = False
+                testTimedOut = False
+
+                # Add new line to logging
+                UtilLogger.verboseLogger.info("")
+
+                # Delay test execution until readiness conditions
+                # in wait-for xml test element hold (at most wait-max,
+                # or delay, seconds)
+                testDelay = test.attrib["delay"]
+                if "wait-for" in test.attrib:
+                    import ReadinessProbe
+                    waitMax = test.attrib.get("wait-max", testDelay)
+                    if waitMax.isdigit() and int(waitMax) > 0:
+                        waitMax = int(waitMax)
+                    else:
+                        waitMax = Config.readinessProbeDefaultMaxTime
+                    ReadinessProbe.WaitFor(interfaceParams, \
+                        test.attrib["wait-for"], waitMax, testName)
+
+                # Delay test execution based on delay
+                # xml test element
+                elif testDelay.isdigit() and \
+                    int(testDelay) > 0:
+                    UtilLogger.verboseLogger.info("Delaying test " + \
+                        "execution for " + str(int(testDelay)) + " seconds..")
+                    time.sleep(int(testDelay))
+
+                # Run Setup, Execute and Cleanup in child process
+                if isolateTest:
+                    testPassOrFail, testTimedOut = \
+                        TestIsolation.RunIsolatedTest(bmcPlatform.__name__, \
+                        testName, interfaceParams, \
+                        TestIsolation.GetTestTimeout(test), \
+                        stopOnAnyTestFail or stopOnTestFail)
+
+                else:
+
+                    # Get loaded module and reset its per-iteration state
+                    module = moduleRegistry.GetModule(testName)
+                    moduleRegistry.ResetModule(testName)
+
+                    # Run Setup Function in TestScript module
+                    UtilLogger.verboseLogger.info("Running Setup for test " \
+                        + str(testName))
+                    testPassOrFail = module.Setup(interfaceParams)
+
+                    # Run Execute Function in TestScript module
+                    if testPassOrFail:
+                        UtilLogger.verboseLogger.info("Running Execute for test " \
+                            + str(testName))
+                        testPassOrFail &= module.Execute(interfaceParams)
+
+                # Determine if to stop testing based on Execute() failure
+                # Feature enabled if stopOnTestFail or stopOnAnyTestFail is true
+                if not testPassOrFail and (stopOnAnyTestFail or stopOnTestFail):
+                    UtilLogger.verboseLogger.error(\
+                        "Stopping Test Execution. Execute " + \
+                        " for test " + str(testName) + " failed.")
+                    stopTest = True
+                    break
+
+                # Run Cleanup Function in TestScript module                          
+                if not isolateTest:
+                    UtilLogger.verboseLogger.info("Running Cleanup for test " \
+                        + str(testName))
+                    module.Cleanup(interfaceParams)
+
+                # Log if test passed, failed or timed out (counted as failed),
+                # increment statistics and save checkpoint
+                if testTimedOut:
+                    UtilLogger.summaryLogger.info(str(testName) + " TIMEOUT")
+                elif testPassOrFail:
+                    UtilLogger.summaryLogger.info(str(testName) + " PASSED")
+                else:
+                    UtilLogger.summaryLogger.info(str(testName) + " FAILED")
+                testCheckpoint.AddResult(testIdx, str(testName), testPassOrFail)
+
+    except Exception, e:
+        UtilLogger.verboseLogger.error("RunXmlTestScripts: test " \
+            + testName + " failed with exception: " + str(e))
+
+    return stopTest
+
+# Function will return the duration, iterations and stopOnFail
+# attributes of the testlist element in test scripts XML file
+# Outputs:
+#   totalSeconds (int): test list duration in seconds
+#   testListCycles (int): test list iterations
+#   stopOnAnyTestFail (bool): stop on failure of any test
+def GetTestListSettings(testList):
+
+    # Convert duration attribute in Xml testlist element
+    # to seconds
+    totalSeconds = ConvertDuration2Seconds(testList.attrib["duration"])
+
+    testListCycles = testList.attrib["iterations"]
+    if not testListCycles.isdigit():
+        testListCycles = 1
+    elif testListCycles < 0:
+        testListCycles = 1
+    else:
+        testListCycles = int(testListCycles)
+    stopOnAnyTestFail = False
+    try:
+        stopOnAnyTestFail = \
+            True if int(testList.attrib["stopOnFail"]) == 1 else False
+    except Exception, stopOnFailXmLException:
+        UtilLogger.verboseLogger.error(\
+            "RunXmlTestScripts: failed to parse stopOnFail " + \
+            " element in XML. Setting to False. Exception: " + \
+            str(stopOnFailXmLException))
+
+    return totalSeconds, testListCycles, stopOnAnyTestFail
+
+# Function will run all tests in test scripts XML file against
+# all targets in inventory file by handing out work units to
+# '-worker' processes on any number of controller hosts
+# and log their merged results
+# Inputs:
+#   inventoryFilePath (string): inventory XML file
+#   xmlFilePath (string): test scripts XML file
+#   port (int): TCP port workers connect to
+#   sharedSecret (string): secret workers authenticate with
+#   switchIpAddress (string): default AC power IP switch address
+def RunShardedXmlTestScripts(inventoryFilePath, xmlFilePath, port, \
+    sharedSecret, switchIpAddress):
+
+    if not sharedSecret:
+        UtilLogger.summaryLogger.error("RunShardedXmlTestScripts: " + \
+            "'-sharedsecret' or Config.testShardSharedSecret required " + \
+            "to hand out units to workers")
+        return
+
+    # Credentials stay with the workers
+    targetList = MultiTarget.LoadInventory(inventoryFilePath, \
+        switchIpAddress, requireCredentials=False)
+    if not targetList:
+        UtilLogger.summaryLogger.error("RunShardedXmlTestScripts: no targets " + \
+            "to run in " + str(inventoryFilePath))
+        return
+
+    # Test modules are only read for their resource tags
+    moduleRegistry = ModuleRegistry.ModuleRegistry(bmcPlatform)
+
+    # Instantiate Xml Parser class
+    xmlParserObj = XmlParser.XmlParser(xmlFilePath)
+    if not xmlParserObj.root:
+        UtilLogger.verboseLogger.error("RunShardedXmlTestScripts: failed to " + \
+            "parse Xml file. Will not execute test scripts.")
+        return
+
+    totalSeconds, testListCycles, stopOnAnyTestFail = \
+        GetTestListSettings(xmlParserObj.root)
+
+    startTime = time.time()
+    testResults = TestSharding.RunCoordinator(port, sharedSecret, targetList, \
+        list(xmlParserObj.root), testListCycles, totalSeconds, \
+        stopOnAnyTestFail, moduleRegistry.GetResourceTags)
+    if testResults is None:
+        return
+
+    # Log merged Summary and Statistics
+    testDuration = datetime.timedelta(seconds=time.time() - startTime)
+    LogSummaryStatistics(testResults.totalRun, testResults.totalPassed, \
+        testResults.totalFailed, testResults.statDict, testDuration)
+
+    return
+
+# Function will run test list units handed out
+# by '-coordinator' process until it has no more units
+# Inputs:
+#   coordinatorAddress (string): <host>:<port> of coordinator
+#   sharedSecret (string): secret to authenticate with the coordinator
+#   inventoryFilePath (string): inventory XML file with credentials
+#       of targets, None if not given
+#   userName (string): user name for targets not in inventory file
+#   password (string): password for targets not in inventory file
+#   switchIpAddress (string): default AC power IP switch address
+def RunShardWorker(coordinatorAddress, sharedSecret, inventoryFilePath, \
+    userName, password, switchIpAddress):
+
+    if not sharedSecret:
+        UtilLogger.summaryLogger.error("RunShardWorker: '-sharedsecret' " + \
+            "or Config.testShardSharedSecret required to connect to " + \
+            "coordinator")
+        return
+
+    # BMC credentials are never sent by the coordinator
+    localTargetList = []
+    if inventoryFilePath is not None:
+        localTargetList = MultiTarget.LoadInventory(inventoryFilePath, \
+            switchIpAddress)
+        if localTargetList is None:
+            return
+    defaultCredentials = None
+    if userName is not None and password is not None:
+        defaultCredentials = (userName, password)
+    if not localTargetList and defaultCredentials is None:
+        UtilLogger.summaryLogger.error("RunShardWorker: '-inventory' or " + \
+            "'-user' and '-pwd' required for BMC credentials")
+        return
+
+    # Get all modules in <bmcPlatform>TestScripts folder
+    # (each module is loaded once, on first use)
+    moduleRegistry = ModuleRegistry.ModuleRegistry(bmcPlatform)
+
+    # Function runs all iterations of a unit's test element
+    # against the unit's target
+    def RunUnit(target, test, stopOnAnyTestFail, unitProgress):
+        target.Apply()
+        return RunXmlTest(target.GetInterfaceParams(), test, 0, \
+            moduleRegistry, stopOnAnyTestFail, unitProgress)
+
+    TestSharding.RunWorker(coordinatorAddress, sharedSecret, \
+        localTargetList, defaultCredentials, RunUnit)
+    moduleRegistry.LogLoadTimes()
+
+    return
+
 # Function will log summary statistics for a single test cycle
 def LogCycleSummaryStatistics(cycleIdx, totalRun, totalPassed, totalFailed, \
     statDict, duration):
@@ -745,6 +1071,21 @@ def LogSummaryStatistics(totalRun, totalPassed, totalFailed, statDict, duration)
                 UtilLogger.summaryLogger.info(failedTest + ": Failed " + \
                     str(failedCount) + " times")
 
+    # Write summary results for '-inventory' controller
+    if resultFilePath is not None:
+        try:
+            with open(resultFilePath, 'w') as resultFile:
+                json.dump({ 'totalRun' : totalRun, \
+                    'totalPassed' : totalPassed, \
+                    'totalFailed' : totalFailed, \
+                    'failedTests' : dict([ (failedTest, failedCount) \
+                        for failedTest, failedCount in statDict.iteritems() \
+                        if failedTest != 'init' ]), \
+                    'duration' : str(duration) }, resultFile)
+        except IOError, e:
+            UtilLogger.summaryLogger.error("Failed to write results to " + \
+                resultFilePath + ": " + str(e))
+
     UtilLogger.consoleLogger.info("")
     UtilLogger.consoleLogger.info("View summary results at " + \
         Config.summaryLogPath + Config.summaryLogFileName + \
@@ -759,6 +1100,8 @@ def LogSummaryStatistics(totalRun, totalPassed, totalFailed, statDict, duration)
 # Function will attempt to email results
 def EmailResults(email, sender, senderPwd, server, port, bmcVersion='', emailBody=''):
 
+    import Email
+
     sendPassOrFail = Email.send_mail(sender, senderPwd, [ email ], \
         'OneBMCTest BMC ' + bmcVersion + ' Results', emailBody, [ \
         Config.verboseLogPath + Config.verboseLogFileName + \
@@ -111,14 +111,14 @@ class PsuFwInfo:
                     ' successfully received PsuFwVersionInfo. Image Type: ' + \
                     self.imageTypeDict[imageType][0] + '.' + \
                     ' Image Active: ' + str(self.activeOrInactive) + '.' + \
-                    ' Raw Psu Version: ' + str(rawPsuVersion))
+                    ' Raw Psu Version: ' + str([ '%02x' % b for b in rawPsuVersion ]))
         else:
             if Config.debugEn:
                 UtilLogger.verboseLogger.error('PsuFwInfo.UpdatePsuFwVersion: ' + \
                     ' failed to receive PsuFwVersionInfo. Image Type: ' + \
                     self.imageTypeDict[imageType][0] + '.' + \
                     ' Image Active: ' + str(self.activeOrInactive) + '.' + \
-                    ' Raw Psu Version: ' + str(rawPsuVersion))
+                    ' Raw Psu Version: ' + str([ '%02x' % b for b in rawPsuVersion ]))
             return updatePassOrFail
         
         # Update PSU FW Version
@@ -135,7 +135,7 @@ class PsuFwInfo:
         return updatePassOrFail
 
     # Function will update PSU FW Version in PsuFwInfo object
-    # using raw byte list response of PSU FW version via PMBus command Read_FW_Info
+    # using raw byte array response of PSU FW version via PMBus command Read_FW_Info
     def UpdatePsuFwVersion(self, rawPsuFwVersion):
 
         # Initialize variables
@@ -143,70 +143,40 @@ class PsuFwInfo:
 
         try:
 
-            # Update PSU FW Major Version
-            rawMajIntString = ''
-            startingOffset = self.psuFwVersionFormatDict[self.psuFwMajorVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwMajorVersionName][1]
-            rawMajAsciiList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawMajChar in rawMajAsciiList:
-                rawMajIntString += str(unichr(int(rawMajChar, 16)))
+            # Update PSU FW Major Version (ASCII characters)
+            startingOffset, fieldLength = \
+                self.psuFwVersionFormatDict[self.psuFwMajorVersionName]
+            rawMajIntString = str(rawPsuFwVersion[\
+                startingOffset : startingOffset + fieldLength])
             self.majorVersion = int(rawMajIntString)
 
-            # Update PSU FW Minor Version
-            rawMinIntString = ''
-            startingOffset = self.psuFwVersionFormatDict[self.psuFwMinorVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwMinorVersionName][1]
-            rawMinAsciiList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawMinChar in rawMinAsciiList:
-                rawMinIntString += str(unichr(int(rawMinChar, 16)))
+            # Update PSU FW Minor Version (ASCII characters)
+            startingOffset, fieldLength = \
+                self.psuFwVersionFormatDict[self.psuFwMinorVersionName]
+            rawMinIntString = str(rawPsuFwVersion[\
+                startingOffset : startingOffset + fieldLength])
             self.minorVersion = int(rawMinIntString)
 
             # Update PSU FW Master Beta Version
-            rawMstrHexString = ''
             startingOffset = self.psuFwVersionFormatDict[self.psuFwMasterBetaVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwMasterBetaVersionName][1]
-            rawMstrHexList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawMstrHex in rawMstrHexList:
-                rawMstrHexString += rawMstrHex
-            self.masterVersion = int(rawMstrHexString, 16)
+            self.masterVersion = rawPsuFwVersion[startingOffset]
 
             # Update PSU FW UCD Beta Version
-            rawUcdHexString = ''
             startingOffset = self.psuFwVersionFormatDict[self.psuFwUcdBetaVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwUcdBetaVersionName][1]
-            rawUcdHexList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawUcdHex in rawUcdHexList:
-                rawUcdHexString += rawUcdHex
-            self.ucdVersion = int(rawUcdHexString, 16)
+            self.ucdVersion = rawPsuFwVersion[startingOffset]
 
             # Update PSU FW IVS Beta Version
-            rawIvsHexString = ''
             startingOffset = self.psuFwVersionFormatDict[self.psuFwIvsBetaVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwIvsBetaVersionName][1]
-            rawIvsHexList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawIvsHex in rawIvsHexList:
-                rawIvsHexString += rawIvsHex
-            self.ivsVersion = int(rawIvsHexString, 16)
+            self.ivsVersion = rawPsuFwVersion[startingOffset]
 
             # Update PSU FW BBU Beta Version
-            rawBbuHexString = ''
             startingOffset = self.psuFwVersionFormatDict[self.psuFwBbuBetaVersionName][0]
-            fieldLength = self.psuFwVersionFormatDict[self.psuFwBbuBetaVersionName][1]
-            rawBbuHexList = rawPsuFwVersion[\
-                startingOffset : startingOffset + fieldLength]
-            for rawBbuHex in rawBbuHexList:
-                rawBbuHexString += rawBbuHex
-            self.bbuVersion = int(rawBbuHexString, 16)
+            self.bbuVersion = rawPsuFwVersion[startingOffset]
 
             # Generate PSU FW Version String
-            self.psuFwVersion = str(rawMajIntString) + '.' + str(rawMinIntString) + '.' + \
-                '0x' + rawMstrHexString + rawUcdHexString + rawIvsHexString + \
-                rawBbuHexString
+            self.psuFwVersion = rawMajIntString + '.' + rawMinIntString + '.' + \
+                '0x%02x%02x%02x%02x' % (self.masterVersion, self.ucdVersion, \
+                self.ivsVersion, self.bbuVersion)
 
             updatePassOrFail = True
 
@@ -224,47 +194,48 @@ class PsuFwInfo:
     # Outputs:
     #   getPassOrFail (bool): get successful
     #   activeOrInactive (bool): image is active (True) or inactive (False)
-    #   psuVersion (list of strings): PSU FW Image (default value: empty list) 
+    #   psuVersion (bytearray): PSU FW Image (default value: empty bytearray) 
     def GetPsuFwVersionInfo(self, interfaceParams, imageType):
 
         # Initialize variables
         getPassOrFail = False
         activeOrInactive = False
-        psuVersion = []
+        psuVersion = bytearray()
 
         # Check if FW Image is active via Read_FW_Info
         # BMC will get PSU active image status using READ_FW_INFO PSU commadn via PMBus
-        cmdPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, Config.netFnApp, \
+        resp = IpmiUtil.SendRawCmdResp(interfaceParams, Config.netFnApp, \
             Config.cmdMasterWriteRead, [ '03', 'B0', '0A', 'EF', '01', \
             self.imageTypeDict[imageType][1]])
-        if cmdPassOrFail and \
-            int(respData[0], 16) == self.pmbReadFwInfoRespLen \
-            and len(respData[1:]) == self.pmbReadFwInfoRespLen:
+        respData = resp.data
+        if resp.cmdPassOrFail and \
+            len(respData[1:]) == self.pmbReadFwInfoRespLen \
+            and respData[0] == self.pmbReadFwInfoRespLen:
 
             # Check whether image is active or inactive
-            if respData[1] == '01': # image is active
+            if respData[1] == 0x01: # image is active
                 getPassOrFail = True
                 activeOrInactive = True
                 psuVersion = respData[2:]
                 UtilLogger.verboseLogger.info('PsuFwInfo.GetPsuFwVersionInfo ' + \
                     '(READ_FW_INFO): command passed.' + \
                     ' PSU ' + self.imageTypeDict[imageType][0] + ' is active image.' + \
-                    ' PSU FW Version: ' + str(psuVersion))
-            elif respData[1] == '00': # image is inactive
+                    ' PSU FW Version: ' + str([ '%02x' % b for b in psuVersion ]))
+            elif respData[1] == 0x00: # image is inactive
                 getPassOrFail = True
                 psuVersion = respData[2:]
                 UtilLogger.verboseLogger.info('PsuFwInfo.GetPsuFwVersionInfo ' + \
                     '(READ_FW_INFO): command passed.' + \
                     ' PSU ' + self.imageTypeDict[imageType][0] + ' is inactive image.' + \
-                    ' PSU FW Version: ' + str(psuVersion))
-            elif cmdPassOrFail:
+                    ' PSU FW Version: ' + str([ '%02x' % b for b in psuVersion ]))
+            elif resp.cmdPassOrFail:
                 UtilLogger.verboseLogger.error('PsuFwInfo.GetPsuFwVersionInfo ' + \
                     '(READ_FW_INFO): command failed. Success completion code but ' + \
                     'unexpected response data: ' + \
-                    str(respData))
+                    str(resp))
             else:
                 UtilLogger.verboseLogger.error('PsuFwInfo.GetPsuFwVersionInfo ' + \
-                    '(READ_FW_INFO): command failed. Completion Code: ' + str(respData))
+                    '(READ_FW_INFO): command failed. Completion Code: ' + str(resp))
 
         return getPassOrFail, activeOrInactive, psuVersion
 
@@ -0,0 +1,163 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Readiness-probe based waits.
+
+WaitFor polls one or more readiness conditions until all of them hold or a
+maximum time has passed, instead of sleeping for a fixed worst-case time:
+    bmc-ready   BMC answers Get Device Id
+    chassis-on  Get Chassis Status reports power on
+    redfish-up  Redfish service root answers HTTP GET
+    ssh-up      BMC SSH port sends an SSH banner
+The first probe runs at once (or after a settle time); the interval between probes starts at
+Config.readinessProbeMinInterval and grows by Config.readinessProbeBackoffFactor
+up to Config.readinessProbeMaxInterval. The time actually waited is logged.
+
+In an XML test list, 'wait-for' replaces the 'delay' sleep before each
+iteration of a test; 'wait-max' (seconds) bounds the wait and defaults to
+'delay', or to Config.readinessProbeDefaultMaxTime without delay:
+    <test name="VerifyGetSdr" wait-for="bmc-ready,redfish-up" wait-max="300"
+      delay="0" iterations="1" stopOnFail="0"/>
+"""
+
+import socket
+import time
+
+import Config
+import IpmiUtil
+import UtilLogger
+
+# Function returns True if BMC answers Get Device Id
+def ProbeBmcReady(interfaceParams):
+
+    cmdPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, \
+        Config.netFnApp, Config.cmdGetDeviceId, [], useCache = False)
+
+    return cmdPassOrFail
+
+# Function returns True if Get Chassis Status reports power on
+def ProbeChassisOn(interfaceParams):
+
+    cmdPassOrFail, respData = IpmiUtil.SendRawCmd(interfaceParams, \
+        Config.netFnChassis, Config.cmdGetChassisStatus, [], useCache = False)
+
+    return cmdPassOrFail and bool(int(respData[0], 16) & 1) # power is on [0]
+
+# Function returns True if Redfish service root answers HTTP GET
+def ProbeRedfishUp(interfaceParams):
+
+    try:
+        import RedFish
+    except ImportError, e:
+        UtilLogger.verboseLogger.error("ReadinessProbe: redfish-up " + \
+            "unavailable: " + str(e))
+        return False
+
+    probePassOrFail, response = RedFish.RestApiCall(None, Config.bmcIpAddress, \
+        Config.REDFISH_BASE_ADDRESS, "GET", None, Config.httpRedfishPort, \
+        restAPITimeout=Config.readinessProbeRequestTimeout)
+
+    return probePassOrFail
+
+# Function returns True if BMC SSH port sends an SSH banner
+def ProbeSshUp(interfaceParams):
+
+    try:
+        sock = socket.create_connection((Config.bmcIpAddress, Config.sshPort), \
+            Config.readinessProbeRequestTimeout)
+        try:
+            return sock.recv(4) == 'SSH-'
+        finally:
+            sock.close()
+    except socket.error:
+        return False
+
+# Dictionary of condition name: probe function pairs
+probeDict = { 'bmc-ready' : ProbeBmcReady, \
+    'chassis-on' : ProbeChassisOn, \
+    'redfish-up' : ProbeRedfishUp, \
+    'ssh-up' : ProbeSshUp }
+
+# Function will wait until all conditions hold
+# or maxSeconds have passed
+# Inputs:
+#   interfaceParams (list): IpmiUtil interface arguments
+#   waitFor (string): comma- or '|'-separated condition names (probeDict)
+#   maxSeconds (float): maximum time to wait
+#   callerName (string): name logged with wait result
+#   settleSeconds (float): time to sleep before first probe
+#       (e.g. BMC still answers until its reboot starts)
+# Outputs:
+#   waitPassOrFail (bool): True if all conditions hold
+#   waitSeconds (float): time waited
+def WaitFor(interfaceParams, waitFor, maxSeconds, callerName='ReadinessProbe', \
+    settleSeconds=0):
+
+    conditionList = [ condition.strip() \
+        for condition in waitFor.replace('|', ',').split(',') \
+        if condition.strip() ]
+    unknownList = [ condition for condition in conditionList \
+        if condition not in probeDict ]
+    if unknownList:
+        UtilLogger.verboseLogger.error(callerName + ": unknown wait-for " + \
+            "condition(s) " + ', '.join(unknownList) + ". Valid conditions: " + \
+            ', '.join(sorted(probeDict.keys())))
+        return False, 0
+
+    UtilLogger.verboseLogger.info(callerName + ": waiting up to " + \
+        str(maxSeconds) + " seconds for " + ', '.join(conditionList) + "..")
+
+    startTime = time.time()
+    if settleSeconds > 0:
+        time.sleep(min(settleSeconds, maxSeconds))
+    probeInterval = Config.readinessProbeMinInterval
+    pendingList = conditionList
+    probeCount = 0
+    while True:
+
+        # Conditions that held once are not probed again
+        pendingList = [ condition for condition in pendingList \
+            if not probeDict[condition](interfaceParams) ]
+        probeCount += 1
+        waitSeconds = time.time() - startTime
+
+        if not pendingList:
+            UtilLogger.verboseLogger.info(callerName + ": waited " + \
+                str(round(waitSeconds, 1)) + " seconds for " + \
+                ', '.join(conditionList) + " (max " + str(maxSeconds) + \
+                ", " + str(probeCount) + " probes)")
+            return True, waitSeconds
+
+        if waitSeconds >= maxSeconds:
+            UtilLogger.verboseLogger.error(callerName + ": " + \
+                ', '.join(pendingList) + " not ready after " + \
+                str(round(waitSeconds, 1)) + " seconds (" + \
+                str(probeCount) + " probes)")
+            return False, waitSeconds
+
+        time.sleep(min(probeInterval, maxSeconds - waitSeconds))
+        probeInterval = min(probeInterval * Config.readinessProbeBackoffFactor, \
+            Config.readinessProbeMaxInterval)
@@ -0,0 +1,168 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+TTL response cache for read-only IPMI requests.
+
+When Config.respCacheEnabled is set, IpmiUtil.SendRawCmdResp looks up
+successful responses to the commands in Config.respCacheTtlDict here before
+sending them, keyed by target (interface parameters), NetFn, Cmd and request
+bytes. Entries expire after the TTL configured for their NetFn/Cmd.
+
+Commands that reset the BMC or change chassis power state
+(Config.respCacheFlushCmdList) flush the cached responses for their target;
+'IpmiUtil power', AC power switch actions and firmware flash flush the whole
+cache since the affected target is not known there.
+"""
+
+import threading
+import time
+
+import Config
+import UtilLogger
+
+# Dictionary of cache key : (expiry time, completion code, response data)
+respCacheDict = {}
+respCacheLock = threading.Lock()
+
+# Hit/miss counters since last flush of all targets
+respCacheHits = 0
+respCacheMisses = 0
+
+# Function returns (netFn, cmd) as integers for policy lookups
+def GetCmdId(netFn, cmd):
+
+    return int(netFn, 16), int(cmd, 16)
+
+# Function returns TTL in seconds for NetFn/Cmd (None if not cacheable)
+def GetTtl(netFn, cmd):
+
+    cmdId = GetCmdId(netFn, cmd)
+    for (policyNetFn, policyCmd), ttl in Config.respCacheTtlDict.iteritems():
+        if GetCmdId(policyNetFn, policyCmd) == cmdId:
+            return ttl
+
+    return None
+
+# Function returns True if NetFn/Cmd flushes cached responses for its target
+def IsFlushCmd(netFn, cmd):
+
+    cmdId = GetCmdId(netFn, cmd)
+    for policyNetFn, policyCmd in Config.respCacheFlushCmdList:
+        if GetCmdId(policyNetFn, policyCmd) == cmdId:
+            return True
+
+    return False
+
+# Function returns cache key for request
+def GetCacheKey(interfaceParams, netFn, cmd, rawBytesList):
+
+    return (tuple(interfaceParams or []),) + GetCmdId(netFn, cmd) + \
+        tuple([ int(rawByte, 16) for rawByte in rawBytesList ])
+
+# Function will look up cached response for request
+# Inputs:
+#   interfaceParams (list; string): interface parameters for LAN+/KCS
+#   netFn, cmd (string): NetFn and Cmd in hex string
+#   rawBytesList (list; string): request data bytes in hex string
+# Outputs:
+#   cacheHit (bool): unexpired response found
+#   completionCode (int): cached completion code
+#   respBytes (bytearray): copy of cached response data
+def GetResp(interfaceParams, netFn, cmd, rawBytesList):
+
+    global respCacheHits, respCacheMisses
+
+    if GetTtl(netFn, cmd) is None:
+        return False, None, None
+
+    cacheKey = GetCacheKey(interfaceParams, netFn, cmd, rawBytesList)
+    with respCacheLock:
+        cacheEntry = respCacheDict.get(cacheKey)
+        if cacheEntry is None or cacheEntry[0] <= time.time():
+            respCacheDict.pop(cacheKey, None)
+            respCacheMisses += 1
+            return False, None, None
+        respCacheHits += 1
+
+    if Config.debugEn:
+        UtilLogger.verboseLogger.info("RespCache: cached response for " + \
+            "NetFn 0x" + netFn + " Cmd 0x" + cmd + ": " + \
+            ' '.join([ '%02x' % respByte for respByte in cacheEntry[2] ]))
+
+    return True, cacheEntry[1], bytearray(cacheEntry[2])
+
+# Function will store successful response for request
+# (ignored if NetFn/Cmd has no TTL)
+# Inputs:
+#   interfaceParams, netFn, cmd, rawBytesList: same as GetResp
+#   completionCode (int): response completion code
+#   respBytes (bytearray): response data
+def PutResp(interfaceParams, netFn, cmd, rawBytesList, completionCode, \
+    respBytes):
+
+    ttl = GetTtl(netFn, cmd)
+    if ttl is None or completionCode != 0:
+        return
+
+    cacheKey = GetCacheKey(interfaceParams, netFn, cmd, rawBytesList)
+    with respCacheLock:
+        respCacheDict[cacheKey] = (time.time() + ttl, completionCode, \
+            bytes(respBytes))
+
+    return
+
+# Function will flush cached responses
+# Inputs:
+#   interfaceParams (list; string): flush only this target
+#       (None flushes all targets)
+#   reason (string): logged when debugEn is True
+def FlushRespCache(interfaceParams = None, reason = ''):
+
+    global respCacheHits, respCacheMisses
+
+    with respCacheLock:
+        if interfaceParams is None:
+            flushCount = len(respCacheDict)
+            respCacheDict.clear()
+            if Config.debugEn and (respCacheHits or respCacheMisses):
+                UtilLogger.verboseLogger.info("RespCache: " + \
+                    str(respCacheHits) + " hits, " + \
+                    str(respCacheMisses) + " misses before flush")
+            respCacheHits = 0
+            respCacheMisses = 0
+        else:
+            target = tuple(interfaceParams)
+            flushKeys = [ cacheKey for cacheKey in respCacheDict \
+                if cacheKey[0] == target ]
+            for cacheKey in flushKeys:
+                del respCacheDict[cacheKey]
+            flushCount = len(flushKeys)
+
+    if Config.debugEn and flushCount:
+        UtilLogger.verboseLogger.info("RespCache: flushed " + \
+            str(flushCount) + " cached responses (" + reason + ")")
+
+    return
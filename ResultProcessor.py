@@ -205,7 +205,8 @@ def ParseVerbLog(verbFilePath):
                     raise InvCycNum, cycleNum
 
             # Is this the end of a test execution result?            
-            elif (line2.endswith('PASSED') or line2.endswith('FAILED')):
+            elif (line2.endswith('PASSED') or line2.endswith('FAILED') or \
+                  line2.endswith('TIMEOUT')):
                 # End of a test execution result.
 
                 # Get test name and test result (Pass/Fail).
@@ -334,7 +335,7 @@ def WriteOutputToExcel(verbCycles, verbTests, outputFilePath):
             passFail = testResult[0]
             if (passFail == 'PASSED'):
                 worksheet.write(rowNum, colNum, passFail, passFormat)
-            else:  # 'FAILED'
+            else:  # 'FAILED' or 'TIMEOUT'
                 worksheet.write(rowNum, colNum, passFail, failFormat)
 
                 # Add comment to cell.
@@ -0,0 +1,549 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+On-disk SDR repository cache.
+
+The full SDR repository is walked once (Reserve SDR Repository + Get SDR,
+using partial reads when the BMC cannot return a whole record at once) and
+each full (0x01) and compact (0x02) sensor record is decoded into an
+SdrRecord. Records are indexed by sensor name and record ID.
+
+The raw records are saved to disk together with a cache key built from the
+Get Device ID firmware version and the Get SDR Repository Info most recent
+addition/erase timestamps. Later runs compare the key with the BMC and only
+walk the repository again when the key changed.
+
+Each full sensor record gets a 256-entry conversion table (raw reading to
+converted reading) when it is decoded. Tables are shared between records
+with the same conversion factors, so readings and thresholds are converted
+with a single lookup.
+"""
+
+from array import array
+import binascii
+import json
+import math
+import os
+import threading
+
+import Config
+import IpmiUtil
+import Helper
+import UtilLogger
+
+# SDR record types
+sdrRecordTypeFull = 0x01
+sdrRecordTypeCompact = 0x02
+
+# SDR header length and record ID of last record
+sdrHeaderLength = 5
+sdrLastRecordId = 0xFFFF
+
+# Completion codes used while walking the SDR repository
+ccReservationCanceled = 0xC5
+ccCannotReturnRequestedBytes = 0xCA
+
+# Linearization types supported by conversion tables: y = f(x)
+sdrLinearizationDict = { \
+    0x00 : None, \
+    0x01 : math.log, \
+    0x02 : math.log10, \
+    0x03 : lambda x: math.log(x, 2) }
+
+# Conversion tables shared by records with the same conversion factors
+# Key: (linearization, M, B, Rexp, Bexp); Value: array('d') of 256 readings
+conversionTableDict = {}
+conversionTableDictLock = threading.Lock()
+
+# Function will return 256-entry conversion table for sensor conversion factors
+# Inputs:
+#   linearization (int): linearization type (bits [6:0])
+#   mVal, bVal, rExp, bExp (int): signed conversion factors
+# Outputs:
+#   conversionTable (array('d')): converted reading for each raw reading
+#       (NaN where linearization is undefined for the reading),
+#       None if linearization type is not supported
+def GetConversionTable(linearization, mVal, bVal, rExp, bExp):
+
+    if linearization not in sdrLinearizationDict:
+        return None
+
+    tableKey = (linearization, mVal, bVal, rExp, bExp)
+    with conversionTableDictLock:
+        conversionTable = conversionTableDict.get(tableKey)
+        if conversionTable is not None:
+            return conversionTable
+
+        linearFunction = sdrLinearizationDict[linearization]
+        conversionTable = array('d')
+        for rawReading in range(256):
+            sensorReading = float((mVal * rawReading + (bVal * (10**bExp))) * \
+                (10**rExp))
+            if linearFunction is not None:
+                try:
+                    sensorReading = linearFunction(sensorReading)
+                except ValueError:
+                    sensorReading = float('nan')
+            conversionTable.append(sensorReading)
+        conversionTableDict[tableKey] = conversionTable
+
+    return conversionTable
+
+# Function will convert a batch of raw readings with one table lookup each
+# Inputs:
+#   conversionTable (array('d')): table from GetConversionTable
+#   rawReadings (bytearray or list; int): raw sensor reading bytes
+# Outputs:
+#   sensorReadings (list; float): converted readings (NaN if undefined)
+def ConvertReadings(conversionTable, rawReadings):
+
+    return map(conversionTable.__getitem__, rawReadings)
+
+# Class holds one decoded full or compact sensor record
+class SdrRecord:
+
+    # Record byte offsets (common to full and compact records)
+    constRecordIdLsbIdx = 0
+    constRecordTypeIdx = 3
+    constSensorOwnerIdIdx = 5
+    constSensorNumberIdx = 7
+    constEntityIdIdx = 8
+    constSensorInitIdx = 10
+    constSensorTypeIdx = 12
+    constEventReadingTypeIdx = 13
+    constLowerThresholdReadingMaskLsbIdx = 14
+    constUpperThresholdReadingMaskLsbIdx = 16
+    constReadableThresholdMaskIdx = 18
+    constSettableThresholdMaskIdx = 19
+    constSensorUnits2Idx = 21
+
+    # Full sensor record byte offsets
+    constLinearizationIdx = 23
+    constMValLsbIdx = 24
+    constMValMsbIdx = 25
+    constBValLsbIdx = 26
+    constBValMsbIdx = 27
+    constRExpBExpIdx = 29
+    constFullThresholdIdxDict = { \
+        'UpperNonRecoverable' : 36, \
+        'UpperCritical' : 37, \
+        'UpperNonCritical' : 38, \
+        'LowerNonRecoverable' : 39, \
+        'LowerCritical' : 40, \
+        'LowerNonCritical' : 41 }
+    constFullIdStringIdx = 47
+
+    # Compact sensor record byte offsets
+    constCompactIdStringIdx = 31
+
+    # Constructor
+    # Inputs:
+    #   recordBytes (bytearray): complete SDR record (header and body)
+    def __init__(self, recordBytes):
+
+        self.recordBytes = recordBytes
+        self.recordId = recordBytes[self.constRecordIdLsbIdx] | \
+            recordBytes[self.constRecordIdLsbIdx + 1] << 8
+        self.recordType = recordBytes[self.constRecordTypeIdx]
+
+        # Sensor Info Variables
+        self.sensorOwnerId = recordBytes[self.constSensorOwnerIdIdx]
+        self.sensorNumber = recordBytes[self.constSensorNumberIdx]
+        self.entityId = recordBytes[self.constEntityIdIdx]
+        self.sensorInit = recordBytes[self.constSensorInitIdx]
+        self.sensorType = recordBytes[self.constSensorTypeIdx]
+        self.eventReadingType = recordBytes[self.constEventReadingTypeIdx]
+        self.lowerThresholdReadingMask = \
+            recordBytes[self.constLowerThresholdReadingMaskLsbIdx] | \
+            recordBytes[self.constLowerThresholdReadingMaskLsbIdx + 1] << 8
+        self.upperThresholdReadingMask = \
+            recordBytes[self.constUpperThresholdReadingMaskLsbIdx] | \
+            recordBytes[self.constUpperThresholdReadingMaskLsbIdx + 1] << 8
+        self.readableThresholdMask = recordBytes[self.constReadableThresholdMaskIdx]
+        self.settableThresholdMask = recordBytes[self.constSettableThresholdMaskIdx]
+        self.sensorUnits = recordBytes[self.constSensorUnits2Idx]
+
+        # Conversion Variables (full sensor records only)
+        self.linearization = None
+        self.mVal = None
+        self.bVal = None
+        self.rExp = None
+        self.bExp = None
+        self.conversionTable = None # array('d'): converted reading by raw reading
+        self.thresholdDict = {} # threshold name: raw threshold (int)
+        self.thresholdReadingDict = {} # threshold name: converted threshold (float)
+
+        if self.recordType == sdrRecordTypeFull:
+            self.linearization = recordBytes[self.constLinearizationIdx] & 0x7F
+            self.mVal = Helper.calc2sComplementInt2Int(\
+                ((recordBytes[self.constMValMsbIdx] >> 6) & 3) << 8 | \
+                recordBytes[self.constMValLsbIdx], 10)
+            self.bVal = Helper.calc2sComplementInt2Int(\
+                ((recordBytes[self.constBValMsbIdx] >> 6) & 3) << 8 | \
+                recordBytes[self.constBValLsbIdx], 10)
+            self.rExp = Helper.calc2sComplementInt2Int(\
+                (recordBytes[self.constRExpBExpIdx] >> 4) & 0x0F, 4)
+            self.bExp = Helper.calc2sComplementInt2Int(\
+                recordBytes[self.constRExpBExpIdx] & 0x0F, 4)
+            for (thresholdName, thresholdIdx) in \
+                self.constFullThresholdIdxDict.iteritems():
+                self.thresholdDict[thresholdName] = recordBytes[thresholdIdx]
+            self.conversionTable = GetConversionTable(self.linearization, \
+                self.mVal, self.bVal, self.rExp, self.bExp)
+            if self.conversionTable is not None:
+                for (thresholdName, rawThreshold) in \
+                    self.thresholdDict.iteritems():
+                    self.thresholdReadingDict[thresholdName] = \
+                        self.conversionTable[rawThreshold]
+            idStringIdx = self.constFullIdStringIdx
+        else:
+            idStringIdx = self.constCompactIdStringIdx
+
+        # Sensor ID string (8-bit ASCII; length in bits [4:0] of type/length byte)
+        self.sensorName = ''
+        if len(recordBytes) > idStringIdx:
+            idStringLength = recordBytes[idStringIdx] & 0x1F
+            self.sensorName = str(recordBytes[idStringIdx + 1 : \
+                idStringIdx + 1 + idStringLength]).rstrip('\x00').strip()
+
+        return
+
+    # Function will convert raw sensor reading
+    # Outputs:
+    #   convertPassOrFail (bool): reading converted
+    #   sensorReading (float): converted reading (None if not converted)
+    def ConvertReading(self, rawReading):
+
+        if self.conversionTable is None:
+            return False, None
+
+        sensorReading = self.conversionTable[rawReading]
+        if math.isnan(sensorReading):
+            return False, None
+
+        return True, sensorReading
+
+    # Function will convert a batch of raw sensor readings
+    # (list of NaN if record has no conversion table)
+    def ConvertReadings(self, rawReadings):
+
+        if self.conversionTable is None:
+            return [ float('nan') ] * len(rawReadings)
+
+        return ConvertReadings(self.conversionTable, rawReadings)
+
+    # Function will return record in Get SDR response format
+    # (next record ID bytes followed by record bytes) as used by IpmiUtil.SdrInfo
+    def GetSdrRespData(self):
+
+        return bytearray(2) + self.recordBytes
+
+# Class holds the decoded SDR repository of one BMC
+class SdrCache:
+
+    # Constructor
+    # Inputs:
+    #   interfaceParams (list; string): interface parameters for LAN+/KCS
+    def __init__(self, interfaceParams):
+
+        self.interfaceParams = interfaceParams
+        self.cacheKey = None # dict
+        self.recordIdDict = {} # record ID (int): SdrRecord
+        self.sensorNameDict = {} # sensor name (string): SdrRecord
+        self.lock = threading.Lock()
+
+        # Cache file name is based on target BMC
+        target = 'Kcs'
+        if Config.ipmiUtilIpAddressSwitch in interfaceParams:
+            target = interfaceParams[interfaceParams.index(\
+                Config.ipmiUtilIpAddressSwitch) + 1]
+        self.cacheFilePath = os.path.join(Config.sdrCacheDirectoryPath, \
+            'SdrCache_' + target.replace(':', '_') + '.json')
+
+        return
+
+    # Function will build cache key from Get Device ID and
+    # Get SDR Repository Info
+    # Outputs:
+    #   getPassOrFail (bool): both commands passed
+    #   cacheKey (dict): firmware version and repository timestamps
+    def GetCacheKey(self):
+
+        resp = IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnApp, \
+            Config.cmdGetDeviceId, [])
+        if not resp.cmdPassOrFail or len(resp.data) < 11:
+            UtilLogger.verboseLogger.error('SdrCache.GetCacheKey: ' + \
+                'GetDeviceId failed. Completion Code: ' + str(resp))
+            return False, None
+        firmwareVersion = '%02x.%02x.%s' % (resp.data[2], resp.data[3], \
+            binascii.hexlify(resp.data[11:15]))
+
+        resp = IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnStorage, \
+            Config.cmdGetSdrRepositoryInfo, [])
+        if not resp.cmdPassOrFail or len(resp.data) < 13:
+            UtilLogger.verboseLogger.error('SdrCache.GetCacheKey: ' + \
+                'GetSdrRepositoryInfo failed. Completion Code: ' + str(resp))
+            return False, None
+
+        cacheKey = { \
+            'firmwareVersion' : firmwareVersion, \
+            'additionTimestamp' : binascii.hexlify(resp.data[5:9]), \
+            'eraseTimestamp' : binascii.hexlify(resp.data[9:13]) }
+
+        return True, cacheKey
+
+    # Function will load SDR records, from disk if cache key matches
+    # the BMC, otherwise by walking the SDR repository
+    # Outputs:
+    #   loadPassOrFail (bool): SDR records available
+    def Load(self):
+
+        with self.lock:
+
+            getPassOrFail, cacheKey = self.GetCacheKey()
+            if not getPassOrFail:
+                return False
+
+            # Cache already loaded and still valid
+            if self.recordIdDict and cacheKey == self.cacheKey:
+                return True
+
+            if self.LoadFile(cacheKey):
+                UtilLogger.verboseLogger.info('SdrCache.Load: loaded ' + \
+                    str(len(self.recordIdDict)) + ' SDR records from ' + \
+                    self.cacheFilePath)
+                return True
+
+            walkPassOrFail, recordList = self.WalkSdrRepository()
+            if not walkPassOrFail:
+                return False
+
+            self.SetRecords(cacheKey, recordList)
+            self.SaveFile()
+            UtilLogger.verboseLogger.info('SdrCache.Load: read ' + \
+                str(len(self.recordIdDict)) + ' SDR records from BMC. ' + \
+                'Firmware version: ' + cacheKey['firmwareVersion'])
+
+        return True
+
+    # Function will index decoded records by record ID and sensor name
+    def SetRecords(self, cacheKey, recordList):
+
+        self.cacheKey = cacheKey
+        self.recordIdDict = {}
+        self.sensorNameDict = {}
+
+        for recordBytes in recordList:
+            if len(recordBytes) <= sdrHeaderLength or \
+                recordBytes[SdrRecord.constRecordTypeIdx] not in \
+                (sdrRecordTypeFull, sdrRecordTypeCompact):
+                continue
+            sdrRecord = SdrRecord(recordBytes)
+            self.recordIdDict[sdrRecord.recordId] = sdrRecord
+            if sdrRecord.sensorName:
+                self.sensorNameDict[sdrRecord.sensorName] = sdrRecord
+
+        return
+
+    # Function will load raw records from cache file if cache key matches
+    def LoadFile(self, cacheKey):
+
+        if not os.path.isfile(self.cacheFilePath):
+            return False
+
+        try:
+            with open(self.cacheFilePath, 'r') as cacheFile:
+                cacheData = json.load(cacheFile)
+        except (IOError, ValueError), e:
+            UtilLogger.verboseLogger.error('SdrCache.LoadFile: unable to read ' + \
+                self.cacheFilePath + ': ' + str(e))
+            return False
+
+        if cacheData.get('cacheKey') != cacheKey:
+            if Config.debugEn:
+                UtilLogger.verboseLogger.info('SdrCache.LoadFile: cache key ' + \
+                    'changed. Previous: ' + str(cacheData.get('cacheKey')) + \
+                    ' Current: ' + str(cacheKey))
+            return False
+
+        recordList = [ bytearray(binascii.unhexlify(record)) \
+            for record in cacheData.get('records', []) ]
+        self.SetRecords(cacheKey, recordList)
+
+        return True
+
+    # Function will save raw records and cache key to cache file
+    def SaveFile(self):
+
+        cacheData = { \
+            'cacheKey' : self.cacheKey, \
+            'records' : [ binascii.hexlify(sdrRecord.recordBytes) \
+                for sdrRecord in self.recordIdDict.values() ] }
+
+        try:
+            if not os.path.isdir(Config.sdrCacheDirectoryPath):
+                os.makedirs(Config.sdrCacheDirectoryPath)
+            with open(self.cacheFilePath, 'w') as cacheFile:
+                json.dump(cacheData, cacheFile)
+        except (IOError, OSError), e:
+            UtilLogger.verboseLogger.error('SdrCache.SaveFile: unable to write ' + \
+                self.cacheFilePath + ': ' + str(e))
+
+        return
+
+    # Function will reserve SDR repository
+    # Outputs:
+    #   reservationId (list; string): [ LS byte, MS byte ] or None on failure
+    def ReserveSdrRepository(self):
+
+        resp = IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnStorage, \
+            Config.cmdReserveSdrRepository, [])
+        if not resp.cmdPassOrFail or len(resp.data) < 2:
+            UtilLogger.verboseLogger.error('SdrCache.ReserveSdrRepository: ' + \
+                'Command failed. Completion Code: ' + str(resp))
+            return None
+
+        return [ '%02x' % resp.data[0], '%02x' % resp.data[1] ]
+
+    # Function will read bytes of one SDR record using Get SDR
+    # Outputs:
+    #   resp (IpmiResponse): Get SDR response
+    def GetSdr(self, reservationId, recordId, offset, bytesToRead):
+
+        return IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnStorage, \
+            Config.cmdGetSdr, reservationId + \
+            [ '%02x' % (recordId & 0xFF), '%02x' % (recordId >> 8), \
+            '%02x' % offset, '%02x' % bytesToRead ])
+
+    # Function will read one complete SDR record
+    # Whole record is requested first; if BMC cannot return the requested bytes,
+    # record is read in Config.sdrCacheReadChunkSize partial reads
+    # Outputs:
+    #   readPassOrFail (bool): record read successfully
+    #   completionCode (int): completion code of last Get SDR
+    #   nextRecordId (int): record ID of next record
+    #   recordBytes (bytearray): complete record
+    def ReadSdrRecord(self, reservationId, recordId):
+
+        resp = self.GetSdr(reservationId, recordId, 0, 0xFF)
+        if resp.cmdPassOrFail and len(resp.data) > 2 + sdrHeaderLength:
+            return True, 0, resp.data[0] | resp.data[1] << 8, resp.data[2:]
+        elif resp.completionCode != ccCannotReturnRequestedBytes:
+            return False, resp.completionCode, sdrLastRecordId, None
+
+        # Read record header for record length
+        resp = self.GetSdr(reservationId, recordId, 0, sdrHeaderLength)
+        if not resp.cmdPassOrFail or len(resp.data) < 2 + sdrHeaderLength:
+            return False, resp.completionCode, sdrLastRecordId, None
+        nextRecordId = resp.data[0] | resp.data[1] << 8
+        recordBytes = resp.data[2:]
+        recordLength = sdrHeaderLength + recordBytes[sdrHeaderLength - 1]
+
+        # Read record body
+        while len(recordBytes) < recordLength:
+            bytesToRead = min(Config.sdrCacheReadChunkSize, \
+                recordLength - len(recordBytes))
+            resp = self.GetSdr(reservationId, recordId, len(recordBytes), \
+                bytesToRead)
+            if not resp.cmdPassOrFail or len(resp.data) <= 2:
+                return False, resp.completionCode, sdrLastRecordId, None
+            recordBytes += resp.data[2:]
+
+        return True, 0, nextRecordId, recordBytes
+
+    # Function will walk the full SDR repository
+    # Outputs:
+    #   walkPassOrFail (bool): all records read successfully
+    #   recordList (list; bytearray): raw SDR records
+    def WalkSdrRepository(self):
+
+        recordList = []
+        recordId = 0
+        reservationRetries = Config.sdrCacheReservationRetries
+
+        reservationId = self.ReserveSdrRepository()
+        if reservationId is None:
+            return False, recordList
+
+        while recordId != sdrLastRecordId:
+
+            readPassOrFail, completionCode, nextRecordId, recordBytes = \
+                self.ReadSdrRecord(reservationId, recordId)
+
+            if readPassOrFail:
+                recordList.append(recordBytes)
+                recordId = nextRecordId
+                continue
+
+            # Repository changed during walk: reserve again and retry record
+            if completionCode == ccReservationCanceled and \
+                reservationRetries > 0:
+                reservationRetries -= 1
+                reservationId = self.ReserveSdrRepository()
+                if reservationId is not None:
+                    continue
+
+            UtilLogger.verboseLogger.error('SdrCache.WalkSdrRepository: ' + \
+                'GetSdr failed for record ID 0x%04x. Completion Code: %s' % \
+                (recordId, completionCode))
+            return False, recordList
+
+        return True, recordList
+
+    # Function will return SdrRecord by sensor name (None if not found)
+    def GetRecordByName(self, sensorName):
+
+        return self.sensorNameDict.get(sensorName)
+
+    # Function will return SdrRecord by record ID (None if not found)
+    # Inputs:
+    #   recordId (int or string): record ID as int or IpmiUtil sensor ID hex string
+    def GetRecordById(self, recordId):
+
+        if isinstance(recordId, basestring):
+            recordId = int(recordId, 16)
+
+        return self.recordIdDict.get(recordId)
+
+# SDR caches for each target BMC
+sdrCacheDict = {}
+sdrCacheDictLock = threading.Lock()
+
+# Function will return loaded SdrCache for target BMC
+# Outputs:
+#   sdrCache (SdrCache): loaded cache or None if SDR records could not be read
+def GetSdrCache(interfaceParams):
+
+    with sdrCacheDictLock:
+        cacheKey = tuple(interfaceParams)
+        if cacheKey not in sdrCacheDict:
+            sdrCacheDict[cacheKey] = SdrCache(interfaceParams)
+        sdrCache = sdrCacheDict[cacheKey]
+
+    if not sdrCache.Load():
+        return None
+
+    return sdrCache
@@ -0,0 +1,234 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Multi-pattern SEL matcher.
+
+The SEL list XML files (required/optional 'contains' strings with
+'allowduplicates') are compiled once into an Aho-Corasick automaton. Each
+actual SEL line is scanned once to find every pattern it contains, so
+verification runs in time linear in the SEL text instead of
+(lines x patterns) substring searches.
+
+Matching keeps the VerifySelAgainstXmlList semantics:
+  - every required pattern must be contained in at least one SEL line
+  - each SEL line is matched to the first pattern (required patterns first,
+    then optional patterns, in XML order) it contains; if that pattern does
+    not allow duplicates and was already matched, the line is unexpected
+  - a SEL line that contains no pattern is unexpected
+
+Compiled matchers are cached by XML file path (and modification time).
+"""
+
+import os
+import threading
+
+import UtilLogger
+import XmlParser
+
+# Duplicate states (same values as used by VerifySelAgainstXmlList)
+duplicateAllowed = -1
+duplicateUnused = 1
+duplicateUsed = 0
+
+# Class implements Aho-Corasick automaton over a list of patterns
+class MultiPatternMatcher:
+
+    # Constructor
+    # Inputs:
+    #   patternList (list; string): patterns; pattern index is list index
+    def __init__(self, patternList):
+
+        self.gotoList = [ {} ] # state: { character: next state }
+        self.failList = [ 0 ] # state: fail state
+        self.outputList = [ [] ] # state: pattern indexes ending at state
+        self.emptyPatternIdxList = [] # patterns contained in every line
+
+        # Build trie
+        for patternIdx, pattern in enumerate(patternList):
+            if not pattern:
+                self.emptyPatternIdxList.append(patternIdx)
+                continue
+            state = 0
+            for character in pattern:
+                nextState = self.gotoList[state].get(character)
+                if nextState is None:
+                    nextState = len(self.gotoList)
+                    self.gotoList.append({})
+                    self.failList.append(0)
+                    self.outputList.append([])
+                    self.gotoList[state][character] = nextState
+                state = nextState
+            self.outputList[state].append(patternIdx)
+
+        # Build fail links breadth first and merge outputs of fail states
+        stateQueue = list(self.gotoList[0].values())
+        queueIdx = 0
+        while queueIdx < len(stateQueue):
+            state = stateQueue[queueIdx]
+            queueIdx += 1
+            for (character, nextState) in self.gotoList[state].iteritems():
+                stateQueue.append(nextState)
+                failState = self.failList[state]
+                while failState and character not in self.gotoList[failState]:
+                    failState = self.failList[failState]
+                failState = self.gotoList[failState].get(character, 0)
+                if failState == nextState:
+                    failState = 0
+                self.failList[nextState] = failState
+                self.outputList[nextState] = self.outputList[nextState] + \
+                    self.outputList[failState]
+
+        return
+
+    # Function will return indexes of all patterns contained in text
+    # Outputs:
+    #   matchSet (set; int): pattern indexes
+    def Search(self, text):
+
+        matchSet = set(self.emptyPatternIdxList)
+        gotoList = self.gotoList
+        failList = self.failList
+        outputList = self.outputList
+
+        state = 0
+        for character in text:
+            while state and character not in gotoList[state]:
+                state = failList[state]
+            state = gotoList[state].get(character, 0)
+            if outputList[state]:
+                matchSet.update(outputList[state])
+
+        return matchSet
+
+# Class holds SEL list XML definitions compiled into a MultiPatternMatcher
+class SelListMatcher:
+
+    # Constructor
+    # Inputs:
+    #   selListXml (string): SEL list XML file path
+    def __init__(self, selListXml):
+
+        self.selListXml = selListXml
+        self.patternList = [] # [ Event_Text, required (bool), duplicate state ]
+        self.matcher = None
+
+        return
+
+    # Function will parse SEL list XML file and compile patterns
+    # Outputs:
+    #   loadPassOrFail (bool): XML file parsed successfully
+    def Load(self):
+
+        xmlParserObj = XmlParser.XmlParser(self.selListXml)
+        if not xmlParserObj.root:
+            UtilLogger.verboseLogger.error("SelMatcher.py - SelListMatcher.Load(): " + \
+                "failed to parse input XML file " + self.selListXml)
+            return False
+
+        # Required patterns first, then optional patterns (XML order)
+        requiredList = []
+        optionalList = []
+        for selEntry in xmlParserObj.root:
+            required = (selEntry.attrib["required"] == "true")
+            selText = selEntry.attrib["contains"]
+            allowDupl = (selEntry.attrib["allowduplicates"] == "true")
+            duplicate = duplicateAllowed if allowDupl else duplicateUnused
+            if required:
+                requiredList.append([ selText, True, duplicate ])
+            else:
+                optionalList.append([ selText, False, duplicate ])
+
+        self.patternList = requiredList + optionalList
+        self.matcher = MultiPatternMatcher(\
+            [ pattern[0] for pattern in self.patternList ])
+
+        return True
+
+    # Function will verify actual SEL lines against compiled patterns
+    # Inputs:
+    #   actualSelList (list; string): SEL lines
+    # Outputs:
+    #   missingSels (list; string): required events not found in any SEL line
+    #   unexpectedSels (list; string): SEL lines that are neither required
+    #       nor optional, or are disallowed duplicates
+    def Verify(self, actualSelList):
+
+        missingSels = []
+        unexpectedSels = []
+        foundSet = set()
+
+        # Duplicate state is per verification
+        duplicateList = [ pattern[2] for pattern in self.patternList ]
+
+        for event in actualSelList:
+            matchSet = self.matcher.Search(event)
+            if not matchSet:
+                unexpectedSels.append(event)
+                continue
+            foundSet.update(matchSet)
+
+            # First pattern in list order decides
+            patternIdx = min(matchSet)
+            if duplicateList[patternIdx] == duplicateUsed:
+                unexpectedSels.append(event) # disallowed duplicate
+            elif duplicateList[patternIdx] == duplicateUnused:
+                duplicateList[patternIdx] = duplicateUsed
+
+        for patternIdx, pattern in enumerate(self.patternList):
+            if pattern[1] and patternIdx not in foundSet:
+                missingSels.append(pattern[0])
+
+        return missingSels, unexpectedSels
+
+# Compiled SEL list matchers for each SEL list XML file
+# { selListXml: (modification time, SelListMatcher) }
+selListMatcherDict = {}
+selListMatcherDictLock = threading.Lock()
+
+# Function will return compiled SelListMatcher for SEL list XML file
+# Matcher is compiled again only if the XML file was modified
+# Outputs:
+#   selListMatcher (SelListMatcher): compiled matcher or None on failure
+def GetSelListMatcher(selListXml):
+
+    try:
+        modifiedTime = os.path.getmtime(selListXml)
+    except OSError, e:
+        UtilLogger.verboseLogger.error("SelMatcher.py - GetSelListMatcher(): " + \
+            "unable to read input XML file " + str(selListXml) + ": " + str(e))
+        return None
+
+    with selListMatcherDictLock:
+        cachedMatcher = selListMatcherDict.get(selListXml)
+        if cachedMatcher is not None and cachedMatcher[0] == modifiedTime:
+            return cachedMatcher[1]
+
+        selListMatcher = SelListMatcher(selListXml)
+        if not selListMatcher.Load():
+            return None
+        selListMatcherDict[selListXml] = (modifiedTime, selListMatcher)
+
+    return selListMatcher
@@ -0,0 +1,480 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Incremental SEL reader.
+
+A SelCursor keeps the record ID of the last SEL entry read from a BMC and the
+Get SEL Info most recent addition/erase timestamps seen at that point. Each
+read checks Get SEL Info first: if neither timestamp changed there are no new
+entries and nothing else is sent. Otherwise Get SEL Entry is walked from the
+saved record ID (or from the first entry if the SEL was erased since), so the
+cost of a read depends on the number of new entries, not the size of the SEL.
+
+New raw 16-byte records are interpreted into the same text lines as
+'IpmiUtil sel' by 'IpmiUtil events -f' (local decode; no BMC traffic).
+
+Every new record is also decoded in-process into a SelEvent and added to the
+cursor's SelEventIndex, indexed by sensor number, sensor type and event type,
+so tests can count events (e.g. event type 0x6f from sensor 0xef) since a
+mark taken at cycle start without re-reading or re-parsing the SEL.
+"""
+
+import os
+import re
+import tempfile
+import threading
+
+import Config
+import IpmiUtil
+import UtilLogger
+
+# Special SEL record IDs
+selFirstRecordId = 0x0000
+selLastRecordId = 0xFFFF
+
+# Completion codes used while walking the SEL
+ccReservationCanceled = 0xC5
+ccRecordNotPresent = 0xCB
+
+# Regular expression for one interpreted SEL record line
+# "<RecId> <Date> <Time> <Source> <Evt_Type> <SensNum> <Evt_detail> .."
+selRecordLineRegEx = re.compile(r'^[0-9a-fA-F]{4} .*$', re.M)
+
+# SEL record types
+selRecordTypeSystemEvent = 0x02
+selRecordTypeOemTimestampedMin = 0xC0
+selRecordTypeOemTimestampedMax = 0xDF
+
+# Event Dir bit in Event Dir/Event Type byte
+selEventDirDeassertion = 0x80
+
+# Class holds one decoded SEL record
+class SelEvent(object):
+
+    __slots__ = ('recordId', 'recordType', 'timestamp', 'generatorId', \
+        'evmRevision', 'sensorType', 'sensorNumber', 'eventType', \
+        'deassertion', 'eventData')
+
+    # Constructor
+    # Inputs:
+    #   recordBytes (bytearray): 16-byte SEL record
+    #       (Get SEL Entry response data without next record ID)
+    def __init__(self, recordBytes):
+
+        self.recordId = recordBytes[0] | recordBytes[1] << 8
+        self.recordType = recordBytes[2]
+        self.timestamp = None # int; seconds, BMC time
+        self.generatorId = None # int; OEM: manufacturer ID
+        self.evmRevision = None
+        self.sensorType = None
+        self.sensorNumber = None
+        self.eventType = None # int; Event/Reading Type code
+        self.deassertion = False
+        self.eventData = None # bytearray; OEM: OEM defined bytes
+
+        if self.recordType == selRecordTypeSystemEvent:
+            self.timestamp = recordBytes[3] | recordBytes[4] << 8 | \
+                recordBytes[5] << 16 | recordBytes[6] << 24
+            self.generatorId = recordBytes[7] | recordBytes[8] << 8
+            self.evmRevision = recordBytes[9]
+            self.sensorType = recordBytes[10]
+            self.sensorNumber = recordBytes[11]
+            self.eventType = recordBytes[12] & ~selEventDirDeassertion
+            self.deassertion = bool(recordBytes[12] & selEventDirDeassertion)
+            self.eventData = recordBytes[13:16]
+        elif selRecordTypeOemTimestampedMin <= self.recordType <= \
+            selRecordTypeOemTimestampedMax:
+            self.timestamp = recordBytes[3] | recordBytes[4] << 8 | \
+                recordBytes[5] << 16 | recordBytes[6] << 24
+            self.generatorId = recordBytes[7] | recordBytes[8] << 8 | \
+                recordBytes[9] << 16
+            self.eventData = recordBytes[10:16]
+        else:
+            # Non-timestamped OEM record
+            self.eventData = recordBytes[3:16]
+
+        return
+
+    def __str__(self):
+
+        if self.recordType != selRecordTypeSystemEvent:
+            return '%04x OEM(%02x) [%s]' % (self.recordId, self.recordType, \
+                ' '.join([ '%02x' % dataByte for dataByte in self.eventData ]))
+
+        return '%04x %08x gen %04x type %02x #%02x - %02x%s [%s]' % \
+            (self.recordId, self.timestamp, self.generatorId, self.sensorType, \
+            self.sensorNumber, self.eventType, \
+            ' deassert' if self.deassertion else '', \
+            ' '.join([ '%02x' % dataByte for dataByte in self.eventData ]))
+
+# Class holds decoded SEL events indexed by sensor and event type
+class SelEventIndex:
+
+    # Constructor
+    def __init__(self):
+
+        self.eventList = [] # SelEvent in read order
+        self.sensorNumberDict = {} # sensorNumber: list of positions
+        self.sensorTypeDict = {} # sensorType: list of positions
+        self.eventTypeDict = {} # eventType: list of positions
+        self.lock = threading.Lock()
+
+        return
+
+    # Function will decode and index raw SEL records
+    # Inputs:
+    #   recordList (list; bytearray): 16-byte SEL records
+    def AddRecords(self, recordList):
+
+        with self.lock:
+            for recordBytes in recordList:
+                if len(recordBytes) < 16:
+                    continue
+                selEvent = SelEvent(recordBytes)
+                position = len(self.eventList)
+                self.eventList.append(selEvent)
+                if selEvent.recordType != selRecordTypeSystemEvent:
+                    continue
+                self.sensorNumberDict.setdefault(\
+                    selEvent.sensorNumber, []).append(position)
+                self.sensorTypeDict.setdefault(\
+                    selEvent.sensorType, []).append(position)
+                self.eventTypeDict.setdefault(\
+                    selEvent.eventType, []).append(position)
+
+        return
+
+    # Function will return mark for events added after this call
+    # (e.g. take at cycle start and pass as sinceMark to Query/Count)
+    def Mark(self):
+
+        with self.lock:
+            return len(self.eventList)
+
+    # Function will return indexed events matching all given filters
+    # Inputs:
+    #   sensorNumber (int): sensor number; None for any
+    #   sensorType (int): sensor type; None for any
+    #   eventType (int): Event/Reading Type code; None for any
+    #   sinceMark (int): only events added after Mark() returned this value
+    #   sinceTimestamp (int): only events with SEL timestamp >= this value
+    #   deassertion (bool): True/False for deassertion/assertion; None for any
+    # Outputs:
+    #   eventList (list; SelEvent): matching events in read order
+    def Query(self, sensorNumber=None, sensorType=None, eventType=None, \
+        sinceMark=0, sinceTimestamp=None, deassertion=None):
+
+        with self.lock:
+
+            # Candidates from the smallest matching index
+            positionLists = []
+            if sensorNumber is not None:
+                positionLists.append(self.sensorNumberDict.get(sensorNumber, []))
+            if sensorType is not None:
+                positionLists.append(self.sensorTypeDict.get(sensorType, []))
+            if eventType is not None:
+                positionLists.append(self.eventTypeDict.get(eventType, []))
+            if positionLists:
+                positionList = min(positionLists, key=len)
+                candidateList = [ self.eventList[position] \
+                    for position in positionList if position >= sinceMark ]
+            else:
+                candidateList = self.eventList[sinceMark:]
+
+        return [ selEvent for selEvent in candidateList \
+            if (sensorNumber is None or selEvent.sensorNumber == sensorNumber) \
+            and (sensorType is None or selEvent.sensorType == sensorType) \
+            and (eventType is None or selEvent.eventType == eventType) \
+            and (sinceTimestamp is None or (selEvent.timestamp is not None \
+                and selEvent.timestamp >= sinceTimestamp)) \
+            and (deassertion is None or selEvent.deassertion == deassertion) ]
+
+    # Function will return number of indexed events matching all given filters
+    # Inputs: same as Query
+    def Count(self, **queryArgs):
+
+        return len(self.Query(**queryArgs))
+
+# Class holds the SEL read position for one BMC
+class SelCursor:
+
+    # Constructor
+    # Inputs:
+    #   interfaceParams (list; string): interface parameters for LAN+/KCS
+    def __init__(self, interfaceParams):
+
+        self.interfaceParams = interfaceParams
+        self.lastRecordId = None # int; None until first checkpoint
+        self.additionTimestamp = None # bytearray
+        self.eraseTimestamp = None # bytearray
+        self.eventIndex = SelEventIndex() # every record read by this cursor
+        self.lock = threading.Lock()
+
+        return
+
+    # Function will get SEL entry count and addition/erase timestamps
+    # Outputs:
+    #   getPassOrFail (bool): command passed
+    #   entryCount (int): number of SEL entries
+    #   additionTimestamp (bytearray): most recent addition timestamp
+    #   eraseTimestamp (bytearray): most recent erase timestamp
+    def GetSelInfo(self):
+
+        resp = IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnStorage, \
+            Config.cmdGetSelInfo, [])
+        if not resp.cmdPassOrFail or len(resp.data) < 13:
+            UtilLogger.verboseLogger.error('SelCursor.GetSelInfo: ' + \
+                'Command failed. Completion Code: ' + str(resp))
+            return False, 0, None, None
+
+        entryCount = resp.data[1] | resp.data[2] << 8
+
+        return True, entryCount, resp.data[5:9], resp.data[9:13]
+
+    # Function will read one SEL entry
+    # Outputs:
+    #   getPassOrFail (bool): command passed
+    #   completionCode (int): completion code
+    #   nextRecordId (int): record ID of next SEL entry
+    #   recordBytes (bytearray): 16-byte SEL record
+    def GetSelEntry(self, recordId):
+
+        resp = IpmiUtil.SendRawCmdResp(self.interfaceParams, Config.netFnStorage, \
+            Config.cmdGetSelEntry, [ '00', '00', \
+            '%02x' % (recordId & 0xFF), '%02x' % (recordId >> 8), '00', 'FF' ])
+        if not resp.cmdPassOrFail or len(resp.data) < 18:
+            return False, resp.completionCode, selLastRecordId, None
+
+        return True, 0, resp.data[0] | resp.data[1] << 8, resp.data[2:18]
+
+    # Function will move cursor to the last SEL entry so that following
+    # reads only return entries added after this call
+    # Outputs:
+    #   checkpointPassOrFail (bool): cursor updated
+    #   entryCount (int): number of SEL entries at checkpoint
+    def Checkpoint(self):
+
+        with self.lock:
+
+            getPassOrFail, entryCount, additionTimestamp, eraseTimestamp = \
+                self.GetSelInfo()
+            if not getPassOrFail:
+                return False, 0
+
+            lastRecordId = None
+            if entryCount > 0:
+                getPassOrFail, completionCode, nextRecordId, recordBytes = \
+                    self.GetSelEntry(selLastRecordId)
+                if not getPassOrFail:
+                    UtilLogger.verboseLogger.error('SelCursor.Checkpoint: ' + \
+                        'GetSelEntry failed for last entry. Completion Code: ' + \
+                        str(completionCode))
+                    return False, entryCount
+                lastRecordId = recordBytes[0] | recordBytes[1] << 8
+
+            self.lastRecordId = lastRecordId
+            self.additionTimestamp = additionTimestamp
+            self.eraseTimestamp = eraseTimestamp
+
+        return True, entryCount
+
+    # Function will read SEL entries added since last read or checkpoint
+    # Outputs:
+    #   readPassOrFail (bool): new entries read successfully
+    #   recordList (list; bytearray): new 16-byte SEL records
+    def ReadNewRecords(self):
+
+        recordList = []
+
+        with self.lock:
+
+            getPassOrFail, entryCount, additionTimestamp, eraseTimestamp = \
+                self.GetSelInfo()
+            if not getPassOrFail:
+                return False, recordList
+
+            # No entries added or erased since last read
+            if self.additionTimestamp is not None and \
+                additionTimestamp == self.additionTimestamp and \
+                eraseTimestamp == self.eraseTimestamp:
+                return True, recordList
+
+            # Start after saved record or from first entry if SEL was erased
+            recordId = selFirstRecordId
+            skipRecordId = None
+            lastRecordId = None
+            if self.lastRecordId is not None and \
+                eraseTimestamp == self.eraseTimestamp:
+                recordId = self.lastRecordId
+                skipRecordId = self.lastRecordId
+                lastRecordId = self.lastRecordId
+
+            # Walk SEL entries; bounded by entry count in case of a
+            # corrupted next record ID chain
+            walkLimit = entryCount + 1
+            while recordId != selLastRecordId and walkLimit > 0:
+                walkLimit -= 1
+
+                getPassOrFail, completionCode, nextRecordId, recordBytes = \
+                    self.GetSelEntry(recordId)
+                if not getPassOrFail:
+                    # Saved record deleted: read from first entry instead
+                    if completionCode == ccRecordNotPresent and \
+                        skipRecordId is not None:
+                        recordId = selFirstRecordId
+                        skipRecordId = None
+                        lastRecordId = None
+                        continue
+                    if completionCode == ccRecordNotPresent and entryCount == 0:
+                        break
+                    UtilLogger.verboseLogger.error('SelCursor.ReadNewRecords: ' + \
+                        'GetSelEntry failed for record ID 0x%04x.' % recordId + \
+                        ' Completion Code: ' + str(completionCode))
+                    return False, recordList
+
+                if recordId != skipRecordId:
+                    recordList.append(recordBytes)
+                lastRecordId = recordBytes[0] | recordBytes[1] << 8
+                skipRecordId = None
+                recordId = nextRecordId
+
+            self.lastRecordId = lastRecordId
+            self.additionTimestamp = additionTimestamp
+            self.eraseTimestamp = eraseTimestamp
+
+        self.eventIndex.AddRecords(recordList)
+
+        if Config.debugEn:
+            UtilLogger.verboseLogger.info('SelCursor.ReadNewRecords: read ' + \
+                str(len(recordList)) + ' new SEL entries.')
+
+        return True, recordList
+
+# Function will interpret raw SEL records into 'IpmiUtil sel' text lines
+# using 'IpmiUtil events -f'
+# Inputs:
+#   recordList (list; bytearray): 16-byte SEL records
+# Outputs:
+#   decodePassOrFail (bool): records interpreted successfully
+#   selLineList (list; string): one line per SEL record
+def DecodeSelRecords(recordList):
+
+    if not recordList:
+        return True, []
+
+    fileHandle, filePath = tempfile.mkstemp(suffix = '.txt', prefix = 'SelRecords')
+    try:
+        # One record per line in 'IpmiUtil sel -r' format
+        os.write(fileHandle, ''.join([ \
+            ' '.join([ '%02x' % recordByte for recordByte in recordBytes ]) + '\n' \
+            for recordBytes in recordList ]))
+        os.close(fileHandle)
+
+        out, err = IpmiUtil.RunIpmiUtil(IpmiUtil.IpmiUtilCmds.get('events') + \
+            [ filePath ])
+    finally:
+        os.remove(filePath)
+
+    if err:
+        UtilLogger.verboseLogger.error('SelReader.DecodeSelRecords: ' + \
+            "IPMI Command 'events -f' Error: " + str(err))
+        return False, []
+
+    # 'events -f' prints one line per record; anything else (e.g.
+    # 'cannot open file', which is reported on stdout) must not be
+    # mistaken for an empty SEL
+    selLineList = selRecordLineRegEx.findall(out)
+    if len(selLineList) != len(recordList):
+        UtilLogger.verboseLogger.error('SelReader.DecodeSelRecords: ' + \
+            "IPMI Command 'events -f' interpreted " + str(len(selLineList)) + \
+            ' of ' + str(len(recordList)) + ' SEL records. Output: \n' + str(out))
+        return False, selLineList
+
+    return True, selLineList
+
+# SEL cursors for each target BMC
+selCursorDict = {}
+selCursorDictLock = threading.Lock()
+
+# Function will return SelCursor for target BMC
+def GetSelCursor(interfaceParams):
+
+    with selCursorDictLock:
+        cursorKey = tuple(interfaceParams)
+        if cursorKey not in selCursorDict:
+            selCursorDict[cursorKey] = SelCursor(interfaceParams)
+
+    return selCursorDict[cursorKey]
+
+# Function will return interpreted SEL entries added since last read
+# or checkpoint for target BMC
+# Outputs:
+#   readPassOrFail (bool): new entries read and interpreted successfully
+#   selLineList (list; string): one 'IpmiUtil sel' line per new SEL entry
+def GetNewSelEntries(interfaceParams):
+
+    readPassOrFail, recordList = GetSelCursor(interfaceParams).ReadNewRecords()
+    if not readPassOrFail:
+        return False, []
+
+    return DecodeSelRecords(recordList)
+
+# Function will move SEL cursor of target BMC to the last SEL entry
+# Outputs: same as SelCursor.Checkpoint
+def CheckpointSel(interfaceParams):
+
+    return GetSelCursor(interfaceParams).Checkpoint()
+
+# Function will return mark for SEL events read from target BMC after
+# this call; pass as sinceMark to CountSelEvents/QuerySelEvents
+def MarkSelEvents(interfaceParams):
+
+    return GetSelCursor(interfaceParams).eventIndex.Mark()
+
+# Function will read new SEL entries of target BMC into its event index
+# and return indexed events matching all given filters
+# Inputs: interfaceParams and filters of SelEventIndex.Query
+# Outputs:
+#   readPassOrFail (bool): new entries read successfully
+#   eventList (list; SelEvent): matching events in read order
+def QuerySelEvents(interfaceParams, **queryArgs):
+
+    selCursor = GetSelCursor(interfaceParams)
+    readPassOrFail, recordList = selCursor.ReadNewRecords()
+
+    return readPassOrFail, selCursor.eventIndex.Query(**queryArgs)
+
+# Function will read new SEL entries of target BMC into its event index
+# and return number of indexed events matching all given filters
+# Inputs: interfaceParams and filters of SelEventIndex.Query
+# Outputs:
+#   readPassOrFail (bool): new entries read successfully
+#   eventCount (int): number of matching events
+def CountSelEvents(interfaceParams, **queryArgs):
+
+    readPassOrFail, eventList = QuerySelEvents(interfaceParams, **queryArgs)
+
+    return readPassOrFail, len(eventList)
@@ -0,0 +1,134 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+CLI startup time benchmark.
+
+Runs short OneBMCTest invocations and startup steps in fresh Python processes
+and logs the minimum and median wall time of each:
+
+  - 'OneBMCTest.py -h' and 'import Program' (modules imported at startup)
+  - test manifest build with and without a cached manifest file
+  - resource tags of all test modules from the manifest, compared to
+    importing every test module (what a package scan plus load costs;
+    modules whose dependencies are not installed are skipped)
+
+Usage:
+    python StartupBenchmark.py [-runs <count>] [-platform <platform>]
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import Config
+import UtilLogger
+
+# Function returns benchmark cases as list of (name, python arguments)
+# Inputs:
+#   platform (string): test scripts package (e.g. 'C2010TestScripts')
+#   manifestFilePath (string): manifest file used by manifest cases
+def GetBenchmarkCases(platform, manifestFilePath):
+
+    manifestSetup = 'import Config, ' + platform + ', TestManifest; ' + \
+        'Config.testManifestFilePath = ' + repr(manifestFilePath) + '; '
+
+    return [
+        ('OneBMCTest.py -h', [ 'OneBMCTest.py', '-h' ]),
+        ('import Program', [ '-c', 'import Program' ]),
+        ('manifest (no cache)', [ '-c', 'import os; ' + manifestSetup + \
+            'os.path.isfile(Config.testManifestFilePath) and ' + \
+            'os.remove(Config.testManifestFilePath); ' + \
+            'TestManifest.GetManifest(' + platform + ')' ]),
+        ('manifest (cached)', [ '-c', manifestSetup + \
+            'TestManifest.GetManifest(' + platform + ')' ]),
+        ('resource tags (manifest)', [ '-c', manifestSetup + \
+            'import ModuleRegistry; ' + \
+            'registry = ModuleRegistry.ModuleRegistry(' + platform + '); ' + \
+            '[ registry.GetResourceTags(name) for name in ' + \
+            'registry.GetModuleNames() ]' ]),
+        ('import all test modules', [ '-c', 'import pkgutil, ' + platform + \
+            '\nfor loader, name, isPkg in pkgutil.iter_modules(' + platform + \
+            '.__path__):\n    try: loader.find_module(name).load_module(name)' + \
+            '\n    except Exception: pass' ]) ]
+
+# Function returns wall times of running python with arguments
+# Outputs:
+#   durationList (list): durations in milliseconds (None for failed runs)
+def TimeCase(pythonArgs, runs):
+
+    durationList = []
+    with open(os.devnull, 'w') as devNull:
+        for runIdx in range(runs):
+            startTime = time.time()
+            returnCode = subprocess.call([ sys.executable ] + pythonArgs, \
+                stdout=devNull, stderr=devNull)
+            duration = (time.time() - startTime) * 1000.0
+            durationList.append(duration if returnCode == 0 else None)
+
+    return durationList
+
+def main():
+
+    parser = argparse.ArgumentParser(description='OneBMCTest CLI ' + \
+        'startup time benchmark')
+    parser.add_argument('-runs', type=int, default=5, \
+        help='Runs per benchmark case')
+    parser.add_argument('-platform', default=Config.bmcPlatformC2010Value, \
+        choices=[ Config.bmcPlatformC2010Value, Config.bmcPlatformJ2010Value, \
+            Config.bmcPlatformG50Value ], help='BMC platform of test scripts')
+    parsedArgs = parser.parse_args()
+
+    # Log to console
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    UtilLogger.consoleLogger = logging.getLogger('StartupBenchmark')
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    manifestFilePath = os.path.join(tempfile.gettempdir(), \
+        'StartupBenchmarkManifest_' + str(os.getpid()) + '.json')
+    platform = parsedArgs.platform + 'TestScripts'
+
+    UtilLogger.consoleLogger.info('%-28s %10s %10s' % \
+        ('Case', 'Min (ms)', 'Median (ms)'))
+    try:
+        for caseName, pythonArgs in GetBenchmarkCases(platform, manifestFilePath):
+            durationList = TimeCase(pythonArgs, max(1, parsedArgs.runs))
+            if None in durationList:
+                UtilLogger.consoleLogger.info('%-28s %s' % (caseName, 'failed'))
+                continue
+            durationList.sort()
+            UtilLogger.consoleLogger.info('%-28s %10.1f %10.1f' % (caseName, \
+                durationList[0], durationList[len(durationList) / 2]))
+    finally:
+        if os.path.isfile(manifestFilePath):
+            os.remove(manifestFilePath)
+
+    return
+
+if __name__ == '__main__':main()
@@ -0,0 +1,280 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Checkpoint and resume of XML test list runs.
+
+A TestCheckpoint holds the progress of a RunXmlTestScripts run: current test
+list cycle, completed iterations of each test element in that cycle, elapsed
+test list and cycle time, and the pass/fail statistics of the run and cycle.
+AddResult records one test iteration and rewrites the checkpoint file
+(written to a temporary file and renamed over the old checkpoint, so a crash
+never leaves a partial checkpoint or no checkpoint at all).
+
+The checkpoint file is named after the summary log
+(<summaryLogFileName>_checkpoint.json in Config.summaryLogPath) and removed
+when the run finishes. '-resume' loads it with LoadCheckpoint: logging
+continues in the log files of the interrupted run, the remaining duration is
+computed from the elapsed test list time, and execution continues at the next
+iteration of the interrupted cycle.
+"""
+
+import json
+import os
+import threading
+import time
+
+import Config
+import TestScheduler
+import UtilLogger
+
+# Class holds progress and statistics of an XML test list run
+class TestCheckpoint:
+
+    # Constructor
+    # Inputs:
+    #   filePath (string): checkpoint file path
+    #   xmlFilePath (string): XML test list file path
+    #   logStartTime (float): start time of run (names log files)
+    def __init__(self, filePath, xmlFilePath, logStartTime):
+
+        self.filePath = filePath
+        self.xmlFilePath = xmlFilePath
+        self.logStartTime = logStartTime
+
+        self.testResults = TestScheduler.TestResults()
+        self.cycleResults = TestScheduler.TestResults()
+        self.cycleIdx = 0
+        self.cycleInProgress = False
+        self.iterationDict = {} # test index: completed iterations in cycle
+
+        # Elapsed time in seconds up to resumeTime
+        # (time.time() of this process)
+        self.elapsedTime = 0.0
+        self.cycleElapsedTime = 0.0
+        self.resumeTime = time.time()
+        self.cycleResumeTime = self.resumeTime
+
+        self.lock = threading.Lock()
+
+        return
+
+    # Function returns elapsed test list time in seconds
+    def GetElapsedTime(self):
+
+        return self.elapsedTime + time.time() - self.resumeTime
+
+    # Function returns elapsed time of current cycle in seconds
+    def GetCycleElapsedTime(self):
+
+        return self.cycleElapsedTime + time.time() - self.cycleResumeTime
+
+    # Function returns number of completed iterations
+    # of test element in current cycle
+    def GetCompletedIterations(self, testIdx):
+
+        with self.lock:
+            return self.iterationDict.get(testIdx, 0)
+
+    # Function will start a new test list cycle
+    def StartCycle(self):
+
+        with self.lock:
+            self.cycleResults = TestScheduler.TestResults()
+            self.cycleInProgress = True
+            self.iterationDict = {}
+            self.cycleElapsedTime = 0.0
+            self.cycleResumeTime = time.time()
+            self.Save()
+
+        return
+
+    # Function will record one completed test iteration
+    # and save checkpoint
+    # Inputs:
+    #   testIdx (int): index of test element in XML test list
+    #   testName (string): name of test module
+    #   testPassOrFail (bool): True if iteration passed
+    def AddResult(self, testIdx, testName, testPassOrFail):
+
+        with self.lock:
+            self.testResults.AddResult(testName, testPassOrFail)
+            self.cycleResults.AddResult(testName, testPassOrFail)
+            self.iterationDict[testIdx] = self.iterationDict.get(testIdx, 0) + 1
+            self.Save()
+
+        return
+
+    # Function will end current test list cycle
+    def EndCycle(self):
+
+        with self.lock:
+            self.cycleIdx += 1
+            self.cycleInProgress = False
+            self.iterationDict = {}
+            self.Save()
+
+        return
+
+    # Function will write checkpoint file
+    # (caller holds lock)
+    def Save(self):
+
+        checkpointDict = { 'xmlFilePath' : self.xmlFilePath, \
+            'logStartTime' : self.logStartTime, \
+            'cycleIdx' : self.cycleIdx, \
+            'cycleInProgress' : self.cycleInProgress, \
+            'iterations' : dict([ (str(testIdx), iterationCount) \
+                for testIdx, iterationCount in self.iterationDict.iteritems() ]), \
+            'elapsedTime' : self.GetElapsedTime(), \
+            'cycleElapsedTime' : self.GetCycleElapsedTime(), \
+            'testResults' : self.testResults.ToDict(), \
+            'cycleResults' : self.cycleResults.ToDict() }
+
+        tempFilePath = self.filePath + '.tmp'
+        try:
+            with open(tempFilePath, 'w') as checkpointFile:
+                json.dump(checkpointDict, checkpointFile, sort_keys=True)
+                checkpointFile.flush()
+                os.fsync(checkpointFile.fileno())
+            ReplaceFile(tempFilePath, self.filePath)
+        except (IOError, OSError), e:
+            UtilLogger.verboseLogger.error("TestCheckpoint.Save: unable " + \
+                "to write " + self.filePath + ": " + str(e))
+
+        return
+
+    # Function will remove checkpoint file (run finished)
+    def Delete(self):
+
+        with self.lock:
+            for filePath in [ self.filePath, self.filePath + '.tmp', \
+                self.filePath + Config.testCheckpointBackupSuffix ]:
+                if os.path.isfile(filePath):
+                    try:
+                        os.remove(filePath)
+                    except OSError, e:
+                        UtilLogger.verboseLogger.error("TestCheckpoint.Delete: " + \
+                            "unable to remove " + filePath + ": " + str(e))
+
+        return
+
+# MoveFileEx flags (winbase.h)
+moveFileReplaceExisting = 0x1
+moveFileWriteThrough = 0x8
+
+# Number of attempts to replace the checkpoint file on Windows
+# (the file may briefly be held open, e.g. by a virus scanner)
+replaceFileAttemptCount = 3
+replaceFileRetryDelay = 0.1 # in seconds
+
+# Function will replace file dstPath with srcPath so that dstPath is
+# never missing: os.rename replaces an existing file atomically on Linux,
+# but fails on Windows if dstPath exists, where MoveFileEx with
+# MOVEFILE_REPLACE_EXISTING is used instead. Without MoveFileEx, dstPath
+# is renamed to <dstPath>.bak first and only removed once srcPath is in
+# place (LoadCheckpoint reads the .bak file if dstPath is missing)
+# Inputs:
+#   srcPath (string): new file
+#   dstPath (string): file to replace
+def ReplaceFile(srcPath, dstPath):
+
+    if os.name != Config.osNameWindows:
+        os.rename(srcPath, dstPath)
+        return
+
+    try:
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        moveFileEx = kernel32.MoveFileExW
+    except (ImportError, AttributeError, OSError):
+        moveFileEx = None
+
+    for attemptIdx in range(replaceFileAttemptCount):
+        if attemptIdx:
+            time.sleep(replaceFileRetryDelay)
+
+        if moveFileEx is not None:
+            if moveFileEx(unicode(srcPath), unicode(dstPath), \
+                moveFileReplaceExisting | moveFileWriteThrough):
+                return
+            replaceError = ctypes.WinError(ctypes.get_last_error())
+            continue
+
+        backupPath = dstPath + Config.testCheckpointBackupSuffix
+        try:
+            if os.path.isfile(dstPath):
+                if os.path.isfile(backupPath):
+                    os.remove(backupPath)
+                os.rename(dstPath, backupPath)
+            os.rename(srcPath, dstPath)
+        except OSError, e:
+            replaceError = e
+            continue
+        if os.path.isfile(backupPath):
+            os.remove(backupPath)
+        return
+
+    raise replaceError
+
+# Function returns checkpoint file path for current summary log name
+def GetCheckpointFilePath():
+
+    return Config.summaryLogPath + Config.summaryLogFileName + \
+        Config.testCheckpointFileSuffix + Config.testCheckpointFileExtension
+
+# Function will load checkpoint of interrupted run
+# (called before logging is initialized)
+# Inputs:
+#   filePath (string): checkpoint file path
+# Outputs:
+#   loadPassOrFail (bool): True if checkpoint was loaded
+#   testCheckpoint: TestCheckpoint, or error string if load failed
+def LoadCheckpoint(filePath):
+
+    # Interrupted while the checkpoint was replaced: use previous checkpoint
+    if not os.path.isfile(filePath) and \
+        os.path.isfile(filePath + Config.testCheckpointBackupSuffix):
+        filePath += Config.testCheckpointBackupSuffix
+
+    try:
+        with open(filePath, 'r') as checkpointFile:
+            checkpointDict = json.load(checkpointFile)
+
+        testCheckpoint = TestCheckpoint(filePath, \
+            str(checkpointDict['xmlFilePath']), checkpointDict['logStartTime'])
+        testCheckpoint.cycleIdx = checkpointDict['cycleIdx']
+        testCheckpoint.cycleInProgress = checkpointDict['cycleInProgress']
+        testCheckpoint.iterationDict = dict([ (int(testIdx), iterationCount) \
+            for testIdx, iterationCount in \
+            checkpointDict['iterations'].iteritems() ])
+        testCheckpoint.elapsedTime = checkpointDict['elapsedTime']
+        testCheckpoint.cycleElapsedTime = checkpointDict['cycleElapsedTime']
+        testCheckpoint.testResults.LoadDict(checkpointDict['testResults'])
+        testCheckpoint.cycleResults.LoadDict(checkpointDict['cycleResults'])
+    except (IOError, ValueError, KeyError, TypeError), e:
+        return False, "unable to load checkpoint " + filePath + ": " + str(e)
+
+    return True, testCheckpoint
@@ -0,0 +1,296 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Per-test process isolation with hard timeouts.
+
+With '-isolate', and for every XML test list test element with a 'timeout'
+attribute, each test iteration runs Setup, Execute and Cleanup in a child
+process:
+    <test name="AcPowerCycleStressTest" timeout="00:30:00" delay="0" .../>
+timeout is in seconds or HH:MM:SS (Config.testIsolationDefaultTimeout for
+tests without the attribute; 0: no deadline). A child still running at the
+deadline is killed together with the processes it started (ipmiutil, ssh;
+process group on POSIX only), the iteration is logged as TIMEOUT and counted
+as failed, and with Config.testTimeoutDetectBmcHang Helper.DetectAndRemoveBmcHang
+runs before the test list continues. A hung ipmiutil call, paramiko channel or
+thread join therefore costs at most the deadline of its test.
+
+On POSIX the child is forked from the test list process. Elsewhere it is
+started fresh and gets the Config values and log files of the parent. The
+child loads the test module itself, so module state starts fresh in every
+iteration, and it opens and closes its own native IPMI sessions instead of
+sharing the parent's. The child returns its IPMI command statistics with its
+result and the parent merges them into its own (statistics of a killed child
+are lost). Since the test may have changed the BMC behind the parent's back,
+the parent flushes its RespCache after every isolated iteration. IpmiUtil
+record files of the child are not merged into the parent's.
+"""
+
+import os
+import multiprocessing
+import signal
+import sys
+import time
+
+import CmdStats
+import Config
+import ModuleRegistry
+import RespCache
+import UtilLogger
+
+# Config value types copied to child processes that are not forked
+configValueTypes = (basestring, bool, int, long, float, list, tuple, dict, \
+    type(None))
+
+# Function returns the deadline of a test element
+# Inputs:
+#   test (Element): test element in XML test list
+# Outputs:
+#   testTimeout (int): deadline in seconds, 0 if test has no deadline
+def GetTestTimeout(test):
+
+    testTimeout = test.attrib.get("timeout")
+    if testTimeout is None:
+        return Config.testIsolationDefaultTimeout
+
+    try:
+        timeoutSeconds = 0
+        for timeValue in testTimeout.split(':'):
+            timeoutSeconds = timeoutSeconds * 60 + int(timeValue)
+        return max(0, timeoutSeconds)
+    except ValueError:
+        UtilLogger.verboseLogger.error("TestIsolation: invalid timeout " + \
+            testTimeout + " for test " + test.attrib["name"] + \
+            ". Using default timeout.")
+        return Config.testIsolationDefaultTimeout
+
+# Function returns state a child process that is not forked
+# needs to continue where the parent is
+def GetChildState():
+
+    return { 'config' : dict([ (name, value) \
+        for name, value in vars(Config).iteritems() \
+        if not name.startswith('__') and isinstance(value, configValueTypes) ]), \
+        'logStartTime' : UtilLogger.logStartTime }
+
+# Function prepares a child process for running a test
+def InitChild(childState):
+
+    # Own process group, so that a timeout kills
+    # the processes started by the test as well
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+
+    # Started fresh: restore Config and continue parent's log files
+    if UtilLogger.verboseLogger is None:
+        for name, value in childState['config'].iteritems():
+            setattr(Config, name, value)
+        UtilLogger.InitLogging(childState['logStartTime'], True)
+        return
+
+    # Forked: parent's command statistics stay with the parent
+    CmdStats.TakeCmdStats()
+
+    # Forked: locks may have been held by other parent threads
+    for logger in [ UtilLogger.consoleLogger, UtilLogger.summaryLogger, \
+        UtilLogger.verboseLogger ]:
+        for handler in logger.handlers:
+            handler.createLock()
+
+    # Forked: open own native IPMI sessions and OpenIPMI device
+    if 'IpmiLanPlus' in sys.modules:
+        sys.modules['IpmiLanPlus'].ForgetAllSessions()
+    if 'IpmiPipeline' in sys.modules:
+        sys.modules['IpmiPipeline'].ForgetAllPipelines()
+    if 'IpmiDev' in sys.modules:
+        sys.modules['IpmiDev'].ForgetDevice()
+
+    return
+
+# Function closes native IPMI sessions and device opened by child process
+def CloseChild():
+
+    if 'IpmiLanPlus' in sys.modules:
+        sys.modules['IpmiLanPlus'].CloseAllSessions()
+    if 'IpmiPipeline' in sys.modules:
+        sys.modules['IpmiPipeline'].CloseAllPipelines()
+    if 'IpmiDev' in sys.modules:
+        sys.modules['IpmiDev'].CloseDevice()
+
+    return
+
+# Child process function: runs Setup, Execute and Cleanup of a test
+# once and sends whether Setup and Execute passed, and the IPMI command
+# statistics of the test, to the parent
+# Inputs:
+#   childState (dictionary): returned by GetChildState
+#   packageName (string): <bmcPlatform>TestScripts package
+#   testName (string): name of test module
+#   interfaceParams (list): IpmiUtil interface arguments
+#   skipCleanupOnFail (bool): do not run Cleanup if test failed
+#       (test list stops)
+#   resultConn (Connection): pipe to parent
+def RunChild(childState, packageName, testName, interfaceParams, \
+    skipCleanupOnFail, resultConn):
+
+    InitChild(childState)
+
+    # Test failed by default
+    testPassOrFail = False
+
+    try:
+
+        moduleRegistry = ModuleRegistry.ModuleRegistry(__import__(packageName))
+        module = moduleRegistry.GetModule(testName)
+
+        # Run Setup Function in TestScript module
+        UtilLogger.verboseLogger.info("Running Setup for test " \
+            + str(testName) + " (process " + str(os.getpid()) + ")")
+        testPassOrFail = module.Setup(interfaceParams)
+
+        # Run Execute Function in TestScript module
+        if testPassOrFail:
+            UtilLogger.verboseLogger.info("Running Execute for test " \
+                + str(testName))
+            testPassOrFail &= module.Execute(interfaceParams)
+
+        # Run Cleanup Function in TestScript module
+        if testPassOrFail or not skipCleanupOnFail:
+            UtilLogger.verboseLogger.info("Running Cleanup for test " \
+                + str(testName))
+            module.Cleanup(interfaceParams)
+
+    except Exception, e:
+        UtilLogger.verboseLogger.error("TestIsolation: test " + \
+            str(testName) + " failed with exception: " + str(e))
+        testPassOrFail = False
+
+    finally:
+        resultConn.send((bool(testPassOrFail), CmdStats.TakeCmdStats()))
+        resultConn.close()
+        CloseChild()
+
+    return
+
+# Function kills a child process and the processes it started
+def KillChild(process):
+
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError: # child has no process group yet
+            pass
+    if process.is_alive():
+        process.terminate()
+    process.join()
+
+    return
+
+# Function returns result sent by child process
+# Outputs:
+#   childResult (tuple): (testPassOrFail, cmdStatsDict),
+#       None if child exited without sending it
+def ReceiveChildResult(resultConn):
+
+    try:
+        return resultConn.recv()
+    except (EOFError, IOError):
+        return None
+
+# Function will run Setup, Execute and Cleanup of a test once
+# in a child process that is killed at the test's deadline
+# Inputs:
+#   packageName (string): <bmcPlatform>TestScripts package
+#   testName (string): name of test module
+#   interfaceParams (list): IpmiUtil interface arguments
+#   testTimeout (int): deadline in seconds (0: no deadline)
+#   skipCleanupOnFail (bool): do not run Cleanup if test failed
+# Outputs:
+#   testPassOrFail (bool): True if Setup and Execute passed
+#   testTimedOut (bool): True if child was killed at deadline
+def RunIsolatedTest(packageName, testName, interfaceParams, testTimeout, \
+    skipCleanupOnFail):
+
+    resultConn, childConn = multiprocessing.Pipe(False)
+    process = multiprocessing.Process(target=RunChild, \
+        args=(GetChildState(), packageName, testName, interfaceParams, \
+        skipCleanupOnFail, childConn), name='Isolated' + testName)
+
+    startTime = time.time()
+    testTimedOut = False
+    childResult = None
+    resultPending = True
+    try:
+        process.start()
+        childConn.close()
+
+        # Wait with timeout so that KeyboardInterrupt is not blocked;
+        # result is read as soon as it is sent, since a child with
+        # many command statistics blocks until the pipe is read
+        while process.is_alive():
+            if testTimeout > 0 and time.time() - startTime >= testTimeout:
+                testTimedOut = True
+                break
+            if not resultPending:
+                process.join(1)
+            elif resultConn.poll(1):
+                resultPending = False
+                childResult = ReceiveChildResult(resultConn)
+
+    finally:
+        # Child must not outlive the test
+        if process.is_alive():
+            KillChild(process)
+
+        # Test may have reset, power cycled or reconfigured the BMC
+        RespCache.FlushRespCache(reason = 'isolated test ' + testName)
+
+    if resultPending and resultConn.poll():
+        childResult = ReceiveChildResult(resultConn)
+    resultConn.close()
+
+    # Use result if child sent it (child that finished the test
+    # may be killed while closing its IPMI sessions)
+    testPassOrFail = False
+    if childResult is not None:
+        testPassOrFail, childCmdStatsDict = childResult
+        testTimedOut = False
+        CmdStats.MergeCmdStats(childCmdStatsDict)
+
+    if testTimedOut:
+        UtilLogger.verboseLogger.error("TestIsolation: test " + testName + \
+            " did not finish in " + str(testTimeout) + \
+            " seconds. Killed process " + str(process.pid))
+
+        if Config.testTimeoutDetectBmcHang:
+            import Helper
+            Helper.DetectAndRemoveBmcHang(interfaceParams)
+
+    elif process.exitcode != 0 and not testPassOrFail:
+        UtilLogger.verboseLogger.error("TestIsolation: process of test " + \
+            testName + " exited with code " + str(process.exitcode))
+
+    return testPassOrFail, testTimedOut
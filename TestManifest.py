@@ -0,0 +1,160 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Cached manifest of test scripts packages.
+
+GetManifest returns an entry for every module in a <bmcPlatform>TestScripts
+package: file name, modification time, whether it is a package, and the
+module-scope metadata it declares (Config.testManifestMetadataList, e.g.
+resourceTags). Metadata is read from the module source as Python literals, so
+test modules are not imported to build the manifest.
+
+The manifest is cached in Config.testManifestFilePath. On later runs only a
+directory listing is needed; modules whose file changed are re-read and the
+cache is rewritten. A metadata variable that is not a literal is left out of
+the entry, so callers fall back to the attribute of the imported module.
+"""
+
+import ast
+import json
+import os
+import threading
+
+import Config
+import UtilLogger
+
+# Lock for reading/writing manifest file
+testManifestLock = threading.Lock()
+
+# Function returns module-scope metadata declared in module source
+# Inputs:
+#   filePath (string): path of module source file
+# Outputs:
+#   metadataDict (dict): variable name: value
+#       (declared value None if not declared; not a literal: left out)
+def ReadMetadata(filePath):
+
+    metadataDict = dict([ (varName, None) \
+        for varName in Config.testManifestMetadataList ])
+
+    try:
+        with open(filePath, 'rb') as moduleFile:
+            moduleTree = ast.parse(moduleFile.read(), filePath)
+    except (IOError, SyntaxError, TypeError), e:
+        UtilLogger.verboseLogger.error("TestManifest.ReadMetadata: unable " + \
+            "to parse " + filePath + ": " + str(e))
+        return {}
+
+    for node in moduleTree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1 or \
+            not isinstance(node.targets[0], ast.Name) or \
+            node.targets[0].id not in metadataDict:
+            continue
+        # Values are stored as JSON (tuples become lists)
+        try:
+            metadataDict[node.targets[0].id] = \
+                json.loads(json.dumps(ast.literal_eval(node.value)))
+        except (ValueError, TypeError):
+            del metadataDict[node.targets[0].id]
+
+    return metadataDict
+
+# Function will load cached manifests
+# Outputs:
+#   manifestDict (dict): package directory: manifest
+def LoadManifests():
+
+    if not os.path.isfile(Config.testManifestFilePath):
+        return {}
+
+    try:
+        with open(Config.testManifestFilePath, 'r') as manifestFile:
+            return json.load(manifestFile)
+    except (IOError, ValueError), e:
+        UtilLogger.verboseLogger.error('TestManifest.LoadManifests: ' + \
+            'unable to read ' + Config.testManifestFilePath + ': ' + str(e))
+
+    return {}
+
+# Function will save cached manifests
+# (written to a temporary file first so that concurrent
+# '-inventory' processes never read a partial file)
+def SaveManifests(manifestDict):
+
+    tempFilePath = Config.testManifestFilePath + '.' + str(os.getpid())
+    try:
+        with open(tempFilePath, 'w') as manifestFile:
+            json.dump(manifestDict, manifestFile, sort_keys=True)
+        if os.name == Config.osNameWindows and \
+            os.path.isfile(Config.testManifestFilePath):
+            os.remove(Config.testManifestFilePath)
+        os.rename(tempFilePath, Config.testManifestFilePath)
+    except (IOError, OSError), e:
+        UtilLogger.verboseLogger.error('TestManifest.SaveManifests: ' + \
+            'unable to write ' + Config.testManifestFilePath + ': ' + str(e))
+
+    return
+
+# Function returns manifest of test scripts package
+# Inputs:
+#   package (module): <bmcPlatform>TestScripts package
+# Outputs:
+#   manifest (dict): module name: { 'file', 'mtime', 'isPkg',
+#       and declared metadata variables }
+def GetManifest(package):
+
+    packageDir = os.path.abspath(package.__path__[0])
+
+    with testManifestLock:
+        manifestDict = LoadManifests()
+        cachedManifest = manifestDict.get(packageDir, {})
+        manifest = {}
+
+        for fileName in sorted(os.listdir(packageDir)):
+            filePath = os.path.join(packageDir, fileName)
+            modName, fileExt = os.path.splitext(fileName)
+            if fileExt == '.py' and modName != '__init__':
+                isPkg = False
+            elif fileExt == '' and \
+                os.path.isfile(os.path.join(filePath, '__init__.py')):
+                isPkg = True
+                filePath = os.path.join(filePath, '__init__.py')
+            else:
+                continue
+
+            mtime = os.path.getmtime(filePath)
+            entry = cachedManifest.get(modName)
+            if entry is None or entry['mtime'] != mtime or \
+                entry['file'] != fileName:
+                entry = { 'file' : fileName, 'mtime' : mtime, 'isPkg' : isPkg }
+                entry.update(ReadMetadata(filePath))
+            manifest[modName] = entry
+
+        if manifest != cachedManifest:
+            manifestDict[packageDir] = manifest
+            SaveManifests(manifestDict)
+
+    return manifest
@@ -0,0 +1,303 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Resource-aware parallel execution of XML test list tests.
+
+A test module declares the BMC resources it changes or depends on with a
+module-scope list of tags, e.g.
+    resourceTags = [ 'sel' ]
+and a test element in the XML test list can override it with a comma-separated
+'resources' attribute:
+    <test name="VerifyAddSelEntry" resources="sel" delay="0" .../>
+Tags in use are 'power', 'sel', 'fw', 'bmc-reset' and 'sol'. An empty list
+(resourceTags = [] or resources="") marks a read-only test.
+
+RunTests runs one test list cycle on a pool of worker threads. A test is
+started once no running test shares a tag with it and no earlier test in the
+list that it conflicts with is still waiting, so conflicting tests keep their
+list order. Tests that declare no tags, and tests with a tag in
+Config.testSchedulerExclusiveTagList, are exclusive: they wait for all running
+tests to finish and no other test starts until they are done. All iterations
+of one test element run on the same worker. After a stopOnFail failure no new
+tests are started; running tests finish their current iteration loop.
+
+TestResults holds the pass/fail counts of a test list or test list cycle and
+is shared by all workers.
+"""
+
+import threading
+
+import Config
+import UtilLogger
+
+# Class holds pass/fail statistics for a test list or test list cycle
+class TestResults:
+
+    # Constructor
+    def __init__(self):
+
+        self.totalRun = 0
+        self.totalPassed = 0
+        self.totalFailed = 0
+
+        # Dictionary of tests that fail
+        # and number of iterations where they failed
+        self.statDict = { 'init' : 0 }
+
+        self.lock = threading.Lock()
+
+        return
+
+    # Function will add the result of one test iteration
+    # Inputs:
+    #   testName (string): name of test module
+    #   testPassOrFail (bool): True if iteration passed
+    def AddResult(self, testName, testPassOrFail):
+
+        with self.lock:
+            if testPassOrFail:
+                self.totalPassed += 1
+            else:
+                self.totalFailed += 1
+                self.statDict[testName] = self.statDict.get(testName, 0) + 1
+            self.totalRun = self.totalPassed + self.totalFailed
+
+        return
+
+    # Function returns statistics as dictionary for JSON output
+    def ToDict(self):
+
+        with self.lock:
+            return { 'totalPassed' : self.totalPassed, \
+                'totalFailed' : self.totalFailed, \
+                'statDict' : dict(self.statDict) }
+
+    # Function will restore statistics from dictionary returned by ToDict
+    def LoadDict(self, resultsDict):
+
+        with self.lock:
+            self.totalPassed = resultsDict['totalPassed']
+            self.totalFailed = resultsDict['totalFailed']
+            self.statDict = dict([ (str(testName), failedCount) \
+                for testName, failedCount in resultsDict['statDict'].iteritems() ])
+            self.totalRun = self.totalPassed + self.totalFailed
+
+        return
+
+# Class holds one test element of the XML test list
+# and the resources it uses
+class TestJob:
+
+    # Constructor
+    # Inputs:
+    #   test (Element): test element in XML test list
+    #   resourceTags (list): resource tags of test,
+    #       None if test did not declare any
+    def __init__(self, test, resourceTags):
+
+        self.test = test
+        self.testName = test.attrib["name"]
+        self.resourceTags = set(resourceTags or [])
+        self.exclusive = resourceTags is None or \
+            bool(self.resourceTags.intersection(\
+            Config.testSchedulerExclusiveTagList))
+
+        return
+
+    # Function returns True if this test and
+    # otherJob must not run at the same time
+    def ConflictsWith(self, otherJob):
+
+        return self.exclusive or otherJob.exclusive or \
+            self.testName == otherJob.testName or \
+            bool(self.resourceTags.intersection(otherJob.resourceTags))
+
+# Class hands out test jobs to worker threads
+class TestScheduler:
+
+    # Constructor
+    # Inputs:
+    #   jobList (list): TestJob objects in XML test list order
+    def __init__(self, jobList):
+
+        self.pendingJobs = list(jobList)
+        self.runningJobs = []
+        self.stopTest = False
+        self.condition = threading.Condition()
+
+        return
+
+    # Function returns True if no test is pending or running
+    # (caller holds condition)
+    def IsDone(self):
+
+        return not self.runningJobs and \
+            (self.stopTest or not self.pendingJobs)
+
+    # Function starts the first pending test that can run now
+    # (caller holds condition)
+    # Outputs:
+    #   TestJob to run, or None if no pending test can be started
+    def StartNextJob(self):
+
+        if self.stopTest:
+            return None
+
+        for jobIdx, job in enumerate(self.pendingJobs):
+            blockingJobs = self.runningJobs + self.pendingJobs[:jobIdx]
+            if not any(job.ConflictsWith(otherJob) \
+                for otherJob in blockingJobs):
+                del self.pendingJobs[jobIdx]
+                self.runningJobs.append(job)
+                return job
+
+        return None
+
+    # Function blocks until a pending test can be started
+    # Outputs:
+    #   TestJob to run, or None if there are no more tests to start
+    def GetNextJob(self):
+
+        with self.condition:
+            while True:
+                if self.stopTest or not self.pendingJobs:
+                    return None
+
+                job = self.StartNextJob()
+                if job is not None:
+                    return job
+
+                self.condition.wait()
+
+    # Function will return a started test to the front of the
+    # pending tests (its runner went away before finishing it)
+    def RequeueJob(self, job):
+
+        with self.condition:
+            self.runningJobs.remove(job)
+            self.pendingJobs.insert(0, job)
+            self.condition.notify_all()
+
+        return
+
+    # Function will release the resources of a finished test
+    # Inputs:
+    #   job (TestJob): finished test
+    #   stopTest (bool): True if test list execution should stop
+    def CompleteJob(self, job, stopTest):
+
+        with self.condition:
+            self.runningJobs.remove(job)
+            if stopTest:
+                self.stopTest = True
+            self.condition.notify_all()
+
+        return
+
+    # Worker thread function
+    # Inputs:
+    #   RunTest (function): runs all iterations of a test element,
+    #       returns True if test list execution should stop
+    def Worker(self, RunTest):
+
+        while True:
+            job = self.GetNextJob()
+            if job is None:
+                return
+
+            stopTest = False
+            try:
+                stopTest = RunTest(job.test)
+            except Exception, e:
+                UtilLogger.verboseLogger.error("TestScheduler: test " + \
+                    job.testName + " failed with exception: " + str(e))
+            finally:
+                self.CompleteJob(job, stopTest)
+
+# Function returns the resource tags of a test element
+# Inputs:
+#   test (Element): test element in XML test list
+#   GetModuleTags (function): returns resource tags declared
+#       by test module for test name
+# Outputs:
+#   list of tags, or None if test did not declare any
+def GetResourceTags(test, GetModuleTags):
+
+    testName = test.attrib["name"]
+
+    # XML attribute overrides module attribute
+    if "resources" in test.attrib:
+        return [ tag.strip() for tag in test.attrib["resources"].split(',') \
+            if tag.strip() ]
+
+    try:
+        resourceTags = GetModuleTags(testName)
+    except Exception, e:
+        UtilLogger.verboseLogger.error("TestScheduler: failed to get " + \
+            "resource tags of test " + testName + ". Exception: " + str(e))
+        return None
+
+    if resourceTags is None:
+        return None
+
+    return list(resourceTags)
+
+# Function will run all test elements of one XML test list cycle
+# on workerCount worker threads
+# Inputs:
+#   testList (list): test elements in XML test list
+#   workerCount (int): number of worker threads
+#   GetModuleTags (function): returns resource tags declared
+#       by test module for test name
+#   RunTest (function): runs all iterations of a test element,
+#       returns True if test list execution should stop
+# Outputs:
+#   stopTest (bool): True if a test stopped test list execution
+def RunTests(testList, workerCount, GetModuleTags, RunTest):
+
+    jobList = [ TestJob(test, GetResourceTags(test, GetModuleTags)) \
+        for test in testList ]
+
+    exclusiveCount = len([ job for job in jobList if job.exclusive ])
+    UtilLogger.verboseLogger.info("TestScheduler: running " + \
+        str(len(jobList)) + " tests (" + str(exclusiveCount) + \
+        " exclusive) on " + str(workerCount) + " workers")
+
+    scheduler = TestScheduler(jobList)
+    workerList = []
+    for workerIdx in range(max(1, min(workerCount, len(jobList)))):
+        worker = threading.Thread(target=scheduler.Worker, args=(RunTest,), \
+            name='TestWorker' + str(workerIdx))
+        worker.daemon = True
+        worker.start()
+        workerList.append(worker)
+
+    # Join with timeout so that KeyboardInterrupt is not blocked
+    for worker in workerList:
+        while worker.isAlive():
+            worker.join(1)
+
+    return scheduler.stopTest
@@ -0,0 +1,1024 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Distributed XML test list runs across controller hosts.
+
+A coordinator ('-coordinator <port>' with '-inventory', '-test b' and
+'-xmlfilepath') splits the test list into work units - one test element
+(all its iterations) of one test list cycle for one target - and hands them
+out to worker processes ('-worker <host>:<port>') started on any number of
+controller hosts. A worker runs one unit at a time against the target named
+in the unit and streams the result of every iteration back, so adding
+workers adds throughput. The coordinator merges all results into one
+summary.
+
+The units of a target are scheduled with TestScheduler: tests that share
+resource tags never run on a BMC at the same time, even on different
+workers, and conflicting tests keep their list order. The test list cycles
+of a target run one after another until both the 'iterations' and the
+'duration' of the test list are reached. After a stopOnFail failure no new
+units are started for that target.
+
+Security: the coordinator listens on Config.testShardListenAddress
+(loopback unless changed for workers on other hosts). Coordinator and
+worker prove to each other that they know the shared secret
+('-sharedsecret' or Config.testShardSharedSecret) with HMAC-SHA256 over
+random nonces; the secret itself is never sent. BMC credentials never leave
+the worker: units name the target and its address only, and the worker
+takes user name and password from its own '-inventory' file (by target
+name) or its '-user'/'-pwd'. A worker only gets units of targets it has
+credentials for.
+
+Leases: every time a unit is handed out it gets a new lease ID, and the
+worker's results and 'unitdone' carry it. A worker sends a heartbeat every
+Config.testShardHeartbeatInterval seconds and the coordinator acknowledges
+it. A worker whose connection drops or that is silent for
+Config.testShardWorkerTimeout seconds is dead: its lease is revoked and the
+unit goes back to the front of the pending units of the target to run again
+on another worker. Results of revoked leases are dropped, and iteration
+results are only counted when their unit is done, so every iteration is
+counted once. A worker that loses its connection, or whose heartbeats are
+not acknowledged for Config.testShardLeaseTimeout seconds (shorter than
+testShardWorkerTimeout), gives up the lease itself and stops the unit at
+the end of the current iteration, before the coordinator reassigns it.
+
+Workers run the test modules of the platform given on their own command
+line; the coordinator reads resource tags of its own platform.
+
+Protocol (one JSON object per line over TCP):
+    coordinator -> worker (on connect):
+        { "type": "challenge", "nonce": <hex> }
+    worker -> coordinator:
+        { "type": "hello", "worker": <name>, "nonce": <hex>,
+          "auth": <hex>, "targets": <target names, null for any> }
+        { "type": "request" }
+        { "type": "result", "lease": <id>, "test": <name>, "passed": <bool> }
+        { "type": "unitdone", "lease": <id>, "stopTest": <bool> }
+        { "type": "heartbeat", "lease": <id or null> }
+    coordinator -> worker:
+        { "type": "welcome", "auth": <hex> } (reply to hello)
+        { "type": "work", "unitId": <id>, "lease": <id>, "target": <target>,
+          "test": <test element attributes>, "stopOnAnyTestFail": <bool> }
+        { "type": "wait" }
+        { "type": "done" }
+        { "type": "heartbeat" } (reply to heartbeat)
+"""
+
+import binascii
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import Queue
+import socket
+import SocketServer
+import threading
+import time
+import xml.etree.cElementTree as ElementTree
+
+import Config
+import MultiTarget
+import TestScheduler
+import UtilLogger
+
+# Number of random bytes in handshake nonces
+handshakeNonceSize = 16
+
+# Class sends and receives protocol messages on a TCP connection
+class MessageConnection:
+
+    # Constructor
+    # Inputs:
+    #   sock (socket): connected socket
+    def __init__(self, sock):
+
+        self.sock = sock
+        self.readFile = sock.makefile('rb')
+        self.sendLock = threading.Lock()
+
+        return
+
+    # Function sends one message
+    # Inputs:
+    #   message (dictionary): message to send
+    def Send(self, message):
+
+        with self.sendLock:
+            self.sock.sendall(json.dumps(message) + '\n')
+
+        return
+
+    # Function receives one message
+    # Outputs:
+    #   message (dictionary): None if connection was closed
+    def Receive(self):
+
+        line = self.readFile.readline()
+        if not line:
+            return None
+
+        return json.loads(line)
+
+    # Function closes connection
+    def Close(self):
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        try:
+            self.readFile.close()
+            self.sock.close()
+        except socket.error:
+            pass
+
+        return
+
+# Function returns a new random handshake nonce (hex string)
+def NewNonce():
+
+    return binascii.hexlify(os.urandom(handshakeNonceSize))
+
+# Function returns proof of knowing the shared secret for a handshake
+# Inputs:
+#   sharedSecret (string): secret shared by coordinator and workers
+#   role (string): 'worker' or 'coordinator' (proofs are not interchangeable)
+#   valueList (list; string): nonces and names bound to the proof
+# Outputs:
+#   auth (string): hex HMAC-SHA256
+def GetHandshakeAuth(sharedSecret, role, valueList):
+
+    return hmac.new(str(sharedSecret), ':'.join([ role ] + \
+        [ str(value) for value in valueList ]), hashlib.sha256).hexdigest()
+
+# Function returns True if auth received in a handshake is the expected proof
+def IsHandshakeAuthValid(auth, expectedAuth):
+
+    if not isinstance(auth, basestring):
+        return False
+
+    return hmac.compare_digest(str(auth), expectedAuth)
+
+# Function returns target as protocol message dictionary
+# (same attribute names as inventory file; no credentials)
+def TargetToMessage(target):
+
+    return { 'name' : target.name, 'ip' : target.ipAddress, \
+        'platform' : target.platform, 'switch' : target.switchIpAddress, \
+        'ipmitransport' : target.ipmiTransport }
+
+# Function returns target of a unit with worker-local credentials
+# Inputs:
+#   targetMessage (dictionary): target in 'work' message
+#   localTargetDict (dictionary): target name -> TargetContext
+#       from the worker's inventory file
+#   defaultCredentials (tuple): (userName, password) for targets not in
+#       localTargetDict, None if the worker has none
+# Outputs:
+#   target (TargetContext): None if worker has no credentials for target
+def TargetFromMessage(targetMessage, localTargetDict, defaultCredentials):
+
+    targetDict = dict([ (key, None if value is None else str(value)) \
+        for key, value in targetMessage.iteritems() ])
+
+    localTarget = localTargetDict.get(targetDict['name'])
+    if localTarget is not None:
+        if localTarget.ipAddress != targetDict['ip']:
+            UtilLogger.summaryLogger.error("TestSharding: target " + \
+                localTarget.name + " is " + str(targetDict['ip']) + \
+                " in coordinator inventory and " + localTarget.ipAddress + \
+                " in worker inventory. Using " + localTarget.ipAddress)
+        return localTarget
+
+    if defaultCredentials is None:
+        return None
+
+    userName, password = defaultCredentials
+
+    return MultiTarget.TargetContext(targetDict['name'], targetDict['ip'], \
+        userName, password, targetDict['platform'], targetDict['switch'], \
+        targetDict['ipmitransport'])
+
+# Class holds one test element of one test list cycle
+# for one target, leased to one worker
+class WorkUnit:
+
+    # Constructor
+    # Inputs:
+    #   leaseId (int): unique number of this hand out of the unit
+    #   targetShard (TargetShard): target of unit
+    #   job (TestJob): test element of unit
+    #   workerName (string): worker running unit
+    def __init__(self, leaseId, targetShard, job, workerName):
+
+        self.leaseId = leaseId
+        self.targetShard = targetShard
+        self.job = job
+        self.cycleIdx = targetShard.cycleIdx
+        self.workerName = workerName
+
+        # Same for every hand out: <target>/<cycle>/<test element index>
+        self.unitId = targetShard.target.name + '/' + str(self.cycleIdx) + \
+            '/' + str(targetShard.jobIdxDict[job])
+
+        # Iteration results (testName, testPassOrFail) streamed by worker
+        self.resultList = []
+
+        return
+
+    # Function returns unit description for logging
+    def GetDescription(self):
+
+        return "unit " + self.unitId + " (" + self.job.testName + \
+            " on target " + self.targetShard.target.name + ", cycle " + \
+            str(self.cycleIdx) + ", lease " + str(self.leaseId) + ")"
+
+# Class holds the test list cycles and results of one target
+class TargetShard:
+
+    # Constructor
+    # Inputs:
+    #   target (TargetContext): target under test
+    #   testList (list): test elements in XML test list
+    #   GetModuleTags (function): returns resource tags declared
+    #       by test module for test name
+    def __init__(self, target, testList, GetModuleTags):
+
+        self.target = target
+        self.testList = testList
+        self.GetModuleTags = GetModuleTags
+        self.testResults = TestScheduler.TestResults()
+        self.cycleResults = None
+        self.cycleIdx = 0 # number of completed cycles
+        self.cycleStartTime = None
+        self.scheduler = None # scheduler of cycle in progress
+        self.jobIdxDict = {} # TestJob -> index of test element in list
+        self.stopTest = False
+
+        return
+
+    # Function returns True if another test list cycle should run
+    # Inputs:
+    #   testListCycles (int): test list iterations
+    #   totalSeconds (int): test list duration in seconds
+    #   elapsedTime (float): seconds since run started
+    def HasMoreCycles(self, testListCycles, totalSeconds, elapsedTime):
+
+        return not self.stopTest and \
+            (elapsedTime < totalSeconds or self.cycleIdx < testListCycles)
+
+    # Function starts the first pending test of the target that can run now
+    # (starts next test list cycle if none is in progress)
+    # Outputs:
+    #   TestJob to run, or None if no test can be started
+    def StartNextJob(self, testListCycles, totalSeconds, elapsedTime):
+
+        if self.scheduler is None:
+            if not self.HasMoreCycles(testListCycles, totalSeconds, elapsedTime):
+                return None
+            jobList = [ TestScheduler.TestJob(test, \
+                TestScheduler.GetResourceTags(test, self.GetModuleTags)) \
+                for test in self.testList ]
+            self.jobIdxDict = dict([ (job, jobIdx) \
+                for jobIdx, job in enumerate(jobList) ])
+            self.scheduler = TestScheduler.TestScheduler(jobList)
+            self.cycleResults = TestScheduler.TestResults()
+            self.cycleStartTime = time.time()
+            UtilLogger.summaryLogger.info("Starting Test List Cycle " + \
+                str(self.cycleIdx) + " on target " + self.target.name)
+
+        with self.scheduler.condition:
+            return self.scheduler.StartNextJob()
+
+    # Function will add the results of a finished unit
+    # and end the test list cycle once all its tests are done
+    # Inputs:
+    #   unit (WorkUnit): finished unit
+    #   stopTest (bool): True if test list execution should stop
+    def CompleteUnit(self, unit, stopTest):
+
+        for testName, testPassOrFail in unit.resultList:
+            self.testResults.AddResult(testName, testPassOrFail)
+            self.cycleResults.AddResult(testName, testPassOrFail)
+        self.scheduler.CompleteJob(unit.job, stopTest)
+
+        with self.scheduler.condition:
+            cycleDone = self.scheduler.IsDone()
+        if not cycleDone:
+            return
+
+        UtilLogger.summaryLogger.info("SUMMARY for Test Cycle " + \
+            str(self.cycleIdx) + " on target " + self.target.name + \
+            " - Total Passed: " + str(self.cycleResults.totalPassed) + \
+            " Total Failed: " + str(self.cycleResults.totalFailed) + \
+            " Total Run: " + str(self.cycleResults.totalRun) + \
+            " Test Duration: " + str(datetime.timedelta(\
+            seconds=time.time() - self.cycleStartTime)))
+        self.stopTest = self.scheduler.stopTest
+        self.scheduler = None
+        self.cycleIdx += 1
+
+        return
+
+# Class hands out work units to workers and merges their results
+class TestShardCoordinator:
+
+    # Constructor
+    # Inputs:
+    #   targetList (list; TargetContext): targets under test
+    #   testList (list): test elements in XML test list
+    #   testListCycles (int): test list iterations
+    #   totalSeconds (int): test list duration in seconds
+    #   stopOnAnyTestFail (bool): stop target on failure of any test
+    #   GetModuleTags (function): returns resource tags declared
+    #       by test module for test name
+    def __init__(self, targetList, testList, testListCycles, totalSeconds, \
+        stopOnAnyTestFail, GetModuleTags):
+
+        self.targetShards = [ TargetShard(target, testList, GetModuleTags) \
+            for target in targetList ]
+        self.testListCycles = testListCycles
+        self.totalSeconds = totalSeconds
+        self.stopOnAnyTestFail = stopOnAnyTestFail
+        self.testResults = TestScheduler.TestResults() # merged results
+        self.runningUnits = {} # leaseId -> WorkUnit
+        self.workerDict = {} # worker name -> number of units completed
+        self.connectedWorkers = {} # worker name -> target names (None: any)
+        self.nextLeaseId = 0
+        self.nextTargetIdx = 0
+        self.startTime = time.time()
+        self.condition = threading.Condition()
+
+        return
+
+    # Function returns seconds since run started
+    def GetElapsedTime(self):
+
+        return time.time() - self.startTime
+
+    # Function returns True if all test list cycles
+    # of all targets are done (caller holds condition)
+    def IsDone(self):
+
+        elapsedTime = self.GetElapsedTime()
+
+        return all([ targetShard.scheduler is None and \
+            not targetShard.HasMoreCycles(self.testListCycles, \
+            self.totalSeconds, elapsedTime) \
+            for targetShard in self.targetShards ])
+
+    # Function registers an authenticated worker
+    # Inputs:
+    #   workerName (string): name sent by worker
+    #   clientAddress (string): worker IP address
+    #   targetNameList (list; string): targets worker has credentials
+    #       for (None: any target)
+    # Outputs:
+    #   workerName (string): unique worker name
+    def AddWorker(self, workerName, clientAddress, targetNameList):
+
+        targetNames = None if targetNameList is None else \
+            set([ str(targetName) for targetName in targetNameList ])
+        with self.condition:
+            if workerName in self.connectedWorkers or \
+                workerName in self.workerDict:
+                workerName += '-' + str(len(self.workerDict))
+            self.connectedWorkers[workerName] = targetNames
+            self.workerDict.setdefault(workerName, 0)
+
+        UtilLogger.summaryLogger.info("Worker " + workerName + " (" + \
+            clientAddress + ") connected for " + ("all targets" \
+            if targetNames is None else "targets: " + \
+            ', '.join([ targetShard.target.name \
+            for targetShard in self.targetShards \
+            if targetShard.target.name in targetNames ])))
+
+        return workerName
+
+    # Function returns the units of a disconnected or silent worker
+    # to their targets so that they run again on another worker
+    def RemoveWorker(self, workerName):
+
+        with self.condition:
+            self.connectedWorkers.pop(workerName, None)
+            for unit in self.runningUnits.values():
+                if unit.workerName == workerName:
+                    del self.runningUnits[unit.leaseId]
+                    unit.targetShard.scheduler.RequeueJob(unit.job)
+                    UtilLogger.summaryLogger.error("Worker " + workerName + \
+                        " lost. Revoked lease of " + unit.GetDescription() + \
+                        "; unit runs again")
+            self.condition.notify_all()
+
+        UtilLogger.verboseLogger.info("TestSharding: worker " + workerName + \
+            " disconnected")
+
+        return
+
+    # Function starts the next unit for a worker
+    # (targets take turns so that all targets progress)
+    # Outputs:
+    #   isDone (bool): True if all units are done
+    #   unit (WorkUnit): unit to run, None if no unit can be started now
+    def StartUnit(self, workerName):
+
+        with self.condition:
+            if self.IsDone():
+                return True, None
+
+            elapsedTime = self.GetElapsedTime()
+            targetNames = self.connectedWorkers.get(workerName)
+            for offset in range(len(self.targetShards)):
+                targetIdx = (self.nextTargetIdx + offset) % len(self.targetShards)
+                targetShard = self.targetShards[targetIdx]
+                if targetNames is not None and \
+                    targetShard.target.name not in targetNames:
+                    continue
+                job = targetShard.StartNextJob(self.testListCycles, \
+                    self.totalSeconds, elapsedTime)
+                if job is not None:
+                    self.nextTargetIdx = (targetIdx + 1) % len(self.targetShards)
+                    unit = WorkUnit(self.nextLeaseId, targetShard, job, workerName)
+                    self.nextLeaseId += 1
+                    self.runningUnits[unit.leaseId] = unit
+                    UtilLogger.verboseLogger.info("TestSharding: started " + \
+                        unit.GetDescription() + " on worker " + workerName)
+                    return False, unit
+
+        return False, None
+
+    # Function returns the running unit of a lease held by a worker
+    # (caller holds condition)
+    # Outputs:
+    #   unit (WorkUnit): None if lease was revoked or is not the worker's
+    def GetLeasedUnit(self, workerName, leaseId):
+
+        unit = self.runningUnits.get(leaseId)
+        if unit is None or unit.workerName != workerName:
+            return None
+
+        return unit
+
+    # Function will keep an iteration result streamed by a worker
+    # (dropped if the worker's lease was revoked)
+    def AddUnitResult(self, workerName, leaseId, testName, testPassOrFail):
+
+        with self.condition:
+            unit = self.GetLeasedUnit(workerName, leaseId)
+            if unit is None:
+                UtilLogger.verboseLogger.error("TestSharding: dropped " + \
+                    testName + " result of revoked lease " + str(leaseId) + \
+                    " from worker " + workerName)
+                return
+            unit.resultList.append((testName, testPassOrFail))
+
+        UtilLogger.verboseLogger.info("TestSharding: " + testName + \
+            (" PASSED" if testPassOrFail else " FAILED") + " on target " + \
+            unit.targetShard.target.name + " (worker " + workerName + ")")
+
+        return
+
+    # Function will count the results of a unit finished by a worker
+    # (dropped if the worker's lease was revoked)
+    # Inputs:
+    #   stopTest (bool): True if test list execution
+    #       of unit's target should stop
+    def CompleteUnit(self, workerName, leaseId, stopTest):
+
+        with self.condition:
+            unit = self.GetLeasedUnit(workerName, leaseId)
+            if unit is None:
+                UtilLogger.summaryLogger.error("TestSharding: dropped " + \
+                    "late unitdone of revoked lease " + str(leaseId) + \
+                    " from worker " + workerName)
+                return
+            del self.runningUnits[leaseId]
+
+            for testName, testPassOrFail in unit.resultList:
+                self.testResults.AddResult(testName, testPassOrFail)
+                UtilLogger.summaryLogger.info(testName + \
+                    (" PASSED" if testPassOrFail else " FAILED") + \
+                    " on target " + unit.targetShard.target.name)
+            unit.targetShard.CompleteUnit(unit, stopTest)
+            self.workerDict[workerName] += 1
+            self.condition.notify_all()
+
+        return
+
+    # Function blocks until all units are done
+    def WaitDone(self):
+
+        # Wait with timeout so that KeyboardInterrupt is not blocked
+        # and duration based test lists end on time
+        with self.condition:
+            while not self.IsDone():
+                self.condition.wait(1)
+
+        return
+
+    # Function logs results per target and units per worker
+    def LogShardSummary(self):
+
+        UtilLogger.summaryLogger.info("")
+        UtilLogger.summaryLogger.info("")
+
+        for targetShard in self.targetShards:
+            testResults = targetShard.testResults
+            failedTests = ', '.join([ failedTest + ' (' + str(failedCount) + ')' \
+                for failedTest, failedCount in sorted(testResults.statDict.iteritems()) \
+                if failedTest != 'init' ])
+            UtilLogger.summaryLogger.info("TARGET " + targetShard.target.name + \
+                " (" + targetShard.target.ipAddress + ") - Total Passed: " + \
+                str(testResults.totalPassed) + \
+                " Total Failed: " + str(testResults.totalFailed) + \
+                " Total Run: " + str(testResults.totalRun) + \
+                " Test Cycles: " + str(targetShard.cycleIdx) + \
+                (" Failed Tests: " + failedTests if failedTests else ""))
+
+        for workerName, unitCount in sorted(self.workerDict.iteritems()):
+            UtilLogger.summaryLogger.info("WORKER " + workerName + \
+                " - Units Completed: " + str(unitCount))
+
+        return
+
+# Class handles the connection of one worker
+class CoordinatorHandler(SocketServer.BaseRequestHandler):
+
+    # Function authenticates the worker with the shared secret
+    # Outputs:
+    #   workerName (string): None if the worker failed to authenticate
+    def Handshake(self, connection):
+
+        coordinator = self.server.coordinator
+        sharedSecret = self.server.sharedSecret
+
+        nonce = NewNonce()
+        connection.Send({ 'type' : 'challenge', 'nonce' : nonce })
+        message = connection.Receive()
+        if message is None or message.get('type') != 'hello' or \
+            not isinstance(message.get('nonce'), basestring) or \
+            not IsHandshakeAuthValid(message.get('auth'), \
+            GetHandshakeAuth(sharedSecret, 'worker', \
+            [ nonce, message['nonce'], message.get('worker') ])):
+            UtilLogger.summaryLogger.error("TestSharding: rejected " + \
+                "connection from " + self.client_address[0] + \
+                ": shared secret authentication failed")
+            return None
+
+        connection.Send({ 'type' : 'welcome', 'auth' : GetHandshakeAuth(\
+            sharedSecret, 'coordinator', [ message['nonce'], nonce ]) })
+
+        return coordinator.AddWorker(str(message['worker']), \
+            self.client_address[0], message.get('targets'))
+
+    # Function serves worker messages until worker disconnects
+    def handle(self):
+
+        coordinator = self.server.coordinator
+        self.request.settimeout(Config.testShardWorkerTimeout)
+        connection = MessageConnection(self.request)
+        workerName = None
+
+        try:
+            workerName = self.Handshake(connection)
+            while workerName is not None:
+                message = connection.Receive()
+                if message is None:
+                    break
+
+                messageType = message.get('type')
+                if messageType == 'request':
+                    isDone, unit = coordinator.StartUnit(workerName)
+                    if isDone:
+                        connection.Send({ 'type' : 'done' })
+                    elif unit is None:
+                        connection.Send({ 'type' : 'wait' })
+                    else:
+                        connection.Send({ 'type' : 'work', \
+                            'unitId' : unit.unitId, \
+                            'lease' : unit.leaseId, \
+                            'target' : TargetToMessage(unit.targetShard.target), \
+                            'test' : dict(unit.job.test.attrib), \
+                            'stopOnAnyTestFail' : coordinator.stopOnAnyTestFail })
+
+                elif messageType == 'result':
+                    coordinator.AddUnitResult(workerName, message['lease'], \
+                        str(message['test']), bool(message['passed']))
+
+                elif messageType == 'unitdone':
+                    coordinator.CompleteUnit(workerName, message['lease'], \
+                        bool(message['stopTest']))
+
+                elif messageType == 'heartbeat':
+                    connection.Send({ 'type' : 'heartbeat' })
+
+        except (socket.error, ValueError, KeyError, AttributeError), e:
+            UtilLogger.verboseLogger.error("TestSharding: connection to " + \
+                "worker " + str(workerName) + " (" + self.client_address[0] + \
+                ") failed: " + str(e))
+
+        finally:
+            if workerName is not None:
+                coordinator.RemoveWorker(workerName)
+            connection.Close()
+
+        return
+
+# Class serves each worker connection on its own thread
+class CoordinatorServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+# Function hands out XML test list units for all targets
+# to workers connecting on port until all units are done
+# Inputs:
+#   port (int): TCP port workers connect to
+#   sharedSecret (string): secret workers must prove to know
+#   targetList (list; TargetContext): targets under test
+#       (credentials are not used)
+#   testList (list): test elements in XML test list
+#   testListCycles (int): test list iterations
+#   totalSeconds (int): test list duration in seconds
+#   stopOnAnyTestFail (bool): stop target on failure of any test
+#   GetModuleTags (function): returns resource tags declared
+#       by test module for test name
+# Outputs:
+#   testResults (TestResults): merged results, None if coordinator
+#       could not be started
+def RunCoordinator(port, sharedSecret, targetList, testList, testListCycles, \
+    totalSeconds, stopOnAnyTestFail, GetModuleTags):
+
+    coordinator = TestShardCoordinator(targetList, testList, testListCycles, \
+        totalSeconds, stopOnAnyTestFail, GetModuleTags)
+
+    try:
+        server = CoordinatorServer((Config.testShardListenAddress, port), \
+            CoordinatorHandler)
+    except socket.error, e:
+        UtilLogger.summaryLogger.error("TestSharding: unable to listen on " + \
+            "port " + str(port) + ": " + str(e))
+        return None
+    server.coordinator = coordinator
+    server.sharedSecret = sharedSecret
+
+    serverThread = threading.Thread(target=server.serve_forever, \
+        name='TestShardCoordinator')
+    serverThread.daemon = True
+    serverThread.start()
+
+    listenHost = Config.testShardListenAddress or socket.gethostname()
+    UtilLogger.summaryLogger.info("Coordinating " + str(len(testList)) + \
+        " tests on " + str(len(targetList)) + " targets. Start workers with " + \
+        "'-worker " + listenHost + ":" + str(port) + "'")
+
+    coordinator.WaitDone()
+
+    # Give waiting workers time to ask for work and be told to exit
+    time.sleep(Config.testShardWaitInterval + 1)
+    server.shutdown()
+    server.server_close()
+
+    coordinator.LogShardSummary()
+
+    return coordinator.testResults
+
+# Exception raised in a unit whose lease the worker no longer holds
+class LeaseLostError(Exception):
+    pass
+
+# Class holds the worker side of the connection to the coordinator:
+# replies to requests, heartbeats and the lease of the unit being run
+class WorkerSession:
+
+    # Constructor
+    # Inputs:
+    #   connection (MessageConnection): authenticated connection
+    def __init__(self, connection):
+
+        self.connection = connection
+        self.replyQueue = Queue.Queue()
+        self.leaseId = None # lease of unit being run
+        self.leaseLost = False
+        self.lastAckTime = time.time()
+        self.stopEvent = threading.Event()
+        self.lock = threading.Lock()
+
+        return
+
+    # Function starts the reader and heartbeat threads
+    def Start(self):
+
+        for threadTarget, threadName in [ (self.ReadMessages, 'TestShardReader'), \
+            (self.SendHeartbeats, 'TestShardHeartbeat') ]:
+            thread = threading.Thread(target=threadTarget, name=threadName)
+            thread.daemon = True
+            thread.start()
+
+        return
+
+    # Function stops the heartbeat thread and closes the connection
+    def Stop(self):
+
+        self.stopEvent.set()
+        self.connection.Close()
+
+        return
+
+    # Function receives coordinator messages: heartbeat acknowledgements
+    # renew the lease, other messages are replies to requests
+    def ReadMessages(self):
+
+        while True:
+            try:
+                message = self.connection.Receive()
+            except (socket.error, ValueError):
+                message = None
+
+            if message is None:
+                self.DropLease("connection to coordinator closed")
+                self.replyQueue.put(None)
+                return
+
+            if message.get('type') == 'heartbeat':
+                with self.lock:
+                    self.lastAckTime = time.time()
+            else:
+                self.replyQueue.put(message)
+
+    # Function sends heartbeats and gives up the lease when they
+    # are not acknowledged for Config.testShardLeaseTimeout seconds
+    def SendHeartbeats(self):
+
+        while not self.stopEvent.wait(Config.testShardHeartbeatInterval):
+            with self.lock:
+                leaseId = self.leaseId
+                silentTime = time.time() - self.lastAckTime
+            if silentTime > Config.testShardLeaseTimeout:
+                self.DropLease("no heartbeat acknowledgement for " + \
+                    str(int(silentTime)) + " seconds")
+                self.connection.Close()
+                return
+            try:
+                self.connection.Send({ 'type' : 'heartbeat', 'lease' : leaseId })
+            except socket.error:
+                return
+
+    # Function gives up the lease of the unit being run
+    def DropLease(self, reason):
+
+        with self.lock:
+            if self.leaseId is None or self.leaseLost:
+                return
+            self.leaseLost = True
+            leaseId = self.leaseId
+
+        UtilLogger.summaryLogger.error("TestSharding: gave up lease " + \
+            str(leaseId) + ": " + reason + ". Stopping unit after " + \
+            "current iteration")
+
+        return
+
+    # Function sets the lease of a unit about to be run
+    def StartLease(self, leaseId):
+
+        with self.lock:
+            self.leaseId = leaseId
+            self.leaseLost = False
+            self.lastAckTime = time.time()
+
+        return
+
+    # Function ends the lease of the unit that was run
+    # Outputs:
+    #   leaseValid (bool): False if the lease was given up during the unit
+    def EndLease(self):
+
+        with self.lock:
+            leaseValid = not self.leaseLost
+            self.leaseId = None
+            self.leaseLost = False
+
+        return leaseValid
+
+    # Function returns True if the worker still holds the lease
+    def IsLeaseValid(self):
+
+        with self.lock:
+            return self.leaseId is not None and not self.leaseLost
+
+    # Function sends a message
+    def Send(self, message):
+
+        self.connection.Send(message)
+
+        return
+
+    # Function returns the next reply from the coordinator
+    # Outputs:
+    #   message (dictionary): None if connection was closed or timed out
+    def Receive(self):
+
+        try:
+            return self.replyQueue.get(True, Config.testShardWorkerTimeout)
+        except Queue.Empty:
+            return None
+
+# Class streams iteration results of a work unit to the coordinator
+# (used by Program.RunXmlTest in place of TestCheckpoint)
+class UnitProgress:
+
+    # Constructor
+    # Inputs:
+    #   session (WorkerSession): connection to coordinator
+    #   leaseId (int): lease of unit being run
+    def __init__(self, session, leaseId):
+
+        self.session = session
+        self.leaseId = leaseId
+
+        return
+
+    # Function returns number of iterations already run (units start over)
+    def GetCompletedIterations(self, testIdx):
+
+        return 0
+
+    # Function will send the result of one test iteration
+    # (raises LeaseLostError to stop the unit if the lease was given up)
+    def AddResult(self, testIdx, testName, testPassOrFail):
+
+        if not self.session.IsLeaseValid():
+            raise LeaseLostError("lease " + str(self.leaseId) + " lost")
+
+        self.session.Send({ 'type' : 'result', 'lease' : self.leaseId, \
+            'test' : testName, 'passed' : testPassOrFail })
+
+        return
+
+# Function authenticates the worker to the coordinator and checks that
+# the coordinator knows the shared secret
+# Outputs:
+#   handshakePassOrFail (bool): True if both sides authenticated
+def WorkerHandshake(connection, sharedSecret, workerName, targetNameList):
+
+    message = connection.Receive()
+    if message is None or message.get('type') != 'challenge' or \
+        not isinstance(message.get('nonce'), basestring):
+        UtilLogger.summaryLogger.error("TestSharding: no handshake " + \
+            "challenge from coordinator")
+        return False
+
+    nonce = NewNonce()
+    connection.Send({ 'type' : 'hello', 'worker' : workerName, \
+        'nonce' : nonce, 'targets' : targetNameList, \
+        'auth' : GetHandshakeAuth(sharedSecret, 'worker', \
+        [ message['nonce'], nonce, workerName ]) })
+
+    reply = connection.Receive()
+    if reply is None or reply.get('type') != 'welcome' or \
+        not IsHandshakeAuthValid(reply.get('auth'), GetHandshakeAuth(\
+        sharedSecret, 'coordinator', [ nonce, message['nonce'] ])):
+        UtilLogger.summaryLogger.error("TestSharding: coordinator " + \
+            "rejected the worker or failed shared secret authentication")
+        return False
+
+    return True
+
+# Function runs work units handed out by coordinator
+# until coordinator has no more units
+# Inputs:
+#   coordinatorAddress (string): <host>:<port> of coordinator
+#   sharedSecret (string): secret shared with the coordinator
+#   localTargetList (list; TargetContext): targets with credentials
+#       from the worker's inventory file
+#   defaultCredentials (tuple): (userName, password) for any other target,
+#       None to only run targets in localTargetList
+#   RunUnit (function): runs all iterations of a test element against
+#       a target (target, test, stopOnAnyTestFail, unitProgress),
+#       returns True if test list execution should stop
+# Outputs:
+#   runPassOrFail (bool): True if worker ran until coordinator was done
+def RunWorker(coordinatorAddress, sharedSecret, localTargetList, \
+    defaultCredentials, RunUnit):
+
+    host, _, port = coordinatorAddress.rpartition(':')
+    workerName = socket.gethostname() + ':' + str(os.getpid())
+    localTargetDict = dict([ (target.name, target) \
+        for target in localTargetList ])
+    targetNameList = None if defaultCredentials is not None else \
+        sorted(localTargetDict.keys())
+
+    try:
+        sock = socket.create_connection((host, int(port)), \
+            Config.testShardConnectTimeout)
+    except (socket.error, ValueError), e:
+        UtilLogger.summaryLogger.error("TestSharding: unable to connect to " + \
+            "coordinator " + coordinatorAddress + ": " + str(e))
+        return False
+    sock.settimeout(Config.testShardWorkerTimeout)
+    connection = MessageConnection(sock)
+
+    try:
+        handshakePassOrFail = WorkerHandshake(connection, sharedSecret, \
+            workerName, targetNameList)
+    except (socket.error, ValueError), e:
+        UtilLogger.summaryLogger.error("TestSharding: handshake with " + \
+            "coordinator " + coordinatorAddress + " failed: " + str(e))
+        handshakePassOrFail = False
+    if not handshakePassOrFail:
+        connection.Close()
+        return False
+
+    # Reader thread waits for messages without timeout; heartbeats
+    # are acknowledged even while a unit runs
+    sock.settimeout(None)
+    session = WorkerSession(connection)
+    session.Start()
+
+    runPassOrFail = False
+    unitCount = 0
+    try:
+        while True:
+            session.Send({ 'type' : 'request' })
+            message = session.Receive()
+            if message is None:
+                UtilLogger.summaryLogger.error("TestSharding: lost " + \
+                    "connection to coordinator " + coordinatorAddress)
+                break
+            if message['type'] == 'done':
+                runPassOrFail = True
+                break
+
+            if message['type'] == 'wait':
+                time.sleep(Config.testShardWaitInterval)
+                continue
+
+            target = TargetFromMessage(message['target'], localTargetDict, \
+                defaultCredentials)
+            if target is None:
+                UtilLogger.summaryLogger.error("TestSharding: no credentials " + \
+                    "for target " + str(message['target']['name']) + \
+                    " of unit " + str(message['unitId']))
+                break
+            test = ElementTree.Element('test', dict([ (str(key), str(value)) \
+                for key, value in message['test'].iteritems() ]))
+            UtilLogger.summaryLogger.info("")
+            UtilLogger.summaryLogger.info("Running unit " + \
+                str(message['unitId']) + " (lease " + str(message['lease']) + \
+                "): " + test.attrib['name'] + " on target " + target.name + \
+                " (" + target.ipAddress + ")")
+            if target.platform != Config.bmcPlatform:
+                UtilLogger.summaryLogger.error("TestSharding: target " + \
+                    target.name + " is platform " + str(target.platform) + \
+                    ", worker runs " + Config.bmcPlatform + " test modules")
+
+            session.StartLease(message['lease'])
+            stopTest = RunUnit(target, test, \
+                bool(message['stopOnAnyTestFail']), \
+                UnitProgress(session, message['lease']))
+            if not session.EndLease():
+                UtilLogger.summaryLogger.error("TestSharding: abandoned " + \
+                    "unit " + str(message['unitId']) + "; the coordinator " + \
+                    "runs it on another worker")
+                break
+            session.Send({ 'type' : 'unitdone', \
+                'lease' : message['lease'], 'stopTest' : stopTest })
+            unitCount += 1
+
+    except (socket.error, ValueError, KeyError), e:
+        UtilLogger.summaryLogger.error("TestSharding: connection to " + \
+            "coordinator " + coordinatorAddress + " failed: " + str(e))
+
+    finally:
+        session.Stop()
+
+    UtilLogger.summaryLogger.info("")
+    UtilLogger.summaryLogger.info("Worker " + workerName + " completed " + \
+        str(unitCount) + " units")
+
+    return runPassOrFail
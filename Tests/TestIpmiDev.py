@@ -0,0 +1,291 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Tests for IpmiDev.IpmiDevice against a local stand-in for the OpenIPMI
+character device, and for importing IpmiUtil and IpmiDev without fcntl
+(Windows).
+
+The stand-in is a pipe: the device fd is the read end, so select() in
+IpmiDevice.SendRecv waits on a real fd, and one byte is written for each
+queued message. The fcntl module used by IpmiDev is replaced with
+FakeOpenIpmiDriver, which decodes IPMICTL_SEND_COMMAND requests from the
+ctypes structures and fills IPMICTL_RECEIVE_MSG_TRUNC like the driver.
+
+Run from the OneBMCTest root directory:
+    python -m unittest discover -s Tests -p "Test*.py"
+"""
+
+import ctypes
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Config
+import IpmiDev
+import UtilLogger
+
+# Async event receive type (IPMI_ASYNC_EVENT_RECV_TYPE)
+ipmiAsyncEventRecvType = 2
+
+# Class emulates the OpenIPMI driver ioctls on a pipe
+class FakeOpenIpmiDriver:
+
+    def __init__(self, readFd, writeFd):
+
+        self.readFd = readFd
+        self.writeFd = writeFd
+        self.requestList = [] # (addr tuple, msgId, netFn, cmd, bytearray)
+        self.lastAddrLen = None # (addrLen, sizeof addr structure)
+        self.recvQueue = [] # (recvType, msgId, bytearray)
+        self.Respond = None # function(request) -> list of recvQueue entries
+
+        return
+
+    # Function queues one message and makes the fd readable
+    def QueueRecv(self, recvType, msgId, respBytes):
+
+        self.recvQueue.append((recvType, msgId, bytearray(respBytes)))
+        os.write(self.writeFd, 'x')
+
+        return
+
+    def ioctl(self, fd, request, arg):
+
+        assert fd == self.readFd
+
+        if request == IpmiDev.ipmiCtlSendCommand:
+            addrType = ctypes.c_int.from_address(arg.addr).value
+            if addrType == IpmiDev.ipmiIpmbAddrType:
+                addr = IpmiDev.IpmiIpmbAddr.from_address(arg.addr)
+                addrTuple = (addr.addrType, addr.channel, addr.slaveAddr, addr.lun)
+            else:
+                addr = IpmiDev.IpmiSystemInterfaceAddr.from_address(arg.addr)
+                addrTuple = (addr.addrType, addr.channel, addr.lun)
+            self.lastAddrLen = (arg.addrLen, ctypes.sizeof(addr))
+            data = bytearray((ctypes.c_ubyte * arg.msg.dataLen).from_address(\
+                arg.msg.data)) if arg.msg.dataLen else bytearray()
+            request = (addrTuple, arg.msgId, arg.msg.netFn, arg.msg.cmd, data)
+            self.requestList.append(request)
+            if self.Respond is not None:
+                for recvType, msgId, respBytes in self.Respond(request):
+                    self.QueueRecv(recvType, msgId, respBytes)
+            return 0
+
+        if request == IpmiDev.ipmiCtlReceiveMsgTrunc:
+            os.read(self.readFd, 1)
+            recvType, msgId, respBytes = self.recvQueue.pop(0)
+            arg.recvType = recvType
+            arg.msgId = msgId
+            arg.msg.dataLen = min(len(respBytes), IpmiDev.ipmiMaxMsgLength)
+            ctypes.memmove(arg.msg.data, str(respBytes), arg.msg.dataLen)
+            return 0
+
+        raise IOError(22, 'Invalid argument')
+
+class IpmiDeviceTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.savedFcntl = IpmiDev.fcntl
+        self.savedTimeout = Config.ipmiDeviceResponseTimeout
+        self.savedVerboseLogger = UtilLogger.verboseLogger
+        UtilLogger.verboseLogger = logging.getLogger('IpmiDeviceTest')
+        UtilLogger.verboseLogger.addHandler(logging.NullHandler())
+        UtilLogger.verboseLogger.propagate = False
+
+        readFd, writeFd = os.pipe()
+        self.driver = FakeOpenIpmiDriver(readFd, writeFd)
+        IpmiDev.fcntl = self.driver
+        self.device = IpmiDev.IpmiDevice('/dev/ipmi-standin')
+        self.device.fd = readFd
+
+        return
+
+    def tearDown(self):
+
+        IpmiDev.fcntl = self.savedFcntl
+        IpmiDev.ForgetDevice()
+        Config.ipmiDeviceResponseTimeout = self.savedTimeout
+        UtilLogger.verboseLogger = self.savedVerboseLogger
+        os.close(self.driver.readFd)
+        os.close(self.driver.writeFd)
+
+        return
+
+    # Stand-in BMC: Get Device Id response echoing request bytes
+    def Echo(self, request):
+
+        addrTuple, msgId, netFn, cmd, data = request
+
+        return [ (IpmiDev.ipmiResponseRecvType, msgId, \
+            bytearray([ 0x00, cmd ]) + data) ]
+
+    def testIoctlNumbers(self):
+
+        if ctypes.sizeof(ctypes.c_void_p) != 8:
+            self.skipTest('values below are for 64-bit Linux')
+
+        # linux/ipmi.h on x86_64
+        self.assertEqual(IpmiDev.ipmiCtlSendCommand, 0x8028690d)
+        self.assertEqual(IpmiDev.ipmiCtlReceiveMsgTrunc, 0xc030690b)
+
+    def testRequestFraming(self):
+
+        self.driver.Respond = self.Echo
+
+        self.device.SendRecv(0x06, 0x01, bytearray())
+        self.device.SendRecv(0x0a, 0x43, bytearray([ 0x00, 0x00, 0xff, 0xff ]))
+
+        self.assertEqual(self.driver.requestList, [
+            ((IpmiDev.ipmiSystemInterfaceAddrType, IpmiDev.ipmiBmcChannel, 0), \
+                1, 0x06, 0x01, bytearray()),
+            ((IpmiDev.ipmiSystemInterfaceAddrType, IpmiDev.ipmiBmcChannel, 0), \
+                2, 0x0a, 0x43, bytearray([ 0x00, 0x00, 0xff, 0xff ])) ])
+        addrLen, addrSize = self.driver.lastAddrLen
+        self.assertEqual(addrLen, addrSize)
+
+    def testBridgedRequestFraming(self):
+
+        self.driver.Respond = self.Echo
+        IpmiDev.ipmiDevice = self.device
+
+        cmdPassOrFail, respData = IpmiDev.SendRawCmd2ME([], \
+            [ '06', '2c', 'b8', '40', '57', '01', '00' ])
+
+        addrTuple, msgId, netFn, cmd, data = self.driver.requestList[0]
+        self.assertEqual(addrTuple, (IpmiDev.ipmiIpmbAddrType, \
+            int(Config.ipmbChannel, 16), int(Config.meSlaveAddr, 16), \
+            int(Config.meLun, 16)))
+        self.assertEqual((netFn, cmd, data), \
+            (0x2e, 0x40, bytearray([ 0x57, 0x01, 0x00 ])))
+        self.assertEqual((cmdPassOrFail, respData), \
+            (True, [ '40', '57', '01', '00' ]))
+
+    def testResponseMatchedByMsgId(self):
+
+        # Stale response of an earlier (timed out) request and an
+        # asynchronous event arrive before the response
+        def Respond(request):
+            addrTuple, msgId, netFn, cmd, data = request
+            return [ (IpmiDev.ipmiResponseRecvType, msgId - 1, bytearray([ 0xc0 ])), \
+                (ipmiAsyncEventRecvType, msgId, bytearray([ 0x00, 0xee ])), \
+                (IpmiDev.ipmiResponseRecvType, msgId, bytearray([ 0x00, 0x20, 0x81 ])) ]
+        self.driver.Respond = Respond
+        self.device.msgId = 10
+
+        self.assertEqual(self.device.SendRecv(0x06, 0x01, bytearray()), \
+            (True, 0x00, bytearray([ 0x20, 0x81 ])))
+        self.assertEqual(self.driver.recvQueue, [])
+
+    def testCompletionCode(self):
+
+        self.driver.Respond = lambda request: \
+            [ (IpmiDev.ipmiResponseRecvType, request[1], bytearray([ 0xc1 ])) ]
+        IpmiDev.ipmiDevice = self.device
+
+        cmdPassOrFail, ccode, respBytes = \
+            IpmiDev.SendRawCmdBytes([], '06', '99', [])
+
+        self.assertEqual((cmdPassOrFail, ccode, respBytes), \
+            (True, 0xc1, bytearray()))
+
+    def testTimeout(self):
+
+        Config.ipmiDeviceResponseTimeout = 0.2
+
+        startTime = time.time()
+        resp = self.device.SendRecv(0x06, 0x01, bytearray())
+        elapsed = time.time() - startTime
+
+        self.assertEqual(resp, (False, None, bytearray()))
+        self.assertTrue(0.15 <= elapsed < 2, elapsed)
+
+    def testTimeoutIgnoresStaleResponse(self):
+
+        # Only a response for another message ID arrives
+        self.driver.Respond = lambda request: \
+            [ (IpmiDev.ipmiResponseRecvType, request[1] + 1, bytearray([ 0x00 ])) ]
+        Config.ipmiDeviceResponseTimeout = 0.2
+
+        self.assertEqual(self.device.SendRecv(0x06, 0x01, bytearray()), \
+            (False, None, bytearray()))
+
+    def testLateResponseOfTimedOutRequestSkipped(self):
+
+        Config.ipmiDeviceResponseTimeout = 0.1
+        self.device.SendRecv(0x06, 0x01, bytearray())
+
+        # Response to request 1 arrives while request 2 is waiting
+        self.driver.QueueRecv(IpmiDev.ipmiResponseRecvType, 1, bytearray([ 0x00, 0x01 ]))
+        self.driver.Respond = self.Echo
+        Config.ipmiDeviceResponseTimeout = 1
+
+        self.assertEqual(self.device.SendRecv(0x06, 0x04, bytearray()), \
+            (True, 0x00, bytearray([ 0x04 ])))
+
+# Windows has no fcntl: IpmiUtil must import without it
+# and the OpenIPMI device must fail to open
+class ImportWithoutFcntlTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.savedModules = dict(sys.modules)
+        self.savedVerboseLogger = UtilLogger.verboseLogger
+        UtilLogger.verboseLogger = logging.getLogger('ImportWithoutFcntlTest')
+        UtilLogger.verboseLogger.addHandler(logging.NullHandler())
+        UtilLogger.verboseLogger.propagate = False
+
+        for moduleName in [ 'IpmiUtil', 'IpmiDev' ]:
+            sys.modules.pop(moduleName, None)
+        sys.modules['fcntl'] = None # import fcntl raises ImportError
+
+        return
+
+    def tearDown(self):
+
+        sys.modules.clear()
+        sys.modules.update(self.savedModules)
+        UtilLogger.verboseLogger = self.savedVerboseLogger
+
+        return
+
+    def testImportIpmiUtil(self):
+
+        import IpmiUtil
+        self.assertFalse('IpmiDev' in sys.modules)
+
+    def testOpenDevice(self):
+
+        import IpmiDev as IpmiDevNoFcntl
+        self.assertTrue(IpmiDevNoFcntl.fcntl is None)
+        self.assertFalse(IpmiDevNoFcntl.IpmiDevice('/dev/ipmi-standin').Open())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Tests for SelReader.DecodeSelRecords using output captured from
+'ipmiutil events -f' (ipmiutil-3.0.1-wcs/Linux/ipmiutil, TZ=UTC) for the
+records in selRecordList.
+
+Run from the OneBMCTest root directory:
+    python -m unittest discover -s Tests -p "Test*.py"
+"""
+
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import IpmiUtil
+import SelMatcher
+import SelReader
+import UtilLogger
+
+# Raw SEL records ('IpmiUtil sel -r' format)
+selRecordList = [ bytearray.fromhex(recordHex) for recordHex in [
+    '01 00 02 4f 1d 5c 58 20 00 04 10 8a 6f 02 ff ff',
+    '02 00 02 50 1d 5c 58 2c 00 04 28 ef 70 a2 01 00',
+    '03 00 02 51 1d 5c 58 2c 00 04 28 ef 70 a8 01 00',
+    '04 00 02 52 1d 5c 58 20 00 04 08 84 6f 00 ff ff',
+    '05 00 c1 53 1d 5c 58 57 01 00 01 02 03 04 05 06' ] ]
+
+# Captured 'ipmiutil events -f <file>' output for selRecordList
+eventsOutput = \
+    'ipmiutil ver 2.99_WCS\n' + \
+    'ievents version 2.98\n' + \
+    'RecId Date/Time_______ SEV Src_ Evt_Type___ Sens# Evt_detail - Trig [Evt_data]\n' + \
+    '0001 12/22/16 18:37:03 INF BMC  Event Log #8a Log Cleared 6f [02 ff ff]\n' + \
+    '0002 12/22/16 18:37:04 INF ME   Management Subsystem Health #ef Other FW HAL error 70 [a2 01 00]\n' + \
+    '0003 12/22/16 18:37:05 INF ME   Management Subsystem Health #ef Other FW HAL error 70 [a8 01 00]\n' + \
+    '0004 12/22/16 18:37:06 INF BMC  Power Supply #84 Inserted 6f [00 ff ff]\n' + \
+    '0005 12/22/16 18:37:07 INF c1 000157 OEM Event 01 02 03 04 05 06 \n' + \
+    'ipmiutil events, completed successfully\n'
+
+# Captured 'ipmiutil events -f' output when the record file is missing
+# (reported on stdout with an empty stderr)
+eventsCannotOpenOutput = \
+    'ipmiutil ver 2.99_WCS\n' + \
+    'ievents version 2.98\n' + \
+    'Cannot open file /nonexist\n' + \
+    'ipmiutil events, cannot open file\n'
+
+selListXml = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', \
+    'C2010TestScripts', 'XmlFiles', 'bmccoldresetsellist.xml')
+
+class DecodeSelRecordsTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.savedRunIpmiUtil = IpmiUtil.RunIpmiUtil
+        self.savedVerboseLogger = UtilLogger.verboseLogger
+        UtilLogger.verboseLogger = logging.getLogger('DecodeSelRecordsTest')
+        UtilLogger.verboseLogger.addHandler(logging.NullHandler())
+        UtilLogger.verboseLogger.propagate = False
+        self.recordFileList = []
+        self.out = eventsOutput
+
+        return
+
+    def tearDown(self):
+
+        IpmiUtil.RunIpmiUtil = self.savedRunIpmiUtil
+        UtilLogger.verboseLogger = self.savedVerboseLogger
+
+        return
+
+    # Stand-in for IpmiUtil.RunIpmiUtil; keeps the record file content
+    def RunIpmiUtil(self, processCmd):
+
+        self.assertEqual(processCmd[:2], [ 'events', '-f' ])
+        with open(processCmd[2]) as recordFile:
+            self.recordFileList.append(recordFile.read())
+
+        return self.out, ''
+
+    def Decode(self, recordList):
+
+        IpmiUtil.RunIpmiUtil = self.RunIpmiUtil
+
+        return SelReader.DecodeSelRecords(recordList)
+
+    def testRecordFileFormat(self):
+
+        self.Decode(selRecordList)
+
+        self.assertEqual(self.recordFileList[0].splitlines()[1], \
+            '02 00 02 50 1d 5c 58 2c 00 04 28 ef 70 a2 01 00')
+        self.assertEqual(len(self.recordFileList[0].splitlines()), \
+            len(selRecordList))
+
+    def testDecodeCapturedOutput(self):
+
+        decodePassOrFail, selLineList = self.Decode(selRecordList)
+
+        self.assertTrue(decodePassOrFail)
+        self.assertEqual([ selLine[:4] for selLine in selLineList ], \
+            [ '0001', '0002', '0003', '0004', '0005' ])
+
+        # Same lines as VerifySelAgainstXmlList takes from 'sel -u' output
+        # (lines between the RecId header and the last line)
+        rawSelList = eventsOutput.splitlines()
+        headerIndex = [ rawSelIdx for rawSelIdx, rawSel in enumerate(rawSelList) \
+            if rawSel.startswith('RecId Date/Time') ][0]
+        self.assertEqual(selLineList, rawSelList[headerIndex + 1 : -1])
+
+    def testDecodedLinesMatchSelList(self):
+
+        decodePassOrFail, selLineList = self.Decode(selRecordList)
+        missingSels, unexpectedSels = \
+            SelMatcher.GetSelListMatcher(selListXml).Verify(selLineList)
+
+        self.assertEqual(missingSels, [])
+        self.assertEqual(len(unexpectedSels), 1)
+        self.assertTrue('OEM Event' in unexpectedSels[0])
+
+    def testNoRecords(self):
+
+        self.assertEqual(self.Decode([]), (True, []))
+        self.assertEqual(self.recordFileList, [])
+
+    def testCannotOpenFileFails(self):
+
+        self.out = eventsCannotOpenOutput
+
+        decodePassOrFail, selLineList = self.Decode(selRecordList)
+
+        self.assertFalse(decodePassOrFail)
+        self.assertEqual(selLineList, [])
+
+    def testMissingLinesFail(self):
+
+        self.out = '\n'.join([ outLine for outLine in eventsOutput.splitlines() \
+            if not outLine.startswith('0003') ]) + '\n'
+
+        decodePassOrFail, selLineList = self.Decode(selRecordList)
+
+        self.assertFalse(decodePassOrFail)
+        self.assertEqual(len(selLineList), len(selRecordList) - 1)
+
+if __name__ == '__main__':
+    unittest.main()
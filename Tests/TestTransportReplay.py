@@ -0,0 +1,175 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Tests for keyed TransportReplay of IpmiUtil calls whose input file is a
+new temp file on every call: a batch recorded through
+IpmiUtil.SendRawCmdBatchWcsFile and SEL records decoded by
+SelReader.DecodeSelRecords are replayed without running IpmiUtil.
+
+Run from the OneBMCTest root directory:
+    python -m unittest discover -s Tests -p "Test*.py"
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import CmdStats
+import Config
+import IpmiUtil
+import SelReader
+import TransportReplay
+import UtilLogger
+
+interfaceParams = [ '-N', '192.0.2.10', '-U', 'admin', '-P', 'secret' ]
+
+# Batch of Get Device Id and Get Self Test Results
+cmdList = [ ('06', '01', []), ('06', '04', []) ]
+
+# 'ipmiutil wcs file' output for cmdList
+wcsFileOutput = \
+    'ipmiutil ver 2.99_WCS\n' + \
+    'Processing entry 1: 20 18 01\n' + \
+    '00 20 01 03 02 02 bf 57 01 00 27 04 00 00 00 00\n' + \
+    'Processing entry 2: 20 18 04\n' + \
+    '00 55 00\n' + \
+    'ipmiutil wcs, completed successfully\n'
+
+# 'ipmiutil events -f' output for selRecordList
+selRecordList = [ bytearray.fromhex('01 00 02 4f 1d 5c 58 20 00 04 10 8a 6f 02 ff ff') ]
+eventsOutput = \
+    'ipmiutil ver 2.99_WCS\n' + \
+    'RecId Date/Time_______ SEV Src_ Evt_Type___ Sens# Evt_detail - Trig [Evt_data]\n' + \
+    '0001 12/22/16 18:37:03 INF BMC  Event Log #8a Log Cleared 6f [02 ff ff]\n' + \
+    'ipmiutil events, completed successfully\n'
+
+# Stand-in for subprocess.Popen running IpmiUtil
+class FakeProcess:
+
+    outputDict = { 'wcs' : wcsFileOutput, 'events' : eventsOutput }
+
+    def __init__(self, processCmd, stdout=None, stderr=None):
+
+        self.processCmd = processCmd
+
+        return
+
+    def communicate(self):
+
+        return self.outputDict[self.processCmd[1]], ''
+
+# Stand-in for subprocess.Popen that must not be called in replay mode
+def NoProcess(processCmd, stdout=None, stderr=None):
+
+    raise AssertionError('IpmiUtil run in replay mode: ' + ' '.join(processCmd))
+
+class KeyedReplayTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.savedPopen = IpmiUtil.Popen
+        self.savedLoggers = (UtilLogger.verboseLogger, UtilLogger.summaryLogger)
+        UtilLogger.verboseLogger = logging.getLogger('KeyedReplayTest')
+        UtilLogger.verboseLogger.addHandler(logging.NullHandler())
+        UtilLogger.verboseLogger.propagate = False
+        UtilLogger.summaryLogger = UtilLogger.verboseLogger
+
+        fileHandle, self.recordFilePath = tempfile.mkstemp(suffix = '.jsonl', \
+            prefix = 'KeyedReplayTest')
+        os.close(fileHandle)
+
+        return
+
+    def tearDown(self):
+
+        TransportReplay.StopRecording()
+        TransportReplay.replayEnabled = False
+        IpmiUtil.Popen = self.savedPopen
+        UtilLogger.verboseLogger, UtilLogger.summaryLogger = self.savedLoggers
+        CmdStats.TakeCmdStats()
+        os.remove(self.recordFilePath)
+
+        return
+
+    # Function runs Call once recording IpmiUtil, then again replaying
+    # the record file by arguments, and returns both results
+    def RecordAndReplay(self, Call):
+
+        IpmiUtil.Popen = FakeProcess
+        TransportReplay.StartRecording(self.recordFilePath)
+        recordedResult = Call()
+        TransportReplay.StopRecording()
+
+        IpmiUtil.Popen = NoProcess
+        self.assertTrue(TransportReplay.StartReplay(self.recordFilePath, \
+            Config.transportReplayModeKeyed))
+        replayedResult = Call()
+
+        return recordedResult, replayedResult
+
+    def testBatchRoundTrip(self):
+
+        recordedResult, replayedResult = self.RecordAndReplay(lambda: \
+            IpmiUtil.SendRawCmdBatchWcsFile(interfaceParams, cmdList))
+
+        self.assertTrue(recordedResult[0])
+        self.assertTrue(replayedResult[0])
+        self.assertEqual([ (resp.completionCode, resp.data) \
+            for resp in replayedResult[1] ], [ (resp.completionCode, resp.data) \
+            for resp in recordedResult[1] ])
+
+    def testSelDecodeRoundTrip(self):
+
+        recordedResult, replayedResult = self.RecordAndReplay(lambda: \
+            SelReader.DecodeSelRecords(selRecordList))
+
+        self.assertTrue(replayedResult[0])
+        self.assertEqual(replayedResult, recordedResult)
+
+    def testRecordedArgs(self):
+
+        self.RecordAndReplay(lambda: \
+            IpmiUtil.SendRawCmdBatchWcsFile(interfaceParams, cmdList))
+
+        recordedArgs = TransportReplay.replayRecordDict.keys()[0]
+        self.assertTrue(recordedArgs[2].startswith('tempfile:'))
+        self.assertEqual(recordedArgs[-1], '*')
+
+    def testDifferentBatchNotMatched(self):
+
+        self.RecordAndReplay(lambda: \
+            IpmiUtil.SendRawCmdBatchWcsFile(interfaceParams, cmdList))
+
+        out, err = TransportReplay.Replay(IpmiUtil.IpmiUtilCmds['wcsfile'] + \
+            [ self.recordFilePath ] + interfaceParams)
+        self.assertTrue(err.startswith('TransportReplay: no recorded response'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+﻿# OneBMCTest
+#
+# Copyright (c) Microsoft Corporation
+#
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of
+# this software and associated documentation files (the ""Software""),
+# to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice
+# shall be included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED *AS IS*, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Record and replay of IpmiUtil traffic.
+
+In record mode every RunIpmiUtil call is appended to the record file as one
+JSON line: timestamp ('t'), IpmiUtil arguments ('a'; password replaced by
+'*'), stdout ('o'), stderr ('e') and latency in seconds ('l'). Output is
+stored as Latin-1 so any byte sequence is recorded unchanged. Input files
+written to the temp directory for a single call (e.g. 'wcs file' batches of
+IpmiUtil.SendRawCmdBatch, 'events -f' records of SelReader.DecodeSelRecords)
+get a new name every time, so they are recorded and matched as
+'tempfile:<SHA-1 of file contents>' instead of their path.
+
+In replay mode RunIpmiUtil does not start IpmiUtil. Recorded output is
+served instead, either in recorded order (Config.transportReplayModeOrdered)
+or by matching the arguments of the call (Config.transportReplayModeKeyed;
+repeated calls with the same arguments get the recorded responses in order,
+the last one is reused when they run out). Recorded latency can optionally
+be emulated.
+
+Native transports (IpmiLanPlus, IpmiPipeline, IpmiDev) do not go through
+RunIpmiUtil and are neither recorded nor replayed.
+"""
+
+from collections import deque
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import Config
+import UtilLogger
+
+# Record file and lock for appending records
+recordFile = None
+recordLock = threading.Lock()
+
+# Replay state
+replayEnabled = False
+replayMode = Config.transportReplayModeOrdered
+replayEmulateLatency = False
+replayRecordQueue = deque() # ordered mode: records in recorded order
+replayRecordDict = {} # keyed mode: argument tuple: deque of records
+replayLock = threading.Lock()
+
+# Function returns IpmiUtil arguments with password replaced by '*'
+def MaskArgs(args):
+
+    maskedArgs = list(args)
+    for argIdx in range(len(maskedArgs) - 1):
+        if maskedArgs[argIdx] == Config.ipmiUtilPasswordSwitch:
+            maskedArgs[argIdx + 1] = '*'
+
+    return maskedArgs
+
+# Function returns IpmiUtil arguments as recorded and matched: password
+# replaced by '*' and temp input files replaced by a hash of their contents
+def GetArgsKey(args):
+
+    argsKey = MaskArgs(args)
+    tempDirPath = os.path.join(tempfile.gettempdir(), '')
+    for argIdx, arg in enumerate(argsKey):
+        if arg.startswith(tempDirPath) and os.path.isfile(arg):
+            try:
+                with open(arg, 'rb') as tempFile:
+                    argsKey[argIdx] = 'tempfile:' + \
+                        hashlib.sha1(tempFile.read()).hexdigest()
+            except IOError:
+                pass
+
+    return argsKey
+
+# Function will open record file for appending
+# Outputs:
+#   startPassOrFail (bool): record file opened
+def StartRecording(recordFilePath):
+
+    global recordFile
+
+    try:
+        recordFile = open(recordFilePath, 'a')
+    except IOError, e:
+        UtilLogger.verboseLogger.error('TransportReplay.StartRecording: ' + \
+            'unable to open ' + recordFilePath + ': ' + str(e))
+        return False
+
+    UtilLogger.summaryLogger.info('Recording IpmiUtil traffic to ' + \
+        recordFilePath)
+
+    return True
+
+# Function will close record file
+def StopRecording():
+
+    global recordFile
+
+    with recordLock:
+        if recordFile is not None:
+            recordFile.close()
+            recordFile = None
+
+    return
+
+# Function returns True if RunIpmiUtil calls are recorded
+def IsRecording():
+
+    return recordFile is not None
+
+# Function will append one RunIpmiUtil call to record file
+# Inputs:
+#   args (list; string): IpmiUtil arguments (without IpmiUtil file path)
+#   out, err (string): IpmiUtil stdout and stderr
+#   latency (float): IpmiUtil run time in seconds
+def Record(args, out, err, latency):
+
+    recordLine = json.dumps({ 't' : round(time.time(), 3), \
+        'a' : GetArgsKey(args), 'o' : out.decode('latin-1'), \
+        'e' : err.decode('latin-1'), \
+        'l' : round(latency, 4) }, separators=(',', ':'))
+
+    with recordLock:
+        if recordFile is not None:
+            recordFile.write(recordLine + '\n')
+            recordFile.flush()
+
+    return
+
+# Function will load record file for replay
+# Inputs:
+#   replayFilePath (string): file written in record mode
+#   mode (string): Config.transportReplayModeOrdered or
+#       Config.transportReplayModeKeyed
+#   emulateLatency (bool): sleep for recorded latency on every call
+# Outputs:
+#   startPassOrFail (bool): record file loaded
+def StartReplay(replayFilePath, mode = Config.transportReplayModeOrdered, \
+    emulateLatency = False):
+
+    global replayEnabled, replayMode, replayEmulateLatency
+
+    recordCount = 0
+    try:
+        with open(replayFilePath, 'r') as replayFile:
+            with replayLock:
+                replayRecordQueue.clear()
+                replayRecordDict.clear()
+                for recordLine in replayFile:
+                    if not recordLine.strip():
+                        continue
+                    record = json.loads(recordLine)
+                    replayRecordQueue.append(record)
+                    replayRecordDict.setdefault(tuple(record['a']), \
+                        deque()).append(record)
+                    recordCount += 1
+    except (IOError, ValueError, KeyError), e:
+        UtilLogger.verboseLogger.error('TransportReplay.StartReplay: ' + \
+            'unable to load ' + replayFilePath + ': ' + str(e))
+        return False
+
+    replayEnabled = True
+    replayMode = mode
+    replayEmulateLatency = emulateLatency
+    UtilLogger.summaryLogger.info('Replaying ' + str(recordCount) + \
+        ' recorded IpmiUtil calls from ' + replayFilePath + \
+        ' (mode: ' + mode + ', latency emulation: ' + \
+        str(emulateLatency) + ')')
+
+    return True
+
+# Function returns True if RunIpmiUtil calls are served from record file
+def IsReplaying():
+
+    return replayEnabled
+
+# Function will return recorded output for RunIpmiUtil call
+# Inputs:
+#   args (list; string): IpmiUtil arguments (without IpmiUtil file path)
+# Outputs:
+#   out, err (string): recorded IpmiUtil stdout and stderr
+#       (err set if no record is available)
+def Replay(args):
+
+    argsKey = GetArgsKey(args)
+
+    with replayLock:
+        record = None
+        if replayMode == Config.transportReplayModeKeyed:
+            recordQueue = replayRecordDict.get(tuple(argsKey))
+            if recordQueue:
+                record = recordQueue.popleft() if len(recordQueue) > 1 \
+                    else recordQueue[0]
+        elif replayRecordQueue:
+            record = replayRecordQueue.popleft()
+
+    if record is None:
+        err = 'TransportReplay: no recorded response for: ' + \
+            ' '.join(argsKey)
+        UtilLogger.verboseLogger.error(err)
+        return '', err
+
+    if replayMode == Config.transportReplayModeOrdered and record['a'] != argsKey and \
+        Config.debugEn:
+        UtilLogger.verboseLogger.info('TransportReplay: recorded arguments ' + \
+            ' '.join(record['a']) + ' differ from ' + ' '.join(argsKey))
+
+    if replayEmulateLatency:
+        time.sleep(record.get('l', 0))
+
+    return record['o'].encode('latin-1'), record['e'].encode('latin-1')
@@ -37,8 +37,12 @@ verboseCompleteFileName = None
 # Time stamp to be included in output file names.
 fileTimeStamp = None
 
+# Start time that log file names are derived from.
+logStartTime = None
+
 # Configure logger
-def InitLogging(startTime):
+# (appendEn: continue log files of an earlier run with the same startTime)
+def InitLogging(startTime, appendEn=False):
     
     # Declare module-scope variables
     global consoleLogger
@@ -46,8 +50,10 @@ def InitLogging(startTime):
     global verboseLogger
     global verboseCompleteFileName
     global fileTimeStamp
+    global logStartTime
 
     # Format startTime
+    logStartTime = startTime
     fileTimeStamp = datetime.datetime.fromtimestamp(startTime).strftime('_%Y-%m-%d_%H-%M-%S')
 
     # Initialize summaryLogger
@@ -66,12 +72,13 @@ def InitLogging(startTime):
     summaryHandler = logging.FileHandler(\
         Config.summaryLogPath + Config.summaryLogFileName + \
         fileTimeStamp + Config.summaryLogFileExtension, \
-        mode='w')
+        mode='a' if appendEn else 'w')
 
     # Define verbose handler (logs to <verboseFileName>_<fileTimeStamp>.log)
     verboseCompleteFileName = Config.verboseLogPath + Config.verboseLogFileName \
                               + fileTimeStamp + Config.verboseLogFileExtension
-    verboseHandler = logging.FileHandler(verboseCompleteFileName, mode='w')
+    verboseHandler = logging.FileHandler(verboseCompleteFileName, \
+        mode='a' if appendEn else 'w')
 
     # Define console handler (output to console)
     consoleHandler = logging.StreamHandler()